@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import auth
+from .metrics import REGISTRY
+
+# =========================================================
+# Admission control
+# =========================================================
+# AdmissionMiddleware runs in front of routing, before a request takes a
+# threadpool slot or a database connection. Every request is classed:
+#
+#   export   /reports/*, /forensics/bundle*, /jobs/{id}/result
+#   read     GET/HEAD, plus POST /geo/drones/within (a query)
+#   write    everything else
+#
+# and keyed on the token's company_id and subject, the same claims
+# get_current_user returns (the middleware verifies the token once and
+# get_current_user reuses the claims). Requests without a valid token are
+# keyed on the client address alone and left for the route to reject: each
+# address gets the subject bucket and its own in-flight share, never a
+# tenant bucket, so anonymous callers cannot drain each other's budget.
+#
+# Each class has its own budget:
+#   - a token bucket per subject and one per company; both must have a
+#     token, so a single user cannot spend the whole tenant budget and a
+#     tenant cannot exceed its aggregate rate however many users it has
+#   - a cap on requests in flight for the class, and a per-company share
+#     of that cap (tenant_share), so one tenant's backlog cannot occupy
+#     every slot while others queue behind it
+#
+# Over budget -> 429 with Retry-After: the time until the bucket refills
+# one token, or 1 s when shedding on in-flight depth. /metrics, the docs
+# and CORS preflights are never limited.
+#
+# Budgets (per process; with N workers each worker enforces its own):
+#                subject rps/burst   company rps/burst   in flight
+#   read         20 / 60             100 / 300           32
+#   write        10 / 30              50 / 150           16
+#   export        0.5 / 3              2 / 6               4
+#
+# VIGIL_ADMISSION=0 disables the layer; VIGIL_ADMISSION_BUDGETS overrides
+# fields per class as JSON, e.g. {"read": {"subject_rate": 50}}.
+# =========================================================
+
+ADMISSION_ENABLED = os.environ.get("VIGIL_ADMISSION", "1") != "0"
+REQUEST_CLASSES = ("read", "write", "export")
+EXEMPT_PATHS = {"/metrics", "/openapi.json", "/docs", "/docs/oauth2-redirect", "/redoc"}
+READ_POSTS = {"/geo/drones/within"}
+BUCKET_IDLE_SECONDS = 600.0
+PRUNE_EVERY = 4096
+
+ADMISSION_REJECTED = REGISTRY.counter(
+    "admission_rejected_total", "Requests refused by admission control", ("request_class", "reason")
+)
+ADMISSION_INFLIGHT = REGISTRY.gauge("admission_inflight", "Admitted requests in flight", ("request_class",))
+
+
+@dataclass(frozen=True)
+class Budget:
+    subject_rate: float   # tokens/s per token subject
+    subject_burst: float
+    tenant_rate: float    # tokens/s per company
+    tenant_burst: float
+    max_inflight: int     # admitted requests of this class in flight, all tenants
+    tenant_share: float = 0.5  # fraction of max_inflight one company may hold
+
+    @property
+    def tenant_inflight(self) -> int:
+        return max(1, int(self.max_inflight * self.tenant_share))
+
+
+DEFAULT_BUDGETS: Dict[str, Budget] = {
+    "read": Budget(20, 60, 100, 300, 32),
+    "write": Budget(10, 30, 50, 150, 16),
+    "export": Budget(0.5, 3, 2, 6, 4),
+}
+
+
+def budgets_from_env(raw: Optional[str] = None) -> Dict[str, Budget]:
+    raw = os.environ.get("VIGIL_ADMISSION_BUDGETS", "") if raw is None else raw
+    if not raw.strip():
+        return dict(DEFAULT_BUDGETS)
+    overrides = json.loads(raw)
+    known = {f.name for f in fields(Budget)}
+    out = dict(DEFAULT_BUDGETS)
+    for cls, values in overrides.items():
+        if cls not in out:
+            raise ValueError(f"unknown request class in VIGIL_ADMISSION_BUDGETS: {cls}")
+        unknown = set(values) - known
+        if unknown:
+            raise ValueError(f"unknown budget fields for {cls}: {', '.join(sorted(unknown))}")
+        out[cls] = replace(out[cls], **values)
+    return out
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    p = path[4:] if path.startswith("/api/") else path
+    if p in EXEMPT_PATHS or method == "OPTIONS":
+        return None
+    if p.startswith(("/reports/", "/forensics/bundle")) or (p.startswith("/jobs/") and p.endswith("/result")):
+        return "export"
+    if method in ("GET", "HEAD") or p in READ_POSTS:
+        return "read"
+    return "write"
+
+
+class TokenBuckets:
+    """Token buckets keyed by arbitrary tuples; event-loop confined, so unlocked."""
+
+    def __init__(self) -> None:
+        self._buckets: Dict[Tuple[Any, ...], List[float]] = {}  # key -> [tokens, last refill]
+        self._ops = 0
+
+    def _level(self, key: Tuple[Any, ...], rate: float, burst: float, now: float) -> List[float]:
+        b = self._buckets.get(key)
+        if b is None:
+            b = self._buckets[key] = [burst, now]
+        else:
+            b[0] = min(burst, b[0] + (now - b[1]) * rate)
+            b[1] = now
+        return b
+
+    def take(self, specs: List[Tuple[Tuple[Any, ...], float, float]], now: float) -> float:
+        """Take one token from every bucket, or none; returns 0 or seconds to wait."""
+        self._ops += 1
+        if self._ops % PRUNE_EVERY == 0:
+            self.prune(now)
+        levels = [(self._level(key, rate, burst, now), rate) for key, rate, burst in specs]
+        wait = max(((1.0 - b[0]) / rate if b[0] < 1.0 else 0.0) for b, rate in levels)
+        if wait > 0:
+            return wait
+        for b, _ in levels:
+            b[0] -= 1.0
+        return 0.0
+
+    def prune(self, now: float) -> None:
+        idle = [k for k, (_, last) in self._buckets.items() if now - last > BUCKET_IDLE_SECONDS]
+        for k in idle:
+            del self._buckets[k]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def _identity(scope: Dict[str, Any]) -> Tuple[Optional[str], str]:
+    """(company_id, subject) from a verified bearer token, else (None, client address)."""
+    for key, value in scope.get("headers") or ():
+        if key == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                payload = auth.verified_claims(token)
+                if payload is None:
+                    break
+                scope.setdefault("state", {})["auth_claims"] = (token, payload)
+                return payload.get("company_id") or "default", f"user:{payload.get('sub')}"
+            break
+    client = scope.get("client") or ("unknown", 0)
+    return None, f"addr:{client[0]}"
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying per-class token buckets and in-flight caps."""
+
+    def __init__(self, app: Any, budgets: Optional[Dict[str, Budget]] = None, enabled: bool = ADMISSION_ENABLED):
+        self.app = app
+        self.enabled = enabled
+        self.budgets = budgets or budgets_from_env()
+        self.buckets = TokenBuckets()
+        self.inflight: Dict[str, int] = {c: 0 for c in REQUEST_CLASSES}
+        self.tenant_inflight: Dict[Tuple[str, ...], int] = {}
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        cls = classify(scope.get("method", ""), scope.get("path", "")) if scope["type"] == "http" else None
+        if not self.enabled or cls is None:
+            await self.app(scope, receive, send)
+            return
+        company_id, subject = _identity(scope)
+        budget = self.budgets[cls]
+        if company_id is None:
+            tenant_key: Tuple[str, ...] = (cls, "", subject)
+            specs = [(("a", cls, subject), budget.subject_rate, budget.subject_burst)]
+        else:
+            tenant_key = (cls, company_id)
+            specs = [
+                (("s", cls, company_id, subject), budget.subject_rate, budget.subject_burst),
+                (("t", cls, company_id), budget.tenant_rate, budget.tenant_burst),
+            ]
+
+        if self.inflight[cls] >= budget.max_inflight:
+            await self._reject(send, cls, "queue", 1.0)
+            return
+        if self.tenant_inflight.get(tenant_key, 0) >= budget.tenant_inflight:
+            await self._reject(send, cls, "tenant_queue", 1.0)
+            return
+        wait = self.buckets.take(specs, time.monotonic())
+        if wait > 0:
+            await self._reject(send, cls, "rate", wait)
+            return
+
+        self.inflight[cls] += 1
+        self.tenant_inflight[tenant_key] = self.tenant_inflight.get(tenant_key, 0) + 1
+        ADMISSION_INFLIGHT.labels(cls).set(self.inflight[cls])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.inflight[cls] -= 1
+            left = self.tenant_inflight[tenant_key] - 1
+            if left:
+                self.tenant_inflight[tenant_key] = left
+            else:
+                del self.tenant_inflight[tenant_key]
+            ADMISSION_INFLIGHT.labels(cls).set(self.inflight[cls])
+
+    async def _reject(self, send: Any, cls: str, reason: str, wait: float) -> None:
+        ADMISSION_REJECTED.labels(cls, reason).inc()
+        retry_after = max(1, math.ceil(wait))
+        body = json.dumps({
+            "detail": "Too many requests" if reason == "rate" else "Server busy",
+            "request_class": cls,
+            "reason": reason,
+            "retry_after": retry_after,
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Security
+from fastapi import APIRouter, Depends, HTTPException, Request, Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel
 import jwt
 
+from .metrics import AUTH_DECODE_SECONDS
+
 # =========================================================
 # CONFIG (DEV MODE)
 # =========================================================
@@ -64,11 +67,13 @@ def _now() -> datetime:
 
 
 def _make_token(username: str, role: str, company_id: str) -> Dict[str, Any]:
-    exp = _now() + timedelta(hours=TOKEN_TTL_HOURS)
+    iat = _now()
+    exp = iat + timedelta(hours=TOKEN_TTL_HOURS)
     payload = {
         "sub": username,
         "role": role,
         "company_id": company_id,
+        "iat": iat,
         "exp": exp,
     }
     token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG)
@@ -76,12 +81,23 @@ def _make_token(username: str, role: str, company_id: str) -> Dict[str, Any]:
 
 
 def _decode_token(token: str) -> Dict[str, Any]:
+    t0 = time.perf_counter()
     try:
         return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    finally:
+        AUTH_DECODE_SECONDS.observe(time.perf_counter() - t0)
+
+
+def verified_claims(token: str) -> Optional[Dict[str, Any]]:
+    """Claims of a valid token, None otherwise (admission keys requests on these)."""
+    try:
+        return _decode_token(token)
+    except HTTPException:
+        return None
 
 
 # =========================================================
@@ -114,15 +130,24 @@ def login(req: LoginRequest):
 # =========================================================
 
 def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
 ) -> Dict[str, Any]:
     token = credentials.credentials
-    payload = _decode_token(token)
+    # AdmissionMiddleware has usually verified this token already
+    cached = getattr(request.state, "auth_claims", None)
+    payload = cached[1] if cached and cached[0] == token else _decode_token(token)
+
+    # Older tokens carry no iat; derive it from exp for session-age checks
+    issued_at = payload.get("iat")
+    if issued_at is None and payload.get("exp") is not None:
+        issued_at = payload["exp"] - TOKEN_TTL_HOURS * 3600
 
     return {
         "username": payload.get("sub"),
         "role": payload.get("role"),
         "company_id": payload.get("company_id"),
+        "issued_at": issued_at,
     }
 
 
@@ -0,0 +1,458 @@
+"""
+In-process HTTP benchmark for every API endpoint.
+
+Seeds (or reuses) a benchmark database with backend.bench.seed, boots the
+FastAPI app against it through TestClient and drives each route in main.py /
+threats.py / telemetry.py / jobs.py / geo.py with realistic requests. Per endpoint it records
+throughput and p50/p95/p99 latency; the result is written as JSON so runs
+can be diffed across commits.
+
+    python -m backend.bench.api_bench --db /tmp/vigil-bench.db --scale medium --out bench-$(git rev-parse --short HEAD).json
+    python -m backend.bench.api_bench --requests 200 --compare bench-abc123.json
+
+Mutating endpoints (mitigate/close/respond/review) consume pools of rows
+created before timing starts, so every timed request does real work.
+Routes the suite does not drive are listed under "uncovered" in the output.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import count
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .seed import Volumes, add_volume_args, drone_ids, seed, volumes_from_args
+
+SKIPPED_ROUTES = {"/openapi.json", "/docs", "/docs/oauth2-redirect", "/redoc"}
+
+
+@dataclass
+class Scenario:
+    name: str
+    endpoint: str  # "<module>.<function>" of the route handler
+    call: Callable[[int], Any]
+    ok: tuple = (200,)
+    pool: Optional[int] = None  # requests available when the scenario consumes rows
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _git_meta() -> Dict[str, Any]:
+    root = Path(__file__).resolve().parents[2]
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"], cwd=root, capture_output=True, text=True
+            ).stdout.strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+class Bench:
+    def __init__(self, client: Any, volumes: Volumes, requests: int):
+        from .. import auth
+
+        self.c = client
+        self.v = volumes
+        self.n = requests
+        self.admin = {"Authorization": "Bearer " + auth._make_token("admin", "Admin", "default")["token"]}
+        self.operator = {"Authorization": "Bearer " + auth._make_token("operator1", "Operator", "default")["token"]}
+        self.drones = drone_ids(0, volumes)
+        self.seq = count()
+
+    # ---- pools (untimed) -------------------------------------------------
+
+    def _fresh_incidents(self, prefix: str, n: int) -> List[Dict[str, Any]]:
+        ids = [f"{prefix}-{i:06d}" for i in range(n)]
+        r = self.c.post(
+            "/api/threats/run_batch",
+            json={"drone_ids": ids, "threat_types": ["gps_spoof"], "wait": True},
+            headers=self.admin,
+        )
+        r.raise_for_status()
+        active = self.c.get("/api/incidents/active", headers=self.admin).json()["incidents"]
+        return [i for i in active if i["drone_id"].startswith(prefix + "-")]
+
+    def _pending_evidence(self, n: int) -> List[int]:
+        out = []
+        for i in range(n):
+            r = self.c.post(
+                "/api/evidence",
+                json={
+                    "framework_id": "faa_107",
+                    "control_id": "107.12",
+                    "evidence_type": "manual",
+                    "drone_id": self.drones[i % len(self.drones)],
+                    "attestation": "bench",
+                },
+                headers=self.admin,
+            )
+            out.append(r.json()["evidence"]["id"])
+        return out
+
+    def _geofences(self, n: int, rule: str, kind: str, geometry: Dict[str, Any]) -> List[str]:
+        out = []
+        for i in range(n):
+            r = self.c.post(
+                "/api/geo/geofences",
+                json={"name": f"bench-{rule}-{i}", "kind": kind, "rule": rule, "geometry": geometry},
+                headers=self.admin,
+            )
+            r.raise_for_status()
+            out.append(r.json()["geofence"]["geofence_id"])
+        return out
+
+    def _finished_job(self, incident_id: str, timeout: float = 30.0) -> str:
+        r = self.c.post("/api/forensics/bundle/jobs", json={"incident_id": incident_id}, headers=self.admin)
+        r.raise_for_status()
+        job_id = r.json()["job"]["job_id"]
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.c.get(f"/api/jobs/{job_id}", headers=self.admin).json()["job"]["status"] == "done":
+                return job_id
+            time.sleep(0.05)
+        raise RuntimeError(f"bundle job {job_id} did not finish")
+
+    # ---- scenarios -------------------------------------------------------
+
+    def scenarios(self, pool_size: int) -> List[Scenario]:
+        c, A, O = self.c, self.admin, self.operator
+        drones = self.drones
+        some_incident = self.c.get("/api/incidents/active", headers=A).json()["incidents"]
+        incident_ids = [i["incident_id"] for i in some_incident] or ["INC-000000000000"]
+        mitigate_pool = [i["incident_id"] for i in self._fresh_incidents("BM", pool_size)]
+        close_pool = [i["incident_id"] for i in self._fresh_incidents("BC", pool_size)]
+        respond_pool = [i["drone_id"] for i in self._fresh_incidents("BR", pool_size)]
+        review_pool = self._pending_evidence(pool_size)
+        batch_id = c.post(
+            "/api/threats/run_batch",
+            json={"drone_ids": drones[:10], "threat_types": ["firmware_tamper"], "wait": True},
+            headers=A,
+        ).json()["batch"]["batch_id"]
+        job_id = self._finished_job(incident_ids[0])
+        fence_pool = self._geofences(pool_size, "keep_out", "circle", {"lat": 51.2, "lon": -0.4, "radius_m": 500})
+        # Encloses the whole position grid below, so it never breaches but every query scans it all
+        fence_id = self._geofences(1, "keep_in", "bbox", {
+            "min_lat": 51.29, "min_lon": -0.31, "max_lat": 51.71, "max_lon": 0.11})[0]
+        seq = self.seq
+
+        def d(i: int) -> str:
+            return drones[i % len(drones)]
+
+        def pos(i: int) -> Dict[str, float]:
+            # A 100 x 100 grid over ~45 km of London, clear of the keep_out bench geofences
+            k = i % len(drones)
+            return {"lat": 51.3 + (k % 100) * 0.004, "lon": -0.3 + (k // 100 % 100) * 0.004}
+
+        for start in range(0, len(drones), 500):
+            c.post(
+                "/api/telemetry",
+                json={"samples": [{"drone_id": d(k), **pos(k)} for k in range(start, min(start + 500, len(drones)))]},
+                headers=A,
+            ).raise_for_status()
+
+        def inc(i: int) -> str:
+            return incident_ids[i % len(incident_ids)]
+
+        def telemetry_samples(i: int) -> Dict[str, Any]:
+            return {
+                "samples": [
+                    {"drone_id": d(i * 10 + k), "battery": 80, "link_quality": 70, "gps_health": 90, **pos(i * 10 + k)}
+                    for k in range(10)
+                ]
+            }
+
+        return [
+            Scenario("auth.login", "auth.login",
+                     lambda i: c.post("/auth/login", json={"username": "admin", "password": "admin"})),
+            Scenario("zerotrust.get", "main.get_zerotrust", lambda i: c.get("/security/zerotrust", headers=A)),
+            Scenario("zerotrust.set", "main.set_zerotrust",
+                     lambda i: c.post("/security/zerotrust", json={"enabled": False, "timeout": 900 + i % 2}, headers=A)),
+            Scenario("security.events", "main.security_events",
+                     lambda i: c.get("/security/events", headers=A)),
+            Scenario("forensics.list", "main.get_forensics", lambda i: c.get("/api/forensics", headers=A)),
+            Scenario("forensics.by_drone", "main.get_forensics",
+                     lambda i: c.get("/api/forensics", params={"drone_id": d(i)}, headers=A)),
+            Scenario("forensics.by_incident", "main.get_forensics",
+                     lambda i: c.get("/api/forensics", params={"incident_id": inc(i)}, headers=A)),
+            Scenario("evidence.list", "main.get_evidence", lambda i: c.get("/api/evidence", headers=A)),
+            Scenario("evidence.by_drone", "main.get_evidence",
+                     lambda i: c.get("/api/evidence", params={"drone_id": d(i)}, headers=A)),
+            Scenario("evidence.by_date", "main.get_evidence",
+                     lambda i: c.get("/api/evidence",
+                                     params={"date_from": "2026-02-01", "date_to": "2026-02-07"}, headers=A)),
+            Scenario("evidence.summary", "main.get_evidence_summary",
+                     lambda i: c.get("/api/evidence/summary", params={"framework_id": "faa_107"}, headers=A)),
+            Scenario("evidence.summary_drone", "main.get_evidence_summary",
+                     lambda i: c.get("/api/evidence/summary",
+                                     params={"framework_id": "faa_107", "drone_id": d(i)}, headers=A)),
+            Scenario("evidence.create", "main.create_evidence",
+                     lambda i: c.post("/api/evidence", json={
+                         "framework_id": "faa_107", "control_id": "107.29", "evidence_type": "manual",
+                         "drone_id": d(i), "attestation": "bench"}, headers=A)),
+            Scenario("evidence.review", "main.review_evidence",
+                     lambda i: c.post(f"/api/evidence/{review_pool[i]}/review",
+                                      json={"decision": "accepted"}, headers=A), pool=len(review_pool)),
+            Scenario("forensics.bundle", "main.export_forensics_bundle",
+                     lambda i: c.get("/api/forensics/bundle", params={"incident_id": inc(i)}, headers=A)),
+            Scenario("forensics.bundle_job", "main.submit_forensics_bundle_job",
+                     lambda i: c.post("/api/forensics/bundle/jobs", json={"incident_id": inc(i)}, headers=A),
+                     ok=(202,)),
+            Scenario("jobs.list", "jobs.list_jobs", lambda i: c.get("/api/jobs", headers=A)),
+            Scenario("jobs.get", "jobs.get_job", lambda i: c.get(f"/api/jobs/{job_id}", headers=A)),
+            Scenario("jobs.result", "jobs.download_job_result",
+                     lambda i: c.get(f"/api/jobs/{job_id}/result", headers=A)),
+            Scenario("reports.incidents_csv", "reports.incident_report",
+                     lambda i: c.get(f"/api/reports/incidents?format=csv&drone_id={d(i)}", headers=A)),
+            Scenario("reports.forensics_ndjson", "reports.forensics_report",
+                     lambda i: c.get(f"/api/reports/forensics?format=ndjson&drone_id={d(i)}", headers=A)),
+            Scenario("reports.evidence_day", "reports.evidence_report",
+                     lambda i: c.get("/api/reports/evidence?date_from=2026-01-10&date_to=2026-01-10", headers=A)),
+            Scenario("reports.compliance", "reports.compliance_report",
+                     lambda i: c.get("/api/reports/compliance?framework_id=faa_107&framework_id=easa", headers=A)),
+            Scenario("incident.respond", "main.respond_to_incident",
+                     lambda i: c.post("/api/incident/respond", json={
+                         "drone_id": respond_pool[i], "response_id": "rtl", "response_name": "RTL"}, headers=A),
+                     pool=len(respond_pool)),
+            Scenario("threats.templates", "threats.get_templates",
+                     lambda i: c.get("/api/threats/templates", headers=A)),
+            Scenario("threats.run", "threats.run_threat",
+                     lambda i: c.post("/api/threats/run", json={
+                         "drone_id": f"BT-{next(seq):07d}", "threat_type": "gps_spoof"}, headers=A)),
+            Scenario("threats.run_folded", "threats.run_threat",
+                     lambda i: c.post("/api/threats/run", json={
+                         "drone_id": "BF-000000", "threat_type": "rf_link_hijack"}, headers=A)),
+            Scenario("threats.assign_operator", "threats.assign_operator",
+                     lambda i: c.post("/api/threats/assign_operator", json={
+                         "drone_id": d(i), "operator": "operator1"}, headers=A)),
+            Scenario("threats.run_batch_100", "threats.run_threat_batch",
+                     lambda i: c.post("/api/threats/run_batch", json={
+                         "drone_ids": [f"BB-{next(seq):07d}" for _ in range(100)],
+                         "threat_types": ["gps_spoof"], "wait": True}, headers=A)),
+            Scenario("threats.batch_status", "threats.get_threat_batch",
+                     lambda i: c.get(f"/api/threats/run_batch/{batch_id}", headers=A)),
+            Scenario("incidents.active", "threats.get_active_incidents",
+                     lambda i: c.get("/api/incidents/active", headers=O)),
+            Scenario("incidents.correlation", "threats.get_correlation_stats",
+                     lambda i: c.get("/api/incidents/correlation", headers=A)),
+            Scenario("incidents.mitigate", "threats.mitigate",
+                     lambda i: c.post(f"/api/incidents/{mitigate_pool[i]}/mitigate",
+                                      json={"action": "rtl"}, headers=A), pool=len(mitigate_pool)),
+            Scenario("incidents.close", "threats.close",
+                     lambda i: c.post(f"/api/incidents/{close_pool[i]}/close", headers=A), pool=len(close_pool)),
+            Scenario("telemetry.ingest_10", "telemetry.ingest_telemetry",
+                     lambda i: c.post("/api/telemetry", json=telemetry_samples(i), headers=A)),
+            Scenario("telemetry.latest", "telemetry.latest_telemetry", lambda i: c.get("/telemetry", headers=A)),
+            Scenario("telemetry.detectors", "telemetry.detector_stats",
+                     lambda i: c.get("/telemetry/detectors", headers=A)),
+            Scenario("telemetry.history", "telemetry.telemetry_history",
+                     lambda i: c.get(f"/telemetry/{d(i)}/history", headers=A)),
+            Scenario("telemetry.recent_60", "telemetry.recent_telemetry",
+                     lambda i: c.get(f"/telemetry/{d(i)}/recent", params={"n": 60}, headers=A)),
+            Scenario("geo.bbox", "geo.drones_in_bbox",
+                     lambda i: c.get("/api/geo/drones", params={
+                         "min_lat": 51.4, "min_lon": -0.2, "max_lat": 51.45, "max_lon": -0.15}, headers=A)),
+            Scenario("geo.near_1km", "geo.drones_near",
+                     lambda i: c.get("/api/geo/drones/near", params={**pos(i), "radius_m": 1000}, headers=A)),
+            Scenario("geo.polygon", "geo.drones_in_polygon",
+                     lambda i: c.post("/api/geo/drones/within", json={
+                         "points": [[51.4, -0.2], [51.5, -0.15], [51.4, -0.1]]}, headers=A)),
+            Scenario("geo.geofences", "geo.list_geofences", lambda i: c.get("/api/geo/geofences", headers=A)),
+            Scenario("geo.geofence_create", "geo.create_geofence",
+                     lambda i: c.post("/api/geo/geofences", json={
+                         "name": f"bench-{next(seq)}", "kind": "bbox", "rule": "keep_out",
+                         "geometry": {"min_lat": 51.0, "min_lon": -1.0, "max_lat": 51.01, "max_lon": -0.99}},
+                         headers=A), ok=(201,)),
+            Scenario("geo.geofence_delete", "geo.delete_geofence",
+                     lambda i: c.delete(f"/api/geo/geofences/{fence_pool[i]}", headers=A), pool=len(fence_pool)),
+            Scenario("geo.geofence_drones", "geo.drones_in_geofence",
+                     lambda i: c.get(f"/api/geo/geofences/{fence_id}/drones", headers=A)),
+            Scenario("metrics", "main.metrics", lambda i: c.get("/metrics")),
+            Scenario("debug.slow_queries", "debug.slow_queries",
+                     lambda i: c.get("/debug/slow_queries", headers=A), ok=(200, 404)),
+            Scenario("debug.requests", "debug.recent_requests",
+                     lambda i: c.get("/debug/requests", headers=A), ok=(200, 404)),
+            Scenario("debug.request_profile", "debug.request_profile",
+                     lambda i: c.get("/debug/requests/none", headers=A), ok=(404,)),
+            Scenario("debug.query_cache", "debug.query_cache", lambda i: c.get("/debug/query_cache", headers=A)),
+        ]
+
+    # ---- timing ----------------------------------------------------------
+
+    def run_scenario(self, s: Scenario, warmup: int, concurrency: int) -> Dict[str, Any]:
+        n = self.n if s.pool is None else max(min(self.n, s.pool - warmup), 0)
+        for i in range(min(warmup, s.pool if s.pool is not None else warmup)):
+            s.call(i)
+        offset = warmup if s.pool is not None else 0
+        latencies: List[float] = []
+        errors = 0
+
+        def one(i: int) -> None:
+            nonlocal errors
+            t0 = time.perf_counter()
+            r = s.call(offset + i)
+            latencies.append(time.perf_counter() - t0)
+            if r.status_code not in s.ok:
+                errors += 1
+
+        t_start = time.perf_counter()
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(one, range(n)))
+        else:
+            for i in range(n):
+                one(i)
+        wall = time.perf_counter() - t_start
+        ms = sorted(x * 1000 for x in latencies)
+        return {
+            "endpoint": s.endpoint,
+            "n": n,
+            "errors": errors,
+            "rps": round(n / wall, 1) if wall > 0 else 0.0,
+            "p50_ms": round(_percentile(ms, 50), 3),
+            "p95_ms": round(_percentile(ms, 95), 3),
+            "p99_ms": round(_percentile(ms, 99), 3),
+            "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+        }
+
+
+def uncovered_routes(app: Any, scenarios: List[Scenario]) -> List[str]:
+    covered = {s.endpoint for s in scenarios}
+    missing = set()
+    for route in app.routes:
+        endpoint = getattr(route, "endpoint", None)
+        if endpoint is None or route.path in SKIPPED_ROUTES:
+            continue
+        key = endpoint.__module__.rsplit(".", 1)[-1] + "." + endpoint.__name__
+        if key not in covered:
+            missing.add(f"{','.join(sorted(getattr(route, 'methods', None) or ()))} {route.path} ({key})")
+    return sorted(missing)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    lines = [f"{'scenario':28} {'p50':>10} {'Δp50':>8} {'p99':>10} {'Δp99':>8} {'rps':>9} {'Δrps':>8}"]
+    base = baseline.get("results", {})
+    for name, cur in current["results"].items():
+        old = base.get(name)
+        if not old:
+            lines.append(f"{name:28} {cur['p50_ms']:>10.3f} {'new':>8}")
+            continue
+
+        def pct(new: float, prev: float) -> str:
+            return f"{(new - prev) / prev * 100:+.0f}%" if prev else "n/a"
+
+        lines.append(
+            f"{name:28} {cur['p50_ms']:>10.3f} {pct(cur['p50_ms'], old['p50_ms']):>8} "
+            f"{cur['p99_ms']:>10.3f} {pct(cur['p99_ms'], old['p99_ms']):>8} "
+            f"{cur['rps']:>9.1f} {pct(cur['rps'], old['rps']):>8}"
+        )
+    return lines
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="In-process API benchmark")
+    parser.add_argument("--db", default=os.environ.get("VIGIL_BENCH_DB") or "/tmp/vigil-bench.db")
+    parser.add_argument("--requests", type=int, default=100, help="timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=1, help="client threads per scenario")
+    parser.add_argument("--only", default=None, help="comma-separated scenario names")
+    parser.add_argument("--out", default=None, help="write results JSON here")
+    parser.add_argument("--compare", default=None, help="baseline results JSON to diff against")
+    parser.add_argument("--fresh", action="store_true", help="re-seed even if the manifest matches")
+    add_volume_args(parser)
+    args = parser.parse_args(argv)
+
+    volumes = volumes_from_args(args)
+    manifest = seed(args.db, volumes, args.seed, force=args.fresh)
+
+    # Benchmark writes go to a copy so the seeded database stays reusable
+    work_db = args.db + ".run"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(work_db + suffix):
+            os.unlink(work_db + suffix)
+    src = sqlite3.connect(args.db)
+    dst = sqlite3.connect(work_db)
+    src.backup(dst)
+    src.close()
+    dst.close()
+
+    # db may already be imported (by seed) with the default path, so point the
+    # storage singleton at the copy explicitly rather than relying on the env
+    os.environ["VIGIL_DB_PATH"] = work_db
+    os.environ["VIGIL_STORAGE_URL"] = f"sqlite:///{work_db}"
+    # The bench drives one token far past any per-user budget
+    os.environ.setdefault("VIGIL_ADMISSION", "0")
+    from fastapi.testclient import TestClient
+
+    from ..main import app
+
+    results: Dict[str, Any] = {}
+    with TestClient(app) as client:
+        bench = Bench(client, volumes, args.requests)
+        scenarios = bench.scenarios(pool_size=args.requests + args.warmup)
+        uncovered = uncovered_routes(app, scenarios)
+        selected = set(args.only.split(",")) if args.only else None
+        for s in scenarios:
+            if selected is not None and s.name not in selected:
+                continue
+            results[s.name] = bench.run_scenario(s, args.warmup, args.concurrency)
+            r = results[s.name]
+            print(
+                f"{s.name:28} n={r['n']:<5} err={r['errors']:<3} rps={r['rps']:>8.1f} "
+                f"p50={r['p50_ms']:>8.3f} p95={r['p95_ms']:>8.3f} p99={r['p99_ms']:>8.3f} ms",
+                file=sys.stderr,
+            )
+
+    output = {
+        "meta": {
+            **_git_meta(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "volumes": manifest["volumes"],
+            "db_bytes": manifest["bytes"],
+        },
+        "results": results,
+        "uncovered": uncovered,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(output, indent=2))
+    if args.compare:
+        print("\n".join(compare(output, json.loads(Path(args.compare).read_text()))))
+    elif not args.out:
+        print(json.dumps(output, indent=2))
+    failed = sum(r["errors"] for r in results.values())
+    return 1 if failed or uncovered else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,103 @@
+"""
+Cold-start time to readiness, default vs fast-start mode.
+
+Spawns fresh interpreters against an already migrated database and, for
+each run, records the app_startup_seconds phases (framework_import, import,
+init_schema, ready, app_ready), the wall time from spawn until the startup
+hook finished, and the latency of the first request that has to build a
+lazily loaded router.
+
+    python -m backend.bench.cold_start --runs 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+TARGET_MS = 200.0
+ROOT = Path(__file__).resolve().parents[2]
+
+CHILD = r"""
+import asyncio, json, sys, time
+import backend.main as m
+from backend.startup import phases
+asyncio.run(m.app.router.startup())
+print("ready", flush=True)
+from fastapi.testclient import TestClient
+from backend import auth
+client = TestClient(m.app)
+token = auth._make_token("admin", "Admin", "default")["token"]
+t0 = time.perf_counter()
+status = client.get("/api/incidents/active", headers={"Authorization": "Bearer " + token}).status_code
+first = time.perf_counter() - t0
+print(json.dumps({"phases": phases(), "first_request_s": first, "status": status, "numpy": "numpy" in sys.modules}))
+"""
+
+
+def _one(db_path: str, fast: bool) -> Dict[str, Any]:
+    env = dict(os.environ)
+    env.update(
+        {"VIGIL_DB_PATH": db_path, "VIGIL_FAST_START": "1" if fast else "0", "PYTHONWARNINGS": "ignore"}
+    )
+    env.pop("VIGIL_STORAGE_URL", None)
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", CHILD], cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    assert proc.stdout is not None
+    line = proc.stdout.readline()
+    spawn_to_ready = time.perf_counter() - t0
+    out, err = proc.communicate()
+    if line.strip() != "ready" or proc.returncode != 0:
+        raise RuntimeError(f"child failed: {line}{out}{err}")
+    result = json.loads(out.strip().splitlines()[-1])
+    result["spawn_to_ready_s"] = spawn_to_ready
+    return result
+
+
+def _median_ms(values: List[float]) -> float:
+    return round(statistics.median(values) * 1000, 1)
+
+
+def run(runs: int, db_path: str) -> Dict[str, Any]:
+    # Migrate once so both modes start from a current schema
+    _one(db_path, fast=False)
+    report: Dict[str, Any] = {}
+    for mode, fast in (("default", False), ("fast_start", True)):
+        samples = [_one(db_path, fast) for _ in range(runs)]
+        phase_names = sorted({name for s in samples for name in s["phases"]})
+        report[mode] = {
+            **{f"{name}_ms": _median_ms([s["phases"].get(name, 0.0) for s in samples]) for name in phase_names},
+            "spawn_to_ready_ms": _median_ms([s["spawn_to_ready_s"] for s in samples]),
+            "first_request_ms": _median_ms([s["first_request_s"] for s in samples]),
+            "numpy_loaded": any(s["numpy"] for s in samples),
+        }
+    fast = report["fast_start"]
+    report["target_ms"] = TARGET_MS
+    # framework_import (fastapi + pydantic) is a fixed floor no app change can remove
+    report["fast_start_app_ready_within_target"] = fast["app_ready_ms"] <= TARGET_MS
+    return report
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--db", default=None, help="database to start against (default: a temp file)")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        report = run(args.runs, args.db or os.path.join(tmp, "vigil.db"))
+    print(json.dumps(report, indent=2))
+    return 0 if report["fast_start_app_ready_within_target"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
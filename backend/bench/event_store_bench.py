@@ -0,0 +1,323 @@
+"""
+Forensic event storage before and after schema 7 (the compact event store).
+
+Seeds (or reuses) a forensics-heavy database with backend.bench.seed (2M
+events by default, other tables token-sized) and derives two copies:
+
+    legacy   a schema-6 forensics_events table (ISO-8601 TEXT ts, company,
+             event type and actor strings per row, payload_json TEXT) with
+             its (company_id, ts) index, queried with the schema-6 SQL
+    current  the legacy copy migrated by db.init_db() to event_log /
+             event_dict (time, drone and incident indexes), queried through
+             db.list_forensics / iter_forensics
+
+Reports bytes per row (dbstat: table plus indexes) and file size after
+VACUUM, the median latency of list and range-scan views, insert cost
+(rolled back) and the migration time. Both layouts must return the same
+rows for every view.
+
+    python -m backend.bench.event_store_bench
+    python -m backend.bench.event_store_bench --db /tmp/ev.db --forensics 5000000 --out events.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .seed import Volumes, drone_ids, seed
+
+LEGACY_TABLE = """
+    CREATE TABLE forensics_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts TEXT NOT NULL,
+        company_id TEXT NOT NULL,
+        drone_id TEXT,
+        incident_id TEXT,
+        event_type TEXT NOT NULL,
+        actor TEXT,
+        action TEXT,
+        result TEXT,
+        payload_json TEXT
+    )
+"""
+LEGACY_OBJECTS = ("forensics_events", "idx_forensics_company_ts")
+CURRENT_OBJECTS = (
+    "event_log",
+    "idx_event_log_company_ts",
+    "idx_event_log_company_drone_ts",
+    "idx_event_log_company_incident_ts",
+    "event_dict",
+    "sqlite_autoindex_event_dict_1",
+)
+
+
+def legacy_sql(kind: str, kw: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """The schema-6 SQL of list_forensics / iter_forensics."""
+    from ..db import _date_filters
+
+    if kind == "list":
+        return (
+            """
+            SELECT * FROM forensics_events
+            WHERE company_id=?
+              AND (? IS NULL OR ? = '' OR drone_id=?)
+              AND (? IS NULL OR ? = '' OR incident_id=?)
+            ORDER BY ts ASC
+            LIMIT ?
+            """,
+            [kw["company_id"], *[kw.get("drone_id")] * 3, *[kw.get("incident_id")] * 3, kw.get("limit", 500)],
+        )
+    where, params = ["company_id = ?"], [kw["company_id"]]
+    for column in ("drone_id", "incident_id", "event_type"):
+        if kw.get(column):
+            where.append(f"{column} = ?")
+            params.append(kw[column])
+    _date_filters("ts", kw.get("date_from"), kw.get("date_to"), where, params)
+    if kind == "count":
+        return f"SELECT COUNT(*) AS n FROM forensics_events WHERE {' AND '.join(where)}", params
+    return f"SELECT * FROM forensics_events WHERE {' AND '.join(where)} ORDER BY ts, id", params
+
+
+def legacy_call(kind: str, kw: Dict[str, Any]) -> Callable[[], List[Dict[str, Any]]]:
+    """legacy_sql on a connection per call, as the schema-6 functions ran it."""
+    from .. import db
+
+    sql, params = legacy_sql(kind, kw)
+
+    def call() -> List[Dict[str, Any]]:
+        conn = db.connect()
+        try:
+            return [dict(r) for r in conn.execute(sql, params).fetchall()]
+        finally:
+            conn.close()
+    return call
+
+
+def current_call(kind: str, kw: Dict[str, Any]) -> Callable[[], List[Dict[str, Any]]]:
+    from .. import db
+
+    if kind == "list":
+        return lambda: db.list_forensics(**kw)
+    if kind == "count":
+        def count() -> List[Dict[str, Any]]:
+            where, params = [f"company = {db._dict_id_sql('company')}"], [kw["company_id"]]
+            db._date_filters("ts_us", kw.get("date_from"), kw.get("date_to"), where, params, encode=db.ts_to_us)
+            conn = db.connect()
+            try:
+                return [dict(r) for r in conn.execute(f"SELECT COUNT(*) AS n FROM event_log WHERE {' AND '.join(where)}", params)]
+            finally:
+                conn.close()
+        return count
+    return lambda: list(db.iter_forensics(**kw))
+
+
+def views(company: str, drone: str, incident: str) -> List[Tuple[str, str, Dict[str, Any]]]:
+    base = {"company_id": company}
+    day = {"date_from": "2026-02-01", "date_to": "2026-02-01"}
+    week = {"date_from": "2026-02-01", "date_to": "2026-02-07"}
+    return [
+        ("list.company", "list", base),
+        ("list.drone", "list", {**base, "drone_id": drone}),
+        ("list.incident", "list", {**base, "incident_id": incident}),
+        ("scan.day", "iter", {**base, **day}),
+        ("scan.week", "iter", {**base, **week}),
+        ("scan.week_event_type", "iter", {**base, **week, "event_type": "incident_created"}),
+        ("scan.drone", "iter", {**base, "drone_id": drone}),
+        ("count.week", "count", {**base, **week}),
+    ]
+
+
+def _median_ms(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    times, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return round(statistics.median(times) * 1000, 3), out
+
+
+def _object_bytes(conn: sqlite3.Connection, names: Tuple[str, ...]) -> Optional[Dict[str, int]]:
+    try:
+        rows = conn.execute(
+            f"SELECT name, SUM(pgsize) FROM dbstat WHERE name IN ({', '.join('?' * len(names))}) GROUP BY name", names
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return None  # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+    return {name: size for name, size in rows}
+
+
+def _copy(src: str, dst: str) -> None:
+    a, b = sqlite3.connect(src), sqlite3.connect(dst)
+    a.backup(b)
+    a.close()
+    b.close()
+
+
+def _build_legacy(seeded: str, path: str) -> None:
+    """A schema-6 copy of the seeded database: forensics back in one TEXT table."""
+    from .. import db
+
+    _copy(seeded, path)
+    previous, db.DB_PATH = db.DB_PATH, Path(path)
+    conn = db.connect()
+    try:
+        conn.execute("CREATE TABLE forensics_legacy AS SELECT * FROM forensics_events ORDER BY id")
+        conn.execute("DROP VIEW forensics_events")
+        conn.execute(LEGACY_TABLE)
+        conn.execute("INSERT INTO forensics_events SELECT * FROM forensics_legacy ORDER BY id")
+        for table in ("forensics_legacy", "event_log", "event_dict"):
+            conn.execute(f"DROP TABLE {table}")
+        conn.execute("CREATE INDEX idx_forensics_company_ts ON forensics_events(company_id, ts)")
+        conn.execute("PRAGMA user_version = 6")
+        conn.commit()
+        conn.execute("VACUUM")
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+        db.DB_PATH = previous
+
+
+def _insert_cost(conn: sqlite3.Connection, company: str, drone: str, n: int, encode: bool) -> float:
+    from .. import db
+
+    events = [
+        (f"2026-03-01T00:00:{i % 60:02d}.{i:06d}+00:00", company, drone, f"INC-bench-{i % 97}", "incident_created",
+         "operator1", "gps_spoof", "ok", json.dumps({"training": True, "actor_role": "admin", "operator": "operator1"}))
+        for i in range(n)
+    ]
+    t0 = time.perf_counter()
+    conn.execute("BEGIN")
+    if encode:
+        encoder = db.EventEncoder(conn)
+        conn.executemany(db.EVENT_LOG_INSERT, [encoder.row(*ev) for ev in events])
+    else:
+        conn.executemany(
+            """
+            INSERT INTO forensics_events (ts, company_id, drone_id, incident_id, event_type, actor, action, result, payload_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            events,
+        )
+    elapsed = time.perf_counter() - t0
+    conn.execute("ROLLBACK")
+    return round(elapsed / n * 1e6, 2)
+
+
+def _measure(
+    path: str, objects: Tuple[str, ...], rows: int, insert: Callable[[sqlite3.Connection], float]
+) -> Dict[str, Any]:
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        sizes = _object_bytes(conn, objects)
+        return {
+            "object_bytes": sizes,
+            "bytes_per_row": round(sum(sizes.values()) / rows, 1) if sizes and rows else None,
+            "file_bytes": os.path.getsize(path),
+            "insert_us_per_row": insert(conn),
+        }
+    finally:
+        conn.close()
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Forensic event store benchmark")
+    parser.add_argument("--db", default=os.environ.get("VIGIL_BENCH_DB") or "/tmp/vigil-events-bench.db")
+    parser.add_argument("--forensics", type=int, default=2_000_000)
+    parser.add_argument("--companies", type=int, default=3)
+    parser.add_argument("--drones-per-company", dest="drones_per_company", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--insert-rows", dest="insert_rows", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    volumes = Volumes(
+        companies=args.companies, drones_per_company=args.drones_per_company,
+        incidents=5000, forensics=args.forensics, evidence=1000, telemetry=1000,
+    )
+    manifest = seed(args.db, volumes, args.seed)
+
+    from .. import db
+
+    company = volumes.company_ids()[0]
+    drone = drone_ids(0, volumes)[7 % args.drones_per_company]
+    work = tempfile.mkdtemp(prefix="vigil-events-")
+    legacy_path, current_path = os.path.join(work, "legacy.db"), os.path.join(work, "current.db")
+    _build_legacy(args.db, legacy_path)
+    conn = sqlite3.connect(legacy_path)
+    incident = conn.execute(
+        "SELECT incident_id FROM forensics_events WHERE company_id = ? AND incident_id IS NOT NULL LIMIT 1", (company,)
+    ).fetchone()[0]
+    rows = conn.execute("SELECT COUNT(*) FROM forensics_events").fetchone()[0]
+    conn.close()
+    checks = views(company, drone, incident)
+
+    legacy = _measure(
+        legacy_path, LEGACY_OBJECTS, rows, lambda c: _insert_cost(c, company, drone, args.insert_rows, encode=False)
+    )
+    legacy["views"] = {}
+    legacy_rows: Dict[str, Any] = {}
+    db.DB_PATH = Path(legacy_path)
+    for name, kind, kw in checks:
+        ms, out = _median_ms(legacy_call(kind, kw), args.repeat)
+        legacy["views"][name] = {"ms": ms, "rows": len(out) if kind != "count" else out[0]["n"]}
+        legacy_rows[name] = out
+        print(json.dumps({"layout": "legacy", "view": name, "ms": ms}), file=sys.stderr)
+
+    # current: migrate a copy of the legacy database the way a deploy would
+    _copy(legacy_path, current_path)
+    db.DB_PATH = Path(current_path)
+    t0 = time.perf_counter()
+    db.init_db()
+    migrate_s = time.perf_counter() - t0
+    conn = sqlite3.connect(current_path, isolation_level=None)
+    t0 = time.perf_counter()
+    conn.execute("VACUUM")
+    vacuum_s = time.perf_counter() - t0
+    conn.execute("ANALYZE")
+    conn.close()
+
+    current = _measure(
+        current_path, CURRENT_OBJECTS, rows, lambda c: _insert_cost(c, company, drone, args.insert_rows, encode=True)
+    )
+    current["views"] = {}
+    mismatched = []
+    for name, kind, kw in checks:
+        ms, out = _median_ms(current_call(kind, kw), args.repeat)
+        current["views"][name] = {"ms": ms, "rows": len(out) if kind != "count" else out[0]["n"]}
+        if out != legacy_rows[name]:
+            mismatched.append(name)
+        print(json.dumps({"layout": "current", "view": name, "ms": ms}), file=sys.stderr)
+
+    report = {
+        "volumes": manifest["volumes"],
+        "rows": rows,
+        "company": company,
+        "drone": drone,
+        "migrate_s": round(migrate_s, 1),
+        "vacuum_s": round(vacuum_s, 1),
+        "legacy": legacy,
+        "current": current,
+        "speedup": {
+            name: round(legacy["views"][name]["ms"] / current["views"][name]["ms"], 1) if current["views"][name]["ms"] else None
+            for name, _, _ in checks
+        },
+        "mismatched_views": mismatched,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    return 0 if not mismatched else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,283 @@
+"""
+Evidence drone-scope queries and index layout, before and after schema 6.
+
+Seeds (or reuses) an evidence-heavy database with backend.bench.seed
+(10M evidence rows by default, other tables token-sized), then runs the
+same compliance views against two layouts of evidence_registry:
+
+    legacy   the six schema-5 indexes, drone scope as
+             (drone_id = ? OR drone_id IS NULL)
+    current  db.init_db() migrates to the five schema-6 indexes; the views
+             run through db.list_evidence / evidence_summary_by_control /
+             iter_evidence (drone scope as a UNION ALL of two probes)
+
+Per view: median latency of --repeat runs and the query plan; both layouts
+must return the same rows. Per layout: index bytes (dbstat) and the cost of
+inserting --insert-rows evidence rows (rolled back). The migration itself
+(dropping and building indexes) is timed too.
+
+    python -m backend.bench.evidence_scope_bench
+    python -m backend.bench.evidence_scope_bench --db /tmp/ev.db --evidence 1000000 --out scope.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .seed import Volumes, drone_ids, seed
+
+LEGACY_INDEXES = {
+    "idx_evidence_company_framework_control_created": "(company_id, framework_id, control_id, created_at)",
+    "idx_evidence_company_framework_control": "(company_id, framework_id, control_id)",
+    "idx_evidence_company_framework_drone_control": "(company_id, framework_id, drone_id, control_id)",
+    "idx_evidence_company_framework_created": "(company_id, framework_id, created_at)",
+    "idx_evidence_company_drone_created": "(company_id, drone_id, created_at)",
+    "idx_evidence_company_incident_created": "(company_id, incident_id, created_at)",
+}
+SUMMARY_COLUMNS = """
+    control_id,
+    SUM(CASE WHEN COALESCE(NULLIF(review_status, ''), 'pending') = 'accepted' THEN 1 ELSE 0 END) AS accepted,
+    SUM(CASE WHEN COALESCE(NULLIF(review_status, ''), 'pending') = 'pending' THEN 1 ELSE 0 END) AS pending,
+    SUM(CASE WHEN COALESCE(NULLIF(review_status, ''), 'pending') = 'rejected' THEN 1 ELSE 0 END) AS rejected,
+    COUNT(*) AS total
+"""
+
+
+def _legacy_where(kw: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """The schema-5 WHERE builder of list_evidence / evidence_summary_by_control."""
+    from ..db import _day_bounds_utc
+
+    where, params = ["company_id = ?"], [kw["company_id"]]
+    for column in ("framework_id", "control_id"):
+        if kw.get(column):
+            where.append(f"{column} = ?")
+            params.append(kw[column])
+    if kw.get("drone_id"):
+        where.append("(drone_id = ? OR drone_id IS NULL)")
+        params.append(kw["drone_id"])
+    if kw.get("date_from"):
+        where.append("created_at >= ?")
+        params.append(_day_bounds_utc(kw["date_from"], end=False))
+    if kw.get("date_to"):
+        where.append("created_at <= ?")
+        params.append(_day_bounds_utc(kw["date_to"], end=True))
+    return " AND ".join(where), params
+
+
+def legacy_sql(kind: str, kw: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    where, params = _legacy_where(kw)
+    if kind == "list":
+        return f"SELECT * FROM evidence_registry WHERE {where} ORDER BY created_at DESC LIMIT ?", [*params, kw.get("limit", 200)]
+    if kind == "summary":
+        return f"SELECT {SUMMARY_COLUMNS} FROM evidence_registry WHERE {where} GROUP BY control_id", params
+    return f"SELECT * FROM evidence_registry WHERE {where} ORDER BY created_at, id", params
+
+
+def current_call(kind: str, kw: Dict[str, Any]) -> Callable[[], List[Dict[str, Any]]]:
+    from .. import db
+
+    if kind == "list":
+        return lambda: db.list_evidence(**kw)
+    if kind == "summary":
+        return lambda: db.evidence_summary_by_control(**kw)
+    return lambda: list(db.iter_evidence(**kw))
+
+
+def current_sql(kind: str, kw: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """The SQL current_call runs, for EXPLAIN QUERY PLAN."""
+    from .. import db
+
+    where, params = ["company_id = ?"], [kw["company_id"]]
+    for column in ("framework_id", "control_id"):
+        if kw.get(column):
+            where.append(f"{column} = ?")
+            params.append(kw[column])
+    db._date_filters("created_at", kw.get("date_from"), kw.get("date_to"), where, params)
+    columns = "control_id, review_status" if kind == "summary" else "*"
+    scoped, params = db.evidence_scope_sql(columns, " AND ".join(where), params, kw.get("drone_id"))
+    if kind == "list":
+        return f"{scoped} ORDER BY created_at DESC LIMIT ?", [*params, kw.get("limit", 200)]
+    if kind == "summary":
+        return f"SELECT {SUMMARY_COLUMNS} FROM ({scoped}) GROUP BY control_id", params
+    return f"{scoped} ORDER BY created_at, id", params
+
+
+def views(company: str, drone: str) -> List[Tuple[str, str, Dict[str, Any]]]:
+    base = {"company_id": company}
+    fw = {**base, "framework_id": "faa_107"}
+    window = {"date_from": "2026-02-01", "date_to": "2026-02-03"}
+    return [
+        ("list.company", "list", base),
+        ("list.drone", "list", {**base, "drone_id": drone}),
+        ("list.drone_framework", "list", {**fw, "drone_id": drone}),
+        ("list.drone_dates", "list", {**base, "drone_id": drone, **window}),
+        ("list.control", "list", {**fw, "control_id": "107.49"}),
+        ("list.dates", "list", {**base, **window}),
+        ("summary.framework", "summary", fw),
+        ("summary.framework_dates", "summary", {**fw, **window}),
+        ("summary.drone", "summary", {**fw, "drone_id": drone}),
+        ("summary.drone_dates", "summary", {**fw, "drone_id": drone, **window}),
+        ("report.drone", "iter", {**fw, "drone_id": drone}),
+    ]
+
+
+def _median_ms(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    times, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return round(statistics.median(times) * 1000, 3), out
+
+
+def _plan(conn: sqlite3.Connection, sql: str, params: List[Any]) -> str:
+    return " | ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def _index_bytes(conn: sqlite3.Connection) -> Optional[Dict[str, int]]:
+    try:
+        rows = conn.execute(
+            "SELECT name, SUM(pgsize) FROM dbstat WHERE name LIKE 'idx_evidence%' GROUP BY name"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return None  # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+    return {name: size for name, size in rows}
+
+
+def _insert_cost(conn: sqlite3.Connection, company: str, drone: str, n: int) -> float:
+    rows = [
+        (company, drone if i % 10 else None, f"INC-bench-{i}", "faa_107", "107.49", "bench", None, None,
+         f"2026-03-01T00:00:{i % 60:02d}.{i:06d}+00:00", "pending")
+        for i in range(n)
+    ]
+    t0 = time.perf_counter()
+    conn.execute("BEGIN")
+    conn.executemany(
+        """
+        INSERT INTO evidence_registry (
+            company_id, drone_id, incident_id, framework_id, control_id, evidence_type,
+            source_event_id, reference_id, created_at, review_status
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    elapsed = time.perf_counter() - t0
+    conn.execute("ROLLBACK")
+    return round(elapsed / n * 1e6, 2)
+
+
+def _layout(conn: sqlite3.Connection) -> List[str]:
+    return [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='evidence_registry' AND sql IS NOT NULL ORDER BY name"
+    )]
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Evidence drone-scope benchmark")
+    parser.add_argument("--db", default=os.environ.get("VIGIL_BENCH_DB") or "/tmp/vigil-evidence-bench.db")
+    parser.add_argument("--evidence", type=int, default=10_000_000)
+    parser.add_argument("--companies", type=int, default=10)
+    parser.add_argument("--drones-per-company", dest="drones_per_company", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--insert-rows", dest="insert_rows", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    volumes = Volumes(
+        companies=args.companies, drones_per_company=args.drones_per_company,
+        incidents=1000, forensics=1000, evidence=args.evidence, telemetry=1000,
+    )
+    t0 = time.perf_counter()
+    manifest = seed(args.db, volumes, args.seed)
+    seed_s = time.perf_counter() - t0
+
+    from .. import db
+
+    db.DB_PATH = Path(args.db)
+    company = volumes.company_ids()[min(1, args.companies - 1)]
+    drone = drone_ids(min(1, args.companies - 1), volumes)[42 % args.drones_per_company]
+    checks = views(company, drone)
+
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+
+    # legacy layout: schema-5 indexes only
+    for name in _layout(conn):
+        if name not in LEGACY_INDEXES:
+            conn.execute(f"DROP INDEX {name}")
+    for name, columns in LEGACY_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON evidence_registry{columns}")
+    legacy: Dict[str, Any] = {
+        "indexes": _layout(conn),
+        "index_bytes": _index_bytes(conn),
+        "insert_us_per_row": _insert_cost(conn, company, drone, args.insert_rows),
+        "views": {},
+    }
+    legacy_rows: Dict[str, Any] = {}
+    for name, kind, kw in checks:
+        sql, params = legacy_sql(kind, kw)
+        ms, rows = _median_ms(lambda: [dict(r) for r in conn.execute(sql, params).fetchall()], args.repeat)
+        legacy["views"][name] = {"ms": ms, "rows": len(rows), "plan": _plan(conn, sql, params)}
+        legacy_rows[name] = rows
+        print(json.dumps({"layout": "legacy", "view": name, "ms": ms}), file=sys.stderr)
+
+    # current layout: let init_db migrate (fresh connection: no statements
+    # prepared against the legacy schema)
+    conn.close()
+    t0 = time.perf_counter()
+    db.init_db()
+    migrate_s = time.perf_counter() - t0
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    current: Dict[str, Any] = {
+        "indexes": _layout(conn),
+        "index_bytes": _index_bytes(conn),
+        "insert_us_per_row": _insert_cost(conn, company, drone, args.insert_rows),
+        "views": {},
+    }
+    mismatched = []
+    for name, kind, kw in checks:
+        ms, rows = _median_ms(current_call(kind, kw), args.repeat)
+        sql, params = current_sql(kind, kw)
+        current["views"][name] = {"ms": ms, "rows": len(rows), "plan": _plan(conn, sql, params)}
+        key = (lambda r: r["control_id"]) if kind == "summary" else None
+        if (sorted(rows, key=key) if key else rows) != (sorted(legacy_rows[name], key=key) if key else legacy_rows[name]):
+            mismatched.append(name)
+        print(json.dumps({"layout": "current", "view": name, "ms": ms}), file=sys.stderr)
+    conn.close()
+
+    def total(layout: Dict[str, Any]) -> Optional[int]:
+        return sum(layout["index_bytes"].values()) if layout["index_bytes"] is not None else None
+
+    report = {
+        "volumes": manifest["volumes"],
+        "company": company,
+        "drone": drone,
+        "seed_s": round(seed_s, 1),
+        "migrate_s": round(migrate_s, 1),
+        "legacy": legacy,
+        "current": current,
+        "speedup": {
+            name: round(legacy["views"][name]["ms"] / current["views"][name]["ms"], 1) if current["views"][name]["ms"] else None
+            for name, _, _ in checks
+        },
+        "index_bytes_total": {"legacy": total(legacy), "current": total(current)},
+        "mismatched_views": mismatched,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    return 0 if not mismatched else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
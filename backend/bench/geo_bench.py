@@ -0,0 +1,122 @@
+"""
+Spatial query latency: grid index vs linear scan.
+
+Places N drones uniformly at random over a region roughly the size of a
+metro area (0.5 x 0.5 degrees), loads them into backend.geo.PositionIndex
+and times bbox, radius and polygon queries of a few sizes against a plain
+scan over every position. Each query is checked to return the same drones
+as the scan. Reports p50/p99 latency in microseconds per query.
+
+    python -m backend.bench.geo_bench
+    python -m backend.bench.geo_bench --drones 10000,100000 --queries 200 --out geo.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+REGION = (51.25, -0.35, 51.75, 0.15)  # min_lat, min_lon, max_lat, max_lon
+QUERY_SIZES_DEG = (0.01, 0.05, 0.2)
+
+
+def _pct(samples: Sequence[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def _shapes(rng: random.Random, kind: str, size: float, n: int) -> List[Any]:
+    from .. import geo
+
+    min_lat, min_lon, max_lat, max_lon = REGION
+    shapes: List[Any] = []
+    for _ in range(n):
+        lat = rng.uniform(min_lat, max_lat - size)
+        lon = rng.uniform(min_lon, max_lon - size)
+        if kind == "bbox":
+            shapes.append(geo.BBox(lat, lon, lat + size, lon + size))
+        elif kind == "circle":
+            shapes.append(geo.Circle(lat + size / 2, lon + size / 2, size / 2 * geo.METERS_PER_DEG_LAT))
+        else:  # a diamond inscribed in the box
+            h = size / 2
+            shapes.append(geo.Polygon([(lat, lon + h), (lat + h, lon + size), (lat + size, lon + h), (lat + h, lon)]))
+    return shapes
+
+
+def _time(fn: Callable[[Any], List[int]], shapes: List[Any]) -> Tuple[List[float], List[List[int]]]:
+    times, results = [], []
+    for shape in shapes:
+        t0 = time.perf_counter()
+        found = fn(shape)
+        times.append((time.perf_counter() - t0) * 1e6)
+        results.append(found)
+    return times, results
+
+
+def run(n_drones: int, n_queries: int, seed: int) -> List[Dict[str, Any]]:
+    from .. import geo
+
+    rng = random.Random(seed)
+    index = geo.PositionIndex()
+    min_lat, min_lon, max_lat, max_lon = REGION
+    t0 = time.perf_counter()
+    for i in range(n_drones):
+        index.update(f"D-{i:06d}", rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon), {"status": "active"})
+    load_s = time.perf_counter() - t0
+
+    def scan(shape: Any) -> List[int]:
+        lat, lon = index.lat, index.lon
+        return [s for s in range(len(index)) if shape.contains(lat[s], lon[s])]
+
+    runs = []
+    for kind in ("bbox", "circle", "polygon"):
+        for size in QUERY_SIZES_DEG:
+            shapes = _shapes(rng, kind, size, n_queries)
+            grid_us, grid_found = _time(index.within, shapes)
+            scan_us, scan_found = _time(scan, shapes)
+            agree = all(sorted(a) == sorted(b) for a, b in zip(grid_found, scan_found))
+            runs.append({
+                "drones": n_drones,
+                "kind": kind,
+                "size_deg": size,
+                "avg_hits": round(sum(map(len, grid_found)) / len(grid_found), 1),
+                "grid_p50_us": round(_pct(grid_us, 0.50), 1),
+                "grid_p99_us": round(_pct(grid_us, 0.99), 1),
+                "scan_p50_us": round(_pct(scan_us, 0.50), 1),
+                "scan_p99_us": round(_pct(scan_us, 0.99), 1),
+                "speedup_p50": round(_pct(scan_us, 0.50) / max(_pct(grid_us, 0.50), 1e-3), 1),
+                "matches_scan": agree,
+                "load_s": round(load_s, 3),
+            })
+    return runs
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Spatial index benchmark")
+    parser.add_argument("--drones", default="10000,100000", help="comma-separated fleet sizes")
+    parser.add_argument("--queries", type=int, default=100, help="queries per (kind, size)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+    from ..geo import GEO_CELL_DEG
+
+    runs: List[Dict[str, Any]] = []
+    for n in (int(x) for x in args.drones.split(",")):
+        for r in run(n, args.queries, args.seed):
+            print(json.dumps(r), file=sys.stderr)
+            runs.append(r)
+    correct = all(r["matches_scan"] for r in runs)
+    report = {"region": REGION, "cell_deg": GEO_CELL_DEG, "all_match_scan": correct, "runs": runs}
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+    print(json.dumps({k: v for k, v in report.items() if k != "runs"}, indent=2))
+    return 0 if correct else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
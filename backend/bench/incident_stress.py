@@ -0,0 +1,137 @@
+"""
+Concurrency stress for incident lifecycle transitions.
+
+Many threads race mitigate/close on a shared pool of incidents using the
+compare-and-swap contract (expected_version). Every accepted transition
+must be visible in the final rows: version == 1 + accepted transitions.
+
+    python -m backend.bench.incident_stress --threads 16 --incidents 200
+    python -m backend.bench.incident_stress --url postgresql://vigil@localhost/vigil
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List
+from uuid import uuid4
+
+from ..storage import INCIDENT_TRANSITIONS, IncidentConflict, StorageBackend, open_storage
+
+
+def _worker(
+    store: StorageBackend,
+    incident_ids: List[str],
+    attempts: int,
+    seed: int,
+    accepted: Counter,
+    stats: Counter,
+    lock: threading.Lock,
+) -> None:
+    rng = random.Random(seed)
+    local_accepted: Counter = Counter()
+    local_stats: Counter = Counter()
+    for _ in range(attempts):
+        incident_id = rng.choice(incident_ids)
+        current = store.get_incident(incident_id)
+        targets = INCIDENT_TRANSITIONS.get(current["status"], ())
+        if not targets:
+            local_stats["skipped_terminal"] += 1
+            continue
+        try:
+            store.update_incident_status(
+                company_id=current["company_id"],
+                incident_id=incident_id,
+                new_status=rng.choice(targets),
+                mitigated_action="stress",
+                expected_version=current["version"],
+            )
+            local_accepted[incident_id] += 1
+            local_stats["accepted"] += 1
+        except IncidentConflict:
+            local_stats["conflicts"] += 1
+    with lock:
+        accepted.update(local_accepted)
+        stats.update(local_stats)
+
+
+def run(store: StorageBackend, incidents: int, threads: int, attempts: int) -> Dict[str, Any]:
+    store.init_schema()
+    company_id = f"stress-{uuid4().hex[:8]}"
+    incident_ids = []
+    for n in range(incidents):
+        incident_id = f"INC-{uuid4().hex[:12]}"
+        store.create_incident(
+            incident_id=incident_id,
+            company_id=company_id,
+            drone_id=f"UA-{n:04d}",
+            threat_type="gps_spoof",
+            severity="high",
+            title="Gps Spoof",
+        )
+        incident_ids.append(incident_id)
+
+    accepted: Counter = Counter()
+    stats: Counter = Counter()
+    lock = threading.Lock()
+    workers = [
+        threading.Thread(
+            target=_worker,
+            args=(store, incident_ids, attempts, seed, accepted, stats, lock),
+        )
+        for seed in range(threads)
+    ]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    lost = []
+    for incident_id in incident_ids:
+        row = store.get_incident(incident_id)
+        if row["version"] != 1 + accepted[incident_id]:
+            lost.append(incident_id)
+
+    return {
+        "backend": store.name,
+        "incidents": incidents,
+        "threads": threads,
+        "attempts": threads * attempts,
+        "accepted": stats["accepted"],
+        "conflicts": stats["conflicts"],
+        "skipped_terminal": stats["skipped_terminal"],
+        "lost_transitions": len(lost),
+        "elapsed_s": round(elapsed, 4),
+        "attempts_per_s": round(threads * attempts / elapsed, 1) if elapsed else None,
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=None, help="storage URL (default: fresh SQLite file)")
+    parser.add_argument("--incidents", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=200, help="attempts per thread")
+    args = parser.parse_args(argv)
+
+    url = args.url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="vigil-stress-"), "vigil.db")
+    store = open_storage(url)
+    try:
+        result = run(store, args.incidents, args.threads, args.attempts)
+    finally:
+        store.close()
+    print(json.dumps(result, indent=2))
+    return 1 if result["lost_transitions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,109 @@
+"""
+Serialization cost of the large list endpoints, per 10k rows.
+
+Seeds (or reuses) a benchmark database with backend.bench.seed, fetches
+forensics, evidence and active-incident rows for the "default" company and
+serializes each response body two ways:
+
+    fastapi  jsonable_encoder + JSONResponse (json.dumps), what a route
+             returning a plain dict goes through
+    fast     responses.rows_response: orjson, payload_json spliced in raw
+
+Times are normalized to 10k rows (median of --repeat runs). Both bodies
+are decoded and compared, with payload_json parsed on the FastAPI side,
+to check the fast path carries the same data.
+
+    python -m backend.bench.json_bench --db /tmp/vigil-bench.db --scale small
+    python -m backend.bench.json_bench --rows 10000 --repeat 7 --out json.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from .seed import add_volume_args, seed, volumes_from_args
+
+
+def _median_s(fn: Callable[[], bytes], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def _same(fast_body: bytes, slow_body: bytes, key: str) -> bool:
+    fast, slow = json.loads(fast_body), json.loads(slow_body)
+    for row in slow[key]:
+        text = row.get("payload_json")
+        if isinstance(text, str) and text[:1] in ("{", "["):
+            row["payload_json"] = json.loads(text)
+    return fast == slow
+
+
+def run_one(name: str, key: str, rows: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from ..responses import rows_response
+
+    def fastapi_path() -> bytes:
+        return JSONResponse(jsonable_encoder({"ok": True, key: rows})).body
+
+    def fast_path() -> bytes:
+        return rows_response(key, rows).body
+
+    slow_s = _median_s(fastapi_path, repeat)
+    fast_s = _median_s(fast_path, repeat)
+    per_10k = 10000 / max(len(rows), 1)
+    return {
+        "endpoint": name,
+        "rows": len(rows),
+        "bytes": {"fastapi": len(fastapi_path()), "fast": len(fast_path())},
+        "ms_per_10k": {"fastapi": round(slow_s * per_10k * 1000, 2), "fast": round(fast_s * per_10k * 1000, 2)},
+        "speedup": round(slow_s / fast_s, 1) if fast_s else None,
+        "same_data": _same(fast_path(), fastapi_path(), key),
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="List endpoint serialization benchmark")
+    parser.add_argument("--db", default=os.environ.get("VIGIL_BENCH_DB") or "/tmp/vigil-bench.db")
+    parser.add_argument("--rows", type=int, default=10000, help="rows fetched per endpoint")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default=None)
+    add_volume_args(parser)
+    args = parser.parse_args(argv)
+
+    manifest = seed(args.db, volumes_from_args(args), args.seed)
+    from ..storage import SQLiteBackend
+
+    store = SQLiteBackend(args.db)
+    datasets = [
+        ("/api/forensics", "events", store.list_forensics(company_id="default", limit=args.rows)),
+        ("/api/evidence", "evidence", store.list_evidence(company_id="default", limit=args.rows)),
+        ("/incidents/active", "incidents", store.list_active_incidents(company_id="default")[: args.rows]),
+    ]
+    runs = []
+    for name, key, rows in datasets:
+        r = run_one(name, key, rows, args.repeat)
+        print(json.dumps(r), file=sys.stderr)
+        runs.append(r)
+    same = all(r["same_data"] for r in runs)
+    report = {"volumes": manifest["volumes"], "all_same_data": same, "runs": runs}
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
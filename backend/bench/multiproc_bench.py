@@ -0,0 +1,196 @@
+"""
+Throughput scaling of the multi-process deployment from 1 to N workers.
+
+For each worker count, starts the API under uvicorn (real HTTP, separate
+processes) either in writer mode (python -m backend.writer --workers N:
+local reads, writes forwarded to the single writer) or, for comparison,
+as plain uvicorn workers all writing to the SQLite file directly. Client
+processes then drive a read/write mix for a fixed duration and the run
+reports requests/s, p50/p99 latency and errors (5xx such as "database is
+locked", or transport failures).
+
+    python -m backend.bench.multiproc_bench --workers 1,2,4 --clients 8 --duration 10
+    python -m backend.bench.multiproc_bench --modes writer --write-ratio 0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import secrets
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start(mode: str, workers: int, db_path: str, port: int, tmp: str) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.pop("VIGIL_STORAGE_URL", None)
+    env.update({"VIGIL_DB_PATH": db_path, "PYTHONWARNINGS": "ignore"})
+    env.setdefault("VIGIL_ADMISSION", "0")
+    if mode == "writer":
+        env["VIGIL_WRITER_AUTHKEY"] = secrets.token_hex(16)
+        cmd = [sys.executable, "-m", "backend.writer", "--db", db_path, "--socket", os.path.join(tmp, "w.sock"),
+               "--workers", str(workers), "--port", str(port)]
+    else:
+        # Same uvicorn launcher as writer mode, minus the writer
+        env["VIGIL_STORAGE_URL"] = f"sqlite:///{db_path}"
+        cmd = [sys.executable, "-c",
+               f"from backend.writer import run_workers; run_workers('127.0.0.1', {port}, {workers})"]
+    return subprocess.Popen(cmd, cwd=ROOT, env=env, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _wait_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/openapi.json")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"server on :{port} not ready")
+
+
+def _stop(proc: subprocess.Popen) -> None:
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=10)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+def _client(args: Tuple[int, int, float, float, str]) -> Dict[str, Any]:
+    port, client_id, duration, write_ratio, token = args
+    rng = random.Random(client_id)
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies: List[float] = []
+    errors = writes = 0
+    seq = 0
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        drone = f"MP-{rng.randrange(200):04d}"
+        if rng.random() < write_ratio:
+            writes += 1
+            seq += 1
+            kind = seq % 3
+            if kind == 0:
+                method, path, body = "POST", "/api/threats/run", {"drone_id": f"MP-{client_id}-{seq}", "threat_type": "gps_spoof"}
+            elif kind == 1:
+                method, path, body = "POST", "/api/evidence", {
+                    "framework_id": "faa_107", "control_id": "107.29", "evidence_type": "manual",
+                    "drone_id": drone, "attestation": "bench"}
+            else:
+                method, path, body = "POST", "/api/telemetry", {
+                    "samples": [{"drone_id": drone, "battery": 80, "link_quality": 70, "gps_health": 90}]}
+            payload = json.dumps(body)
+        else:
+            method, payload = "GET", None
+            path = rng.choice(
+                [f"/api/forensics?drone_id={drone}", f"/api/evidence?drone_id={drone}", "/api/incidents/active?limit=50"]
+            )
+        t0 = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status >= 500:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        latencies.append(time.perf_counter() - t0)
+    conn.close()
+    return {"latencies": latencies, "errors": errors, "writes": writes}
+
+
+def run_one(mode: str, workers: int, clients: int, duration: float, write_ratio: float, token: str) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "vigil.db")
+        port = _free_port()
+        proc = _start(mode, workers, db_path, port, tmp)
+        try:
+            _wait_ready(port)
+            with multiprocessing.Pool(clients) as pool:
+                t0 = time.perf_counter()
+                parts = pool.map(_client, [(port, i, duration, write_ratio, token) for i in range(clients)])
+                wall = time.perf_counter() - t0
+        finally:
+            _stop(proc)
+    latencies = sorted(x for p in parts for x in p["latencies"])
+    n = len(latencies)
+    return {
+        "mode": mode,
+        "workers": workers,
+        "requests": n,
+        "writes": sum(p["writes"] for p in parts),
+        "errors": sum(p["errors"] for p in parts),
+        "rps": round(n / wall, 1),
+        "p50_ms": round(latencies[n // 2] * 1000, 2) if n else None,
+        "p99_ms": round(latencies[min(n - 1, int(n * 0.99))] * 1000, 2) if n else None,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if n else None,
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Multi-process throughput scaling")
+    parser.add_argument("--workers", default=None, help="comma-separated worker counts (default 1..cpu_count)")
+    parser.add_argument("--modes", default="writer,direct")
+    parser.add_argument("--clients", type=int, default=8, help="load-generating client processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--write-ratio", type=float, default=0.3)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(ROOT))
+    from backend import auth
+
+    token = auth._make_token("admin", "Admin", "default")["token"]
+    counts = [int(x) for x in args.workers.split(",")] if args.workers else list(range(1, (os.cpu_count() or 1) + 1))
+    runs = []
+    for mode in args.modes.split(","):
+        base = None
+        for n in counts:
+            result = run_one(mode, n, args.clients, args.duration, args.write_ratio, token)
+            base = base or result["rps"]
+            result["scaling_vs_first"] = round(result["rps"] / base, 2) if base else None
+            runs.append(result)
+            print(json.dumps(result), file=sys.stderr)
+    report = {
+        "cpu_count": os.cpu_count(),
+        "clients": args.clients,
+        "duration_s": args.duration,
+        "write_ratio": args.write_ratio,
+        "runs": runs,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,168 @@
+"""
+List query cache under a poller workload.
+
+Seeds (or reuses) a benchmark database with backend.bench.seed and copies
+it twice. Against each copy it replays the same operation stream: reads of
+the views a dashboard polls (forensics and evidence, company-wide, per
+drone and per framework) mixed with writes (add_forensic_event,
+create_evidence, review_evidence) at --write-ratio. One copy is read with
+the cache off, the other with backend.querycache.QUERY_CACHE on.
+
+Reports read p50/p99 per mode, hit rate per query, and entries dropped by
+writes. Every read in the cached run is also compared with a direct db.py
+query, so stale results served after a write show up as "stale_reads".
+
+    python -m backend.bench.querycache_bench --db /tmp/vigil-bench.db --scale small
+    python -m backend.bench.querycache_bench --ops 20000 --write-ratio 0.05 --out qc.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from .seed import add_volume_args, drone_ids, seed, volumes_from_args
+
+COMPANY = "default"
+MAPPED_EVENT = "mitigation_action_executed"
+
+
+def _pct(samples: Sequence[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+
+def _copy(src: str, dst: str) -> None:
+    a, b = sqlite3.connect(src), sqlite3.connect(dst)
+    a.backup(b)
+    a.close()
+    b.close()
+
+
+def _views(drones: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+    views: List[Tuple[str, Dict[str, Any]]] = [
+        ("forensics", {"limit": 200}),
+        ("evidence", {"limit": 200}),
+        ("evidence", {"framework_id": "faa_107", "limit": 200}),
+    ]
+    for d in drones:
+        views.append(("forensics", {"drone_id": d, "limit": 200}))
+        views.append(("evidence", {"drone_id": d, "limit": 200}))
+    return views
+
+
+def _ops(n: int, write_ratio: float, views: int, drones: List[str], rng_seed: int) -> List[Tuple[str, Any]]:
+    rng = random.Random(rng_seed)
+    out: List[Tuple[str, Any]] = []
+    for _ in range(n):
+        if rng.random() < write_ratio:
+            out.append((rng.choice(("forensic", "forensic_mapped", "evidence", "review")), rng.choice(drones + [None])))
+        else:
+            # Pollers concentrate on the company-wide views
+            out.append(("read", min(int(rng.expovariate(0.35)), views - 1)))
+    return out
+
+
+def run(db_path: str, ops: List[Tuple[str, Any]], views: List[Tuple[str, Dict[str, Any]]], cached: bool) -> Dict[str, Any]:
+    from .. import db, querycache
+    from ..storage import SQLiteBackend
+
+    store = SQLiteBackend(db_path)
+    cache = querycache.QUERY_CACHE
+    cache.enabled = cached
+    cache.clear()
+    direct: Dict[str, Callable[..., List[Dict[str, Any]]]] = {"forensics": db.list_forensics, "evidence": db.list_evidence}
+    reader: Dict[str, Callable[..., List[Dict[str, Any]]]] = {"forensics": store.list_forensics, "evidence": store.list_evidence}
+
+    latencies: List[float] = []
+    stale = writes = 0
+    evidence_ids: List[int] = []
+    for kind, arg in ops:
+        if kind == "read":
+            query, filters = views[arg]
+            t0 = time.perf_counter()
+            rows = reader[query](company_id=COMPANY, **filters)
+            latencies.append((time.perf_counter() - t0) * 1e3)
+            if cached and rows != direct[query](company_id=COMPANY, **filters):
+                stale += 1
+            continue
+        writes += 1
+        if kind in ("forensic", "forensic_mapped"):
+            store.add_forensic_event(
+                company_id=COMPANY, drone_id=arg, incident_id=None, actor="bench",
+                event_type=MAPPED_EVENT if kind == "forensic_mapped" else "bench_event",
+                payload_json=json.dumps({"n": writes}),
+            )
+        elif kind == "evidence" or not evidence_ids:
+            row = store.create_evidence(
+                company_id=COMPANY, drone_id=arg, incident_id=None, framework_id="faa_107",
+                control_id="107.49", evidence_type="bench",
+            )
+            evidence_ids.append(row["id"])
+        else:
+            store.review_evidence(
+                company_id=COMPANY, evidence_id=evidence_ids[-1], review_status="approved", reviewed_by="bench",
+            )
+    stats = cache.stats()
+    return {
+        "cache": cached,
+        "reads": len(latencies),
+        "writes": writes,
+        "read_p50_ms": round(_pct(latencies, 0.50), 3),
+        "read_p99_ms": round(_pct(latencies, 0.99), 3),
+        "read_total_s": round(sum(latencies) / 1e3, 3),
+        "queries": stats["queries"] if cached else None,
+        "stale_reads": stale,
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="List query cache benchmark")
+    parser.add_argument("--db", default=os.environ.get("VIGIL_BENCH_DB") or "/tmp/vigil-bench.db")
+    parser.add_argument("--ops", type=int, default=5000)
+    parser.add_argument("--write-ratio", dest="write_ratio", type=float, default=0.02)
+    parser.add_argument("--drones", type=int, default=10, help="drones with per-drone views")
+    parser.add_argument("--out", default=None)
+    add_volume_args(parser)
+    args = parser.parse_args(argv)
+
+    volumes = volumes_from_args(args)
+    manifest = seed(args.db, volumes, args.seed)
+    drones = drone_ids(0, volumes)[: args.drones]
+    views = _views(drones)
+    ops = _ops(args.ops, args.write_ratio, len(views), drones, args.seed)
+
+    work = tempfile.mkdtemp(prefix="vigil-qc-")
+    runs = []
+    for cached in (False, True):
+        path = os.path.join(work, f"cache-{int(cached)}.db")
+        _copy(args.db, path)
+        r = run(path, ops, views, cached)
+        print(json.dumps(r), file=sys.stderr)
+        runs.append(r)
+
+    off, on = runs
+    report = {
+        "volumes": manifest["volumes"],
+        "ops": args.ops,
+        "write_ratio": args.write_ratio,
+        "views": len(views),
+        "runs": runs,
+        "speedup_total": round(off["read_total_s"] / on["read_total_s"], 1) if on["read_total_s"] else None,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    return 0 if on["stale_reads"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,143 @@
+"""
+"Last N samples" reads: per-drone ring buffers vs SQLite.
+
+Fills a fresh SQLite database and a backend.recent.RecentStore with the
+same telemetry (every drone reports once per tick), then times the two
+ways of serving GET /telemetry/{drone_id}/recent:
+
+    db    store.list_telemetry -> row dicts -> columns -> JSON
+    ring  RecentStore.window   -> columns straight from the typed arrays -> JSON
+
+Reports p50/p99 latency per read, checks both paths return identical
+columns, and measures ring memory per drone with tracemalloc against
+recent.bytes_per_drone().
+
+    python -m backend.bench.recent_bench
+    python -m backend.bench.recent_bench --drones 5000 --ticks 128 --n 60 --reads 5000 --out recent.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _pct(samples: Sequence[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def _tick(drones: List[str], tick: int, rng: random.Random) -> List[Dict[str, Any]]:
+    ts = (EPOCH + timedelta(seconds=tick)).isoformat()
+    return [
+        {
+            "company_id": "default",
+            "drone_id": d,
+            "status": "online" if rng.random() > 0.05 else "warning",
+            "battery": max(0, 100 - tick // 4),
+            "link_quality": rng.randint(60, 100),
+            "gps_health": rng.randint(70, 100),
+            "last_seen": ts,
+            "alt": round(rng.uniform(20, 150), 1),
+            "speed": round(rng.uniform(0, 20), 1),
+        }
+        for d in drones
+    ]
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Recent-window ring buffer benchmark")
+    parser.add_argument("--db", default=None, help="SQLite file to create (default: a temp file)")
+    parser.add_argument("--drones", type=int, default=2000)
+    parser.add_argument("--ticks", type=int, default=128, help="samples per drone")
+    parser.add_argument("--n", type=int, default=60, help="samples per read")
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="vigil-recent-"), "recent.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    from .. import recent
+    from ..storage import SQLiteBackend
+
+    store = SQLiteBackend(db_path)
+    store.init_schema()
+    ring_store = recent.RecentStore(capacity=max(args.ticks, args.n))
+    rng = random.Random(args.seed)
+    drones = [f"UA-{i:06d}" for i in range(args.drones)]
+
+    db_s = ring_s = 0.0
+    for tick in range(args.ticks):
+        batch = _tick(drones, tick, rng)
+        t0 = time.perf_counter()
+        store.ingest_telemetry(batch)
+        t1 = time.perf_counter()
+        ring_store.observe("default", batch)
+        t2 = time.perf_counter()
+        db_s += t1 - t0
+        ring_s += t2 - t1
+    samples = args.drones * args.ticks
+
+    # Memory: the same fill into a second store, traced, batches built before tracing starts
+    batches = [_tick(drones, tick, rng) for tick in range(ring_store.capacity)]
+    measured = recent.RecentStore(capacity=ring_store.capacity)
+    tracemalloc.start()
+    for batch in batches:
+        measured.observe("default", batch)
+    ring_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del batches, measured
+
+    timings: Dict[str, List[float]] = {"db": [], "ring": []}
+    mismatches = 0
+    body_bytes = 0
+    for _ in range(args.reads):
+        d = drones[rng.randrange(len(drones))]
+        t0 = time.perf_counter()
+        db_body = recent.encode(d, "db", recent.columns_from_rows(store.list_telemetry("default", d, args.n)))
+        t1 = time.perf_counter()
+        ring_cols = ring_store.window(store, "default", d, args.n)
+        ring_body = recent.encode(d, "db", ring_cols)
+        t2 = time.perf_counter()
+        timings["db"].append((t1 - t0) * 1e6)
+        timings["ring"].append((t2 - t1) * 1e6)
+        mismatches += db_body != ring_body
+        body_bytes = len(ring_body)
+
+    result = {
+        "drones": args.drones,
+        "samples_per_drone": args.ticks,
+        "n": args.n,
+        "reads": args.reads,
+        "response_bytes": body_bytes,
+        "read_p50_us": {k: round(_pct(v, 0.50), 1) for k, v in timings.items()},
+        "read_p99_us": {k: round(_pct(v, 0.99), 1) for k, v in timings.items()},
+        "speedup_p50": round(_pct(timings["db"], 0.50) / max(_pct(timings["ring"], 0.50), 1e-3), 1),
+        "ingest_us_per_sample": {"db": round(db_s / samples * 1e6, 2), "ring": round(ring_s / samples * 1e6, 2)},
+        "ring_bytes_per_drone": {
+            "measured": round(ring_bytes / args.drones),
+            "bytes_per_drone": recent.bytes_per_drone(ring_store.capacity),
+        },
+        "mismatched_reads": mismatches,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, indent=2))
+    print(json.dumps(result, indent=2))
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
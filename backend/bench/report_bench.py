@@ -0,0 +1,120 @@
+"""
+Streamed report throughput and memory, by report size.
+
+Seeds (or reuses) a benchmark database with backend.bench.seed and runs the
+incident, forensics and evidence reports for the "default" company over
+growing date windows (1, 7, 30 and all days of the seeded range), in each
+format. Per run it records rows, bytes, rows/s and the tracemalloc peak
+while the report is generated. The streamed peak should stay flat as the
+window grows; the "materialized" mode (all rows fetched into a list first,
+as list endpoints do) is included for contrast.
+
+    python -m backend.bench.report_bench --db /tmp/vigil-bench.db --scale medium
+    python -m backend.bench.report_bench --reports forensics --formats ndjson --out reports.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+from .seed import EPOCH, add_volume_args, seed, volumes_from_args
+
+WINDOWS = (1, 7, 30, None)  # days from the start of the seeded range; None = everything
+FLAT_TOLERANCE = 1.5  # all-days peak may be at most this multiple of the first steady-state peak
+
+
+def _scan(store: Any, report: str) -> Callable[..., Iterator[Dict[str, Any]]]:
+    return {"incidents": store.iter_incidents, "forensics": store.iter_forensics, "evidence": store.iter_evidence}[report]
+
+
+def run_one(store: Any, report: str, fmt: str, days: Any, materialize: bool) -> Dict[str, Any]:
+    from .. import reports
+
+    columns = {
+        "incidents": reports.INCIDENT_COLUMNS,
+        "forensics": reports.FORENSICS_COLUMNS,
+        "evidence": reports.EVIDENCE_COLUMNS,
+    }[report]
+    filters: Dict[str, Any] = {"company_id": "default"}
+    if days is not None:
+        filters["date_from"] = EPOCH.strftime("%Y-%m-%d")
+        filters["date_to"] = (EPOCH + timedelta(days=days - 1)).strftime("%Y-%m-%d")
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    rows: Any = _scan(store, report)(**filters)
+    if materialize:
+        rows = list(rows)
+    n_rows = 0
+
+    def counted(it: Any) -> Iterator[Dict[str, Any]]:
+        nonlocal n_rows
+        for row in it:
+            n_rows += 1
+            yield row
+
+    body = reports.encode_csv(counted(rows), columns) if fmt == "csv" else reports.encode_ndjson(counted(rows))
+    n_bytes = sum(len(chunk) for chunk in body)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "report": report,
+        "format": fmt,
+        "mode": "materialized" if materialize else "streamed",
+        "days": days or "all",
+        "rows": n_rows,
+        "bytes": n_bytes,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(n_rows / elapsed) if elapsed else None,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Streamed report benchmark")
+    parser.add_argument("--db", default=os.environ.get("VIGIL_BENCH_DB") or "/tmp/vigil-bench.db")
+    parser.add_argument("--reports", default="incidents,forensics,evidence")
+    parser.add_argument("--formats", default="csv,ndjson")
+    parser.add_argument("--no-materialized", action="store_true", help="skip the list-first comparison runs")
+    parser.add_argument("--out", default=None)
+    add_volume_args(parser)
+    args = parser.parse_args(argv)
+
+    manifest = seed(args.db, volumes_from_args(args), args.seed)
+    from ..db import REPORT_FETCH_SIZE
+    from ..storage import SQLiteBackend
+
+    store = SQLiteBackend(args.db)
+    runs = []
+    flat = True
+    for report in args.reports.split(","):
+        for fmt in args.formats.split(","):
+            modes = (False,) if args.no_materialized else (False, True)
+            for materialize in modes:
+                series = [run_one(store, report, fmt, days, materialize) for days in WINDOWS]
+                for r in series:
+                    print(json.dumps(r), file=sys.stderr)
+                runs.extend(series)
+                # Windows smaller than a couple of cursor fetches never reach
+                # the steady state (one fetch batch plus one encoded chunk)
+                steady = [r for r in series if r["rows"] >= 2 * REPORT_FETCH_SIZE]
+                if not materialize and len(steady) > 1 and steady[-1]["peak_kib"] > FLAT_TOLERANCE * steady[0]["peak_kib"]:
+                    flat = False
+    report = {"volumes": manifest["volumes"], "flat_tolerance": FLAT_TOLERANCE, "streamed_memory_flat": flat, "runs": runs}
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+    print(json.dumps({k: v for k, v in report.items() if k != "runs"}, indent=2))
+    return 0 if flat else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,310 @@
+"""
+Deterministic dataset seeding for benchmarks.
+
+Creates (or reuses) a SQLite database with the app schema and bulk-loads
+companies, drones, incidents, forensic events, evidence and telemetry at
+configurable volumes. The same --seed and volumes always produce the same
+rows, so results are comparable across commits. A manifest is written next
+to the database (<db>.seed.json); a database whose manifest matches the
+requested volumes is reused instead of re-seeded.
+
+    python -m backend.bench.seed --db /tmp/vigil-bench.db --scale medium
+    python -m backend.bench.seed --db /tmp/vigil-bench.db --forensics 5000000 --evidence 2000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .. import db
+
+BATCH = 50000
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+THREATS = ("gps_spoof", "rf_link_hijack", "firmware_tamper")
+EVENT_TYPES = (
+    "simulation_started",
+    "incident_created",
+    "mitigation_action_executed",
+    "incident_closed",
+    "operator_assigned",
+    "signal_correlated",
+    "anomaly_detected",
+)
+CONTROLS = (("faa_107", "107.12"), ("faa_107", "107.21"), ("faa_107", "107.49"), ("faa_107", "107.29"))
+REVIEW_STATES = ("pending", "accepted", "rejected")
+
+
+@dataclass(frozen=True)
+class Volumes:
+    companies: int = 3
+    drones_per_company: int = 50
+    incidents: int = 5000
+    forensics: int = 200000
+    evidence: int = 50000
+    telemetry: int = 100000
+    days: int = 90
+    active_fraction: float = 0.2
+
+    def company_ids(self) -> List[str]:
+        # "default" is the tenant the built-in users belong to
+        return ["default"] + [f"company-{i:03d}" for i in range(1, self.companies)]
+
+
+SCALES: Dict[str, Volumes] = {
+    "small": Volumes(),
+    "medium": Volumes(companies=10, drones_per_company=200, incidents=50000, forensics=1000000, evidence=500000, telemetry=1000000),
+    "large": Volumes(companies=20, drones_per_company=500, incidents=200000, forensics=5000000, evidence=2000000, telemetry=5000000),
+}
+
+
+def drone_ids(company_index: int, volumes: Volumes) -> List[str]:
+    return [f"UA-{company_index:03d}-{n:04d}" for n in range(volumes.drones_per_company)]
+
+
+def _ts(rng: random.Random, days: int) -> str:
+    return (EPOCH + timedelta(seconds=rng.random() * days * 86400)).isoformat()
+
+
+def _batched(rows: Iterator[Tuple[Any, ...]], size: int = BATCH) -> Iterator[List[Tuple[Any, ...]]]:
+    batch: List[Tuple[Any, ...]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _incident_rows(rng: random.Random, v: Volumes) -> Iterator[Tuple[Any, ...]]:
+    companies = v.company_ids()
+    for n in range(v.incidents):
+        ci = n % len(companies)
+        threat = THREATS[rng.randrange(len(THREATS))]
+        created = _ts(rng, v.days)
+        roll = rng.random()
+        status = "active" if roll < v.active_fraction else ("mitigated" if roll < v.active_fraction + 0.2 else "closed")
+        yield (
+            f"INC-{n:012x}",
+            companies[ci],
+            f"UA-{ci:03d}-{rng.randrange(v.drones_per_company):04d}",
+            threat,
+            "critical" if threat == "rf_link_hijack" else "high",
+            threat.replace("_", " ").title(),
+            status,
+            rng.random() < 0.5,
+            created,
+            created,
+            json.dumps({"source": "bench_seed"}),
+            "rtl" if status != "active" else None,
+            created if status != "active" else None,
+            created if status == "closed" else None,
+            "operator1",
+            1 if status == "active" else 2 if status == "mitigated" else 3,
+        )
+
+
+def _forensic_rows(rng: random.Random, v: Volumes) -> Iterator[Tuple[Any, ...]]:
+    companies = v.company_ids()
+    for n in range(v.forensics):
+        ci = n % len(companies)
+        event_type = EVENT_TYPES[rng.randrange(len(EVENT_TYPES))]
+        incident = f"INC-{rng.randrange(max(v.incidents, 1)):012x}" if event_type != "operator_assigned" else None
+        yield (
+            _ts(rng, v.days),
+            companies[ci],
+            f"UA-{ci:03d}-{rng.randrange(v.drones_per_company):04d}",
+            incident,
+            event_type,
+            "admin" if rng.random() < 0.5 else "operator1",
+            THREATS[rng.randrange(len(THREATS))],
+            "ok",
+            json.dumps({"training": True, "seq": n}),
+        )
+
+
+def _evidence_rows(rng: random.Random, v: Volumes) -> Iterator[Tuple[Any, ...]]:
+    companies = v.company_ids()
+    for n in range(v.evidence):
+        ci = n % len(companies)
+        framework_id, control_id = CONTROLS[rng.randrange(len(CONTROLS))]
+        org_level = rng.random() < 0.1
+        drone = None if org_level else f"UA-{ci:03d}-{rng.randrange(v.drones_per_company):04d}"
+        incident = f"INC-{rng.randrange(max(v.incidents, 1)):012x}"
+        yield (
+            companies[ci],
+            drone,
+            incident,
+            framework_id,
+            control_id,
+            "incident_closed",
+            rng.randrange(max(v.forensics, 1)) + 1,
+            incident,
+            _ts(rng, v.days),
+            REVIEW_STATES[rng.randrange(len(REVIEW_STATES))],
+        )
+
+
+def _telemetry_rows(rng: random.Random, v: Volumes) -> Iterator[Tuple[Any, ...]]:
+    companies = v.company_ids()
+    per_drone = max(1, v.telemetry // max(len(companies) * v.drones_per_company, 1))
+    written = 0
+    for step in range(per_drone):
+        ts = (EPOCH + timedelta(seconds=step)).isoformat()
+        for ci, company in enumerate(companies):
+            for d in range(v.drones_per_company):
+                if written >= v.telemetry:
+                    return
+                written += 1
+                yield (
+                    company,
+                    f"UA-{ci:03d}-{d:04d}",
+                    "online",
+                    rng.randrange(20, 101),
+                    rng.randrange(40, 101),
+                    rng.randrange(50, 101),
+                    ts,
+                )
+
+
+INSERTS = {
+    "incidents": (
+        """
+        INSERT INTO incidents (
+            incident_id, company_id, drone_id, threat_type, severity, title, status, training,
+            created_at, updated_at, details, mitigated_action, mitigated_at, closed_at, operator, version
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        _incident_rows,
+    ),
+    # forensics_events is a view over event_log; rows go through db.EventEncoder
+    "forensics_events": (db.EVENT_LOG_INSERT, _forensic_rows),
+    "evidence_registry": (
+        """
+        INSERT INTO evidence_registry (
+            company_id, drone_id, incident_id, framework_id, control_id, evidence_type,
+            source_event_id, reference_id, created_at, review_status
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        _evidence_rows,
+    ),
+    "telemetry": (
+        """
+        INSERT INTO telemetry (company_id, drone_id, status, battery, link_quality, gps_health, last_seen)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        _telemetry_rows,
+    ),
+}
+
+
+def _manifest_path(path: Path) -> Path:
+    return path.with_name(path.name + ".seed.json")
+
+
+def seed(path: str, volumes: Volumes, rng_seed: int = 1, force: bool = False) -> Dict[str, Any]:
+    """Seed (or reuse) the database at path; returns the manifest."""
+    target = Path(path)
+    wanted = {"volumes": asdict(volumes), "seed": rng_seed}
+    manifest_file = _manifest_path(target)
+    if not force and target.exists() and manifest_file.exists():
+        manifest = json.loads(manifest_file.read_text())
+        if {k: manifest.get(k) for k in wanted} == wanted:
+            manifest["reused"] = True
+            return manifest
+
+    for stale in (target, Path(str(target) + "-wal"), Path(str(target) + "-shm"), manifest_file):
+        if stale.exists():
+            stale.unlink()
+    previous, db.DB_PATH = db.DB_PATH, target
+    try:
+        db.init_db()
+    finally:
+        db.DB_PATH = previous
+
+    timings: Dict[str, float] = {}
+    conn = sqlite3.connect(target)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    try:
+        for table, (sql, rows) in INSERTS.items():
+            rng = random.Random(f"{rng_seed}:{table}")
+            t0 = time.perf_counter()
+            encoder = db.EventEncoder(conn) if table == "forensics_events" else None
+            for batch in _batched(rows(rng, volumes)):
+                conn.executemany(sql, [encoder.row(*r) for r in batch] if encoder else batch)
+                conn.commit()
+            timings[table] = round(time.perf_counter() - t0, 3)
+        companies = volumes.company_ids()
+        now = EPOCH.isoformat()
+        conn.executemany(
+            "INSERT OR IGNORE INTO zerotrust_policy (company_id, policy_json, updated_at) VALUES (?, '{}', ?)",
+            [(c, now) for c in companies],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO drone_assignments (drone_id, operator, assigned_at, assigned_by) VALUES (?, 'operator1', ?, 'admin')",
+            [(d, now) for ci in range(len(companies)) for d in drone_ids(ci, volumes)[::5]],
+        )
+        conn.commit()
+        t0 = time.perf_counter()
+        conn.execute("ANALYZE")
+        timings["analyze"] = round(time.perf_counter() - t0, 3)
+    finally:
+        conn.close()
+
+    manifest = {
+        **wanted,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "seconds": timings,
+        "bytes": target.stat().st_size,
+        "reused": False,
+    }
+    manifest_file.write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def volumes_from_args(args: argparse.Namespace) -> Volumes:
+    volumes = SCALES[args.scale]
+    overrides = {
+        name: getattr(args, name)
+        for name in ("companies", "drones_per_company", "incidents", "forensics", "evidence", "telemetry", "days")
+        if getattr(args, name, None) is not None
+    }
+    return replace(volumes, **overrides)
+
+
+def add_volume_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--scale", default="small", choices=sorted(SCALES))
+    parser.add_argument("--companies", type=int, default=None)
+    parser.add_argument("--drones-per-company", dest="drones_per_company", type=int, default=None)
+    parser.add_argument("--incidents", type=int, default=None)
+    parser.add_argument("--forensics", type=int, default=None)
+    parser.add_argument("--evidence", type=int, default=None)
+    parser.add_argument("--telemetry", type=int, default=None)
+    parser.add_argument("--days", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Seed a benchmark database")
+    parser.add_argument("--db", default=os.environ.get("VIGIL_DB_PATH") or "/tmp/vigil-bench.db")
+    parser.add_argument("--force", action="store_true", help="re-seed even if the manifest matches")
+    add_volume_args(parser)
+    args = parser.parse_args(argv)
+    manifest = seed(args.db, volumes_from_args(args), args.seed, force=args.force)
+    print(json.dumps(manifest, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
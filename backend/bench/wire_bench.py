@@ -0,0 +1,124 @@
+"""
+Wire formats and compression levels for list responses.
+
+Seeds (or reuses) a benchmark database with backend.bench.seed, takes a
+forensics and an evidence list response (--rows rows each) and measures:
+
+    formats      JSON (orjson, payload_json spliced) vs MessagePack vs CBOR:
+                 encode time and size
+    compression  gzip and brotli at the levels of the size/level policy in
+                 backend/responses.py (and level 6/4 for contrast): time,
+                 ratio and throughput, one-shot and chunked with a flush per
+                 chunk as the middleware does for streamed bodies
+
+    python -m backend.bench.wire_bench --db /tmp/vigil-bench.db --scale small
+    python -m backend.bench.wire_bench --rows 2000 --out wire.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from .seed import add_volume_args, seed, volumes_from_args
+
+LEVELS = {"gzip": (1, 6), "br": (1, 4)}
+STREAM_CHUNK = 64 * 1024
+
+
+def _median_ms(fn: Callable[[], Any], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return round(statistics.median(times) * 1000, 2)
+
+
+def run_formats(content: Dict[str, Any], repeat: int) -> List[Dict[str, Any]]:
+    from .. import responses
+
+    out = []
+    for fmt in ("json", "msgpack", "cbor"):
+        if fmt != "json" and responses._lib(fmt) is None:
+            continue
+        body = responses.encode(content, fmt)
+        out.append({"format": fmt, "bytes": len(body), "encode_ms": _median_ms(lambda: responses.encode(content, fmt), repeat)})
+    return out
+
+
+def run_compression(body: bytes, repeat: int) -> List[Dict[str, Any]]:
+    from .. import responses
+
+    out = []
+    for encoding, levels in LEVELS.items():
+        if encoding == "br" and responses._lib("br") is None:
+            continue
+        for level in levels:
+            def one_shot() -> bytes:
+                c = responses._Compressor(encoding, level)
+                return c.chunk(body) + c.finish()
+
+            def chunked() -> int:
+                c = responses._Compressor(encoding, level)
+                n = sum(len(c.chunk(body[i:i + STREAM_CHUNK])) for i in range(0, len(body), STREAM_CHUNK))
+                return n + len(c.finish())
+
+            ms = _median_ms(one_shot, repeat)
+            out.append({
+                "encoding": encoding,
+                "level": level,
+                "ratio": round(len(one_shot()) / len(body), 3),
+                "ms": ms,
+                "mb_per_s": round(len(body) / 1e6 / (ms / 1000), 1) if ms else None,
+                "chunked_ratio": round(chunked() / len(body), 3),
+                "policy_level": responses.compress_level(encoding, len(body)) == level,
+            })
+    return out
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Wire format and compression benchmark")
+    parser.add_argument("--db", default=os.environ.get("VIGIL_BENCH_DB") or "/tmp/vigil-bench.db")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default=None)
+    add_volume_args(parser)
+    args = parser.parse_args(argv)
+
+    manifest = seed(args.db, volumes_from_args(args), args.seed)
+    from ..responses import dumps, splice_rows
+    from ..storage import SQLiteBackend
+
+    store = SQLiteBackend(args.db)
+    datasets = {
+        "forensics": {"ok": True, "events": splice_rows(store.list_forensics(company_id="default", limit=args.rows))},
+        "evidence": {"ok": True, "evidence": store.list_evidence(company_id="default", limit=args.rows)},
+    }
+    runs = []
+    for name, content in datasets.items():
+        body = dumps(content)
+        r = {
+            "dataset": name,
+            "rows": len(next(v for k, v in content.items() if k != "ok")),
+            "json_bytes": len(body),
+            "formats": run_formats(content, args.repeat),
+            "compression": run_compression(body, args.repeat),
+        }
+        print(json.dumps(r), file=sys.stderr)
+        runs.append(r)
+    report = {"volumes": manifest["volumes"], "runs": runs}
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from .db import EXPORT_KEYS
+from .metrics import REGISTRY
+from .storage import StorageBackend, get_storage
+
+# =========================================================
+# Columnar exports (Parquet / Arrow IPC) for offline analytics
+# =========================================================
+# Writes forensics_events, incidents, evidence_registry and telemetry as
+# typed columnar files, Hive-partitioned by company and day:
+#
+#   <out>/<table>/company_id=<c>/day=<YYYY-MM-DD>/part-<run>-<n>.parquet
+#
+# Rows come from StorageBackend.iter_export_rows() (batched cursor reads)
+# and are written EXPORT_BATCH_ROWS at a time, one row group per partition
+# per batch, so memory is bounded by the batch size, not the table.
+#
+# Exports are incremental: <out>/_export_state.json keeps the last exported
+# key per table (and company, for --company runs) and the next run resumes
+# after it, so a nightly sync only moves new rows. Append-only tables are
+# keyed by id. Incidents are keyed by (updated_at, incident_id): an
+# incident that changed since the last run is written again, so readers
+# keep the latest updated_at per incident_id. Evidence review state is
+# captured as of export; run with --full to rebuild a table from scratch.
+#
+# Files are written under a dot-prefixed temporary name (skipped by Arrow
+# dataset readers) and only renamed, and the watermark advanced, once the
+# whole run succeeds.
+#
+# pyarrow is imported on first use; the API never needs it.
+# =========================================================
+
+EXPORT_FORMATS = ("parquet", "arrow")
+EXPORT_BATCH_ROWS = int(os.environ.get("VIGIL_EXPORT_BATCH_ROWS", "50000"))
+PARQUET_COMPRESSION = os.environ.get("VIGIL_EXPORT_PARQUET_COMPRESSION", "zstd")
+STATE_FILE = "_export_state.json"
+ALL_COMPANIES = "*"
+
+EXPORT_ROWS = REGISTRY.counter("columnar_export_rows_total", "Rows written to columnar exports", ("table",))
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    name: str
+    day_column: str
+    columns: Tuple[Tuple[str, str], ...]  # (column, "int" | "float" | "str" | "ts")
+
+
+TABLES: Dict[str, ExportTable] = {
+    t.name: t
+    for t in (
+        ExportTable(
+            "forensics_events",
+            "ts",
+            (
+                ("id", "int"), ("ts", "ts"), ("company_id", "str"), ("drone_id", "str"), ("incident_id", "str"),
+                ("event_type", "str"), ("actor", "str"), ("action", "str"), ("result", "str"), ("payload_json", "str"),
+            ),
+        ),
+        ExportTable(
+            "incidents",
+            "created_at",
+            (
+                ("incident_id", "str"), ("company_id", "str"), ("drone_id", "str"), ("threat_type", "str"),
+                ("severity", "str"), ("title", "str"), ("status", "str"), ("training", "int"),
+                ("created_at", "ts"), ("updated_at", "ts"), ("details", "str"), ("mitigated_action", "str"),
+                ("mitigated_at", "ts"), ("closed_at", "ts"), ("operator", "str"), ("version", "int"),
+            ),
+        ),
+        ExportTable(
+            "evidence_registry",
+            "created_at",
+            (
+                ("id", "int"), ("company_id", "str"), ("drone_id", "str"), ("incident_id", "str"),
+                ("framework_id", "str"), ("control_id", "str"), ("evidence_type", "str"), ("source_event_id", "int"),
+                ("reference_id", "str"), ("created_at", "ts"), ("attestation", "str"), ("review_status", "str"),
+                ("reviewed_by", "str"), ("reviewed_at", "ts"), ("review_note", "str"),
+            ),
+        ),
+        ExportTable(
+            "telemetry",
+            "last_seen",
+            (
+                ("id", "int"), ("company_id", "str"), ("drone_id", "str"), ("status", "str"), ("battery", "int"),
+                ("link_quality", "int"), ("gps_health", "int"), ("last_seen", "ts"), ("lat", "float"),
+                ("lon", "float"), ("alt", "float"), ("speed", "float"),
+            ),
+        ),
+    )
+}
+
+pa: Any = None  # pyarrow, imported by the first export
+
+
+def _import_arrow() -> None:
+    global pa
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.ipc  # noqa: F401
+            import pyarrow.parquet  # noqa: F401
+        except ImportError as exc:
+            raise ImportError("Columnar export requires 'pyarrow'") from exc
+        pa = pyarrow
+
+
+def arrow_schema(table: ExportTable) -> Any:
+    _import_arrow()
+    types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "ts": pa.timestamp("us", tz="UTC")}
+    return pa.schema([(name, types[kind]) for name, kind in table.columns])
+
+
+def _ts(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _float(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value: Any) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_CONVERT: Dict[str, Callable[[Any], Any]] = {
+    "int": _int, "float": _float, "str": lambda v: None if v is None else str(v), "ts": _ts,
+}
+
+
+def to_arrow(table: ExportTable, rows: Sequence[Dict[str, Any]], schema: Any) -> Any:
+    """Row dicts -> pyarrow.Table with the export schema (columns built once each)."""
+    columns = {name: [_CONVERT[kind](r.get(name)) for r in rows] for name, kind in table.columns}
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+def _partition(table: ExportTable, row: Dict[str, Any]) -> Tuple[str, str]:
+    day = str(row.get(table.day_column) or "")[:10] or "unknown"
+    return str(row.get("company_id") or "unknown"), day
+
+
+def _partition_dir(out_dir: Path, table: str, company_id: str, day: Optional[str] = None) -> Path:
+    # Partition values are escaped so a company id can never leave its directory
+    path = out_dir / table / f"company_id={quote(company_id, safe='')}"
+    return path / f"day={day}" if day else path
+
+
+class _PartWriter:
+    def __init__(self, path: Path, schema: Any, fmt: str):
+        self.path = path
+        self.tmp = path.with_name(f".{path.name}.tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._sink = None
+        if fmt == "parquet":
+            self._writer = pa.parquet.ParquetWriter(str(self.tmp), schema, compression=PARQUET_COMPRESSION)
+        else:
+            self._sink = pa.OSFile(str(self.tmp), "wb")
+            self._writer = pa.ipc.new_file(self._sink, schema)
+        self.rows = 0
+        self.closed = False
+
+    def write(self, table: Any) -> None:
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self) -> None:
+        if not self.closed:
+            self._writer.close()
+            if self._sink is not None:
+                self._sink.close()
+            self.closed = True
+
+    def discard(self) -> None:
+        try:
+            self.close()
+        finally:
+            self.tmp.unlink(missing_ok=True)
+
+
+def load_state(out_dir: Path) -> Dict[str, Any]:
+    path = out_dir / STATE_FILE
+    if not path.exists():
+        return {"watermarks": {}}
+    return json.loads(path.read_text())
+
+
+def _save_state(out_dir: Path, state: Dict[str, Any]) -> None:
+    path = out_dir / STATE_FILE
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def export_table(
+    store: StorageBackend,
+    table: str,
+    out_dir: Path,
+    *,
+    fmt: str = "parquet",
+    company_id: Optional[str] = None,
+    full: bool = False,
+    batch_rows: int = EXPORT_BATCH_ROWS,
+) -> Dict[str, Any]:
+    """
+    Export the rows of `table` written since the last run into `out_dir`.
+    Returns a summary (rows, files, bytes, old and new watermark).
+    """
+    if table not in TABLES:
+        raise ValueError(f"unknown export table: {table}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    spec = TABLES[table]
+    schema = arrow_schema(spec)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    state = load_state(out_dir)
+    scope = company_id or ALL_COMPANIES
+    marks = state["watermarks"].setdefault(table, {})
+    after = None if full else marks.get(scope)
+
+    t0 = time.perf_counter()
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    ext = "parquet" if fmt == "parquet" else "arrow"
+    key_columns = EXPORT_KEYS[table]
+    open_writers: Dict[Tuple[str, str], _PartWriter] = {}
+    finished: List[_PartWriter] = []
+    batch: List[Dict[str, Any]] = []
+    last_key: Optional[List[Any]] = None
+    total = 0
+
+    def flush() -> None:
+        groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for row in batch:
+            groups.setdefault(_partition(spec, row), []).append(row)
+        for part, rows in groups.items():
+            writer = open_writers.get(part)
+            if writer is None:
+                seq = len(finished) + len(open_writers)
+                path = _partition_dir(out_dir, table, *part) / f"part-{run_id}-{seq:05d}.{ext}"
+                writer = open_writers[part] = _PartWriter(path, schema, fmt)
+            writer.write(to_arrow(spec, rows, schema))
+        # Rows arrive in key order, which tracks time: partitions this batch
+        # did not touch are done, so at most a few files are open at once
+        for part in [p for p in open_writers if p not in groups]:
+            writer = open_writers.pop(part)
+            writer.close()
+            finished.append(writer)
+        EXPORT_ROWS.labels(table).inc(len(batch))
+        batch.clear()
+
+    try:
+        for row in store.iter_export_rows(table, company_id=company_id, after=after):
+            batch.append(row)
+            if len(batch) >= batch_rows:
+                last_key = [batch[-1][c] for c in key_columns]
+                total += len(batch)
+                flush()
+        if batch:
+            last_key = [batch[-1][c] for c in key_columns]
+            total += len(batch)
+            flush()
+        for writer in open_writers.values():
+            writer.close()
+            finished.append(writer)
+        open_writers.clear()
+    except BaseException:
+        for writer in [*finished, *open_writers.values()]:
+            writer.discard()
+        raise
+
+    if full:
+        # Replace what this scope exported before; nothing is removed until
+        # the new files are complete
+        stale = _partition_dir(out_dir, table, company_id) if company_id else out_dir / table
+        keep = {w.tmp for w in finished}
+        for path in stale.rglob("*") if stale.exists() else ():
+            if path.is_file() and path not in keep:
+                path.unlink()
+    for writer in finished:
+        os.replace(writer.tmp, writer.path)
+    if last_key is not None:
+        marks[scope] = last_key
+    elif full:
+        marks.pop(scope, None)
+    _save_state(out_dir, state)
+    return {
+        "table": table,
+        "format": fmt,
+        "scope": scope,
+        "rows": total,
+        "files": len(finished),
+        "bytes": sum(w.path.stat().st_size for w in finished),
+        "after": after,
+        "watermark": marks.get(scope),
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def export_tables(
+    store: StorageBackend,
+    out_dir: Path,
+    tables: Sequence[str] = tuple(TABLES),
+    **kwargs: Any,
+) -> List[Dict[str, Any]]:
+    return [export_table(store, table, out_dir, **kwargs) for table in tables]
+
+
+def prune_empty_dirs(root: Path) -> None:
+    for path in sorted((p for p in root.rglob("*") if p.is_dir()), key=lambda p: len(p.parts), reverse=True):
+        if not any(path.iterdir()):
+            path.rmdir()
+
+
+# ---------------------------------------------------------
+# CLI: nightly sync
+# ---------------------------------------------------------
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Columnar (Parquet / Arrow IPC) export for offline analytics")
+    parser.add_argument("--out", required=True, help="export root directory")
+    parser.add_argument("--format", dest="fmt", choices=EXPORT_FORMATS, default="parquet")
+    parser.add_argument("--tables", default=",".join(TABLES), help="comma-separated tables")
+    parser.add_argument("--company", default=None, help="export one company only (tracked separately)")
+    parser.add_argument("--full", action="store_true", help="ignore the watermark and rewrite the tables")
+    parser.add_argument("--batch-rows", type=int, default=EXPORT_BATCH_ROWS)
+    args = parser.parse_args(argv)
+
+    store = get_storage()
+    store.init_schema()
+    out_dir = Path(args.out)
+    results = export_tables(
+        store,
+        out_dir,
+        [t for t in args.tables.split(",") if t],
+        fmt=args.fmt,
+        company_id=args.company,
+        full=args.full,
+        batch_rows=args.batch_rows,
+    )
+    if args.full:
+        prune_empty_dirs(out_dir)
+    for result in results:
+        print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .storage import StorageBackend
+
+# =========================================================
+# Incident correlation (signal de-duplication)
+# =========================================================
+# CORRELATION indexes active incidents by (company_id, drone_id,
+# threat_type), separately for training drills and real signals so the two
+# never fold into each other. A new signal for a key whose incident saw its
+# last signal less than WINDOW_SECONDS ago is folded into that incident as
+# a signal_correlated forensic event instead of opening a new INC- row.
+#
+# - First use per company loads its active incidents from the store, so a
+#   restarted worker keeps correlating against existing rows. Their last
+#   signal time and folded counts come from the rows and their
+#   signal_correlated events, never from the time of the restart.
+# - Transitions out of "active" drop the entry (resolve()).
+# - An entry older than REVALIDATE_SECONDS re-reads its incident status
+#   before folding, which catches mitigations made by other workers.
+# - The index lock only guards the in-memory maps. Warm-up (serialized per
+#   company) and revalidation read the store without it, so one tenant's
+#   database I/O never stalls claims for the others.
+# =========================================================
+
+WINDOW_SECONDS = float(os.environ.get("VIGIL_CORRELATION_WINDOW_SECONDS", "900"))
+REVALIDATE_SECONDS = float(os.environ.get("VIGIL_CORRELATION_REVALIDATE_SECONDS", "5"))
+TOP_INCIDENTS = 20
+
+Key = Tuple[str, Optional[str], str, bool]
+
+
+@dataclass
+class CorrelatedIncident:
+    incident_id: str
+    company_id: str
+    drone_id: Optional[str]
+    threat_type: str
+    training: bool
+    last_signal_at: float
+    checked_at: float
+    folded: int = 0
+
+
+class CorrelationIndex:
+    def __init__(self, window_s: float = WINDOW_SECONDS, revalidate_s: float = REVALIDATE_SECONDS):
+        self.window_s = window_s
+        self.revalidate_s = revalidate_s
+        self._entries: Dict[Key, CorrelatedIncident] = {}
+        self._by_incident: Dict[str, Key] = {}
+        self._warmed: Set[str] = set()
+        self._folded: Dict[str, Counter] = {}
+        self._lock = threading.RLock()
+        self._warm_locks: Dict[str, threading.Lock] = {}
+
+    def _put(self, entry: CorrelatedIncident) -> None:
+        key = (entry.company_id, entry.drone_id, entry.threat_type, entry.training)
+        old = self._entries.get(key)
+        if old is not None:
+            self._by_incident.pop(old.incident_id, None)
+        self._entries[key] = entry
+        self._by_incident[entry.incident_id] = key
+
+    def _drop(self, key: Key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._by_incident.pop(entry.incident_id, None)
+
+    def _warm(self, store: StorageBackend, company_id: str) -> None:
+        if company_id in self._warmed:
+            return
+        with self._lock:
+            warm_lock = self._warm_locks.setdefault(company_id, threading.Lock())
+        with warm_lock:
+            if company_id not in self._warmed:
+                self._load(store, company_id)
+
+    def _load(self, store: StorageBackend, company_id: str) -> None:
+        rows = store.list_active_incidents(company_id=company_id)
+        last_signal: Dict[str, float] = {}
+        folded: Counter = Counter()
+        for row in rows:
+            last_signal[row["incident_id"]] = max(
+                _epoch(row.get("updated_at")), _epoch(row.get("created_at"))
+            )
+        if rows:
+            since = min(str(r.get("created_at") or "")[:10] for r in rows) or None
+            for event in store.iter_forensics(
+                company_id=company_id, event_type="signal_correlated", date_from=since
+            ):
+                incident_id = event.get("incident_id")
+                if incident_id in last_signal:
+                    folded[incident_id] += 1
+                    last_signal[incident_id] = max(last_signal[incident_id], _epoch(event.get("ts")))
+
+        # Newest first; keep the newest incident per key
+        loaded: Dict[Key, CorrelatedIncident] = {}
+        for row in rows:
+            incident_id = row["incident_id"]
+            entry = CorrelatedIncident(
+                incident_id=incident_id,
+                company_id=company_id,
+                drone_id=row.get("drone_id"),
+                threat_type=row["threat_type"],
+                training=bool(row.get("training")),
+                last_signal_at=last_signal[incident_id],
+                # Unchecked: the row may have been resolved while we read
+                checked_at=0.0,
+                folded=folded[incident_id],
+            )
+            loaded.setdefault((company_id, entry.drone_id, entry.threat_type, entry.training), entry)
+
+        with self._lock:
+            for key, entry in loaded.items():
+                # Entries tracked while we read the store are newer
+                if key not in self._entries:
+                    self._put(entry)
+            for entry in loaded.values():
+                if entry.folded:
+                    self._folded.setdefault(company_id, Counter())[entry.threat_type] += entry.folded
+            self._warmed.add(company_id)
+
+    def claim(
+        self,
+        store: StorageBackend,
+        *,
+        company_id: str,
+        drone_id: Optional[str],
+        threat_type: str,
+        training: bool,
+        incident_id: str,
+        now: Optional[float] = None,
+    ) -> Tuple[str, bool]:
+        """
+        Returns (incident_id, folded). When folded is False the candidate
+        incident_id is now indexed and the caller must create it (or
+        release() it if the write fails).
+        """
+        now = time.time() if now is None else now
+        key = (company_id, drone_id, threat_type, bool(training))
+        self._warm(store, company_id)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None or now - entry.last_signal_at > self.window_s:
+                    self._put(
+                        CorrelatedIncident(
+                            incident_id=incident_id,
+                            company_id=company_id,
+                            drone_id=drone_id,
+                            threat_type=threat_type,
+                            training=bool(training),
+                            last_signal_at=now,
+                            checked_at=now,
+                        )
+                    )
+                    return incident_id, False
+                if now - entry.checked_at < self.revalidate_s:
+                    return self._fold(entry, now), True
+
+            # Revalidate outside the lock; if the entry was replaced meanwhile, decide again
+            row = store.get_incident(entry.incident_id)
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    entry.checked_at = now
+                    if row and row.get("status") == "active":
+                        return self._fold(entry, now), True
+                    self._drop(key)
+
+    def _fold(self, entry: CorrelatedIncident, now: float) -> str:
+        entry.last_signal_at = now
+        entry.folded += 1
+        self._folded.setdefault(entry.company_id, Counter())[entry.threat_type] += 1
+        return entry.incident_id
+
+    def track(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str],
+        threat_type: str,
+        training: bool,
+        incident_id: str,
+        now: Optional[float] = None,
+    ) -> None:
+        """Index an incident created without claim() (batch drills)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._put(
+                CorrelatedIncident(
+                    incident_id=incident_id,
+                    company_id=company_id,
+                    drone_id=drone_id,
+                    threat_type=threat_type,
+                    training=bool(training),
+                    last_signal_at=now,
+                    checked_at=now,
+                )
+            )
+
+    def release(self, incident_id: str) -> None:
+        with self._lock:
+            key = self._by_incident.get(incident_id)
+            if key is not None:
+                self._drop(key)
+
+    def resolve(self, incident: Optional[Dict[str, Any]]) -> None:
+        """Call with the row returned by a status transition."""
+        if incident and incident.get("status") != "active":
+            self.release(incident["incident_id"])
+
+    def folded_count(self, incident_id: str) -> int:
+        key = self._by_incident.get(incident_id)
+        entry = self._entries.get(key) if key is not None else None
+        return entry.folded if entry is not None else 0
+
+    def stats(self, company_id: str) -> Dict[str, Any]:
+        with self._lock:
+            entries = [e for e in self._entries.values() if e.company_id == company_id]
+            by_threat = dict(self._folded.get(company_id, Counter()))
+        top = sorted((e for e in entries if e.folded), key=lambda e: e.folded, reverse=True)[:TOP_INCIDENTS]
+        return {
+            "window_s": self.window_s,
+            "tracked_incidents": len(entries),
+            "folded_signals": sum(by_threat.values()),
+            "folded_by_threat": by_threat,
+            "top_incidents": [
+                {
+                    "incident_id": e.incident_id,
+                    "drone_id": e.drone_id,
+                    "threat_type": e.threat_type,
+                    "folded_signals": e.folded,
+                }
+                for e in top
+            ],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_incident.clear()
+            self._warmed.clear()
+            self._warm_locks.clear()
+            self._folded.clear()
+
+
+CORRELATION = CorrelationIndex()
+
+
+def _epoch(value: Any) -> float:
+    # Unparsable or missing times read as long ago: the entry is outside
+    # every window rather than freshly signalled
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return 0.0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def correlated_signal_event(
+    *,
+    company_id: str,
+    drone_id: Optional[str],
+    incident_id: str,
+    threat_type: str,
+    actor: str,
+    source: str,
+    ts: Optional[str] = None,
+    **payload: Any,
+) -> Dict[str, Any]:
+    """Forensic event recording a signal folded into an existing incident."""
+    event = {
+        "company_id": company_id,
+        "drone_id": drone_id,
+        "incident_id": incident_id,
+        "event_type": "signal_correlated",
+        "actor": actor,
+        "action": threat_type,
+        "result": "ok",
+        "payload_json": json.dumps(
+            {"source": source, "folded_signals": CORRELATION.folded_count(incident_id), **payload}
+        ),
+    }
+    if ts is not None:
+        event["ts"] = ts
+    return event
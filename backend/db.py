@@ -1,11 +1,34 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
+import json
+import os
 import sqlite3
+import time
+import zlib
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-DB_PATH = Path(__file__).with_name("vigil.db")
+from .metrics import DB_COMMIT_SECONDS, DB_CONNECTIONS, FORENSIC_EVENTS, instrumented
+from .profiler import PROFILER, ProfilingCursor
+from .tracing import KIND_CLIENT, TRACER, traced
+
+DB_PATH = Path(os.environ.get("VIGIL_DB_PATH") or Path(__file__).with_name("vigil.db"))
+
+# Stamped into PRAGMA user_version by init_db(); bump it with every schema
+# change so fast-start workers (VIGIL_FAST_START=1) re-run the migrations.
+SCHEMA_VERSION = 9
+FAST_START = os.environ.get("VIGIL_FAST_START", "0") == "1"
+
+# Evidence indexes replaced in schema 6 (prefixes of, or superseded by, the
+# ones init_db creates); dropped on migration.
+RETIRED_EVIDENCE_INDEXES = (
+    "idx_evidence_company_framework_control_created",
+    "idx_evidence_company_framework_control",
+    "idx_evidence_company_framework_drone_control",
+    "idx_evidence_company_framework_created",
+)
 
 ALLOWED_INCIDENT_UPDATE_FIELDS = {
     "status",
@@ -26,9 +49,30 @@ ALLOWED_FORENSICS_FILTERS = {
 }
 
 
+class InstrumentedConnection(sqlite3.Connection):
+    def commit(self) -> None:
+        t0 = time.perf_counter()
+        if TRACER.enabled:
+            with TRACER.span("db.commit", KIND_CLIENT, {"db.system": "sqlite"}):
+                super().commit()
+        else:
+            super().commit()
+        DB_COMMIT_SECONDS.observe(time.perf_counter() - t0)
+
+
+class ProfilingConnection(InstrumentedConnection):
+    # conn.execute() goes through cursor() too, so every statement is profiled
+    def cursor(self, factory: Any = ProfilingCursor) -> sqlite3.Cursor:  # type: ignore[override]
+        return super().cursor(factory)
+
+
 def connect() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    factory = ProfilingConnection if PROFILER.enabled else InstrumentedConnection
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, factory=factory)
     conn.row_factory = sqlite3.Row
+    # forensics_events (a view over event_log) decodes payloads in SQL
+    conn.create_function("vigil_payload", 1, unpack_payload, deterministic=True)
+    DB_CONNECTIONS.inc()
     return conn
 
 
@@ -60,12 +104,17 @@ def _ensure_column(conn: sqlite3.Connection, table: str, col: str, decl: str) ->
     cur.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl}")
 
 
+@traced
+@instrumented
 def init_db() -> None:
     """
     Create tables safely and apply lightweight migrations.
     MUST NOT crash if an old vigil.db exists with older schemas.
     """
     conn = connect()
+    if FAST_START and conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+        conn.close()
+        return
     cur = conn.cursor()
 
     # --- users table (kept for compatibility; auth.py uses in-memory USERS) ---
@@ -104,6 +153,8 @@ def init_db() -> None:
         )
         """
     )
+    # Bumped on every write; the zero-trust cache revalidates against it
+    _ensure_column(conn, "zerotrust_policy", "version", "INTEGER NOT NULL DEFAULT 1")
 
     # --- Telemetry ---
     cur.execute(
@@ -120,6 +171,14 @@ def init_db() -> None:
         )
         """
     )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_telemetry_company_drone_id ON telemetry(company_id, drone_id, id)"
+    )
+    # Position (geo.py): degrees WGS84, altitude in metres, ground speed in m/s
+    _ensure_column(conn, "telemetry", "lat", "REAL")
+    _ensure_column(conn, "telemetry", "lon", "REAL")
+    _ensure_column(conn, "telemetry", "alt", "REAL")
+    _ensure_column(conn, "telemetry", "speed", "REAL")
 
     # --- Incidents (pilot persistence) ---
     cur.execute(
@@ -144,24 +203,15 @@ def init_db() -> None:
     )
     # ✅ Option A (12E): operator attribution (safe migration)
     _ensure_column(conn, "incidents", "operator", "TEXT")
+    # Optimistic concurrency for lifecycle transitions
+    _ensure_column(conn, "incidents", "version", "INTEGER NOT NULL DEFAULT 1")
+    # Report scans (reports.py) walk a company's incidents in created_at order
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_incidents_company_created ON incidents(company_id, created_at)")
+    # Incremental columnar exports (columnar.py) resume after the last updated_at
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_incidents_updated ON incidents(updated_at, incident_id)")
 
-    # --- Forensics (audit backbone) ---
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS forensics_events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ts TEXT NOT NULL,
-            company_id TEXT NOT NULL,
-            drone_id TEXT,
-            incident_id TEXT,
-            event_type TEXT NOT NULL,
-            actor TEXT,
-            action TEXT,
-            result TEXT,
-            payload_json TEXT
-        )
-        """
-    )
+    # --- Forensics (audit backbone): append-only event store, see below ---
+    _init_event_store(conn)
 
     # --- Evidence registry ---
     cur.execute(
@@ -180,24 +230,6 @@ def init_db() -> None:
         )
         """
     )
-    cur.execute(
-        "CREATE INDEX IF NOT EXISTS idx_evidence_company_framework_control_created ON evidence_registry(company_id, framework_id, control_id, created_at)"
-    )
-    cur.execute(
-        "CREATE INDEX IF NOT EXISTS idx_evidence_company_framework_control ON evidence_registry(company_id, framework_id, control_id)"
-    )
-    cur.execute(
-        "CREATE INDEX IF NOT EXISTS idx_evidence_company_framework_drone_control ON evidence_registry(company_id, framework_id, drone_id, control_id)"
-    )
-    cur.execute(
-        "CREATE INDEX IF NOT EXISTS idx_evidence_company_framework_created ON evidence_registry(company_id, framework_id, created_at)"
-    )
-    cur.execute(
-        "CREATE INDEX IF NOT EXISTS idx_evidence_company_drone_created ON evidence_registry(company_id, drone_id, created_at)"
-    )
-    cur.execute(
-        "CREATE INDEX IF NOT EXISTS idx_evidence_company_incident_created ON evidence_registry(company_id, incident_id, created_at)"
-    )
     _ensure_column(conn, "evidence_registry", "drone_id", "TEXT")
     _ensure_column(conn, "evidence_registry", "incident_id", "TEXT")
     _ensure_column(conn, "evidence_registry", "framework_id", "TEXT")
@@ -212,6 +244,89 @@ def init_db() -> None:
     _ensure_column(conn, "evidence_registry", "review_note", "TEXT")
     _ensure_column(conn, "evidence_registry", "created_at", "TEXT")
 
+    # Evidence indexes (schema 6). Drone-scoped lists are two probes of
+    # (company_id, drone_id, created_at), one for the drone and one for
+    # org-level NULL rows (see evidence_scope_sql); control and incident
+    # filters seek their own index; other lists walk (company_id,
+    # created_at) newest-first. The two *_cover indexes carry every column
+    # evidence_summary_by_control reads, company-wide and per drone probe.
+    for name in RETIRED_EVIDENCE_INDEXES:
+        cur.execute(f"DROP INDEX IF EXISTS {name}")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_evidence_company_created ON evidence_registry(company_id, created_at)")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_evidence_company_drone_created ON evidence_registry(company_id, drone_id, created_at)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_evidence_company_incident_created ON evidence_registry(company_id, incident_id, created_at)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_evidence_company_framework_control_created_cover ON evidence_registry"
+        "(company_id, framework_id, control_id, created_at, drone_id, review_status)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_evidence_company_framework_drone_control_cover ON evidence_registry"
+        "(company_id, framework_id, drone_id, control_id, created_at, review_status)"
+    )
+
+    # --- Drone -> operator assignments (Phase 12E Option A) ---
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS drone_assignments (
+            drone_id TEXT PRIMARY KEY,
+            operator TEXT NOT NULL,
+            assigned_at TEXT NOT NULL,
+            assigned_by TEXT
+        )
+        """
+    )
+
+    # --- Geofences (geo.py) ---
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS geofences (
+            geofence_id TEXT PRIMARY KEY,
+            company_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            kind TEXT NOT NULL,                -- bbox | circle | polygon
+            geometry_json TEXT NOT NULL,
+            rule TEXT NOT NULL,                -- keep_out | keep_in
+            created_by TEXT,
+            created_at TEXT NOT NULL
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_geofences_company ON geofences(company_id, created_at)")
+
+    # --- Background jobs (jobs.py scheduler) ---
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            company_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,              -- queued | running | done | failed
+            priority INTEGER NOT NULL DEFAULT 0,
+            params_json TEXT,
+            progress REAL NOT NULL DEFAULT 0,
+            message TEXT,
+            result_json TEXT,
+            error TEXT,
+            created_by TEXT,
+            worker TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT,
+            heartbeat_at TEXT
+        )
+        """
+    )
+    _ensure_column(conn, "jobs", "heartbeat_at", "TEXT")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status_priority_created ON jobs(status, priority DESC, created_at)"
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_company_created ON jobs(company_id, created_at)")
+
     # Seed zerotrust (safe)
     cur.execute(
         """
@@ -230,6 +345,7 @@ def init_db() -> None:
         ("default", "{}", _now_iso()),
     )
 
+    cur.execute(f"PRAGMA user_version = {int(SCHEMA_VERSION)}")
     conn.commit()
     conn.close()
 
@@ -238,50 +354,105 @@ def init_db() -> None:
 # Zero Trust Policy (what main.py reads)
 # -------------------------
 
+@traced
+@instrumented
 def get_zerotrust_policy(company_id: str = "default") -> Dict[str, Any]:
     conn = connect()
     cur = conn.cursor()
     cur.execute(
-        "SELECT company_id, policy_json, updated_at FROM zerotrust_policy WHERE company_id=?",
+        "SELECT company_id, policy_json, updated_at, version FROM zerotrust_policy WHERE company_id=?",
         (company_id,),
     )
     row = cur.fetchone()
     if not row:
+        # Seed on miss in one statement (no INSERT + re-SELECT)
         cur.execute(
-            "INSERT INTO zerotrust_policy (company_id, policy_json, updated_at) VALUES (?, ?, ?)",
+            """
+            INSERT INTO zerotrust_policy (company_id, policy_json, updated_at, version)
+            VALUES (?, ?, ?, 1)
+            ON CONFLICT(company_id) DO UPDATE SET company_id=excluded.company_id
+            RETURNING company_id, policy_json, updated_at, version
+            """,
             (company_id, "{}", _now_iso()),
         )
-        conn.commit()
-        cur.execute(
-            "SELECT company_id, policy_json, updated_at FROM zerotrust_policy WHERE company_id=?",
-            (company_id,),
-        )
         row = cur.fetchone()
+        conn.commit()
+    conn.close()
+    return dict(row) if row else {"company_id": company_id, "policy_json": "{}", "updated_at": _now_iso(), "version": 1}
+
+
+@traced
+@instrumented
+def get_zerotrust_policy_version(company_id: str = "default") -> Optional[int]:
+    """Cheap revalidation probe for the zero-trust policy cache."""
+    conn = connect()
+    cur = conn.cursor()
+    cur.execute("SELECT version FROM zerotrust_policy WHERE company_id=?", (company_id,))
+    row = cur.fetchone()
     conn.close()
-    return dict(row) if row else {"company_id": company_id, "policy_json": "{}", "updated_at": _now_iso()}
+    return int(row["version"]) if row else None
 
 
-def set_zerotrust_policy(company_id: str, policy_json: str) -> None:
+@traced
+@instrumented
+def set_zerotrust_policy(company_id: str, policy_json: str) -> Dict[str, Any]:
     conn = connect()
     cur = conn.cursor()
     cur.execute(
         """
-        INSERT INTO zerotrust_policy (company_id, policy_json, updated_at)
-        VALUES (?, ?, ?)
+        INSERT INTO zerotrust_policy (company_id, policy_json, updated_at, version)
+        VALUES (?, ?, ?, 1)
         ON CONFLICT(company_id) DO UPDATE SET
             policy_json=excluded.policy_json,
-            updated_at=excluded.updated_at
+            updated_at=excluded.updated_at,
+            version=zerotrust_policy.version + 1
+        RETURNING company_id, policy_json, updated_at, version
         """,
         (company_id, policy_json, _now_iso()),
     )
+    row = cur.fetchone()
     conn.commit()
     conn.close()
+    return dict(row)
 
 
 # -------------------------
 # Incidents (DB source of truth)
 # -------------------------
 
+# Lifecycle: active -> mitigated -> closed (active -> closed allowed too)
+INCIDENT_TRANSITIONS = {
+    "active": ("mitigated", "closed"),
+    "mitigated": ("closed",),
+    "closed": (),
+}
+
+
+class IncidentConflict(Exception):
+    """A status transition lost its compare-and-swap (bad state or stale version)."""
+
+    def __init__(self, current: Dict[str, Any], new_status: str):
+        self.current = current
+        self.new_status = new_status
+        super().__init__(
+            f"cannot move incident {current.get('incident_id')} from "
+            f"{current.get('status')} (v{current.get('version')}) to {new_status}"
+        )
+
+    def __reduce__(self) -> Any:
+        # Pickles by constructor args (crosses the writer-process channel)
+        return (type(self), (self.current, self.new_status))
+
+
+def _transition_sources(new_status: str) -> List[str]:
+    sources = [s for s, targets in INCIDENT_TRANSITIONS.items() if new_status in targets]
+    if not sources:
+        raise ValueError(f"unknown incident status: {new_status}")
+    return sources
+
+
+@traced
+@instrumented
 def create_incident(
     *,
     incident_id: str,
@@ -355,6 +526,8 @@ def create_incident(
     return dict(row) if row else {}
 
 
+@traced
+@instrumented
 def get_incident(incident_id: str) -> Optional[Dict[str, Any]]:
     conn = connect()
     cur = conn.cursor()
@@ -364,6 +537,8 @@ def get_incident(incident_id: str) -> Optional[Dict[str, Any]]:
     return dict(row) if row else None
 
 
+@traced
+@instrumented
 def list_active_incidents(company_id: str, drone_id: Optional[str] = None) -> List[Dict[str, Any]]:
     conn = connect()
     cur = conn.cursor()
@@ -392,55 +567,127 @@ def list_active_incidents(company_id: str, drone_id: Optional[str] = None) -> Li
     return [dict(r) for r in rows]
 
 
+@traced
+@instrumented
+def create_incidents_bulk(
+    incidents: Iterable[Dict[str, Any]],
+    events: Iterable[Dict[str, Any]] = (),
+) -> int:
+    """
+    Insert many incidents plus their forensic events in one transaction.
+    Incident dicts use create_incident's keyword names. Returns the
+    number of incidents written.
+    """
+    rows = []
+    for inc in incidents:
+        ts = inc.get("created_at") or _now_iso()
+        rows.append(
+            (
+                inc["incident_id"],
+                inc["company_id"],
+                inc.get("drone_id"),
+                inc["threat_type"],
+                inc["severity"],
+                inc["title"],
+                "active",
+                1 if inc.get("training", True) else 0,
+                ts,
+                ts,
+                inc.get("details"),
+                inc.get("operator"),
+            )
+        )
+
+    conn = connect()
+    try:
+        cur = conn.cursor()
+        cur.executemany(
+            """
+            INSERT INTO incidents (
+                incident_id, company_id, drone_id, threat_type, severity, title,
+                status, training, created_at, updated_at, details, operator
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        written = _insert_forensic_events(conn, events)
+        conn.commit()
+    finally:
+        conn.close()
+    FORENSIC_EVENTS.inc(written)
+    return len(rows)
+
+
+@traced
+@instrumented
 def update_incident_status(
     *,
+    company_id: str,
     incident_id: str,
     new_status: str,
     mitigated_action: Optional[str] = None,
     details: Optional[str] = None,
+    expected_version: Optional[int] = None,
 ) -> Optional[Dict[str, Any]]:
+    """
+    Compare-and-swap lifecycle transition in a single UPDATE ... RETURNING.
+
+    The row only changes if it belongs to company_id, its current status
+    may move to new_status (INCIDENT_TRANSITIONS) and, when given, its
+    version still equals expected_version. Unset fields keep their stored
+    values. Returns the updated row, None if the company has no such
+    incident, and raises IncidentConflict when the guard rejects the write.
+    """
+    from_states = _transition_sources(new_status)
+    placeholders = ", ".join("?" * len(from_states))
     ts = _now_iso()
     conn = connect()
-    cur = conn.cursor()
-
-    # Build final values (only update what we intended; preserve existing values for others)
-    existing = get_incident(incident_id) or {}
-    final_status = new_status
-    final_updated_at = ts
-    final_details = details if details is not None else existing.get("details")
-    final_mitigated_action = (
-        mitigated_action if mitigated_action is not None else existing.get("mitigated_action")
-    )
-    final_mitigated_at = ts if new_status == "mitigated" else existing.get("mitigated_at")
-    final_closed_at = ts if new_status == "closed" else existing.get("closed_at")
-
-    cur.execute(
-        """
-        UPDATE incidents
-        SET status=?,
-            updated_at=?,
-            details=?,
-            mitigated_action=?,
-            mitigated_at=?,
-            closed_at=?
-        WHERE incident_id=?
-        """,
-        (
-            final_status,
-            final_updated_at,
-            final_details,
-            final_mitigated_action,
-            final_mitigated_at,
-            final_closed_at,
-            incident_id,
-        ),
-    )
-    conn.commit()
-
-    cur.execute("SELECT * FROM incidents WHERE incident_id=?", (incident_id,))
-    row = cur.fetchone()
-    conn.close()
-    return dict(row) if row else None
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            UPDATE incidents
+            SET status=?,
+                updated_at=?,
+                details=COALESCE(?, details),
+                mitigated_action=COALESCE(?, mitigated_action),
+                mitigated_at=CASE WHEN ?='mitigated' THEN ? ELSE mitigated_at END,
+                closed_at=CASE WHEN ?='closed' THEN ? ELSE closed_at END,
+                version=version + 1
+            WHERE incident_id=? AND company_id=?
+              AND status IN ({placeholders})
+              AND (? IS NULL OR version=?)
+            RETURNING *
+            """,
+            (
+                new_status,
+                ts,
+                details,
+                mitigated_action,
+                new_status,
+                ts,
+                new_status,
+                ts,
+                incident_id,
+                company_id,
+                *from_states,
+                expected_version,
+                expected_version,
+            ),
+        )
+        row = cur.fetchone()
+        conn.commit()
+        if row:
+            return dict(row)
+
+        # Slow path only: explain why the guard rejected the write
+        cur.execute("SELECT * FROM incidents WHERE incident_id=? AND company_id=?", (incident_id, company_id))
+        current = cur.fetchone()
+    finally:
+        conn.close()
+    if current is None:
+        return None
+    raise IncidentConflict(dict(current), new_status)
 
 
 def _operator_for_incident(conn: sqlite3.Connection, incident_id: str) -> Optional[str]:
@@ -477,6 +724,317 @@ def _latest_operator_for_drone(conn: sqlite3.Connection, company_id: str, drone_
 # Forensics (audit backbone)
 # -------------------------
 
+# Append-only event store (schema 7, ts_text since 9). Forensic events are
+# the largest and hottest table, so they are stored compactly:
+#
+#   event_log    id, ts_us (epoch microseconds, UTC), company, event_type
+#                and actor as event_dict ids, drone_id, incident_id,
+#                action, result, payload, ts_text
+#   event_dict   (kind, value) -> id for companies, event types and actors
+#
+# Ranges compare integers and a row no longer repeats the company and event
+# type strings. payload keeps payload_json byte for byte (bundle hashes and
+# exports depend on the text): as TEXT, or when smaller as a BLOB of
+# PAYLOAD_DEFLATE + raw deflate (512-byte window) primed with PAYLOAD_ZDICT,
+# the keys and values the app writes. The version byte lets a later
+# dictionary coexist with rows written under this one.
+#
+# forensics_events is a view with the original columns (ts rendered back as
+# an isoformat() string, payload decoded by vigil_payload(), which connect()
+# registers), so SELECT * callers see the old rows. The functions below read
+# event_log directly, on its (company, ts_us / drone_id / incident_id)
+# indexes, and decode the same rows in Python (_decode_events).
+# Ranges and ordering use ts_us (a naive ts is taken as UTC). ts_text is
+# NULL when the ts text is exactly what us_to_ts() renders, i.e. what
+# _now_iso() writes; any other spelling (another offset, a naive time) is
+# kept there verbatim and read back in place of the rendered string.
+#
+# init_db migrates a schema-6 forensics_events table in place, keeping ids
+# (evidence source_event_id and export cursors point at them). A legacy ts
+# that does not parse fails the migration with the offending ids and
+# leaves the old table untouched. The file keeps the old table's pages
+# until VACUUM.
+
+PAYLOAD_DEFLATE = b"\x01"
+PAYLOAD_ZDICT = (
+    b'"incidents_per_s": "elapsed_s": "incidents": "planned_incidents": "geofence_id": "kind": "name": '
+    b'"folded_signals": "source": "response_name": "response_id": "assigned_operator": '
+    b'"batch_id": "title": "severity": "critical", "high", "seq": '
+    b'{"training": false, {"training": true, "actor_role": "operator", "operator": "operator1"}'
+    b', "actor_role": "admin", "operator": "operator1"}'
+)
+PAYLOAD_WBITS = -9
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Priming a compressor with the dictionary costs more than compressing a
+# payload; each pack copies this one instead.
+_PAYLOAD_COMPRESSOR = zlib.compressobj(6, zlib.DEFLATED, PAYLOAD_WBITS, 2, zdict=PAYLOAD_ZDICT)
+
+EVENT_TS_SQL = (
+    "strftime('%Y-%m-%dT%H:%M:%S', e.ts_us / 1000000, 'unixepoch')"
+    " || CASE WHEN e.ts_us % 1000000 THEN printf('.%06d', e.ts_us % 1000000) ELSE '' END || '+00:00'"
+)
+EVENT_SELECT = f"""
+    SELECT e.id, COALESCE(e.ts_text, {EVENT_TS_SQL}) AS ts, c.value AS company_id, e.drone_id, e.incident_id,
+           t.value AS event_type, a.value AS actor, e.action, e.result, vigil_payload(e.payload) AS payload_json
+    FROM event_log e
+    CROSS JOIN event_dict c ON c.id = e.company
+    CROSS JOIN event_dict t ON t.id = e.event_type
+    LEFT JOIN event_dict a ON a.id = e.actor
+"""
+# The functions below select these and decode rows in Python, which is
+# cheaper per row than the view's SQL rendering and vigil_payload() calls
+EVENT_COLUMNS = (
+    "e.id, e.ts_us, e.company, e.drone_id, e.incident_id, e.event_type, e.actor, e.action, e.result, e.payload, "
+    "e.ts_text"
+)
+EVENT_LOG_INSERT = """
+    INSERT INTO event_log (ts_us, company, drone_id, incident_id, event_type, actor, action, result, payload, ts_text)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _dict_id_sql(kind: str) -> str:
+    return f"(SELECT id FROM event_dict WHERE kind = '{kind}' AND value = ?)"
+
+
+def ts_to_us(ts: str) -> int:
+    dt = datetime.fromisoformat(ts)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    delta = dt - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+_MINUTES = [f"{m // 60:02d}:{m % 60:02d}:" for m in range(1440)]
+
+
+@lru_cache(maxsize=4096)
+def _day_prefix(day: int) -> str:
+    return (_EPOCH + timedelta(days=day)).date().isoformat() + "T"
+
+
+def us_to_ts(us: int) -> str:
+    """ts_us back to the datetime.isoformat() string add_forensic_event writes (hot in scans)."""
+    day, us = divmod(us, 86_400_000_000)
+    minute, us = divmod(us, 60_000_000)
+    seconds, micros = divmod(us, 1_000_000)
+    if micros:
+        return f"{_day_prefix(day)}{_MINUTES[minute]}{seconds:02d}.{micros:06d}+00:00"
+    return f"{_day_prefix(day)}{_MINUTES[minute]}{seconds:02d}+00:00"
+
+
+def ts_text(ts: str, ts_us: int) -> Optional[str]:
+    """The ts_text column for ts: None when us_to_ts(ts_us) reproduces it."""
+    return None if us_to_ts(ts_us) == ts else ts
+
+
+def pack_payload(text: Optional[str]) -> Any:
+    if not text:
+        return text
+    raw = text.encode()
+    c = _PAYLOAD_COMPRESSOR.copy()
+    packed = PAYLOAD_DEFLATE + c.compress(raw) + c.flush()
+    return packed if len(packed) < len(raw) else text
+
+
+def unpack_payload(value: Any) -> Optional[str]:
+    if not isinstance(value, bytes):
+        return value
+    if value[:1] != PAYLOAD_DEFLATE:
+        raise ValueError(f"unknown payload encoding: {value[:1]!r}")
+    d = zlib.decompressobj(PAYLOAD_WBITS, zdict=PAYLOAD_ZDICT)
+    return (d.decompress(value[1:]) + d.flush()).decode()
+
+
+class EventEncoder:
+    """Builds event_log rows on one connection, adding event_dict values as needed.
+
+    Ids are cached for the encoder's lifetime; use one per transaction.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._cur = conn.cursor()
+        self._ids: Dict[Tuple[str, str], int] = {}
+
+    def dict_id(self, kind: str, value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        key = (kind, value)
+        found = self._ids.get(key)
+        if found is None:
+            select = "SELECT id FROM event_dict WHERE kind = ? AND value = ?"
+            row = self._cur.execute(select, key).fetchone()
+            if row is None:
+                # Another writer may add the same value between the select and
+                # the insert; OR IGNORE lets the re-select pick up its id.
+                self._cur.execute("INSERT OR IGNORE INTO event_dict (kind, value) VALUES (?, ?)", key)
+                row = self._cur.execute(select, key).fetchone()
+            found = self._ids[key] = row[0]
+        return found
+
+    def row(
+        self,
+        ts: str,
+        company_id: str,
+        drone_id: Optional[str],
+        incident_id: Optional[str],
+        event_type: str,
+        actor: Optional[str],
+        action: Optional[str],
+        result: Optional[str],
+        payload_json: Optional[str],
+    ) -> Tuple[Any, ...]:
+        """An EVENT_LOG_INSERT row from forensics_events column values."""
+        ts_us = ts_to_us(ts)
+        return (
+            ts_us,
+            self.dict_id("company", company_id),
+            drone_id,
+            incident_id,
+            self.dict_id("event_type", event_type),
+            self.dict_id("actor", actor),
+            action,
+            result,
+            pack_payload(payload_json),
+            ts_text(ts, ts_us),
+        )
+
+
+class _EventNames(dict):
+    """event_dict id -> value, fetched on first use; one per query."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        super().__init__()
+        self._conn = conn
+
+    def __missing__(self, key: int) -> str:
+        value = self._conn.execute("SELECT value FROM event_dict WHERE id = ?", (key,)).fetchone()[0]
+        self[key] = value
+        return value
+
+
+def _decode_events(names: _EventNames, rows: Iterable[Tuple[Any, ...]]) -> Iterator[Dict[str, Any]]:
+    """EVENT_COLUMNS tuples -> forensics_events rows (what the view returns, decoded in Python)."""
+    for event_id, ts_us, company, drone_id, incident_id, event_type, actor, action, result, payload, text in rows:
+        yield {
+            "id": event_id,
+            "ts": us_to_ts(ts_us) if text is None else text,
+            "company_id": names[company],
+            "drone_id": drone_id,
+            "incident_id": incident_id,
+            "event_type": names[event_type],
+            "actor": None if actor is None else names[actor],
+            "action": action,
+            "result": result,
+            "payload_json": unpack_payload(payload) if payload.__class__ is bytes else payload,
+        }
+
+
+def _legacy_ts_us(ts: str) -> Optional[int]:
+    try:
+        return ts_to_us(ts)
+    except (TypeError, ValueError):
+        return None  # fails event_log's NOT NULL; the migration reports the row
+
+
+def _legacy_ts_text(ts: str) -> Optional[str]:
+    ts_us = _legacy_ts_us(ts)
+    return None if ts_us is None else ts_text(ts, ts_us)
+
+
+def _init_event_store(conn: sqlite3.Connection) -> None:
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS event_dict (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            value TEXT NOT NULL,
+            UNIQUE (kind, value)
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS event_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts_us INTEGER NOT NULL,
+            company INTEGER NOT NULL,
+            drone_id TEXT,
+            incident_id TEXT,
+            event_type INTEGER NOT NULL,
+            actor INTEGER,
+            action TEXT,
+            result TEXT,
+            payload BLOB,
+            ts_text TEXT
+        )
+        """
+    )
+    _ensure_column(conn, "event_log", "ts_text", "TEXT")
+
+    legacy = cur.execute("SELECT type FROM sqlite_master WHERE name = 'forensics_events'").fetchone()
+    if legacy is not None and legacy[0] == "table":
+        conn.create_function("vigil_ts_us", 1, _legacy_ts_us, deterministic=True)
+        conn.create_function("vigil_ts_text", 1, _legacy_ts_text, deterministic=True)
+        conn.create_function("vigil_pack_payload", 1, pack_payload, deterministic=True)
+        bad = [
+            r[0] for r in cur.execute(
+                "SELECT id FROM forensics_events WHERE vigil_ts_us(ts) IS NULL ORDER BY id LIMIT 21"
+            )
+        ]
+        if bad:
+            more = ", ..." if len(bad) > 20 else ""
+            raise RuntimeError(
+                "forensics_events rows with unparsable ts (ids "
+                f"{', '.join(map(str, bad[:20]))}{more}); fix or remove them, then restart to migrate"
+            )
+        for kind in ("company_id", "event_type", "actor"):
+            cur.execute(
+                f"""
+                INSERT OR IGNORE INTO event_dict (kind, value)
+                SELECT DISTINCT ?, {kind} FROM forensics_events WHERE {kind} IS NOT NULL
+                """,
+                ("company" if kind == "company_id" else kind,),
+            )
+        cur.execute(
+            """
+            INSERT INTO event_log (
+                id, ts_us, company, drone_id, incident_id, event_type, actor, action, result, payload, ts_text
+            )
+            SELECT f.id, vigil_ts_us(f.ts), c.id, f.drone_id, f.incident_id, t.id, a.id, f.action, f.result,
+                   vigil_pack_payload(f.payload_json), vigil_ts_text(f.ts)
+            FROM forensics_events f
+            JOIN event_dict c ON c.kind = 'company' AND c.value = f.company_id
+            JOIN event_dict t ON t.kind = 'event_type' AND t.value = f.event_type
+            LEFT JOIN event_dict a ON a.kind = 'actor' AND a.value = f.actor
+            ORDER BY f.id
+            """
+        )
+        # New ids continue after the old table's, even past deleted rows
+        seq = cur.execute("SELECT seq FROM sqlite_sequence WHERE name = 'forensics_events'").fetchone()
+        if seq is not None:
+            cur.execute("DELETE FROM sqlite_sequence WHERE name = 'event_log'")
+            cur.execute(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('event_log', MAX(?, (SELECT IFNULL(MAX(id), 0) FROM event_log)))",
+                (seq[0],),
+            )
+        cur.execute("DROP TABLE forensics_events")
+    # After the copy: building an index over the filled table is cheaper
+    # than maintaining it row by row
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_event_log_company_ts ON event_log(company, ts_us)")
+    # Per-drone timelines and per-incident bundles; schema 6 walked the
+    # company's whole (company_id, ts) range for these
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_event_log_company_drone_ts ON event_log(company, drone_id, ts_us)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_event_log_company_incident_ts ON event_log(company, incident_id, ts_us)")
+    view = cur.execute("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = 'forensics_events'").fetchone()
+    if view is not None and "ts_text" not in view[0]:
+        cur.execute("DROP VIEW forensics_events")  # schema 7-8 view, before ts_text
+    cur.execute(f"CREATE VIEW IF NOT EXISTS forensics_events AS {EVENT_SELECT}")
+
+
+@traced
+@instrumented
 def add_forensic_event(
     *,
     company_id: str,
@@ -490,35 +1048,38 @@ def add_forensic_event(
     ts: Optional[str] = None,
 ) -> None:
     conn = connect()
-    cur = conn.cursor()
+    try:
+        cur = conn.cursor()
 
-    # ✅ Option A: auto-derive actor from operator when actor is missing
-    derived_actor = actor
-    if not derived_actor and incident_id:
-        derived_actor = _operator_for_incident(conn, incident_id)
-    if not derived_actor and drone_id:
-        derived_actor = _latest_operator_for_drone(conn, company_id, drone_id)
+        # ✅ Option A: auto-derive actor from operator when actor is missing
+        derived_actor = actor
+        if not derived_actor and incident_id:
+            derived_actor = _operator_for_incident(conn, incident_id)
+        if not derived_actor and drone_id:
+            derived_actor = _latest_operator_for_drone(conn, company_id, drone_id)
 
-    cur.execute(
-        """
-        INSERT INTO forensics_events (
-            ts, company_id, drone_id, incident_id, event_type, actor, action, result, payload_json
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            ts or _now_iso(),
-            company_id,
-            drone_id,
-            incident_id,
-            event_type,
-            derived_actor,
-            action,
-            result,
-            payload_json,
-        ),
-    )
-    source_event_id = cur.lastrowid
-    conn.commit()
+        cur.execute(
+            EVENT_LOG_INSERT,
+            EventEncoder(conn).row(
+                ts or _now_iso(),
+                company_id,
+                drone_id,
+                incident_id,
+                event_type,
+                derived_actor,
+                action,
+                result,
+                payload_json,
+            ),
+        )
+        source_event_id = cur.lastrowid
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    FORENSIC_EVENTS.inc()
 
     mapping = CONTROL_EVENT_MAP.get(event_type)
     if mapping:
@@ -534,9 +1095,92 @@ def add_forensic_event(
             source_event_id=source_event_id,
             reference_id=incident_id or drone_id,
         )
-    conn.close()
 
 
+def _insert_forensic_events(conn: sqlite3.Connection, events: Iterable[Dict[str, Any]]) -> int:
+    """Insert forensic events (+ mapped evidence) on conn without committing."""
+    cur = conn.cursor()
+    encoder = EventEncoder(conn)
+    evidence_rows: List[tuple] = []
+    written = 0
+    for ev in events:
+        company_id = ev["company_id"]
+        drone_id = ev.get("drone_id")
+        incident_id = ev.get("incident_id")
+        event_type = ev["event_type"]
+
+        derived_actor = ev.get("actor")
+        if not derived_actor and incident_id:
+            derived_actor = _operator_for_incident(conn, incident_id)
+        if not derived_actor and drone_id:
+            derived_actor = _latest_operator_for_drone(conn, company_id, drone_id)
+
+        cur.execute(
+            EVENT_LOG_INSERT,
+            encoder.row(
+                ev.get("ts") or _now_iso(),
+                company_id,
+                drone_id,
+                incident_id,
+                event_type,
+                derived_actor,
+                ev.get("action"),
+                ev.get("result"),
+                ev.get("payload_json"),
+            ),
+        )
+        written += 1
+
+        mapping = CONTROL_EVENT_MAP.get(event_type)
+        if mapping:
+            framework_id, control_id = mapping
+            evidence_rows.append(
+                (
+                    company_id,
+                    drone_id,
+                    incident_id,
+                    framework_id,
+                    control_id,
+                    event_type,
+                    cur.lastrowid,
+                    incident_id or drone_id,
+                    _now_iso(),
+                )
+            )
+
+    if evidence_rows:
+        cur.executemany(
+            """
+            INSERT INTO evidence_registry
+            (company_id, drone_id, incident_id, framework_id, control_id, evidence_type, source_event_id, reference_id, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            evidence_rows,
+        )
+    return written
+
+
+@traced
+@instrumented
+def add_forensic_events(events: Iterable[Dict[str, Any]]) -> int:
+    """
+    Batched variant of add_forensic_event: one connection, one commit.
+    Each event is a dict with the same keys as add_forensic_event's kwargs.
+    Mapped event types register evidence in the same transaction.
+    Returns the number of events written.
+    """
+    conn = connect()
+    try:
+        written = _insert_forensic_events(conn, events)
+        conn.commit()
+    finally:
+        conn.close()
+    FORENSIC_EVENTS.inc(written)
+    return written
+
+
+@traced
+@instrumented
 def list_forensics(
     *,
     company_id: str,
@@ -546,31 +1190,23 @@ def list_forensics(
 ) -> List[Dict[str, Any]]:
     conn = connect()
     cur = conn.cursor()
+    cur.row_factory = None
 
-    # Fixed SQL, no dynamic WHERE
+    # Only the filters given ("" counts as unset), so the drone / incident
+    # indexes serve the filtered views
+    where = [f"e.company = {_dict_id_sql('company')}"]
+    params: List[Any] = [company_id]
+    for column, value in (("drone_id", drone_id), ("incident_id", incident_id)):
+        if value:
+            where.append(f"e.{column} = ?")
+            params.append(value)
     cur.execute(
-        """
-        SELECT * FROM forensics_events
-        WHERE company_id=?
-          AND (? IS NULL OR ? = '' OR drone_id=?)
-          AND (? IS NULL OR ? = '' OR incident_id=?)
-        ORDER BY ts ASC
-        LIMIT ?
-        """,
-        (
-            company_id,
-            drone_id,
-            drone_id,
-            drone_id,
-            incident_id,
-            incident_id,
-            incident_id,
-            limit,
-        ),
+        f"SELECT {EVENT_COLUMNS} FROM event_log e WHERE {' AND '.join(where)} ORDER BY e.ts_us, e.id LIMIT ?",
+        [*params, limit],
     )
-    rows = cur.fetchall()
+    rows = list(_decode_events(_EventNames(conn), cur.fetchall()))
     conn.close()
-    return [dict(r) for r in rows]
+    return rows
 
 
 CONTROL_EVENT_MAP = {
@@ -580,6 +1216,8 @@ CONTROL_EVENT_MAP = {
 }
 
 
+@traced
+@instrumented
 def register_evidence(
     *,
     company_id: str,
@@ -615,6 +1253,8 @@ def register_evidence(
     conn.close()
 
 
+@traced
+@instrumented
 def create_evidence(
     *,
     company_id: str,
@@ -676,6 +1316,8 @@ def create_evidence(
     }
 
 
+@traced
+@instrumented
 def review_evidence(
     *,
     company_id: str,
@@ -712,6 +1354,29 @@ def review_evidence(
     return dict(row)
 
 
+def evidence_scope_sql(
+    columns: str, where: str, params: Sequence[Any], drone_id: Optional[str], placeholder: str = "?"
+) -> Tuple[str, List[Any]]:
+    """
+    SELECT <columns> FROM evidence_registry WHERE <where>, drone-scoped when
+    drone_id is set: drone-specific AND org-level (NULL) rows, as a UNION
+    ALL of two index probes. (drone_id = ? OR drone_id IS NULL) runs as a
+    multi-index OR whose matches are all sorted before LIMIT applies; the
+    two arms arrive in index order, so ORDER BY created_at merges them.
+    The caller appends ORDER BY / LIMIT (they apply to the whole compound).
+    Shared with the PG backend.
+    """
+    if not drone_id:
+        return f"SELECT {columns} FROM evidence_registry WHERE {where}", list(params)
+    sql = (
+        f"SELECT {columns} FROM evidence_registry WHERE {where} AND drone_id = {placeholder} "
+        f"UNION ALL SELECT {columns} FROM evidence_registry WHERE {where} AND drone_id IS NULL"
+    )
+    return sql, [*params, drone_id, *params]
+
+
+@traced
+@instrumented
 def list_evidence(
     *,
     company_id: str,
@@ -737,11 +1402,6 @@ def list_evidence(
         where.append("control_id = ?")
         params.append(control_id)
 
-    if drone_id:
-        # In drone-scoped view, include both drone-specific AND org-level evidence
-        where.append("(drone_id = ? OR drone_id IS NULL)")
-        params.append(drone_id)
-
     if incident_id:
         where.append("incident_id = ?")
         params.append(incident_id)
@@ -754,22 +1414,16 @@ def list_evidence(
         where.append("created_at <= ?")
         params.append(_day_bounds_utc(date_to, end=True))
 
-    params.append(limit)
-
-    sql = f"""
-        SELECT *
-        FROM evidence_registry
-        WHERE {' AND '.join(where)}
-        ORDER BY created_at DESC
-        LIMIT ?
-    """
-
-    cur.execute(sql, params)
+    # In drone-scoped view, include both drone-specific AND org-level evidence
+    scoped, params = evidence_scope_sql("*", " AND ".join(where), params, drone_id)
+    cur.execute(f"{scoped} ORDER BY created_at DESC LIMIT ?", [*params, limit])
     rows = cur.fetchall()
     conn.close()
     return [dict(r) for r in rows]
 
 
+@traced
+@instrumented
 def evidence_summary_by_control(
     *,
     company_id: str,
@@ -790,11 +1444,6 @@ def evidence_summary_by_control(
     where = ["company_id = ?", "framework_id = ?"]
     params: List[Any] = [company_id, framework_id]
 
-    # Drone scope rule: include drone-specific AND org-level (NULL) evidence
-    if drone_id:
-        where.append("(drone_id = ? OR drone_id IS NULL)")
-        params.append(drone_id)
-
     if date_from:
         where.append("created_at >= ?")
         params.append(_day_bounds_utc(date_from, end=False))
@@ -802,6 +1451,8 @@ def evidence_summary_by_control(
         where.append("created_at <= ?")
         params.append(_day_bounds_utc(date_to, end=True))
 
+    # Drone scope rule: include drone-specific AND org-level (NULL) evidence
+    scoped, params = evidence_scope_sql("control_id, review_status", " AND ".join(where), params, drone_id)
     sql = f"""
         SELECT
             control_id,
@@ -809,8 +1460,7 @@ def evidence_summary_by_control(
             SUM(CASE WHEN COALESCE(NULLIF(review_status, ''), 'pending') = 'pending' THEN 1 ELSE 0 END) AS pending,
             SUM(CASE WHEN COALESCE(NULLIF(review_status, ''), 'pending') = 'rejected' THEN 1 ELSE 0 END) AS rejected,
             COUNT(*) AS total
-        FROM evidence_registry
-        WHERE {' AND '.join(where)}
+        FROM ({scoped})
         GROUP BY control_id
     """
 
@@ -818,3 +1468,616 @@ def evidence_summary_by_control(
     rows = cur.fetchall()
     conn.close()
     return [dict(r) for r in rows]
+
+
+
+# -------------------------
+# Report scans (streamed, unbounded)
+# -------------------------
+# Generators over one open cursor, fetched REPORT_FETCH_SIZE rows at a time,
+# so a report of any size holds one batch in memory. Not @instrumented /
+# @traced: those time the call, which for a generator is only its creation.
+
+REPORT_FETCH_SIZE = 1000
+
+
+def _iter_rows(sql: str, params: List[Any]) -> Iterator[Dict[str, Any]]:
+    conn = connect()
+    try:
+        cur = conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(REPORT_FETCH_SIZE)
+            if not rows:
+                break
+            for r in rows:
+                yield dict(r)
+    finally:
+        conn.close()
+
+
+def _iter_events(sql: str, params: List[Any]) -> Iterator[Dict[str, Any]]:
+    """_iter_rows for SELECT {EVENT_COLUMNS} FROM event_log e ... scans."""
+    conn = connect()
+    try:
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute(sql, params)
+        names = _EventNames(conn)
+        while True:
+            rows = cur.fetchmany(REPORT_FETCH_SIZE)
+            if not rows:
+                break
+            yield from _decode_events(names, rows)
+    finally:
+        conn.close()
+
+
+def _date_filters(
+    column: str,
+    date_from: Optional[str],
+    date_to: Optional[str],
+    where: List[str],
+    params: List[Any],
+    encode: Callable[[str], Any] = str,
+) -> None:
+    if date_from:
+        where.append(f"{column} >= ?")
+        params.append(encode(_day_bounds_utc(date_from, end=False)))
+    if date_to:
+        where.append(f"{column} <= ?")
+        params.append(encode(_day_bounds_utc(date_to, end=True)))
+
+
+def iter_incidents(
+    *,
+    company_id: str,
+    drone_id: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = None,  # YYYY-MM-DD
+    date_to: Optional[str] = None,    # YYYY-MM-DD
+) -> Iterator[Dict[str, Any]]:
+    where = ["company_id = ?"]
+    params: List[Any] = [company_id]
+    if drone_id:
+        where.append("drone_id = ?")
+        params.append(drone_id)
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    _date_filters("created_at", date_from, date_to, where, params)
+    return _iter_rows(
+        f"SELECT * FROM incidents WHERE {' AND '.join(where)} ORDER BY created_at, incident_id",
+        params,
+    )
+
+
+def iter_forensics(
+    *,
+    company_id: str,
+    drone_id: Optional[str] = None,
+    incident_id: Optional[str] = None,
+    event_type: Optional[str] = None,
+    date_from: Optional[str] = None,  # YYYY-MM-DD
+    date_to: Optional[str] = None,    # YYYY-MM-DD
+) -> Iterator[Dict[str, Any]]:
+    where = [f"e.company = {_dict_id_sql('company')}"]
+    params: List[Any] = [company_id]
+    for column, value in (("drone_id", drone_id), ("incident_id", incident_id)):
+        if value:
+            where.append(f"e.{column} = ?")
+            params.append(value)
+    if event_type:
+        where.append(f"e.event_type = {_dict_id_sql('event_type')}")
+        params.append(event_type)
+    _date_filters("e.ts_us", date_from, date_to, where, params, encode=ts_to_us)
+    return _iter_events(
+        f"SELECT {EVENT_COLUMNS} FROM event_log e WHERE {' AND '.join(where)} ORDER BY e.ts_us, e.id",
+        params,
+    )
+
+
+def iter_evidence(
+    *,
+    company_id: str,
+    framework_id: Optional[str] = None,
+    control_id: Optional[str] = None,
+    drone_id: Optional[str] = None,
+    incident_id: Optional[str] = None,
+    review_status: Optional[str] = None,
+    date_from: Optional[str] = None,  # YYYY-MM-DD
+    date_to: Optional[str] = None,    # YYYY-MM-DD
+) -> Iterator[Dict[str, Any]]:
+    where = ["company_id = ?"]
+    params: List[Any] = [company_id]
+    for column, value in (("framework_id", framework_id), ("control_id", control_id), ("incident_id", incident_id)):
+        if value:
+            where.append(f"{column} = ?")
+            params.append(value)
+    if review_status:
+        where.append("COALESCE(NULLIF(review_status, ''), 'pending') = ?")
+        params.append(review_status)
+    _date_filters("created_at", date_from, date_to, where, params)
+    # Same scope rule as list_evidence: drone-specific AND org-level rows
+    scoped, params = evidence_scope_sql("*", " AND ".join(where), params, drone_id)
+    return _iter_rows(f"{scoped} ORDER BY created_at, id", params)
+
+
+# Export scans (columnar.py): whole tables in key order, resumable after the
+# last exported key. Append-only tables use their id; incidents change in
+# place, so they are keyed by (updated_at, incident_id) and each export
+# carries the versions written since the previous one.
+EXPORT_KEYS: Dict[str, Tuple[str, ...]] = {
+    "forensics_events": ("id",),
+    "evidence_registry": ("id",),
+    "telemetry": ("id",),
+    "incidents": ("updated_at", "incident_id"),
+}
+
+
+def export_key_sql(table: str, after: Optional[Sequence[Any]], placeholder: str = "?") -> Tuple[str, str]:
+    """(WHERE fragment or "", ORDER BY list) for an export scan; shared with the PG backend."""
+    if table not in EXPORT_KEYS:
+        raise ValueError(f"unknown export table: {table}")
+    key = EXPORT_KEYS[table]
+    order = ", ".join(key)
+    if after is None:
+        return "", order
+    if len(after) != len(key):
+        raise ValueError(f"{table} export key has {len(key)} column(s), got {len(after)}")
+    if len(key) == 1:
+        return f"{key[0]} > {placeholder}", order
+    return f"({order}) > ({', '.join([placeholder] * len(key))})", order
+
+
+def iter_export_rows(
+    table: str,
+    *,
+    company_id: Optional[str] = None,
+    after: Optional[Sequence[Any]] = None,
+) -> Iterator[Dict[str, Any]]:
+    key_where, order = export_key_sql(table, after)
+    # forensics_events is a view: filter and order on event_log's columns
+    events = table == "forensics_events"
+    where: List[str] = []
+    params: List[Any] = []
+    if company_id:
+        where.append(f"e.company = {_dict_id_sql('company')}" if events else "company_id = ?")
+        params.append(company_id)
+    if key_where:
+        where.append(f"e.{key_where}" if events else key_where)
+        params.extend(after or ())
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    if events:
+        return _iter_events(f"SELECT {EVENT_COLUMNS} FROM event_log e {clause} ORDER BY e.{order}", params)
+    return _iter_rows(f"SELECT * FROM {table} {clause} ORDER BY {order}", params)
+
+
+# -------------------------
+# Drone assignments (Phase 12E Option A)
+# -------------------------
+
+@traced
+@instrumented
+def get_assigned_operator(drone_id: Optional[str]) -> Optional[str]:
+    conn = connect()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT operator FROM drone_assignments WHERE drone_id=?",
+            (drone_id,),
+        )
+        row = cur.fetchone()
+        return row["operator"] if row else None
+    finally:
+        conn.close()
+
+
+@traced
+@instrumented
+def get_assigned_operators(drone_ids: Iterable[str]) -> Dict[str, str]:
+    """drone_id -> operator for every assigned drone in drone_ids (one query)."""
+    ids = [d for d in drone_ids if d]
+    if not ids:
+        return {}
+    conn = connect()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT drone_id, operator FROM drone_assignments
+            WHERE drone_id IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps(ids),),
+        )
+        return {r["drone_id"]: r["operator"] for r in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+@traced
+@instrumented
+def set_assigned_operator(drone_id: str, operator: str, assigned_by: Optional[str]) -> None:
+    conn = connect()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO drone_assignments (drone_id, operator, assigned_at, assigned_by)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(drone_id) DO UPDATE SET
+                operator=excluded.operator,
+                assigned_at=excluded.assigned_at,
+                assigned_by=excluded.assigned_by
+            """,
+            (
+                drone_id,
+                operator,
+                datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+                assigned_by,
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+
+# -------------------------
+# Telemetry (ingest + reads)
+# -------------------------
+
+@traced
+@instrumented
+def insert_telemetry(samples: Iterable[Dict[str, Any]]) -> int:
+    """Append telemetry samples in one transaction; returns rows written."""
+    rows = [
+        (
+            s["company_id"],
+            s["drone_id"],
+            s.get("status") or "online",
+            s.get("battery"),
+            s.get("link_quality"),
+            s.get("gps_health"),
+            s.get("last_seen") or _now_iso(),
+            s.get("lat"),
+            s.get("lon"),
+            s.get("alt"),
+            s.get("speed"),
+        )
+        for s in samples
+    ]
+    if not rows:
+        return 0
+    conn = connect()
+    try:
+        conn.executemany(
+            """
+            INSERT INTO telemetry (
+                company_id, drone_id, status, battery, link_quality, gps_health, last_seen, lat, lon, alt, speed
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return len(rows)
+
+
+@traced
+@instrumented
+def latest_telemetry(company_id: str) -> List[Dict[str, Any]]:
+    """Most recent sample per drone for a company."""
+    conn = connect()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT t.*
+        FROM telemetry t
+        JOIN (
+            SELECT MAX(id) AS id FROM telemetry WHERE company_id=? GROUP BY drone_id
+        ) latest ON latest.id = t.id
+        ORDER BY t.drone_id
+        """,
+        (company_id,),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+@traced
+@instrumented
+def list_telemetry(company_id: str, drone_id: str, limit: int = 500) -> List[Dict[str, Any]]:
+    """Newest-first telemetry history for one drone."""
+    conn = connect()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT * FROM telemetry
+        WHERE company_id=? AND drone_id=?
+        ORDER BY id DESC
+        LIMIT ?
+        """,
+        (company_id, drone_id, limit),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+# -------------------------
+# Geofences (geo.py)
+# -------------------------
+
+@traced
+@instrumented
+def create_geofence(
+    *,
+    geofence_id: str,
+    company_id: str,
+    name: str,
+    kind: str,
+    geometry_json: str,
+    rule: str,
+    created_by: Optional[str] = None,
+) -> Dict[str, Any]:
+    row = {
+        "geofence_id": geofence_id,
+        "company_id": company_id,
+        "name": name,
+        "kind": kind,
+        "geometry_json": geometry_json,
+        "rule": rule,
+        "created_by": created_by,
+        "created_at": _now_iso(),
+    }
+    conn = connect()
+    try:
+        conn.execute(
+            """
+            INSERT INTO geofences (geofence_id, company_id, name, kind, geometry_json, rule, created_by, created_at)
+            VALUES (:geofence_id, :company_id, :name, :kind, :geometry_json, :rule, :created_by, :created_at)
+            """,
+            row,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return row
+
+
+@traced
+@instrumented
+def list_geofences(company_id: str) -> List[Dict[str, Any]]:
+    conn = connect()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM geofences WHERE company_id=? ORDER BY created_at, geofence_id", (company_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(r) for r in rows]
+
+
+@traced
+@instrumented
+def delete_geofence(company_id: str, geofence_id: str) -> bool:
+    conn = connect()
+    try:
+        cur = conn.execute("DELETE FROM geofences WHERE company_id=? AND geofence_id=?", (company_id, geofence_id))
+        conn.commit()
+        return cur.rowcount > 0
+    finally:
+        conn.close()
+
+
+# -------------------------
+# Background jobs (queue + results)
+# -------------------------
+
+# Every column but result_json, which can be large and is read on download only
+JOB_COLUMNS = (
+    "job_id, company_id, kind, status, priority, params_json, progress, message, error, "
+    "created_by, worker, attempts, created_at, started_at, finished_at, heartbeat_at"
+)
+
+
+@traced
+@instrumented
+def create_job(
+    *,
+    job_id: str,
+    company_id: str,
+    kind: str,
+    params_json: str = "{}",
+    priority: int = 0,
+    created_by: Optional[str] = None,
+) -> Dict[str, Any]:
+    conn = connect()
+    try:
+        row = conn.execute(
+            f"""
+            INSERT INTO jobs (job_id, company_id, kind, status, priority, params_json, created_by, created_at)
+            VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)
+            RETURNING {JOB_COLUMNS}
+            """,
+            (job_id, company_id, kind, int(priority), params_json, created_by, _now_iso()),
+        ).fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+    return dict(row)
+
+
+@traced
+@instrumented
+def claim_job(worker: str, kinds: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Move the next queued job (highest priority, then oldest) to running and
+    return it; None when the queue is empty. One statement, so two workers
+    can never claim the same job.
+    """
+    kind_list = list(kinds) if kinds is not None else None
+    if kind_list == []:
+        return None
+    kind_filter = f"AND kind IN ({','.join('?' * len(kind_list))})" if kind_list else ""
+    now = _now_iso()
+    conn = connect()
+    try:
+        row = conn.execute(
+            f"""
+            UPDATE jobs
+            SET status='running', worker=?, started_at=?, heartbeat_at=?, attempts=attempts + 1
+            WHERE job_id = (
+                SELECT job_id FROM jobs
+                WHERE status='queued' {kind_filter}
+                ORDER BY priority DESC, created_at, job_id
+                LIMIT 1
+            ) AND status='queued'
+            RETURNING {JOB_COLUMNS}
+            """,
+            (worker, now, now, *(kind_list or ())),
+        ).fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+
+@traced
+@instrumented
+def update_job_progress(job_id: str, progress: float, message: Optional[str] = None) -> None:
+    conn = connect()
+    try:
+        conn.execute(
+            """
+            UPDATE jobs SET progress=?, message=COALESCE(?, message), heartbeat_at=?
+            WHERE job_id=? AND status='running'
+            """,
+            (float(progress), message, _now_iso(), job_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@traced
+@instrumented
+def heartbeat_job(job_id: str, worker: str) -> bool:
+    """Renew the lease on a running job; False once the worker lost it."""
+    conn = connect()
+    try:
+        cur = conn.execute(
+            "UPDATE jobs SET heartbeat_at=? WHERE job_id=? AND status='running' AND worker=?",
+            (_now_iso(), job_id, worker),
+        )
+        conn.commit()
+        return cur.rowcount > 0
+    finally:
+        conn.close()
+
+
+@traced
+@instrumented
+def requeue_stale_jobs(stale_before: str, max_attempts: int) -> int:
+    """
+    Running jobs whose lease (heartbeat_at, else started_at) is older than
+    stale_before go back to queued; those already tried max_attempts times
+    fail instead, so a job that kills its worker cannot loop forever.
+    """
+    conn = connect()
+    try:
+        stale = "status='running' AND COALESCE(heartbeat_at, started_at) < ?"
+        failed = conn.execute(
+            f"""
+            UPDATE jobs SET status='failed', error=?, finished_at=?
+            WHERE {stale} AND attempts >= ?
+            """,
+            (f"lease expired after {max_attempts} attempts", _now_iso(), stale_before, int(max_attempts)),
+        ).rowcount
+        requeued = conn.execute(
+            f"""
+            UPDATE jobs SET status='queued', worker=NULL, heartbeat_at=NULL, message='lease expired; requeued'
+            WHERE {stale}
+            """,
+            (stale_before,),
+        ).rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    return failed + requeued
+
+
+@traced
+@instrumented
+def finish_job(
+    job_id: str,
+    *,
+    status: str,
+    result_json: Optional[str] = None,
+    error: Optional[str] = None,
+    worker: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Record the outcome of a running job. Returns None when the job is not
+    running (already finished, or requeued after its lease expired) or,
+    with worker given, is now held by a different worker.
+    """
+    if status not in ("done", "failed"):
+        raise ValueError(f"not a final job status: {status}")
+    conn = connect()
+    try:
+        row = conn.execute(
+            f"""
+            UPDATE jobs
+            SET status=?, result_json=?, error=?, finished_at=?,
+                progress=CASE WHEN ?='done' THEN 1.0 ELSE progress END
+            WHERE job_id=? AND status='running' AND (? IS NULL OR worker=?)
+            RETURNING {JOB_COLUMNS}
+            """,
+            (status, result_json, error, _now_iso(), status, job_id, worker, worker),
+        ).fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+
+@traced
+@instrumented
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    conn = connect()
+    row = conn.execute(f"SELECT {JOB_COLUMNS} FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+@traced
+@instrumented
+def get_job_result(job_id: str) -> Optional[str]:
+    conn = connect()
+    row = conn.execute("SELECT result_json FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+    conn.close()
+    return row["result_json"] if row else None
+
+
+@traced
+@instrumented
+def list_jobs(company_id: str, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """Newest-first jobs for a company."""
+    conn = connect()
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT {JOB_COLUMNS} FROM jobs
+        WHERE company_id=? AND (? IS NULL OR status=?)
+        ORDER BY created_at DESC, job_id DESC
+        LIMIT ?
+        """,
+        (company_id, status, status, limit),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
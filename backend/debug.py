@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from .profiler import MAX_REQUEST_PROFILES, MAX_SLOW_QUERIES, PROFILER
+from .querycache import QUERY_CACHE
+from .zerotrust import require_action
+
+# =========================================================
+# Debug endpoints (SQL profiler, list query cache)
+# =========================================================
+# Profiles and cache counters span tenants, so these are admin-only on top
+# of the zero-trust check. The profiler routes 404 unless
+# VIGIL_SQL_PROFILE=1.
+# =========================================================
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+def _admin(user: Dict[str, Any] = Depends(require_action("debug.profile"))) -> Dict[str, Any]:
+    if (user.get("role") or "").lower() != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return user
+
+
+def _require_admin(user: Dict[str, Any] = Depends(_admin)) -> Dict[str, Any]:
+    if not PROFILER.enabled:
+        raise HTTPException(status_code=404, detail="SQL profiler disabled (set VIGIL_SQL_PROFILE=1)")
+    return user
+
+
+@router.get("/slow_queries")
+def slow_queries(
+    limit: int = Query(default=100, ge=1, le=MAX_SLOW_QUERIES),
+    user=Depends(_require_admin),
+):
+    return {"ok": True, "threshold_ms": PROFILER.slow_ms, "queries": PROFILER.slow_queries(limit)}
+
+
+@router.get("/requests")
+def recent_requests(
+    limit: int = Query(default=50, ge=1, le=MAX_REQUEST_PROFILES),
+    user=Depends(_require_admin),
+):
+    items = [{k: v for k, v in p.to_dict().items() if k != "queries"} for p in PROFILER.recent_requests(limit)]
+    return {"ok": True, "requests": items}
+
+
+@router.get("/requests/{request_id}")
+def request_profile(request_id: str, user=Depends(_require_admin)):
+    profile = PROFILER.get_request(request_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Request profile not found")
+    return {"ok": True, "profile": profile.to_dict()}
+
+
+@router.get("/query_cache")
+def query_cache(user=Depends(_admin)):
+    return {"ok": True, "cache": QUERY_CACHE.stats()}
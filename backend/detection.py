@@ -0,0 +1,732 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from .correlation import CORRELATION, correlated_signal_event
+from .simulation import severity_for, title_for
+from .storage import StorageBackend
+
+# =========================================================
+# Streaming anomaly detection over telemetry
+# =========================================================
+# telemetry.ingest() hands every accepted batch to ENGINE.observe(). Each
+# company gets a FleetState: per-drone detector state in flat array('d')
+# / array('l') columns indexed by a slot number, so state is O(1) per
+# drone and a sample update is a handful of indexed loads/stores.
+#
+#   gps_health / link_quality  robust EWMA mean + variance; a sample is an
+#                              outlier when z <= -z_threshold (outliers do
+#                              not move the baseline) and the channel is
+#                              degraded when the EWMA mean is below a floor
+#   battery                    drain rate = least-squares slope over a ring
+#                              buffer of the last drain_window samples,
+#                              maintained with running sums
+#
+# A detector fires after min_hits consecutive hits:
+#   gps_health    -> gps_spoof
+#   link_quality  -> rf_link_hijack
+#   battery drain -> firmware_tamper
+# Firing resets that channel's baseline and arms a per-drone cooldown.
+# Detections then go through the correlation index: a repeat for a drone
+# with an active incident of the same threat_type is folded into it as a
+# signal_correlated event instead of opening a new incident.
+#
+# VIGIL_DETECTION_MODE=vector swaps FleetState for VectorFleetState, which
+# holds the same state in NumPy columns and evaluates all three rules for
+# every drone in a batch in one pass (one batch = one fleet tick). It pays
+# a fixed per-batch cost, so it wins for gateway/simulator-sized batches
+# and loses for single-sample posts; see bench/detection_bench.py.
+# =========================================================
+
+DETECTION_ENABLED = os.environ.get("VIGIL_DETECTION", "1") != "0"
+DETECTION_MODE = os.environ.get("VIGIL_DETECTION_MODE", "scalar")  # scalar | vector
+DETECTOR_ACTOR = "detector"
+
+
+@dataclass(frozen=True)
+class DetectorConfig:
+    alpha: float = 0.1              # EWMA smoothing
+    z_threshold: float = 4.0
+    min_std: float = 2.0            # variance floor; telemetry is integer percent
+    warmup: int = 20                # samples before a channel may hit
+    gps_floor: float = 50.0
+    link_floor: float = 25.0
+    drain_window: int = 64          # ring buffer length; slope needs a full ring
+    max_drain_per_s: float = 0.2    # %/s; normal flight drains ~0.01-0.03
+    min_hits: int = 3
+    cooldown_s: float = 300.0
+
+
+@dataclass(frozen=True)
+class Detection:
+    company_id: str
+    drone_id: str
+    threat_type: str
+    detector: str
+    value: float
+    score: float
+    ts: str
+    details: Optional[Dict[str, Any]] = None  # extra signal fields for the incident/event payload
+
+
+def _epoch(value: Any, cache: Dict[str, float]) -> float:
+    if not value:
+        return time.time()
+    ts = cache.get(value)
+    if ts is None:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        ts = parsed.timestamp()
+        if len(cache) > 1024:
+            cache.clear()
+        cache[value] = ts
+    return ts
+
+
+class FleetState:
+    """Detector state for one company's fleet, one slot per drone."""
+
+    def __init__(self, company_id: str, config: DetectorConfig):
+        self.company_id = company_id
+        self.config = config
+        self.slots: Dict[str, int] = {}
+        self.drone_ids: List[str] = []
+        # gps / link EWMA channels
+        self.gps_n = array("l")
+        self.gps_mean = array("d")
+        self.gps_var = array("d")
+        self.gps_hits = array("l")
+        self.link_n = array("l")
+        self.link_mean = array("d")
+        self.link_var = array("d")
+        self.link_hits = array("l")
+        # battery drain: ring buffer + running regression sums (t relative to t0)
+        self.ring_t = array("d")
+        self.ring_b = array("d")
+        self.ring_head = array("l")
+        self.ring_len = array("l")
+        self.t0 = array("d")
+        self.s_t = array("d")
+        self.s_b = array("d")
+        self.s_tt = array("d")
+        self.s_tb = array("d")
+        self.drain_hits = array("l")
+        # cooldown deadlines (epoch seconds) per threat
+        self.gps_until = array("d")
+        self.link_until = array("d")
+        self.drain_until = array("d")
+        self.samples = 0
+        self.detections = 0
+        self.incidents = 0
+
+    def slot(self, drone_id: str) -> int:
+        slot = self.slots.get(drone_id)
+        if slot is not None:
+            return slot
+        slot = len(self.drone_ids)
+        self.slots[drone_id] = slot
+        self.drone_ids.append(drone_id)
+        for col in (self.gps_n, self.gps_hits, self.link_n, self.link_hits,
+                    self.ring_head, self.ring_len, self.drain_hits):
+            col.append(0)
+        for col in (self.gps_mean, self.gps_var, self.link_mean, self.link_var, self.t0,
+                    self.s_t, self.s_b, self.s_tt, self.s_tb,
+                    self.gps_until, self.link_until, self.drain_until):
+            col.append(0.0)
+        zeros = array("d", bytes(8 * self.config.drain_window))
+        self.ring_t.extend(zeros)
+        self.ring_b.extend(zeros)
+        return slot
+
+    def _rebase(self, slot: int) -> None:
+        # Recompute the regression sums exactly, relative to the oldest sample,
+        # once per ring revolution so add/subtract rounding cannot accumulate.
+        w = self.config.drain_window
+        base = slot * w
+        n = self.ring_len[slot]
+        head = self.ring_head[slot]
+        oldest = base + (head - n) % w
+        t0_abs = self.t0[slot] + self.ring_t[oldest]
+        s_t = s_b = s_tt = s_tb = 0.0
+        for k in range(n):
+            i = base + (head - n + k) % w
+            t = self.t0[slot] + self.ring_t[i] - t0_abs
+            b = self.ring_b[i]
+            self.ring_t[i] = t
+            s_t += t
+            s_b += b
+            s_tt += t * t
+            s_tb += t * b
+        self.t0[slot] = t0_abs
+        self.s_t[slot] = s_t
+        self.s_b[slot] = s_b
+        self.s_tt[slot] = s_tt
+        self.s_tb[slot] = s_tb
+
+    def observe(self, samples: Iterable[Dict[str, Any]]) -> List[Detection]:
+        cfg = self.config
+        alpha = cfg.alpha
+        keep = 1.0 - alpha
+        z_thr = cfg.z_threshold
+        min_var = cfg.min_std * cfg.min_std
+        warmup = cfg.warmup
+        min_hits = cfg.min_hits
+        w = cfg.drain_window
+        max_drain = cfg.max_drain_per_s
+        cooldown = cfg.cooldown_s
+        slots = self.slots
+        ts_cache: Dict[str, float] = {}
+        fired: List[Detection] = []
+        channels = (
+            ("gps_health", "gps", cfg.gps_floor, "gps_spoof",
+             self.gps_n, self.gps_mean, self.gps_var, self.gps_hits, self.gps_until),
+            ("link_quality", "link", cfg.link_floor, "rf_link_hijack",
+             self.link_n, self.link_mean, self.link_var, self.link_hits, self.link_until),
+        )
+
+        for s in samples:
+            drone_id = s.get("drone_id")
+            if not drone_id:
+                continue
+            slot = slots.get(drone_id)
+            if slot is None:
+                slot = self.slot(drone_id)
+            last_seen = s.get("last_seen")
+            now = _epoch(last_seen, ts_cache)
+            self.samples += 1
+
+            for field, channel, floor, threat, n_col, mean_col, var_col, hits_col, until_col in channels:
+                x = s.get(field)
+                if x is None:
+                    continue
+                n = n_col[slot]
+                if n == 0:
+                    n_col[slot] = 1
+                    mean_col[slot] = x
+                    var_col[slot] = min_var
+                    continue
+                mean = mean_col[slot]
+                var = var_col[slot]
+                z = (x - mean) / math.sqrt(var if var > min_var else min_var)
+                outlier = z <= -z_thr
+                if not outlier:
+                    diff = x - mean
+                    incr = alpha * diff
+                    mean += incr
+                    mean_col[slot] = mean
+                    var_col[slot] = keep * (var + diff * incr)
+                n_col[slot] = n + 1
+                if n < warmup:
+                    continue
+                if outlier or mean < floor:
+                    hits = hits_col[slot] + 1
+                    if hits >= min_hits and now >= until_col[slot]:
+                        fired.append(
+                            Detection(
+                                company_id=self.company_id,
+                                drone_id=drone_id,
+                                threat_type=threat,
+                                detector=f"{channel}_ewma_z" if outlier else f"{channel}_ewma_floor",
+                                value=float(x),
+                                score=round(z, 3),
+                                ts=last_seen or datetime.fromtimestamp(now, timezone.utc).isoformat(),
+                            )
+                        )
+                        until_col[slot] = now + cooldown
+                        # Re-seed the baseline at the new level
+                        n_col[slot] = 0
+                        hits = 0
+                    hits_col[slot] = hits
+                elif hits_col[slot]:
+                    hits_col[slot] = 0
+
+            b = s.get("battery")
+            if b is None:
+                continue
+            length = self.ring_len[slot]
+            if length == 0:
+                self.t0[slot] = now
+            head = self.ring_head[slot]
+            i = slot * w + head
+            t = now - self.t0[slot]
+            if length == w:
+                ot = self.ring_t[i]
+                ob = self.ring_b[i]
+                self.s_t[slot] -= ot
+                self.s_b[slot] -= ob
+                self.s_tt[slot] -= ot * ot
+                self.s_tb[slot] -= ot * ob
+            else:
+                length += 1
+                self.ring_len[slot] = length
+            self.ring_t[i] = t
+            self.ring_b[i] = b
+            self.s_t[slot] += t
+            self.s_b[slot] += b
+            self.s_tt[slot] += t * t
+            self.s_tb[slot] += t * b
+            head += 1
+            if head == w:
+                head = 0
+                self.ring_head[slot] = 0
+                self._rebase(slot)
+            else:
+                self.ring_head[slot] = head
+            if length < w:
+                continue
+            s_t = self.s_t[slot]
+            denom = length * self.s_tt[slot] - s_t * s_t
+            if denom <= 0:
+                continue
+            drain = -(length * self.s_tb[slot] - s_t * self.s_b[slot]) / denom
+            if drain > max_drain:
+                hits = self.drain_hits[slot] + 1
+                if hits >= min_hits and now >= self.drain_until[slot]:
+                    fired.append(
+                        Detection(
+                            company_id=self.company_id,
+                            drone_id=drone_id,
+                            threat_type="firmware_tamper",
+                            detector="battery_drain_rate",
+                            value=float(b),
+                            score=round(drain, 4),
+                            ts=last_seen or datetime.fromtimestamp(now, timezone.utc).isoformat(),
+                        )
+                    )
+                    self.drain_until[slot] = now + cooldown
+                    hits = 0
+                self.drain_hits[slot] = hits
+            elif self.drain_hits[slot]:
+                self.drain_hits[slot] = 0
+        return fired
+
+np: Any = None  # numpy, imported by the first VectorFleetState (scalar mode never needs it)
+
+
+def _import_numpy() -> None:
+    global np
+    if np is None:
+        import numpy
+
+        np = numpy
+
+
+class VectorFleetState:
+    """
+    Fleet-tick mode: the same detectors as FleetState, with state held in
+    NumPy columns and each batch evaluated in one vectorized pass. A batch
+    is treated as one fleet tick, so only the latest sample per drone in
+    it is used.
+    """
+
+    _INT_COLS = ("gps_n", "gps_hits", "link_n", "link_hits", "ring_head", "ring_len", "drain_hits")
+    _FLOAT_COLS = (
+        "gps_mean", "gps_var", "link_mean", "link_var", "t0", "s_t", "s_b", "s_tt", "s_tb",
+        "gps_until", "link_until", "drain_until",
+    )
+
+    def __init__(self, company_id: str, config: DetectorConfig, capacity: int = 1024):
+        _import_numpy()
+        self.company_id = company_id
+        self.config = config
+        self.slots: Dict[str, int] = {}
+        self.drone_ids: List[str] = []
+        self.capacity = capacity
+        for name in self._INT_COLS:
+            setattr(self, name, np.zeros(capacity, dtype=np.int64))
+        for name in self._FLOAT_COLS:
+            setattr(self, name, np.zeros(capacity, dtype=np.float64))
+        self.ring_t = np.zeros((capacity, config.drain_window), dtype=np.float64)
+        self.ring_b = np.zeros((capacity, config.drain_window), dtype=np.float64)
+        self.samples = 0
+        self.detections = 0
+        self.incidents = 0
+
+    def _grow(self, needed: int) -> None:
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name in self._INT_COLS + self._FLOAT_COLS + ("ring_t", "ring_b"):
+            col = getattr(self, name)
+            grown = np.zeros((capacity,) + col.shape[1:], dtype=col.dtype)
+            grown[: self.capacity] = col
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+    def slot(self, drone_id: str) -> int:
+        slot = self.slots.get(drone_id)
+        if slot is None:
+            slot = len(self.drone_ids)
+            if slot >= self.capacity:
+                self._grow(slot + 1)
+            self.slots[drone_id] = slot
+            self.drone_ids.append(drone_id)
+        return slot
+
+    def _pack(self, samples: Iterable[Dict[str, Any]]) -> Tuple[np.ndarray, ...]:
+        nan = math.nan
+        slots = self.slots
+        ts_cache: Dict[str, float] = {}
+        idx: List[int] = []
+        gps: List[float] = []
+        link: List[float] = []
+        battery: List[float] = []
+        now: List[float] = []
+        for s in samples:
+            drone_id = s.get("drone_id")
+            if not drone_id:
+                continue
+            slot = slots.get(drone_id)
+            idx.append(slot if slot is not None else self.slot(drone_id))
+            x = s.get("gps_health")
+            gps.append(nan if x is None else x)
+            x = s.get("link_quality")
+            link.append(nan if x is None else x)
+            x = s.get("battery")
+            battery.append(nan if x is None else x)
+            now.append(_epoch(s.get("last_seen"), ts_cache))
+        return (
+            np.asarray(idx, dtype=np.int64),
+            np.asarray(gps, dtype=np.float64),
+            np.asarray(link, dtype=np.float64),
+            np.asarray(battery, dtype=np.float64),
+            np.asarray(now, dtype=np.float64),
+        )
+
+    def observe(self, samples: Iterable[Dict[str, Any]]) -> List[Detection]:
+        return self.observe_tick(*self._pack(samples))
+
+    def observe_tick(
+        self,
+        idx: np.ndarray,
+        gps: np.ndarray,
+        link: np.ndarray,
+        battery: np.ndarray,
+        now: np.ndarray,
+    ) -> List[Detection]:
+        """
+        One fleet tick from packed columns (slot index, gps_health,
+        link_quality, battery, epoch seconds); NaN marks a missing value.
+        """
+        if idx.size == 0:
+            return []
+        # Latest sample per drone wins (a tick has at most one row per slot)
+        uniq, first_rev = np.unique(idx[::-1], return_index=True)
+        if uniq.size != idx.size:
+            keep = idx.size - 1 - first_rev
+            idx, gps, link, battery, now = idx[keep], gps[keep], link[keep], battery[keep], now[keep]
+        self.samples += int(idx.size)
+
+        cfg = self.config
+        fired: List[Tuple[np.ndarray, str, str, np.ndarray, np.ndarray, np.ndarray]] = []
+        for x, channel, floor, threat in (
+            (gps, "gps", cfg.gps_floor, "gps_spoof"),
+            (link, "link", cfg.link_floor, "rf_link_hijack"),
+        ):
+            hit_rows, outlier, z = self._ewma_channel(channel, idx, x, now, floor)
+            if hit_rows.size:
+                fired.append((hit_rows, threat, channel, x, z, outlier))
+        drain_rows, drain = self._drain(idx, battery, now)
+        if drain_rows.size:
+            fired.append((drain_rows, "firmware_tamper", "battery", battery, drain, None))
+
+        detections: List[Detection] = []
+        for rows, threat, channel, values, scores, outlier in fired:
+            for r in rows.tolist():
+                if outlier is None:
+                    detector = "battery_drain_rate"
+                    score = round(float(scores[r]), 4)
+                else:
+                    detector = f"{channel}_ewma_z" if outlier[r] else f"{channel}_ewma_floor"
+                    score = round(float(scores[r]), 3)
+                detections.append(
+                    Detection(
+                        company_id=self.company_id,
+                        drone_id=self.drone_ids[int(idx[r])],
+                        threat_type=threat,
+                        detector=detector,
+                        value=float(values[r]),
+                        score=score,
+                        ts=datetime.fromtimestamp(float(now[r]), timezone.utc).isoformat(),
+                    )
+                )
+        return detections
+
+    def _ewma_channel(
+        self, channel: str, idx: np.ndarray, x: np.ndarray, now: np.ndarray, floor: float
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        cfg = self.config
+        n_col = getattr(self, f"{channel}_n")
+        mean_col = getattr(self, f"{channel}_mean")
+        var_col = getattr(self, f"{channel}_var")
+        hits_col = getattr(self, f"{channel}_hits")
+        until_col = getattr(self, f"{channel}_until")
+        min_var = cfg.min_std * cfg.min_std
+
+        valid = ~np.isnan(x)
+        n = n_col[idx]
+        first = valid & (n == 0)
+        if first.any():
+            rows = idx[first]
+            n_col[rows] = 1
+            mean_col[rows] = x[first]
+            var_col[rows] = min_var
+        rest = valid & (n > 0)
+
+        mean = mean_col[idx]
+        var = var_col[idx]
+        z = (x - mean) / np.sqrt(np.maximum(var, min_var))
+        outlier = rest & (z <= -cfg.z_threshold)
+        update = rest & ~outlier
+        diff = x - mean
+        incr = cfg.alpha * diff
+        mean = np.where(update, mean + incr, mean)
+        mean_col[idx[update]] = mean[update]
+        var_col[idx[update]] = ((1.0 - cfg.alpha) * (var + diff * incr))[update]
+        n_col[idx[rest]] = n[rest] + 1
+
+        eligible = rest & (n >= cfg.warmup)
+        hit = eligible & (outlier | (mean < floor))
+        hits = np.where(hit, hits_col[idx] + 1, 0)
+        hits_col[idx[eligible]] = hits[eligible]
+        fire = hit & (hits >= cfg.min_hits) & (now >= until_col[idx])
+        rows = np.flatnonzero(fire)
+        if rows.size:
+            slots = idx[rows]
+            until_col[slots] = now[rows] + cfg.cooldown_s
+            n_col[slots] = 0
+            hits_col[slots] = 0
+        return rows, outlier, z
+
+    def _drain(self, idx: np.ndarray, battery: np.ndarray, now: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        cfg = self.config
+        w = cfg.drain_window
+        valid = ~np.isnan(battery)
+        if not valid.all():
+            rows_map = np.flatnonzero(valid)
+            idx, battery, now = idx[valid], battery[valid], now[valid]
+        else:
+            rows_map = None
+
+        length = self.ring_len[idx]
+        fresh = length == 0
+        self.t0[idx[fresh]] = now[fresh]
+        head = self.ring_head[idx]
+        t = now - self.t0[idx]
+        full = length == w
+        ot = np.where(full, self.ring_t[idx, head], 0.0)
+        ob = np.where(full, self.ring_b[idx, head], 0.0)
+        length = np.where(full, length, length + 1)
+        self.ring_len[idx] = length
+        self.ring_t[idx, head] = t
+        self.ring_b[idx, head] = battery
+        self.s_t[idx] += t - ot
+        self.s_b[idx] += battery - ob
+        self.s_tt[idx] += t * t - ot * ot
+        self.s_tb[idx] += t * battery - ot * ob
+        head = head + 1
+        wrapped = head == w
+        head[wrapped] = 0
+        self.ring_head[idx] = head
+        if wrapped.any():
+            # Full revolution: oldest sample is column 0; rebase t and re-sum exactly
+            rows = idx[wrapped]
+            rt = self.ring_t[rows]
+            origin = rt[:, :1]
+            rt = rt - origin
+            rb = self.ring_b[rows]
+            self.ring_t[rows] = rt
+            self.t0[rows] += origin[:, 0]
+            self.s_t[rows] = rt.sum(axis=1)
+            self.s_b[rows] = rb.sum(axis=1)
+            self.s_tt[rows] = (rt * rt).sum(axis=1)
+            self.s_tb[rows] = (rt * rb).sum(axis=1)
+
+        ready = length >= w
+        s_t = self.s_t[idx]
+        denom = length * self.s_tt[idx] - s_t * s_t
+        ok = ready & (denom > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drain = np.where(ok, -(length * self.s_tb[idx] - s_t * self.s_b[idx]) / np.where(ok, denom, 1.0), 0.0)
+        hit = ok & (drain > cfg.max_drain_per_s)
+        hits = np.where(hit, self.drain_hits[idx] + 1, 0)
+        self.drain_hits[idx[ok]] = hits[ok]
+        fire = hit & (hits >= cfg.min_hits) & (now >= self.drain_until[idx])
+        rows = np.flatnonzero(fire)
+        if rows.size:
+            slots = idx[rows]
+            self.drain_until[slots] = now[rows] + cfg.cooldown_s
+            self.drain_hits[slots] = 0
+        if rows_map is not None:
+            full_drain = np.zeros(valid.size)
+            full_drain[rows_map] = drain
+            return rows_map[rows], full_drain
+        return rows, drain
+
+
+def bytes_per_drone(config: DetectorConfig) -> int:
+    # 7 int64 + 12 float64 columns, plus the (t, battery) ring
+    return 7 * array("l").itemsize + 12 * 8 + 2 * 8 * config.drain_window
+
+
+def raise_incidents(
+    store: StorageBackend, detections: List[Detection], source: str = "anomaly_detection"
+) -> List[Dict[str, Any]]:
+    """
+    Write one incident + anomaly_detected / incident_created events per
+    detection; detections correlated with an active incident are folded
+    into it instead. Returns the incidents written.
+    """
+    if not detections:
+        return []
+    operators = store.get_assigned_operators({d.drone_id for d in detections})
+    incidents: List[Dict[str, Any]] = []
+    events: List[Dict[str, Any]] = []
+    for d in detections:
+        signal = {"detector": d.detector, "value": d.value, "score": d.score, **(d.details or {})}
+        incident_id, folded = CORRELATION.claim(
+            store,
+            company_id=d.company_id,
+            drone_id=d.drone_id,
+            threat_type=d.threat_type,
+            training=False,
+            incident_id=f"INC-{uuid4().hex[:12]}",
+        )
+        if folded:
+            events.append(
+                correlated_signal_event(
+                    company_id=d.company_id,
+                    drone_id=d.drone_id,
+                    incident_id=incident_id,
+                    threat_type=d.threat_type,
+                    actor=DETECTOR_ACTOR,
+                    source=source,
+                    ts=d.ts,
+                    **signal,
+                )
+            )
+            continue
+
+        severity = severity_for(d.threat_type)
+        title = title_for(d.threat_type)
+        operator = operators.get(d.drone_id)
+        incidents.append(
+            {
+                "incident_id": incident_id,
+                "company_id": d.company_id,
+                "drone_id": d.drone_id,
+                "threat_type": d.threat_type,
+                "severity": severity,
+                "title": title,
+                "training": False,
+                "created_at": d.ts,
+                "details": json.dumps({"source": source, **signal}),
+                "operator": operator,
+            }
+        )
+        events.append(
+            {
+                "ts": d.ts,
+                "company_id": d.company_id,
+                "drone_id": d.drone_id,
+                "incident_id": incident_id,
+                "event_type": "anomaly_detected",
+                "actor": DETECTOR_ACTOR,
+                "action": d.threat_type,
+                "result": "ok",
+                "payload_json": json.dumps(signal),
+            }
+        )
+        events.append(
+            {
+                "ts": d.ts,
+                "company_id": d.company_id,
+                "drone_id": d.drone_id,
+                "incident_id": incident_id,
+                "event_type": "incident_created",
+                "actor": DETECTOR_ACTOR,
+                "action": d.threat_type,
+                "result": "ok",
+                "payload_json": json.dumps(
+                    {"severity": severity, "title": title, "training": False, "operator": operator, **signal}
+                ),
+            }
+        )
+    try:
+        if incidents:
+            store.create_incidents_bulk(incidents, events)
+        elif events:
+            store.add_forensic_events(events)
+    except Exception:
+        for inc in incidents:
+            CORRELATION.release(inc["incident_id"])
+        raise
+    return incidents
+
+
+FLEET_STATES = {"scalar": FleetState, "vector": VectorFleetState}
+
+
+class DetectionEngine:
+    def __init__(self, config: Optional[DetectorConfig] = None, mode: str = DETECTION_MODE):
+        if mode not in FLEET_STATES:
+            raise ValueError(f"unknown detection mode: {mode}")
+        self.config = config or DetectorConfig()
+        self.mode = mode
+        self._fleets: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def fleet(self, company_id: str) -> Tuple[Any, threading.Lock]:
+        state = self._fleets.get(company_id)
+        if state is None:
+            with self._lock:
+                state = self._fleets.get(company_id)
+                if state is None:
+                    self._locks[company_id] = threading.Lock()
+                    state = self._fleets[company_id] = FLEET_STATES[self.mode](company_id, self.config)
+        return state, self._locks[company_id]
+
+    def observe(self, store: Optional[StorageBackend], company_id: str, samples: Iterable[Dict[str, Any]]) -> List[Detection]:
+        """Update detector state; with a store, fired detections become incidents."""
+        state, lock = self.fleet(company_id)
+        with lock:
+            fired = state.observe(samples)
+            state.detections += len(fired)
+        if fired and store is not None:
+            written = len(raise_incidents(store, fired))
+            with lock:
+                state.incidents += written
+        return fired
+
+    def stats(self, company_id: str) -> Dict[str, Any]:
+        state = self._fleets.get(company_id)
+        return {
+            "enabled": DETECTION_ENABLED,
+            "mode": self.mode,
+            "drones": len(state.drone_ids) if state else 0,
+            "samples": state.samples if state else 0,
+            "detections": state.detections if state else 0,
+            "incidents": state.incidents if state else 0,
+            "state_bytes_per_drone": bytes_per_drone(self.config),
+        }
+
+    def reset(self, company_id: Optional[str] = None) -> None:
+        with self._lock:
+            if company_id is None:
+                self._fleets.clear()
+            else:
+                self._fleets.pop(company_id, None)
+
+
+ENGINE = DetectionEngine()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from .jobs import JobContext, job_kind
+from .metrics import BUNDLE_BYTES, BUNDLE_HASH_SECONDS
+from .storage import StorageBackend
+
+# =========================================================
+# Exports (forensic evidence bundles)
+# =========================================================
+# build_forensics_bundle() is shared by the synchronous
+# GET /api/forensics/bundle and the "forensics.bundle" background job
+# (POST /api/forensics/bundle/jobs), which also accepts a larger event
+# limit for big audits.
+# =========================================================
+
+BUNDLE_EVENT_LIMIT = 1000
+MAX_JOB_BUNDLE_EVENTS = 100000
+
+ProgressFn = Callable[[float, Optional[str]], None]
+
+
+def build_forensics_bundle(
+    store: StorageBackend,
+    incident_id: str,
+    *,
+    actor: str,
+    role: str,
+    company_id: str,
+    event_limit: int = BUNDLE_EVENT_LIMIT,
+    progress: Optional[ProgressFn] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Evidence Bundle Export v0: system-generated snapshot for audits/pilots.
+    None when the incident does not exist for this company.
+    """
+    report = progress or (lambda fraction, message=None: None)
+
+    incident = store.get_incident(incident_id)
+    # Prevent cross-tenant export
+    if not incident or incident.get("company_id") != company_id:
+        return None
+    report(0.1, "incident loaded")
+
+    # Pull append-only event timeline
+    events = store.list_forensics(
+        company_id=company_id,
+        drone_id=incident.get("drone_id"),
+        incident_id=incident_id,
+        limit=event_limit,
+    )
+    events = sorted(
+        events,
+        key=lambda event: (
+            event.get("ts") or "",
+            event.get("id") or "",
+        ),
+    )
+    report(0.6, f"{len(events)} events loaded")
+
+    bundle = {
+        "schema_version": "12F.export.v0",
+        "generated_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        "generated_by": {"actor": actor, "role": role, "company_id": company_id},
+        "disclaimer": "System-generated snapshot of append-only evidence events + incident state. Not user-editable.",
+        "incident": incident,
+        "events": events,
+    }
+
+    stable_for_hash = {
+        "schema_version": bundle["schema_version"],
+        "generated_by": bundle["generated_by"],
+        "disclaimer": bundle["disclaimer"],
+        "incident": bundle["incident"],
+        "events": bundle["events"],
+    }
+
+    t0 = time.perf_counter()
+    canonical = json.dumps(
+        stable_for_hash,
+        sort_keys=True,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    bundle["bundle_sha256"] = hashlib.sha256(canonical).hexdigest()
+    BUNDLE_HASH_SECONDS.observe(time.perf_counter() - t0)
+    BUNDLE_BYTES.observe(len(canonical))
+    report(0.9, "bundle hashed")
+    return bundle
+
+
+@job_kind("forensics.bundle", action="forensics.export")
+def forensics_bundle_job(ctx: JobContext) -> Dict[str, Any]:
+    params = ctx.params
+    bundle = build_forensics_bundle(
+        ctx.store,
+        params["incident_id"],
+        actor=params.get("actor") or "unknown",
+        role=params.get("role") or "unknown",
+        company_id=ctx.company_id,
+        event_limit=int(params.get("event_limit") or BUNDLE_EVENT_LIMIT),
+        progress=ctx.progress,
+    )
+    if bundle is None:
+        raise LookupError("Incident not found")
+    return {"ok": True, "bundle": bundle}
@@ -0,0 +1,581 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import uuid4
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from . import db
+from .detection import Detection, raise_incidents
+from .metrics import REGISTRY
+from .storage import StorageBackend, get_storage
+from .zerotrust import require_action
+
+# =========================================================
+# Geospatial: latest fleet positions + geofences
+# =========================================================
+# telemetry.ingest() hands samples that carry lat/lon to GEO.observe():
+#
+#   - PositionIndex (one per company) keeps the latest position of every
+#     drone in flat array('d') columns indexed by slot, plus a uniform grid
+#     (GEO_CELL_DEG-degree cells -> set of slots). A move updates the
+#     columns and, when the drone changes cell, two set operations.
+#   - bbox / radius / polygon queries visit only the cells that overlap the
+#     query's bounding box (or only the occupied cells, when that is fewer),
+#     then test the candidates exactly: haversine for circles, ray casting
+#     for polygons.
+#   - Every positioned sample is tested against the company's geofences.
+#     A drone entering a keep_out fence, or leaving a keep_in fence, is a
+#     geofence_breach detection and goes through detection.raise_incidents
+#     (so repeats fold into the drone's active breach incident). A drone
+#     must clear the fence before the same fence can fire again.
+#   - A sample whose last_seen is older than the drone's indexed one (a
+#     delayed or replayed batch) is ignored, so it cannot move the drone
+#     back to a stale position or flip its breach state.
+#
+# Geofences live in the `geofences` table; each process caches the compiled
+# shapes per company for GEOFENCE_REFRESH_SECONDS (writes through this
+# process refresh immediately). An index is warmed from latest_telemetry()
+# the first time a company is used, with breach state evaluated silently so
+# a restart does not re-fire standing breaches.
+#
+# Coordinates are WGS84 degrees; boxes crossing the antimeridian are not
+# supported (split them in two).
+# =========================================================
+
+GEO_ENABLED = os.environ.get("VIGIL_GEO", "1") != "0"
+GEO_CELL_DEG = float(os.environ.get("VIGIL_GEO_CELL_DEG", "0.01"))  # ~1.1 km of latitude
+GEOFENCE_REFRESH_SECONDS = float(os.environ.get("VIGIL_GEOFENCE_REFRESH_SECONDS", "5"))
+GEOFENCE_KINDS = ("bbox", "circle", "polygon")
+GEOFENCE_RULES = ("keep_out", "keep_in")
+GEOFENCE_THREAT = "geofence_breach"
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEG_LAT = math.pi * EARTH_RADIUS_M / 180.0  # on the haversine sphere, so bounds agree with contains()
+MAX_RADIUS_M = 500000.0
+MAX_POLYGON_POINTS = 1000
+
+GEO_QUERY_SECONDS = REGISTRY.histogram("geo_query_seconds", "Spatial index query time", ("kind",))
+GEOFENCE_BREACHES = REGISTRY.counter("geofence_breaches_total", "Geofence breaches detected", ("rule",))
+
+
+# ---------------------------------------------------------
+# Geometry
+# ---------------------------------------------------------
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _check_point(lat: Any, lon: Any) -> Tuple[float, float]:
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        raise ValueError("coordinates must be numbers")
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        raise ValueError(f"coordinate out of range: ({lat}, {lon})")
+    return lat, lon
+
+
+class BBox:
+    __slots__ = ("min_lat", "min_lon", "max_lat", "max_lon")
+
+    def __init__(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float):
+        min_lat, min_lon = _check_point(min_lat, min_lon)
+        max_lat, max_lon = _check_point(max_lat, max_lon)
+        if min_lat > max_lat or min_lon > max_lon:
+            raise ValueError("bbox min must not exceed max (antimeridian boxes are not supported)")
+        self.min_lat, self.min_lon, self.max_lat, self.max_lon = min_lat, min_lon, max_lat, max_lon
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        return self.min_lat, self.min_lon, self.max_lat, self.max_lon
+
+    def contains(self, lat: float, lon: float) -> bool:
+        return self.min_lat <= lat <= self.max_lat and self.min_lon <= lon <= self.max_lon
+
+
+class Circle:
+    __slots__ = ("lat", "lon", "radius_m", "bounds")
+
+    def __init__(self, lat: float, lon: float, radius_m: float):
+        self.lat, self.lon = _check_point(lat, lon)
+        radius_m = float(radius_m)
+        if not 0 < radius_m <= MAX_RADIUS_M:
+            raise ValueError(f"radius_m must be in (0, {MAX_RADIUS_M:g}]")
+        self.radius_m = radius_m
+        dlat = radius_m / METERS_PER_DEG_LAT
+        # Longitude degrees shrink with latitude; near the poles the box is all longitudes
+        cos_lat = math.cos(math.radians(min(89.0, abs(self.lat) + dlat)))
+        dlon = min(180.0, radius_m / (METERS_PER_DEG_LAT * cos_lat))
+        self.bounds = (
+            max(-90.0, self.lat - dlat), max(-180.0, self.lon - dlon),
+            min(90.0, self.lat + dlat), min(180.0, self.lon + dlon),
+        )
+
+    def contains(self, lat: float, lon: float) -> bool:
+        return haversine_m(self.lat, self.lon, lat, lon) <= self.radius_m
+
+
+class Polygon:
+    __slots__ = ("lats", "lons", "bounds")
+
+    def __init__(self, points: Sequence[Sequence[float]]):
+        if not 3 <= len(points) <= MAX_POLYGON_POINTS:
+            raise ValueError(f"polygon needs 3..{MAX_POLYGON_POINTS} [lat, lon] points")
+        pts = []
+        for p in points:
+            if len(p) != 2:
+                raise ValueError("polygon points are [lat, lon] pairs")
+            pts.append(_check_point(p[0], p[1]))
+        self.lats = [p[0] for p in pts]
+        self.lons = [p[1] for p in pts]
+        self.bounds = (min(self.lats), min(self.lons), max(self.lats), max(self.lons))
+
+    def contains(self, lat: float, lon: float) -> bool:
+        # Even-odd ray casting in the (lon, lat) plane; fine for fence-sized areas
+        lats, lons = self.lats, self.lons
+        inside = False
+        j = len(lats) - 1
+        for i in range(len(lats)):
+            yi, yj = lats[i], lats[j]
+            if (yi > lat) != (yj > lat):
+                x = lons[i] + (lat - yi) * (lons[j] - lons[i]) / (yj - yi)
+                if lon < x:
+                    inside = not inside
+            j = i
+        return inside
+
+
+Shape = Any  # BBox | Circle | Polygon
+
+
+def compile_shape(kind: str, geometry: Dict[str, Any]) -> Shape:
+    """Geometry JSON -> shape; raises ValueError on anything malformed."""
+    try:
+        if kind == "bbox":
+            return BBox(geometry["min_lat"], geometry["min_lon"], geometry["max_lat"], geometry["max_lon"])
+        if kind == "circle":
+            return Circle(geometry["lat"], geometry["lon"], geometry["radius_m"])
+        if kind == "polygon":
+            return Polygon(geometry["points"])
+    except (KeyError, TypeError) as exc:
+        raise ValueError(f"invalid {kind} geometry: {exc}")
+    raise ValueError(f"kind must be one of {', '.join(GEOFENCE_KINDS)}")
+
+
+class Geofence:
+    __slots__ = ("geofence_id", "name", "rule", "shape")
+
+    def __init__(self, row: Dict[str, Any]):
+        self.geofence_id: str = row["geofence_id"]
+        self.name: str = row["name"]
+        self.rule: str = row["rule"]
+        self.shape = compile_shape(row["kind"], json.loads(row["geometry_json"]))
+
+    def violated(self, lat: float, lon: float) -> bool:
+        return self.shape.contains(lat, lon) == (self.rule == "keep_out")
+
+
+# ---------------------------------------------------------
+# Position index
+# ---------------------------------------------------------
+
+
+class PositionIndex:
+    """Latest position per drone, bucketed in a uniform lat/lon grid."""
+
+    def __init__(self, cell_deg: float = GEO_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.slots: Dict[str, int] = {}
+        self.drone_ids: List[str] = []
+        self.lat = array("d")
+        self.lon = array("d")
+        self.alt = array("d")
+        self.speed = array("d")
+        self.status: List[Optional[str]] = []
+        self.seen: List[Optional[str]] = []
+        self.seen_at = array("d")  # last_seen as epoch seconds (nan when unknown)
+        self.cell_of: List[Tuple[int, int]] = []
+        self.cells: Dict[Tuple[int, int], Set[int]] = {}
+        self.breached: List[Set[str]] = []  # geofence ids each drone is currently violating
+
+    def __len__(self) -> int:
+        return len(self.drone_ids)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def stale(self, drone_id: str, sample: Dict[str, Any]) -> bool:
+        """True when the sample is older than the position already indexed for the drone."""
+        slot = self.slots.get(drone_id)
+        return slot is not None and _seen_epoch(sample.get("last_seen")) < self.seen_at[slot]
+
+    def update(self, drone_id: str, lat: float, lon: float, sample: Dict[str, Any]) -> int:
+        cell = self._cell(lat, lon)
+        slot = self.slots.get(drone_id)
+        if slot is None:
+            slot = self.slots[drone_id] = len(self.drone_ids)
+            self.drone_ids.append(drone_id)
+            for col in (self.lat, self.lon, self.alt, self.speed, self.seen_at):
+                col.append(math.nan)
+            self.status.append(None)
+            self.seen.append(None)
+            self.cell_of.append(cell)
+            self.breached.append(set())
+            self.cells.setdefault(cell, set()).add(slot)
+        elif self.cell_of[slot] != cell:
+            old = self.cells[self.cell_of[slot]]
+            old.discard(slot)
+            if not old:
+                del self.cells[self.cell_of[slot]]
+            self.cells.setdefault(cell, set()).add(slot)
+            self.cell_of[slot] = cell
+        self.lat[slot] = lat
+        self.lon[slot] = lon
+        alt, speed = sample.get("alt"), sample.get("speed")
+        self.alt[slot] = math.nan if alt is None else float(alt)
+        self.speed[slot] = math.nan if speed is None else float(speed)
+        self.status[slot] = sample.get("status")
+        self.seen[slot] = sample.get("last_seen")
+        self.seen_at[slot] = _seen_epoch(self.seen[slot])
+        return slot
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[int]:
+        y0, x0 = self._cell(min_lat, min_lon)
+        y1, x1 = self._cell(max_lat, max_lon)
+        if (y1 - y0 + 1) * (x1 - x0 + 1) <= len(self.cells):
+            buckets = [b for b in (self.cells.get((y, x)) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)) if b]
+        else:
+            buckets = [b for (y, x), b in self.cells.items() if y0 <= y <= y1 and x0 <= x <= x1]
+        lat, lon = self.lat, self.lon
+        return [
+            s for b in buckets for s in b
+            if min_lat <= lat[s] <= max_lat and min_lon <= lon[s] <= max_lon
+        ]
+
+    def within(self, shape: Shape) -> List[int]:
+        lat, lon = self.lat, self.lon
+        return [s for s in self.bbox(*shape.bounds) if shape.contains(lat[s], lon[s])]
+
+    def row(self, slot: int) -> Dict[str, Any]:
+        alt, speed = self.alt[slot], self.speed[slot]
+        return {
+            "drone_id": self.drone_ids[slot],
+            "lat": self.lat[slot],
+            "lon": self.lon[slot],
+            "alt": None if math.isnan(alt) else alt,
+            "speed": None if math.isnan(speed) else speed,
+            "status": self.status[slot],
+            "last_seen": self.seen[slot],
+        }
+
+    def rows(self, slots: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.row(s) for s in sorted(slots, key=self.drone_ids.__getitem__)]
+
+
+def _position(sample: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    lat, lon = sample.get("lat"), sample.get("lon")
+    if lat is None or lon is None:
+        return None
+    try:
+        return _check_point(lat, lon)
+    except ValueError:
+        return None
+
+
+def _seen_epoch(value: Any) -> float:
+    if not value:
+        return math.nan
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return math.nan
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class GeoEngine:
+    def __init__(self, cell_deg: float = GEO_CELL_DEG, refresh_seconds: float = GEOFENCE_REFRESH_SECONDS):
+        self.cell_deg = cell_deg
+        self.refresh_seconds = refresh_seconds
+        self._indexes: Dict[str, Tuple[PositionIndex, threading.Lock]] = {}
+        self._fences: Dict[str, Tuple[float, List[Geofence]]] = {}
+        self._lock = threading.Lock()
+
+    def geofences(self, store: StorageBackend, company_id: str) -> List[Geofence]:
+        cached = self._fences.get(company_id)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < self.refresh_seconds:
+            return cached[1]
+        fences = [Geofence(row) for row in store.list_geofences(company_id)]
+        self._fences[company_id] = (now, fences)
+        return fences
+
+    def invalidate_geofences(self, company_id: str) -> None:
+        self._fences.pop(company_id, None)
+
+    def index(self, store: StorageBackend, company_id: str) -> Tuple[PositionIndex, threading.Lock]:
+        entry = self._indexes.get(company_id)
+        if entry is None:
+            with self._lock:
+                entry = self._indexes.get(company_id)
+                if entry is None:
+                    index = PositionIndex(self.cell_deg)
+                    fences = self.geofences(store, company_id)
+                    for row in store.latest_telemetry(company_id):
+                        pos = _position(row)
+                        if pos is not None:
+                            slot = index.update(row["drone_id"], pos[0], pos[1], row)
+                            index.breached[slot] = {f.geofence_id for f in fences if f.violated(*pos)}
+                    entry = self._indexes[company_id] = (index, threading.Lock())
+        return entry
+
+    def observe(self, store: StorageBackend, company_id: str, samples: Iterable[Dict[str, Any]]) -> List[Detection]:
+        """Move drones in the index; geofence breaches become incidents."""
+        positioned = [(s, pos) for s in samples for pos in (_position(s),) if pos is not None]
+        if not positioned:
+            return []
+        index, lock = self.index(store, company_id)
+        fences = self.geofences(store, company_id)
+        breaches: List[Detection] = []
+        with lock:
+            for sample, (lat, lon) in positioned:
+                if index.stale(sample["drone_id"], sample):
+                    continue
+                slot = index.update(sample["drone_id"], lat, lon, sample)
+                if not fences and not index.breached[slot]:
+                    continue
+                current = {f.geofence_id for f in fences if f.violated(lat, lon)}
+                for fence in fences:
+                    if fence.geofence_id in current and fence.geofence_id not in index.breached[slot]:
+                        GEOFENCE_BREACHES.labels(fence.rule).inc()
+                        breaches.append(
+                            Detection(
+                                company_id=company_id,
+                                drone_id=sample["drone_id"],
+                                threat_type=GEOFENCE_THREAT,
+                                detector=f"geofence:{fence.rule}",
+                                value=1.0,
+                                score=1.0,
+                                ts=sample.get("last_seen") or db._now_iso(),
+                                details={
+                                    "geofence_id": fence.geofence_id,
+                                    "geofence": fence.name,
+                                    "lat": lat,
+                                    "lon": lon,
+                                },
+                            )
+                        )
+                index.breached[slot] = current
+        if breaches:
+            raise_incidents(store, breaches, source="geofence")
+        return breaches
+
+    def query(self, store: StorageBackend, company_id: str, kind: str, shape: Optional[Shape]) -> Tuple[List[Dict[str, Any]], float]:
+        """Drones inside `shape` (all drones when None) and the index time in ms."""
+        index, lock = self.index(store, company_id)
+        t0 = time.perf_counter()
+        with lock:
+            slots = range(len(index)) if shape is None else index.within(shape)
+            rows = index.rows(slots)
+        elapsed = time.perf_counter() - t0
+        GEO_QUERY_SECONDS.labels(kind).observe(elapsed)
+        return rows, elapsed * 1000.0
+
+    def reset(self, company_id: Optional[str] = None) -> None:
+        with self._lock:
+            if company_id is None:
+                self._indexes.clear()
+                self._fences.clear()
+            else:
+                self._indexes.pop(company_id, None)
+                self._fences.pop(company_id, None)
+
+
+GEO = GeoEngine()
+
+
+# ---------------------------------------------------------
+# Routes
+# ---------------------------------------------------------
+
+router = APIRouter(prefix="/geo", tags=["geo"])
+
+
+class PolygonQuery(BaseModel):
+    points: List[List[float]] = Field(min_length=3, max_length=MAX_POLYGON_POINTS)  # [[lat, lon], ...]
+
+
+class GeofenceRequest(BaseModel):
+    name: str = Field(min_length=1, max_length=200)
+    kind: str  # bbox | circle | polygon
+    geometry: Dict[str, Any]
+    rule: str = "keep_out"  # keep_out | keep_in
+
+
+def _shape(build: Any, *args: Any) -> Shape:
+    try:
+        return build(*args)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _public_geofence(row: Dict[str, Any]) -> Dict[str, Any]:
+    out = {k: v for k, v in row.items() if k != "geometry_json"}
+    out["geometry"] = json.loads(row["geometry_json"])
+    return out
+
+
+def _result(rows: List[Dict[str, Any]], elapsed_ms: float, **extra: Any) -> Dict[str, Any]:
+    return {"ok": True, **extra, "count": len(rows), "query_ms": round(elapsed_ms, 4), "drones": rows}
+
+
+@router.get("/drones")
+def drones_in_bbox(
+    min_lat: Optional[float] = Query(default=None),
+    min_lon: Optional[float] = Query(default=None),
+    max_lat: Optional[float] = Query(default=None),
+    max_lon: Optional[float] = Query(default=None),
+    user=Depends(require_action("telemetry.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    company_id = user.get("company_id") or "default"
+    bounds = (min_lat, min_lon, max_lat, max_lon)
+    if all(v is None for v in bounds):
+        rows, elapsed = GEO.query(store, company_id, "all", None)
+        return _result(rows, elapsed)
+    if any(v is None for v in bounds):
+        raise HTTPException(status_code=400, detail="min_lat, min_lon, max_lat and max_lon go together")
+    rows, elapsed = GEO.query(store, company_id, "bbox", _shape(BBox, *bounds))
+    return _result(rows, elapsed)
+
+
+@router.get("/drones/near")
+def drones_near(
+    lat: float = Query(...),
+    lon: float = Query(...),
+    radius_m: float = Query(..., gt=0, le=MAX_RADIUS_M),
+    user=Depends(require_action("telemetry.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    company_id = user.get("company_id") or "default"
+    circle = _shape(Circle, lat, lon, radius_m)
+    rows, elapsed = GEO.query(store, company_id, "radius", circle)
+    for row in rows:
+        row["distance_m"] = round(haversine_m(lat, lon, row["lat"], row["lon"]), 1)
+    rows.sort(key=lambda r: r["distance_m"])
+    return _result(rows, elapsed)
+
+
+@router.post("/drones/within")
+def drones_in_polygon(
+    body: PolygonQuery,
+    user=Depends(require_action("telemetry.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    company_id = user.get("company_id") or "default"
+    rows, elapsed = GEO.query(store, company_id, "polygon", _shape(Polygon, body.points))
+    return _result(rows, elapsed)
+
+
+@router.get("/geofences")
+def list_geofences(
+    user=Depends(require_action("telemetry.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    company_id = user.get("company_id") or "default"
+    rows = store.list_geofences(company_id)
+    return {
+        "ok": True,
+        "geofences": [_public_geofence(r) for r in rows],
+    }
+
+
+@router.post("/geofences", status_code=201)
+def create_geofence(
+    body: GeofenceRequest,
+    user=Depends(require_action("geofence.write")),
+    store: StorageBackend = Depends(get_storage),
+):
+    company_id = user.get("company_id") or "default"
+    if (user.get("role") or "").lower() != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+    if body.rule not in GEOFENCE_RULES:
+        raise HTTPException(status_code=400, detail=f"rule must be one of {', '.join(GEOFENCE_RULES)}")
+    _shape(compile_shape, body.kind, body.geometry)
+    row = store.create_geofence(
+        geofence_id=f"GF-{uuid4().hex[:12]}",
+        company_id=company_id,
+        name=body.name,
+        kind=body.kind,
+        geometry_json=json.dumps(body.geometry, sort_keys=True),
+        rule=body.rule,
+        created_by=user.get("username"),
+    )
+    GEO.invalidate_geofences(company_id)
+    store.add_forensic_event(
+        company_id=company_id,
+        drone_id=None,
+        incident_id=None,
+        event_type="geofence_created",
+        actor=user.get("username") or "unknown",
+        action=body.rule,
+        result="ok",
+        payload_json=json.dumps({"geofence_id": row["geofence_id"], "name": body.name, "kind": body.kind}),
+    )
+    return {"ok": True, "geofence": _public_geofence(row)}
+
+
+@router.delete("/geofences/{geofence_id}")
+def delete_geofence(
+    geofence_id: str,
+    user=Depends(require_action("geofence.write")),
+    store: StorageBackend = Depends(get_storage),
+):
+    company_id = user.get("company_id") or "default"
+    if (user.get("role") or "").lower() != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+    if not store.delete_geofence(company_id, geofence_id):
+        raise HTTPException(status_code=404, detail="Geofence not found")
+    GEO.invalidate_geofences(company_id)
+    store.add_forensic_event(
+        company_id=company_id,
+        drone_id=None,
+        incident_id=None,
+        event_type="geofence_deleted",
+        actor=user.get("username") or "unknown",
+        action="delete",
+        result="ok",
+        payload_json=json.dumps({"geofence_id": geofence_id}),
+    )
+    return {"ok": True, "geofence_id": geofence_id}
+
+
+@router.get("/geofences/{geofence_id}/drones")
+def drones_in_geofence(
+    geofence_id: str,
+    user=Depends(require_action("telemetry.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    company_id = user.get("company_id") or "default"
+    fence = next((f for f in GEO.geofences(store, company_id) if f.geofence_id == geofence_id), None)
+    if fence is None:
+        GEO.invalidate_geofences(company_id)  # may have been created by another worker
+        fence = next((f for f in GEO.geofences(store, company_id) if f.geofence_id == geofence_id), None)
+    if fence is None:
+        raise HTTPException(status_code=404, detail="Geofence not found")
+    rows, elapsed = GEO.query(store, company_id, "geofence", fence.shape)
+    return _result(rows, elapsed, geofence_id=geofence_id, rule=fence.rule)
@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
+
+from .metrics import REGISTRY
+from .storage import StorageBackend, get_storage
+from .tracing import TRACER
+from .zerotrust import check_action, require_action
+
+# =========================================================
+# Background jobs (queue in the `jobs` table)
+# =========================================================
+# Heavy work (bundle exports, rollups, retention) runs off the request
+# thread:
+#   - submit() inserts a queued row (kind, params, priority) and wakes the
+#     local workers; the route returns 202 with the job id
+#   - JobScheduler worker threads claim the highest-priority, oldest queued
+#     job (StorageBackend.claim_job is a single atomic UPDATE, so workers in
+#     other processes can share the queue), run its handler, and store the
+#     JSON result or the error on the row
+#   - handlers report progress through JobContext.progress(); clients poll
+#     GET /jobs/{id} and fetch GET /jobs/{id}/result once it is done
+#
+# Handlers register per kind with @job_kind(kind, action=...); `action` is
+# the zero-trust action a caller needs to submit the job or read its result.
+#
+# Workers start with the app (VIGIL_JOB_WORKERS threads, 0 disables them);
+# `python -m backend.jobs --workers N` runs a dedicated worker process
+# against the same storage instead.
+#
+# Claimed jobs are leased: while a job runs, the scheduler's heartbeat
+# thread renews heartbeat_at every VIGIL_JOB_LEASE_SECONDS / 3 and requeues
+# `running` jobs whose lease has expired (their process died), failing them
+# instead once they have been tried VIGIL_JOB_MAX_ATTEMPTS times. finish_job
+# only applies to a job still running on the worker that claimed it, so a
+# worker that lost its lease cannot overwrite the new run's outcome.
+# =========================================================
+
+JOB_WORKERS = int(os.environ.get("VIGIL_JOB_WORKERS", "2"))
+POLL_SECONDS = float(os.environ.get("VIGIL_JOB_POLL_SECONDS", "1.0"))
+LEASE_SECONDS = float(os.environ.get("VIGIL_JOB_LEASE_SECONDS", "60"))
+MAX_ATTEMPTS = int(os.environ.get("VIGIL_JOB_MAX_ATTEMPTS", "3"))
+PROGRESS_MIN_INTERVAL_S = 0.25
+JOB_STATUSES = ("queued", "running", "done", "failed")
+MAX_PRIORITY = 100
+
+JOBS_TOTAL = REGISTRY.counter("jobs_total", "Background jobs finished", ("kind", "status"))
+JOB_SECONDS = REGISTRY.histogram("job_duration_seconds", "Background job run time", ("kind",))
+JOB_QUEUE_SECONDS = REGISTRY.histogram("job_queue_wait_seconds", "Time from submit to claim", ("kind",))
+
+
+class JobContext:
+    """What a handler sees: the job row, its params, and a progress callback."""
+
+    def __init__(self, store: StorageBackend, job: Dict[str, Any]):
+        self.store = store
+        self.job = job
+        self.job_id: str = job["job_id"]
+        self.company_id: str = job["company_id"]
+        self.params: Dict[str, Any] = json.loads(job.get("params_json") or "{}")
+        self._last_report = 0.0
+
+    def progress(self, fraction: float, message: Optional[str] = None) -> None:
+        # Throttled: a tight handler loop must not turn into a write per row.
+        # Updates that carry a message mark a stage change and always go out.
+        now = time.monotonic()
+        if message is None and fraction < 1.0 and now - self._last_report < PROGRESS_MIN_INTERVAL_S:
+            return
+        self._last_report = now
+        self.store.update_job_progress(self.job_id, max(0.0, min(1.0, fraction)), message)
+
+
+JobHandler = Callable[[JobContext], Any]
+
+
+@dataclass(frozen=True)
+class JobKind:
+    kind: str
+    handler: JobHandler
+    action: str
+
+
+JOB_KINDS: Dict[str, JobKind] = {}
+
+
+def job_kind(kind: str, action: str) -> Callable[[JobHandler], JobHandler]:
+    """Register `handler(ctx) -> JSON-serialisable result` for a job kind."""
+
+    def register(handler: JobHandler) -> JobHandler:
+        JOB_KINDS[kind] = JobKind(kind=kind, handler=handler, action=action)
+        return handler
+
+    return register
+
+
+def _parse_ts(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+class JobScheduler:
+    def __init__(self, workers: int = JOB_WORKERS, poll_seconds: float = POLL_SECONDS):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self._threads: List[threading.Thread] = []
+        self._wake = threading.Condition()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._held: Dict[str, str] = {}  # job_id -> worker, renewed by the heartbeat thread
+        self._heartbeat: Optional[threading.Thread] = None
+        self.processed = 0
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def submit(
+        self,
+        store: StorageBackend,
+        *,
+        kind: str,
+        company_id: str,
+        params: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"unknown job kind: {kind}")
+        if not -MAX_PRIORITY <= priority <= MAX_PRIORITY:
+            raise ValueError(f"priority must be between -{MAX_PRIORITY} and {MAX_PRIORITY}")
+        job = store.create_job(
+            job_id=f"JOB-{uuid4().hex[:12]}",
+            company_id=company_id,
+            kind=kind,
+            params_json=json.dumps(params or {}, sort_keys=True),
+            priority=priority,
+            created_by=created_by,
+        )
+        with self._wake:
+            self._wake.notify()
+        return job
+
+    def requeue_stale(self, store: StorageBackend) -> int:
+        stale_before = datetime.fromtimestamp(time.time() - LEASE_SECONDS, timezone.utc).isoformat()
+        return store.requeue_stale_jobs(stale_before, MAX_ATTEMPTS)
+
+    def _heartbeat_loop(self, store: StorageBackend) -> None:
+        while not self._stopping.wait(LEASE_SECONDS / 3):
+            with self._lock:
+                held = list(self._held.items())
+            try:
+                for job_id, worker in held:
+                    store.heartbeat_job(job_id, worker)
+                self.requeue_stale(store)
+            except Exception:  # e.g. the database is briefly locked; the lease has slack
+                pass
+
+    def _ensure_heartbeat(self, store: StorageBackend) -> None:
+        with self._lock:
+            if self._heartbeat is not None and self._heartbeat.is_alive():
+                return
+            self._heartbeat = threading.Thread(
+                target=self._heartbeat_loop, args=(store,), name="vigil-job-heartbeat", daemon=True
+            )
+            self._heartbeat.start()
+
+    def run_job(self, store: StorageBackend, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one claimed job and record its outcome."""
+        self._ensure_heartbeat(store)
+        with self._lock:
+            self._held[job["job_id"]] = job.get("worker") or ""
+        try:
+            return self._run_job(store, job)
+        finally:
+            with self._lock:
+                self._held.pop(job["job_id"], None)
+
+    def _run_job(self, store: StorageBackend, job: Dict[str, Any]) -> Dict[str, Any]:
+        kind = job["kind"]
+        worker = job.get("worker")
+        queued_at = _parse_ts(job.get("created_at"))
+        if queued_at is not None:
+            JOB_QUEUE_SECONDS.labels(kind).observe(max(0.0, time.time() - queued_at))
+        t0 = time.perf_counter()
+        attributes = {"vigil.job_id": job["job_id"], "vigil.job_kind": kind, "vigil.company_id": job["company_id"]}
+        with TRACER.span("jobs.run", attributes=attributes):
+            try:
+                spec = JOB_KINDS[kind]
+                result = spec.handler(JobContext(store, job))
+                finished = store.finish_job(
+                    job["job_id"], status="done", result_json=json.dumps(result), worker=worker
+                )
+            except Exception as exc:  # surfaced on the job row
+                finished = store.finish_job(
+                    job["job_id"], status="failed", error=f"{type(exc).__name__}: {exc}", worker=worker
+                )
+        JOB_SECONDS.labels(kind).observe(time.perf_counter() - t0)
+        # None: the lease expired and the job was requeued under us
+        JOBS_TOTAL.labels(kind, finished["status"] if finished else "lost").inc()
+        with self._lock:
+            self.processed += 1
+        return finished or job
+
+    def run_pending(self, store: StorageBackend, worker: Optional[str] = None, limit: Optional[int] = None) -> int:
+        """Drain the queue on the calling thread (CLI, tests, VIGIL_JOB_WORKERS=0)."""
+        worker = worker or f"{socket.gethostname()}:{os.getpid()}:inline"
+        self.requeue_stale(store)
+        done = 0
+        while limit is None or done < limit:
+            job = store.claim_job(worker, list(JOB_KINDS))
+            if job is None:
+                break
+            self.run_job(store, job)
+            done += 1
+        return done
+
+    def _loop(self, store: StorageBackend, worker: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = store.claim_job(worker, list(JOB_KINDS))
+            except Exception:  # e.g. the database is briefly locked; try again later
+                job = None
+            if job is not None:
+                try:
+                    self.run_job(store, job)
+                except Exception:  # finish_job failed; the lease expires and the job is requeued
+                    pass
+                continue
+            with self._wake:
+                self._wake.wait(self.poll_seconds)
+
+    def start(self, store: StorageBackend) -> None:
+        with self._lock:
+            if self.running or self.workers <= 0:
+                return
+            self._stopping.clear()
+            host = socket.gethostname()
+            self._threads = []
+            for n in range(self.workers):
+                name = f"vigil-job-{n}"
+                thread = threading.Thread(
+                    target=self._loop, args=(store, f"{host}:{os.getpid()}:{name}"), name=name, daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        with self._wake:
+            self._wake.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._heartbeat is not None:
+            self._heartbeat.join(timeout)
+            self._heartbeat = None
+
+
+SCHEDULER = JobScheduler()
+
+
+# ---------------------------------------------------------
+# Routes: poll + download
+# ---------------------------------------------------------
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def _own_job(store: StorageBackend, job_id: str, user: Dict[str, Any]) -> Dict[str, Any]:
+    job = store.get_job(job_id)
+    # Jobs from other tenants are indistinguishable from unknown ones
+    if job is None or job["company_id"] != (user.get("company_id") or "default"):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def job_links(job: Dict[str, Any]) -> Dict[str, str]:
+    return {"poll": f"/api/jobs/{job['job_id']}", "download": f"/api/jobs/{job['job_id']}/result"}
+
+
+@router.get("")
+def list_jobs(
+    status: Optional[str] = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    user=Depends(require_action("jobs.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    if status is not None and status not in JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(JOB_STATUSES)}")
+    company_id = user.get("company_id") or "default"
+    return {"ok": True, "jobs": store.list_jobs(company_id, status=status, limit=limit)}
+
+
+@router.get("/{job_id}")
+def get_job(
+    job_id: str,
+    user=Depends(require_action("jobs.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    job = _own_job(store, job_id, user)
+    return {"ok": True, "job": job, **job_links(job)}
+
+
+@router.get("/{job_id}/result")
+def download_job_result(
+    job_id: str,
+    user=Depends(require_action("jobs.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    job = _own_job(store, job_id, user)
+    spec = JOB_KINDS.get(job["kind"])
+    if spec is not None:
+        check_action(user, spec.action, store)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.get('error')}")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    # Stored JSON goes out as-is; no decode/re-encode of large results
+    return Response(
+        content=store.get_job_result(job_id) or "null",
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.json"'},
+    )
+
+
+# ---------------------------------------------------------
+# CLI: dedicated worker process
+# ---------------------------------------------------------
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Background job worker")
+    parser.add_argument("--workers", type=int, default=max(1, JOB_WORKERS), help="worker threads")
+    parser.add_argument("--drain", action="store_true", help="run queued jobs, then exit")
+    args = parser.parse_args(argv)
+
+    from . import exports  # noqa: F401  registers the job kinds
+
+    store = get_storage()
+    store.init_schema()
+    if args.drain:
+        print(json.dumps({"processed": SCHEDULER.run_pending(store)}))
+        return 0
+    SCHEDULER.workers = args.workers
+    SCHEDULER.start(store)
+    try:
+        while SCHEDULER.running:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        SCHEDULER.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,20 +1,38 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from datetime import datetime, timezone
-import hashlib
 import json
+import secrets
+import time
 
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-
-from .auth import router as auth_router, require_token
-from . import threats as threats_mod
-from . import db
-
-app = FastAPI(title="VigilAero Backend", version="0.2.0")
+_IMPORT_STARTED = time.perf_counter()
 
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+_FRAMEWORK_IMPORTED = time.perf_counter()
+
+from .admission import AdmissionMiddleware
+from .auth import router as auth_router
+from .correlation import CORRELATION
+from .exports import BUNDLE_EVENT_LIMIT, MAX_JOB_BUNDLE_EVENTS, build_forensics_bundle
+from .jobs import MAX_PRIORITY, SCHEDULER, job_links
+from .jobs import router as jobs_router
+from .metrics import METRICS_TOKEN, REGISTRY, MetricsMiddleware
+from .profiler import ProfilerMiddleware
+from .responses import FastJSONResponse, WireMiddleware, rows_response
+from .startup import include_routers, install_openapi, record_phase
+from .storage import IncidentConflict, StorageBackend, get_storage
+from .tracing import TracingMiddleware
+from .zerotrust import POLICY_CACHE, PolicyError, compile_policy, require_action
+
+app = FastAPI(title="VigilAero Backend", version="0.2.0", default_response_class=FastJSONResponse)
+
+# Inside CORS so 429s carry CORS headers and preflights are never charged
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -25,11 +43,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(WireMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilerMiddleware)
+app.add_middleware(TracingMiddleware)
 
 
 @app.on_event("startup")
 def _startup():
-    db.init_db()
+    t0 = time.perf_counter()
+    get_storage().init_schema()
+    record_phase("init_schema", time.perf_counter() - t0)
+    ready = time.perf_counter() - _IMPORT_STARTED
+    record_phase("ready", ready)
+    record_phase("app_ready", ready - (_FRAMEWORK_IMPORTED - _IMPORT_STARTED))
+    # Job workers run after the clock stops; they are not on the request path
+    SCHEDULER.start(get_storage())
+
+
+@app.on_event("shutdown")
+def _shutdown():
+    SCHEDULER.stop()
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: Optional[str] = Header(default=None)):
+    # Scrapers are not app users; an optional static bearer token gates access
+    if METRICS_TOKEN and not secrets.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
 def _actor_from_user(user: dict) -> str:
@@ -45,13 +87,56 @@ def _role_from_user(user: dict) -> str:
 # ─────────────────────────────────────────────────────────────
 app.include_router(auth_router)
 
-# threats + incidents (native)
-app.include_router(threats_mod.router)       # /threats/*
-app.include_router(threats_mod.inc_router)   # /incidents/*
+# Loaders return (router, mount prefix) pairs; with VIGIL_FAST_START=1 they
+# run on the first request under the listed paths (see startup.py)
+
+
+def _threat_routers():
+    from . import threats as threats_mod
+
+    return [
+        (threats_mod.router, ""),           # /threats/*
+        (threats_mod.inc_router, ""),       # /incidents/*
+        # mirror under /api (frontend uses these)
+        (threats_mod.router, "/api"),       # /api/threats/*
+        (threats_mod.inc_router, "/api"),   # /api/incidents/*
+    ]
+
+
+def _telemetry_routers():
+    # telemetry ingest + reads (TelemetryTable polls /telemetry)
+    from . import telemetry as telemetry_mod
+
+    return [(telemetry_mod.router, ""), (telemetry_mod.router, "/api")]
+
 
-# mirror under /api (frontend uses these)
-app.include_router(threats_mod.router, prefix="/api")      # /api/threats/*
-app.include_router(threats_mod.inc_router, prefix="/api")  # /api/incidents/*
+def _geo_routers():
+    # fleet positions (grid index) + geofences
+    from . import geo as geo_mod
+
+    return [(geo_mod.router, ""), (geo_mod.router, "/api")]
+
+
+def _report_routers():
+    # streamed CSV / NDJSON reports + compliance scoring
+    from . import reports as reports_mod
+
+    return [(reports_mod.router, ""), (reports_mod.router, "/api")]
+
+
+def _debug_routers():
+    # SQL profiler (VIGIL_SQL_PROFILE=1)
+    from . import debug as debug_mod
+
+    return [(debug_mod.router, "")]
+
+
+include_routers(app, _threat_routers, ("/api/threats", "/incidents", "/api/api/threats", "/api/incidents"))
+include_routers(app, _telemetry_routers, ("/telemetry", "/api/telemetry"))
+include_routers(app, _geo_routers, ("/geo", "/api/geo"))
+include_routers(app, _report_routers, ("/reports", "/api/reports"))
+include_routers(app, _debug_routers, ("/debug",))
+install_openapi(app)
 
 
 # ─────────────────────────────────────────────────────────────
@@ -61,33 +146,76 @@ security_router = APIRouter(prefix="/security", tags=["security"])
 
 
 @security_router.get("/zerotrust")
-def get_zerotrust(user=Depends(require_token)):
+def get_zerotrust(
+    user=Depends(require_action("security.policy.read")),
+    store: StorageBackend = Depends(get_storage),
+):
     company_id = user.get("company_id") or "default"
-    row = db.get_zerotrust_policy(company_id)
-    return {"ok": True, "policy": row["policy_json"], "updated_at": row["updated_at"]}
+    policy = POLICY_CACHE.get(company_id, store)
+    return {
+        "ok": True,
+        "policy": policy.policy_json,
+        "updated_at": policy.updated_at,
+        **policy.to_public(),
+    }
 
 
 class ZeroTrustUpdate(BaseModel):
-    policy: str
+    # Either a raw policy_json string, or the structured fields the UI sends
+    policy: Optional[str] = None
+    enabled: Optional[bool] = None
+    roles: Optional[List[str]] = None
+    timeout: Optional[int] = None
+    allowed_actions: Optional[Dict[str, List[str]]] = None
 
 
 @security_router.post("/zerotrust")
-def set_zerotrust(body: ZeroTrustUpdate, user=Depends(require_token)):
+def set_zerotrust(
+    body: ZeroTrustUpdate,
+    user=Depends(require_action("security.policy.write")),
+    store: StorageBackend = Depends(get_storage),
+):
+    # Policy writes are an admin-only escape hatch: an operator could
+    # otherwise enable a policy that excludes Admin and lock the tenant out
+    if (user.get("role") or "").lower() != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
     company_id = user.get("company_id") or "default"
-    db.set_zerotrust_policy(company_id, body.policy)
-    row = db.get_zerotrust_policy(company_id)
-    return {"ok": True, "policy": row["policy_json"], "updated_at": row["updated_at"]}
+    if body.policy is not None:
+        policy_json = body.policy
+    else:
+        fields = body.model_dump(exclude={"policy"}, exclude_none=True)
+        policy_json = json.dumps(fields, sort_keys=True)
+
+    # Compile before persisting so a broken policy never reaches the table
+    try:
+        compiled = compile_policy(company_id, policy_json)
+    except PolicyError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # ...and one that takes policy writes away from the caller's own role
+    # could never be undone through the API
+    if compiled.evaluate(user.get("role"), "security.policy.write", None, time.time()) is not None:
+        raise HTTPException(status_code=400, detail="Policy would revoke security.policy.write from your own role")
+
+    row = store.set_zerotrust_policy(company_id, policy_json)
+    policy = POLICY_CACHE.put(row)
+    return {
+        "ok": True,
+        "policy": policy.policy_json,
+        "updated_at": policy.updated_at,
+        **policy.to_public(),
+    }
 
 
 @security_router.get("/events")
 def security_events(
     drone_id: Optional[str] = Query(default=None),
     limit: int = Query(default=200, ge=1, le=500),
-    user=Depends(require_token),
+    user=Depends(require_action("forensics.read")),
+    store: StorageBackend = Depends(get_storage),
 ):
     company_id = user.get("company_id") or "default"
-    items = db.list_forensics(company_id=company_id, drone_id=drone_id, limit=limit)
-    return {"ok": True, "events": items}
+    items = store.list_forensics(company_id=company_id, drone_id=drone_id, limit=limit)
+    return rows_response("events", items)
 
 
 app.include_router(security_router)
@@ -106,16 +234,17 @@ def get_forensics(
     drone_id: Optional[str] = Query(default=None),
     incident_id: Optional[str] = Query(default=None),
     limit: int = Query(default=200, ge=1, le=500),
-    user=Depends(require_token),
+    user=Depends(require_action("forensics.read")),
+    store: StorageBackend = Depends(get_storage),
 ):
     company_id = user.get("company_id") or "default"
-    items = db.list_forensics(
+    items = store.list_forensics(
         company_id=company_id,
         drone_id=drone_id,
         incident_id=incident_id,
         limit=limit,
     )
-    return {"ok": True, "events": items}
+    return rows_response("events", items)
 
 
 @forensics_router.get("/evidence")
@@ -127,10 +256,11 @@ def get_evidence(
     date_from: Optional[str] = Query(default=None),  # YYYY-MM-DD
     date_to: Optional[str] = Query(default=None),    # YYYY-MM-DD
     limit: int = Query(default=200, ge=1, le=500),
-    user=Depends(require_token),
+    user=Depends(require_action("evidence.read")),
+    store: StorageBackend = Depends(get_storage),
 ):
     company_id = user.get("company_id") or "default"
-    items = db.list_evidence(
+    items = store.list_evidence(
         company_id=company_id,
         framework_id=framework_id,
         control_id=control_id,
@@ -140,7 +270,7 @@ def get_evidence(
         date_to=date_to,
         limit=limit,
     )
-    return {"ok": True, "evidence": items}
+    return rows_response("evidence", items)
 
 
 @forensics_router.get("/evidence/summary")
@@ -149,11 +279,12 @@ def get_evidence_summary(
     drone_id: Optional[str] = Query(default=None),
     date_from: Optional[str] = Query(default=None),  # YYYY-MM-DD
     date_to: Optional[str] = Query(default=None),    # YYYY-MM-DD
-    user=Depends(require_token),
+    user=Depends(require_action("evidence.read")),
+    store: StorageBackend = Depends(get_storage),
 ):
     company_id = user.get("company_id") or "default"
 
-    rows = db.evidence_summary_by_control(
+    rows = store.evidence_summary_by_control(
         company_id=company_id,
         framework_id=framework_id,
         drone_id=drone_id,
@@ -199,11 +330,12 @@ class EvidenceCreateRequest(BaseModel):
 @forensics_router.post("/evidence")
 def create_evidence(
     body: EvidenceCreateRequest,
-    user=Depends(require_token),
+    user=Depends(require_action("evidence.create")),
+    store: StorageBackend = Depends(get_storage),
 ):
     company_id = user.get("company_id") or "default"
 
-    item = db.create_evidence(
+    item = store.create_evidence(
         company_id=company_id,
         drone_id=body.drone_id,
         incident_id=body.incident_id,
@@ -226,7 +358,8 @@ class EvidenceReviewRequest(BaseModel):
 def review_evidence(
     evidence_id: int,
     body: EvidenceReviewRequest,
-    user=Depends(require_token),
+    user=Depends(require_action("evidence.review")),
+    store: StorageBackend = Depends(get_storage),
 ):
     company_id = user.get("company_id") or "default"
     role = (user.get("role") or "").lower()
@@ -237,7 +370,7 @@ def review_evidence(
     if decision not in {"accepted", "rejected"}:
         raise HTTPException(status_code=400, detail="decision must be accepted or rejected")
 
-    item = db.review_evidence(
+    item = store.review_evidence(
         company_id=company_id,
         evidence_id=evidence_id,
         review_status=decision,
@@ -252,68 +385,69 @@ def review_evidence(
 @forensics_router.get("/forensics/bundle")
 def export_forensics_bundle(
     incident_id: str = Query(...),
-    user=Depends(require_token),
+    user=Depends(require_action("forensics.export")),
+    store: StorageBackend = Depends(get_storage),
 ):
     """
     Evidence Bundle Export v0
     System-generated snapshot for audits/pilots.
     """
     user = user or {}
-    actor = user.get("username") or "unknown"
-    role = user.get("role") or "unknown"
-    company_id = user.get("company_id") or "default"
-
-    incident = db.get_incident(incident_id)
-    if not incident:
+    bundle = build_forensics_bundle(
+        store,
+        incident_id,
+        actor=user.get("username") or "unknown",
+        role=user.get("role") or "unknown",
+        company_id=user.get("company_id") or "default",
+    )
+    if bundle is None:
         raise HTTPException(status_code=404, detail="Incident not found")
+    return {"ok": True, "bundle": bundle}
 
-    # Prevent cross-tenant export
-    if incident.get("company_id") != company_id:
-        raise HTTPException(status_code=404, detail="Incident not found")
 
-    # Pull append-only event timeline
-    events = db.list_forensics(
-        company_id=company_id,
-        drone_id=incident.get("drone_id"),
-        incident_id=incident_id,
-        limit=1000,
-    )
-    events = sorted(
-        events,
-        key=lambda event: (
-            event.get("ts") or "",
-            event.get("id") or "",
-        ),
-    )
+class BundleJobRequest(BaseModel):
+    incident_id: str
+    priority: int = Field(default=0, ge=-MAX_PRIORITY, le=MAX_PRIORITY)
+    event_limit: int = Field(default=BUNDLE_EVENT_LIMIT, ge=1, le=MAX_JOB_BUNDLE_EVENTS)
 
-    bundle = {
-        "schema_version": "12F.export.v0",
-        "generated_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
-        "generated_by": {"actor": actor, "role": role, "company_id": company_id},
-        "disclaimer": "System-generated snapshot of append-only evidence events + incident state. Not user-editable.",
-        "incident": incident,
-        "events": events,
-    }
 
-    stable_for_hash = {
-        "schema_version": bundle["schema_version"],
-        "generated_by": bundle["generated_by"],
-        "disclaimer": bundle["disclaimer"],
-        "incident": bundle["incident"],
-        "events": bundle["events"],
-    }
+@forensics_router.post("/forensics/bundle/jobs", status_code=202)
+def submit_forensics_bundle_job(
+    body: BundleJobRequest,
+    user=Depends(require_action("forensics.export")),
+    store: StorageBackend = Depends(get_storage),
+):
+    """
+    Queue a bundle export as a background job. Poll GET /api/jobs/{job_id},
+    then download GET /api/jobs/{job_id}/result.
+    """
+    user = user or {}
+    company_id = user.get("company_id") or "default"
 
-    canonical = json.dumps(
-        stable_for_hash,
-        sort_keys=True,
-        separators=(",", ":"),
-    ).encode("utf-8")
-    bundle["bundle_sha256"] = hashlib.sha256(canonical).hexdigest()
+    # Fail fast on unknown / other-tenant incidents instead of queueing them
+    incident = store.get_incident(body.incident_id)
+    if not incident or incident.get("company_id") != company_id:
+        raise HTTPException(status_code=404, detail="Incident not found")
 
-    return {"ok": True, "bundle": bundle}
+    job = SCHEDULER.submit(
+        store,
+        kind="forensics.bundle",
+        company_id=company_id,
+        params={
+            "incident_id": body.incident_id,
+            "event_limit": body.event_limit,
+            "actor": user.get("username") or "unknown",
+            "role": user.get("role") or "unknown",
+        },
+        priority=body.priority,
+        created_by=_actor_from_user(user),
+    )
+    return {"ok": True, "job": job, **job_links(job)}
 
 
 app.include_router(forensics_router)
+app.include_router(jobs_router)
+app.include_router(jobs_router, prefix="/api")
 
 
 # ─────────────────────────────────────────────────────────────
@@ -329,26 +463,38 @@ class IncidentRespondRequest(BaseModel):
 
 
 @incident_api.post("/respond")
-def respond_to_incident(req: IncidentRespondRequest, user=Depends(require_token)):
+def respond_to_incident(
+    req: IncidentRespondRequest,
+    user=Depends(require_action("incident.mitigate")),
+    store: StorageBackend = Depends(get_storage),
+):
     company_id = user.get("company_id") or "default"
     actor = _actor_from_user(user)
     actor_role = _role_from_user(user)
 
-    active = db.list_active_incidents(company_id=company_id, drone_id=req.drone_id)
+    active = store.list_active_incidents(company_id=company_id, drone_id=req.drone_id)
     if not active:
         raise HTTPException(status_code=404, detail="No active incident for this drone")
 
     inc = active[0]
 
-    updated = db.update_incident_status(
-        incident_id=inc["incident_id"],
-        new_status="mitigated",
-        details=f"Mitigation executed (training): {req.response_name}",
-        mitigated_action=req.response_id,
-    )
+    try:
+        updated = store.update_incident_status(
+            company_id=company_id,
+            incident_id=inc["incident_id"],
+            new_status="mitigated",
+            details=f"Mitigation executed (training): {req.response_name}",
+            mitigated_action=req.response_id,
+            expected_version=inc.get("version"),
+        )
+    except IncidentConflict as exc:
+        from .threats import conflict_http_error
+
+        raise conflict_http_error(exc)
+    CORRELATION.resolve(updated)
 
     # Standardize event name to the canonical one
-    db.add_forensic_event(
+    store.add_forensic_event(
         company_id=company_id,
         drone_id=req.drone_id,
         incident_id=inc["incident_id"],
@@ -374,3 +520,6 @@ def respond_to_incident(req: IncidentRespondRequest, user=Depends(require_token)
 
 
 app.include_router(incident_api)
+
+record_phase("framework_import", _FRAMEWORK_IMPORTED - _IMPORT_STARTED)
+record_phase("import", time.perf_counter() - _IMPORT_STARTED)
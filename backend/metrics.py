@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import functools
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+# =========================================================
+# Metrics (Prometheus text exposition)
+# =========================================================
+# Dependency-free counters / gauges / histograms rendered at GET /metrics.
+# Hot paths resolve a labelled child once (metric.labels(...)) and then
+# pay one lock + a bisect per observation, well under a microsecond.
+#
+# Instrumented:
+#   http_requests_total / http_request_duration_seconds  MetricsMiddleware,
+#                                   labelled by route template
+#   db_call_duration_seconds / db_rows_total / db_errors_total
+#                                   @instrumented on every public db.* function
+#   db_connections_opened_total / db_commit_duration_seconds
+#                                   db.connect() / InstrumentedConnection
+#   forensic_events_written_total   SQLite forensic write paths
+#   auth_decode_duration_seconds    auth._decode_token
+#   bundle_bytes / bundle_hash_duration_seconds   /forensics/bundle
+# =========================================================
+
+METRICS_TOKEN = os.environ.get("VIGIL_METRICS_TOKEN") or None
+
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = tuple(float(1024 * 4 ** i) for i in range(10))  # 1 KiB .. 256 MiB
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_label_str(self.labelnames, values)} {_fmt(child.value)}"
+            for values, child in sorted(self._children.items())
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_label_str(self.labelnames, values)} {_fmt(child.value)}"
+            for values, child in sorted(self._children.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def samples(self) -> List[str]:
+        lines: List[str] = []
+        for values, child in sorted(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total, count = child.sum, child.count
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = 'le="' + _fmt(bound) + '"'
+                lines.append(f"{self.name}_bucket{_label_str(self.labelnames, values, le)} {cumulative}")
+            labels = _label_str(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_fmt(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+)
+DB_SECONDS = REGISTRY.histogram("db_call_duration_seconds", "db.* function latency", ("fn",))
+DB_ROWS = REGISTRY.counter("db_rows_total", "Rows returned or written by db.* functions", ("fn",))
+DB_ERRORS = REGISTRY.counter("db_errors_total", "db.* calls that raised", ("fn",))
+DB_CONNECTIONS = REGISTRY.counter("db_connections_opened_total", "SQLite connections opened")
+DB_COMMIT_SECONDS = REGISTRY.histogram("db_commit_duration_seconds", "SQLite COMMIT latency")
+FORENSIC_EVENTS = REGISTRY.counter("forensic_events_written_total", "Forensic events persisted")
+AUTH_DECODE_SECONDS = REGISTRY.histogram("auth_decode_duration_seconds", "JWT decode + verify latency")
+BUNDLE_BYTES = REGISTRY.histogram("bundle_bytes", "Canonical forensic bundle size", buckets=SIZE_BUCKETS)
+BUNDLE_HASH_SECONDS = REGISTRY.histogram("bundle_hash_duration_seconds", "Bundle canonicalise + SHA-256 time")
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _row_count(result: Any) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, bool):
+        return 0
+    if isinstance(result, int):
+        return result  # bulk writers return rows written
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 1 if result else 0
+
+
+def instrumented(fn: F) -> F:
+    """Time a db.* function and count the rows it returns/writes."""
+    name = fn.__name__
+    seconds = DB_SECONDS.labels(name)
+    rows = DB_ROWS.labels(name)
+    errors = DB_ERRORS.labels(name)
+    perf_counter = time.perf_counter
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        t0 = perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            errors.inc()
+            raise
+        finally:
+            seconds.observe(perf_counter() - t0)
+        n = _row_count(result)
+        if n:
+            rows.inc(n)
+        return result
+
+    return wrapper  # type: ignore[return-value]
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and status counts."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        async def _send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            elapsed = time.perf_counter() - t0
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_SECONDS.labels(method, template).observe(elapsed)
+            HTTP_REQUESTS.labels(method, template, str(status[0])).inc()
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+from uuid import uuid4
+
+# =========================================================
+# SQL profiler (opt-in)
+# =========================================================
+# VIGIL_SQL_PROFILE=1 makes db.connect() hand out db.ProfilingConnection,
+# whose ProfilingCursors time every execute/executemany plus the fetches
+# that drain them. Each statement is attributed to the current request through
+# a ContextVar set by ProfilerMiddleware (request id = X-Request-ID or a
+# fresh one), so a request's breakdown is available:
+#   - in the Server-Timing response header (db time + query count, app time)
+#   - at GET /debug/requests/{request_id}
+# Statements slower than VIGIL_SLOW_QUERY_MS also land in the slow-query
+# log with their EXPLAIN QUERY PLAN (GET /debug/slow_queries, debug.py).
+#
+# Only SQL text and parameter *shape* (types, row counts) are recorded,
+# never parameter values.
+# =========================================================
+
+SLOW_QUERY_MS = float(os.environ.get("VIGIL_SLOW_QUERY_MS", "50"))
+MAX_SLOW_QUERIES = 500
+MAX_REQUEST_PROFILES = 200
+MAX_QUERIES_PER_REQUEST = 200
+REQUEST_ID_HEADER = "x-request-id"
+EXPLAINABLE = {"SELECT", "WITH", "UPDATE", "DELETE", "INSERT"}
+
+_WS = re.compile(r"\s+")
+
+
+@dataclass
+class QueryRecord:
+    sql: str
+    params: Dict[str, Any]
+    started_at: float
+    duration_ms: float = 0.0
+    request_id: Optional[str] = None
+    route: Optional[str] = None
+    plan: Optional[List[str]] = None
+    slow_logged: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {
+            "sql": self.sql,
+            "params": self.params,
+            "duration_ms": round(self.duration_ms, 3),
+            "request_id": self.request_id,
+            "route": self.route,
+        }
+        if self.plan is not None:
+            out["plan"] = self.plan
+        return out
+
+
+@dataclass
+class RequestProfile:
+    request_id: str
+    method: str
+    path: str
+    started_at: float
+    route: Optional[str] = None
+    status: Optional[int] = None
+    duration_ms: float = 0.0
+    db_ms: float = 0.0
+    query_count: int = 0
+    queries: List[QueryRecord] = field(default_factory=list)
+
+    def add(self, record: QueryRecord) -> None:
+        self.query_count += 1
+        if len(self.queries) < MAX_QUERIES_PER_REQUEST:
+            self.queries.append(record)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "duration_ms": round(self.duration_ms, 3),
+            "db_ms": round(self.db_ms, 3),
+            "query_count": self.query_count,
+            "queries": [q.to_dict() for q in self.queries],
+        }
+
+    def server_timing(self) -> str:
+        app_ms = max(self.duration_ms - self.db_ms, 0.0)
+        return f'db;dur={self.db_ms:.3f};desc="{self.query_count} queries", app;dur={app_ms:.3f}'
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("vigil_request_profile", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    profile = _current.get()
+    return profile.request_id if profile is not None else None
+
+
+def _params_shape(params: Any, many: bool = False) -> Dict[str, Any]:
+    if many:
+        first = params[0] if params else None
+        return {"rows": len(params), "row": _params_shape(first)["types"] if first is not None else []}
+    if params is None:
+        return {"types": []}
+    if isinstance(params, dict):
+        return {"types": {k: type(v).__name__ for k, v in params.items()}}
+    return {"types": [type(v).__name__ for v in params]}
+
+
+class Profiler:
+    def __init__(self, enabled: bool, slow_ms: float = SLOW_QUERY_MS):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self._slow: Deque[Dict[str, Any]] = deque(maxlen=MAX_SLOW_QUERIES)
+        self._requests: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, rec: QueryRecord) -> None:
+        profile = _current.get()
+        if profile is not None:
+            rec.request_id = profile.request_id
+            rec.route = profile.route or profile.path
+            profile.db_ms += rec.duration_ms
+            profile.add(rec)
+
+    def extend(self, rec: QueryRecord, extra_ms: float) -> None:
+        """Fetch time for an already recorded statement."""
+        rec.duration_ms += extra_ms
+        profile = _current.get()
+        if profile is not None and rec.request_id == profile.request_id:
+            profile.db_ms += extra_ms
+
+    def check_slow(self, conn: sqlite3.Connection, rec: QueryRecord, params: Any, many: bool) -> None:
+        if rec.slow_logged or rec.duration_ms < self.slow_ms:
+            return
+        rec.slow_logged = True
+        if not many and rec.sql.split(" ", 1)[0].upper() in EXPLAINABLE:
+            rec.plan = explain(conn, rec.sql, params)
+        entry = rec.to_dict()
+        entry["ts"] = rec.started_at
+        with self._lock:
+            self._slow.append(entry)
+
+    def slow_queries(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._slow)
+        return list(reversed(items))[:limit]
+
+    def start_request(self, request_id: str, method: str, path: str) -> RequestProfile:
+        profile = RequestProfile(request_id=request_id, method=method, path=path, started_at=time.time())
+        with self._lock:
+            self._requests[request_id] = profile
+            while len(self._requests) > MAX_REQUEST_PROFILES:
+                self._requests.popitem(last=False)
+        return profile
+
+    def get_request(self, request_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return self._requests.get(request_id)
+
+    def recent_requests(self, limit: int) -> List[RequestProfile]:
+        with self._lock:
+            items = list(self._requests.values())
+        return list(reversed(items))[:limit]
+
+
+PROFILER = Profiler(enabled=os.environ.get("VIGIL_SQL_PROFILE", "0") == "1")
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: Any) -> Optional[List[str]]:
+    try:
+        # Plain cursor so the EXPLAIN is not itself profiled
+        cur = sqlite3.Cursor(conn)
+        cur.execute("EXPLAIN QUERY PLAN " + sql, params if params is not None else ())
+        return [row[3] for row in cur.fetchall()]
+    except sqlite3.Error:
+        return None
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    _rec: Optional[QueryRecord] = None
+    _params: Any = None
+    _many: bool = False
+
+    def _run(self, method: Any, sql: str, params: Any, many: bool) -> "ProfilingCursor":
+        rec = QueryRecord(sql=_WS.sub(" ", sql).strip(), params=_params_shape(params, many), started_at=time.time())
+        t0 = time.perf_counter()
+        try:
+            return method(sql, params) if params is not None else method(sql)
+        finally:
+            rec.duration_ms = (time.perf_counter() - t0) * 1000
+            self._rec, self._params, self._many = rec, params, many
+            PROFILER.record(rec)
+            PROFILER.check_slow(self.connection, rec, params, many)
+
+    def execute(self, sql: str, parameters: Any = None) -> "ProfilingCursor":  # type: ignore[override]
+        return self._run(super().execute, sql, parameters, False)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "ProfilingCursor":  # type: ignore[override]
+        if not isinstance(seq_of_parameters, (list, tuple)):
+            seq_of_parameters = list(seq_of_parameters)
+        return self._run(super().executemany, sql, seq_of_parameters, True)
+
+    def _fetch(self, method: Any, *args: Any) -> Any:
+        t0 = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            rec = self._rec
+            if rec is not None:
+                PROFILER.extend(rec, (time.perf_counter() - t0) * 1000)
+                PROFILER.check_slow(self.connection, rec, self._params, self._many)
+
+    def fetchone(self) -> Any:
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size: int = 1) -> List[Any]:  # type: ignore[override]
+        return self._fetch(super().fetchmany, size)
+
+    def fetchall(self) -> List[Any]:
+        return self._fetch(super().fetchall)
+
+
+class ProfilerMiddleware:
+    """Binds a RequestProfile to the request and emits Server-Timing / X-Request-ID."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not PROFILER.enabled:
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for name, value in scope.get("headers") or ():
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        profile = PROFILER.start_request(request_id or uuid4().hex, scope.get("method", ""), scope.get("path", ""))
+        token = _current.set(profile)
+        t0 = time.perf_counter()
+
+        async def _send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                profile.route = getattr(route, "path", None)
+                profile.status = message["status"]
+                profile.duration_ms = (time.perf_counter() - t0) * 1000
+                headers = list(message.get("headers") or [])
+                headers.append((b"server-timing", profile.server_timing().encode("latin-1")))
+                headers.append((REQUEST_ID_HEADER.encode(), profile.request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            profile.duration_ms = (time.perf_counter() - t0) * 1000
+            _current.reset(token)
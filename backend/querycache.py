@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from .db import CONTROL_EVENT_MAP
+from .metrics import REGISTRY
+
+# =========================================================
+# Read-through cache for list_forensics / list_evidence
+# =========================================================
+# Pollers and open tabs re-run the same list queries every few seconds.
+# SQLiteBackend reads these through QUERY_CACHE. Keys are the normalized
+# filters: company, drone, incident and limit for forensics, plus
+# framework, control and date range for evidence.
+#
+# Entries are indexed hierarchically: (query, company) -> drone scope ->
+# keys, where a scope of None means no drone filter. A write drops only the
+# entries that could contain the row:
+#   forensics, drone D       -> unscoped entries and scope D
+#   forensics, no drone      -> unscoped entries (drone views filter it out)
+#   evidence,  drone D       -> unscoped entries and scope D
+#   evidence,  no drone      -> every scope (drone views include org-level rows)
+# Forensic events whose type maps to a control (CONTROL_EVENT_MAP) also
+# register evidence, so those writes invalidate evidence too.
+#
+# A load that overlaps a write for the same (query, company) is returned
+# but not stored: each (query, company) carries a generation that writes
+# bump, and a load only stores if the generation it started under still
+# holds.
+#
+# Bounded by entry count and total cached rows (LRU), and by TTL. The TTL
+# also bounds staleness for writes made by other processes (other uvicorn
+# workers), which this process cannot see.
+#
+# Cached rows are shared between callers and must not be mutated.
+# Hit/miss counts: query_cache_requests_total{query,result} on /metrics and
+# GET /debug/query_cache.
+#
+# VIGIL_QUERY_CACHE=0 disables the cache. VIGIL_QUERY_CACHE_TTL (s),
+# VIGIL_QUERY_CACHE_ENTRIES and VIGIL_QUERY_CACHE_ROWS set the bounds.
+# =========================================================
+
+QUERY_CACHE_ENABLED = os.environ.get("VIGIL_QUERY_CACHE", "1") != "0"
+QUERY_CACHE_TTL = float(os.environ.get("VIGIL_QUERY_CACHE_TTL", "5"))
+QUERY_CACHE_ENTRIES = int(os.environ.get("VIGIL_QUERY_CACHE_ENTRIES", "512"))
+QUERY_CACHE_ROWS = int(os.environ.get("VIGIL_QUERY_CACHE_ROWS", "200000"))
+QUERIES = ("forensics", "evidence")
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "query_cache_requests_total", "List query cache lookups", ("query", "result")
+)
+CACHE_INVALIDATIONS = REGISTRY.counter(
+    "query_cache_invalidated_total", "List query cache entries dropped by writes", ("query",)
+)
+CACHE_ENTRIES = REGISTRY.gauge("query_cache_entries", "List query cache entries", ("query",))
+
+Scope = Optional[str]
+Key = Tuple[Hashable, ...]
+
+
+class _Entry:
+    __slots__ = ("rows", "expires", "query", "company_id", "scope")
+
+    def __init__(self, rows: List[Dict[str, Any]], expires: float, query: str, company_id: str, scope: Scope):
+        self.rows = rows
+        self.expires = expires
+        self.query = query
+        self.company_id = company_id
+        self.scope = scope
+
+
+class QueryCache:
+    def __init__(
+        self,
+        ttl: float = QUERY_CACHE_TTL,
+        max_entries: int = QUERY_CACHE_ENTRIES,
+        max_rows: int = QUERY_CACHE_ROWS,
+        enabled: bool = QUERY_CACHE_ENABLED,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Key, _Entry]" = OrderedDict()
+        self._index: Dict[Tuple[str, str], Dict[Scope, Set[Key]]] = {}
+        self._generation: Dict[Tuple[str, str], int] = {}
+        self._rows = 0
+        self._counts = {q: {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0} for q in QUERIES}
+        self._hit = {q: CACHE_REQUESTS.labels(q, "hit") for q in QUERIES}
+        self._miss = {q: CACHE_REQUESTS.labels(q, "miss") for q in QUERIES}
+
+    # --- reads ---
+    def read(
+        self,
+        query: str,
+        company_id: str,
+        scope: Scope,
+        filters: Key,
+        load: Callable[[], List[Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        if not self.enabled:
+            return load()
+        key = (query, company_id) + filters
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires > now:
+                    self._entries.move_to_end(key)
+                    self._counts[query]["hits"] += 1
+                    self._hit[query].inc()
+                    return list(entry.rows)
+                self._drop(key)
+            self._counts[query]["misses"] += 1
+            self._miss[query].inc()
+            generation = self._generation.get((query, company_id), 0)
+
+        rows = load()
+
+        if len(rows) <= self.max_rows:
+            with self._lock:
+                if self._generation.get((query, company_id), 0) == generation:
+                    self._store(key, _Entry(rows, time.monotonic() + self.ttl, query, company_id, scope))
+        return list(rows)
+
+    def _store(self, key: Key, entry: _Entry) -> None:
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = entry
+        self._index.setdefault((entry.query, entry.company_id), {}).setdefault(entry.scope, set()).add(key)
+        self._rows += len(entry.rows)
+        while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+            oldest = next(iter(self._entries))
+            self._counts[self._entries[oldest].query]["evictions"] += 1
+            self._drop(oldest)
+        CACHE_ENTRIES.labels(entry.query).set(self._query_entries(entry.query))
+
+    def _drop(self, key: Key) -> None:
+        entry = self._entries.pop(key)
+        self._rows -= len(entry.rows)
+        scopes = self._index.get((entry.query, entry.company_id))
+        if scopes is not None:
+            keys = scopes.get(entry.scope)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del scopes[entry.scope]
+            if not scopes:
+                del self._index[(entry.query, entry.company_id)]
+
+    def _query_entries(self, query: str) -> int:
+        return sum(len(keys) for (q, _), scopes in self._index.items() if q == query for keys in scopes.values())
+
+    # --- writes ---
+    def invalidate(self, query: str, company_id: str, drone_id: Scope = None, all_scopes: bool = False) -> int:
+        """Drop the entries a row for (company_id, drone_id) could appear in."""
+        with self._lock:
+            tenant = (query, company_id)
+            self._generation[tenant] = self._generation.get(tenant, 0) + 1
+            scopes = self._index.get(tenant)
+            if not scopes:
+                return 0
+            if all_scopes:
+                targets = list(scopes)
+            else:
+                targets = [None] if not drone_id else [None, drone_id]
+            keys = [k for s in targets for k in scopes.get(s, ())]
+            for k in keys:
+                self._drop(k)
+            if keys:
+                self._counts[query]["invalidations"] += len(keys)
+                CACHE_INVALIDATIONS.labels(query).inc(len(keys))
+                CACHE_ENTRIES.labels(query).set(self._query_entries(query))
+            return len(keys)
+
+    def forensics_written(self, events: Iterable[Dict[str, Any]]) -> None:
+        seen: Set[Tuple[str, Scope, bool]] = set()
+        for ev in events:
+            seen.add((ev["company_id"], ev.get("drone_id") or None, ev.get("event_type") in CONTROL_EVENT_MAP))
+        for company_id, drone_id, mapped in seen:
+            self.invalidate("forensics", company_id, drone_id)
+            if mapped:
+                self.evidence_written(company_id, drone_id)
+
+    def evidence_written(self, company_id: str, drone_id: Scope) -> None:
+        self.invalidate("evidence", company_id, drone_id or None, all_scopes=not drone_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+            self._rows = 0
+            for tenant in self._generation:
+                self._generation[tenant] += 1
+            for c in self._counts.values():
+                c.update(hits=0, misses=0, evictions=0, invalidations=0)
+            for q in QUERIES:
+                CACHE_ENTRIES.labels(q).set(0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queries = {}
+            for q, c in self._counts.items():
+                lookups = c["hits"] + c["misses"]
+                queries[q] = {
+                    **c,
+                    "hit_rate": round(c["hits"] / lookups, 4) if lookups else None,
+                    "entries": self._query_entries(q),
+                }
+            return {
+                "enabled": self.enabled,
+                "ttl_s": self.ttl,
+                "max_entries": self.max_entries,
+                "max_rows": self.max_rows,
+                "entries": len(self._entries),
+                "rows": self._rows,
+                "queries": queries,
+            }
+
+
+def forensics_filters(
+    drone_id: Optional[str] = None, incident_id: Optional[str] = None, limit: int = 500
+) -> Tuple[Scope, Key]:
+    # db.list_forensics treats "" like None
+    drone = drone_id or None
+    return drone, (drone, incident_id or None, int(limit))
+
+
+def evidence_filters(
+    framework_id: Optional[str] = None,
+    control_id: Optional[str] = None,
+    drone_id: Optional[str] = None,
+    incident_id: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = 200,
+) -> Tuple[Scope, Key]:
+    # db.list_evidence ignores falsy filters
+    drone = drone_id or None
+    return drone, (
+        framework_id or None,
+        control_id or None,
+        drone,
+        incident_id or None,
+        date_from or None,
+        date_to or None,
+        int(limit),
+    )
+
+
+QUERY_CACHE = QueryCache()
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import math
+import os
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .responses import dumps
+from .storage import StorageBackend
+
+# =========================================================
+# Recent telemetry windows (live views)
+# =========================================================
+# telemetry.ingest() pushes every accepted sample into a fixed-size ring
+# per drone; GET /telemetry/{drone_id}/recent serializes the last N
+# samples straight out of those rings instead of reading SQLite rows and
+# converting them to dicts.
+#
+# A ring is a __slots__ record over typed arrays, one entry per sample:
+#
+#   t                   array('d')  epoch seconds            8 bytes
+#   battery/link/gps    array('b')  percent, -1 = missing    3 x 1 byte
+#   status              array('B')  code into STATUS_NAMES   1 byte
+#   alt/speed           array('d')  NaN = missing            2 x 8 bytes
+#
+# i.e. 28 bytes a sample plus ~1 KiB of fixed object overhead. With the
+# default VIGIL_RECENT_SAMPLES=128 that is ~4.5 KiB per drone (~440 MiB
+# for 100k drones); bytes_per_drone() measures it and
+# bench/recent_bench.py reports it alongside the SQLite comparison.
+#
+# Rings fill from ingest in arrival order, which is the id order the
+# history endpoint uses. A drone first seen by a read (process restart,
+# or telemetry that reached another worker) is warmed from the database
+# once. With several workers each process only sees its own ingests, so
+# multi-worker deployments should set VIGIL_RECENT=0 to serve the
+# endpoint from the database.
+# =========================================================
+
+RECENT_ENABLED = os.environ.get("VIGIL_RECENT", "1") != "0"
+RECENT_SAMPLES = int(os.environ.get("VIGIL_RECENT_SAMPLES", "128"))
+
+STATUS_NAMES: List[str] = ["online", "warning", "lost"]
+_STATUS_CODES: Dict[str, int] = {name: i for i, name in enumerate(STATUS_NAMES)}
+_STATUS_LOCK = threading.Lock()
+_NAN = float("nan")
+
+
+def _status_code(status: Optional[str]) -> int:
+    status = status or "online"
+    code = _STATUS_CODES.get(status)
+    if code is None:
+        with _STATUS_LOCK:
+            code = _STATUS_CODES.get(status)
+            if code is None:
+                if len(STATUS_NAMES) >= 255:
+                    return _STATUS_CODES["online"]
+                code = _STATUS_CODES[status] = len(STATUS_NAMES)
+                STATUS_NAMES.append(status)
+    return code
+
+
+def _epoch(value: Any) -> float:
+    if not value:
+        return time.time()
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return time.time()
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _pct(value: Any) -> int:
+    return -1 if value is None else int(value)
+
+
+def _real(value: Any) -> float:
+    return _NAN if value is None else float(value)
+
+
+class DroneRing:
+    """Last `capacity` samples of one drone, oldest overwritten first."""
+
+    __slots__ = ("capacity", "head", "size", "cold", "t", "battery", "link", "gps", "status", "alt", "speed")
+
+    def __init__(self, capacity: int, cold: bool = False):
+        self.capacity = capacity
+        self.head = 0  # next write position
+        self.size = 0
+        self.cold = cold  # created by ingest before the database history was loaded
+        self.t = array("d", bytes(8 * capacity))
+        self.battery = array("b", bytes(capacity))
+        self.link = array("b", bytes(capacity))
+        self.gps = array("b", bytes(capacity))
+        self.status = array("B", bytes(capacity))
+        self.alt = array("d", bytes(8 * capacity))
+        self.speed = array("d", bytes(8 * capacity))
+
+    def push(self, t: float, battery: int, link: int, gps: int, status: int, alt: float, speed: float) -> None:
+        i = self.head
+        self.t[i] = t
+        self.battery[i] = battery
+        self.link[i] = link
+        self.gps[i] = gps
+        self.status[i] = status
+        self.alt[i] = alt
+        self.speed[i] = speed
+        self.head = (i + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+            if self.size == self.capacity:
+                self.cold = False  # full: older database history would be overwritten anyway
+
+    def push_sample(self, sample: Dict[str, Any], t: Optional[float] = None) -> None:
+        self.push(
+            _epoch(sample.get("last_seen")) if t is None else t,
+            _pct(sample.get("battery")),
+            _pct(sample.get("link_quality")),
+            _pct(sample.get("gps_health")),
+            _status_code(sample.get("status")),
+            _real(sample.get("alt")),
+            _real(sample.get("speed")),
+        )
+
+    def slots(self, n: int) -> List[int]:
+        """Buffer positions of the newest min(n, size) samples, newest first."""
+        cap, head = self.capacity, self.head
+        return [(head - 1 - k) % cap for k in range(min(n, self.size))]
+
+    def _newest(self, col: array, n: int) -> List[Any]:
+        # At most two contiguous slices of the typed array, then reversed in place
+        head, k = self.head, min(n, self.size)
+        if k <= head:
+            out = col[head - k:head].tolist()
+        else:
+            out = col[self.capacity - (k - head):].tolist() + col[:head].tolist()
+        out.reverse()
+        return out
+
+    def columns(self, n: int) -> Dict[str, List[Any]]:
+        names = STATUS_NAMES
+        cols: Dict[str, List[Any]] = {
+            "t": self._newest(self.t, n),
+            "status": [names[c] for c in self._newest(self.status, n)],
+        }
+        for key, col in (("battery", self.battery), ("link_quality", self.link), ("gps_health", self.gps)):
+            values = self._newest(col, n)
+            cols[key] = [None if v < 0 else v for v in values] if -1 in values else values
+        for key, col in (("alt", self.alt), ("speed", self.speed)):
+            values = self._newest(col, n)
+            cols[key] = [None if math.isnan(v) else v for v in values] if any(map(math.isnan, values)) else values
+        return cols
+
+
+def bytes_per_drone(capacity: int = RECENT_SAMPLES) -> int:
+    """Measured footprint of one full ring, including its fleet dict entry."""
+    ring = DroneRing(capacity)
+    arrays = (ring.t, ring.battery, ring.link, ring.gps, ring.status, ring.alt, ring.speed)
+    dict_entry = 3 * 8 + sys.getsizeof("UA-000000")  # hash/key/value slot + a typical drone id
+    return sys.getsizeof(ring) + sum(sys.getsizeof(a) for a in arrays) + dict_entry
+
+
+def columns_from_rows(rows: Iterable[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Same layout as DroneRing.columns() from newest-first telemetry rows (the SQLite path)."""
+    out: Dict[str, List[Any]] = {
+        k: [] for k in ("t", "status", "battery", "link_quality", "gps_health", "alt", "speed")
+    }
+    for r in rows:
+        out["t"].append(_epoch(r.get("last_seen")))
+        out["status"].append(r.get("status") or "online")
+        for k in ("battery", "link_quality", "gps_health"):
+            out[k].append(r.get(k))
+        for k in ("alt", "speed"):
+            v = r.get(k)
+            out[k].append(None if v is None else float(v))
+    return out
+
+
+def body(drone_id: str, source: str, cols: Dict[str, List[Any]]) -> Dict[str, Any]:
+    return {"ok": True, "drone_id": drone_id, "source": source, "count": len(cols["t"]), **cols}
+
+
+def encode(drone_id: str, source: str, cols: Dict[str, List[Any]]) -> bytes:
+    return dumps(body(drone_id, source, cols))
+
+
+class RecentFleet:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.rings: Dict[str, DroneRing] = {}
+        self.lock = threading.Lock()
+
+
+class RecentStore:
+    def __init__(self, capacity: int = RECENT_SAMPLES):
+        self.capacity = capacity
+        self._fleets: Dict[str, RecentFleet] = {}
+        self._lock = threading.Lock()
+
+    def fleet(self, company_id: str) -> RecentFleet:
+        fleet = self._fleets.get(company_id)
+        if fleet is None:
+            with self._lock:
+                fleet = self._fleets.get(company_id)
+                if fleet is None:
+                    fleet = self._fleets[company_id] = RecentFleet(self.capacity)
+        return fleet
+
+    def observe(self, company_id: str, samples: Iterable[Dict[str, Any]]) -> None:
+        fleet = self.fleet(company_id)
+        with fleet.lock:
+            rings = fleet.rings
+            for s in samples:
+                ring = rings.get(s["drone_id"])
+                if ring is None:
+                    ring = rings[s["drone_id"]] = DroneRing(fleet.capacity, cold=True)
+                ring.push_sample(s)
+
+    def _warm(self, store: StorageBackend, fleet: RecentFleet, company_id: str, drone_id: str) -> Optional[DroneRing]:
+        rows = store.list_telemetry(company_id, drone_id, fleet.capacity)  # newest first
+        with fleet.lock:
+            current = fleet.rings.get(drone_id)
+            if current is not None and not current.cold:
+                return current
+            if not rows and current is None:
+                return None
+            ring = DroneRing(fleet.capacity)
+            newest = float("-inf")
+            for r in reversed(rows):
+                t = _epoch(r.get("last_seen"))
+                ring.push_sample(r, t)
+                newest = max(newest, t)
+            if current is not None:
+                # Samples ingested here after the database read above
+                for i in reversed(current.slots(current.size)):
+                    if current.t[i] > newest:
+                        ring.push(current.t[i], current.battery[i], current.link[i], current.gps[i],
+                                  current.status[i], current.alt[i], current.speed[i])
+            fleet.rings[drone_id] = ring
+            return ring
+
+    def window(self, store: StorageBackend, company_id: str, drone_id: str, n: int) -> Dict[str, List[Any]]:
+        """Newest-first columns for the last n samples of a drone."""
+        fleet = self.fleet(company_id)
+        ring = fleet.rings.get(drone_id)
+        if ring is None or ring.cold:
+            ring = self._warm(store, fleet, company_id, drone_id)
+            if ring is None:
+                return columns_from_rows(())
+        with fleet.lock:
+            return ring.columns(n)
+
+    def stats(self, company_id: str) -> Dict[str, Any]:
+        fleet = self._fleets.get(company_id)
+        drones = len(fleet.rings) if fleet else 0
+        per_drone = bytes_per_drone(self.capacity)
+        return {
+            "enabled": RECENT_ENABLED,
+            "capacity": self.capacity,
+            "drones": drones,
+            "bytes_per_drone": per_drone,
+            "bytes": drones * per_drone,
+        }
+
+    def reset(self, company_id: Optional[str] = None) -> None:
+        with self._lock:
+            if company_id is None:
+                self._fleets.clear()
+            else:
+                self._fleets.pop(company_id, None)
+
+
+RECENT = RecentStore()
+
+
+def recent_columns(store: StorageBackend, company_id: str, drone_id: str, n: int) -> Tuple[str, Dict[str, List[Any]]]:
+    if RECENT_ENABLED:
+        return "ring", RECENT.window(store, company_id, drone_id, n)
+    return "db", columns_from_rows(store.list_telemetry(company_id, drone_id, n))
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from .db import CONTROL_EVENT_MAP, INCIDENT_TRANSITIONS
+from .metrics import REGISTRY
+from .storage import StorageBackend, get_storage
+from .zerotrust import require_action
+
+# =========================================================
+# Reports (server-side, streamed)
+# =========================================================
+# Incident, forensics and evidence reports are written straight from the
+# StorageBackend.iter_*() cursors as CSV or NDJSON: rows are encoded
+# CHUNK_ROWS at a time into a small buffer and sent as they are produced, so
+# memory stays flat whatever the date range or fleet size. Filters:
+# date_from / date_to (YYYY-MM-DD, UTC, inclusive) and a drone scope.
+#
+# The compliance report scores frameworks from evidence_summary_by_control:
+# a control is met once it has accepted evidence; controls the platform
+# maps events to (db.CONTROL_EVENT_MAP) count as unmet when they have none.
+# =========================================================
+
+REPORT_FORMATS = ("csv", "ndjson")
+CHUNK_ROWS = 500
+REVIEW_STATUSES = ("accepted", "pending", "rejected")
+
+INCIDENT_COLUMNS = (
+    "incident_id", "created_at", "updated_at", "drone_id", "threat_type", "severity", "title", "status",
+    "training", "operator", "mitigated_action", "mitigated_at", "closed_at", "version", "details",
+)
+FORENSICS_COLUMNS = (
+    "id", "ts", "drone_id", "incident_id", "event_type", "actor", "action", "result", "payload_json",
+)
+EVIDENCE_COLUMNS = (
+    "id", "created_at", "framework_id", "control_id", "evidence_type", "drone_id", "incident_id",
+    "source_event_id", "reference_id", "attestation", "review_status", "reviewed_by", "reviewed_at", "review_note",
+)
+COMPLIANCE_COLUMNS = ("framework_id", "control_id", "status", "accepted", "pending", "rejected", "total")
+
+REPORT_ROWS = REGISTRY.counter("report_rows_total", "Rows streamed into reports", ("report",))
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+
+# ---------------------------------------------------------
+# Encoders
+# ---------------------------------------------------------
+
+
+def _csv_cell(value: Any) -> Any:
+    # Spreadsheet formula injection: free-text fields (attestation, notes)
+    # must not be evaluated when an auditor opens the file
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + value
+    return value
+
+
+def encode_csv(rows: Iterable[Dict[str, Any]], columns: Sequence[str], counter: Any = None) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow([_csv_cell(row.get(c)) for c in columns])
+        pending += 1
+        if pending >= CHUNK_ROWS:
+            if counter is not None:
+                counter.inc(pending)
+            pending = 0
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if counter is not None and pending:
+        counter.inc(pending)
+    yield buf.getvalue().encode("utf-8")
+
+
+def encode_ndjson(rows: Iterable[Dict[str, Any]], counter: Any = None) -> Iterator[bytes]:
+    lines: List[str] = []
+    for row in rows:
+        lines.append(json.dumps(row, separators=(",", ":"), default=str))
+        if len(lines) >= CHUNK_ROWS:
+            if counter is not None:
+                counter.inc(len(lines))
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        if counter is not None:
+            counter.inc(len(lines))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _stream(report: str, fmt: str, company_id: str, rows: Iterable[Dict[str, Any]], columns: Sequence[str]) -> StreamingResponse:
+    counter = REPORT_ROWS.labels(report)
+    day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    filename = f"vigil-{report}-{company_id}-{day}.{fmt}"
+    if fmt == "csv":
+        body, media_type = encode_csv(rows, columns, counter), "text/csv; charset=utf-8"
+    else:
+        body, media_type = encode_ndjson(rows, counter), "application/x-ndjson"
+    return StreamingResponse(
+        body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+def _open_scan(scan: Callable[..., Iterator[Dict[str, Any]]], **filters: Any) -> Iterator[Dict[str, Any]]:
+    # Filters are validated when the scan is opened, before any byte is sent
+    try:
+        return scan(**filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid filter: {exc}")
+
+
+def _format(fmt: str) -> None:
+    if fmt not in REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(REPORT_FORMATS)}")
+
+
+# ---------------------------------------------------------
+# Routes
+# ---------------------------------------------------------
+
+
+@router.get("/incidents")
+def incident_report(
+    fmt: str = Query(default="csv", alias="format"),
+    drone_id: Optional[str] = Query(default=None),
+    status: Optional[str] = Query(default=None),
+    date_from: Optional[str] = Query(default=None),  # YYYY-MM-DD
+    date_to: Optional[str] = Query(default=None),    # YYYY-MM-DD
+    user=Depends(require_action("incident.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    _format(fmt)
+    if status is not None and status not in INCIDENT_TRANSITIONS:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(INCIDENT_TRANSITIONS)}")
+    company_id = user.get("company_id") or "default"
+    rows = _open_scan(
+        store.iter_incidents,
+        company_id=company_id, drone_id=drone_id, status=status, date_from=date_from, date_to=date_to,
+    )
+    return _stream("incidents", fmt, company_id, rows, INCIDENT_COLUMNS)
+
+
+@router.get("/forensics")
+def forensics_report(
+    fmt: str = Query(default="csv", alias="format"),
+    drone_id: Optional[str] = Query(default=None),
+    incident_id: Optional[str] = Query(default=None),
+    event_type: Optional[str] = Query(default=None),
+    date_from: Optional[str] = Query(default=None),  # YYYY-MM-DD
+    date_to: Optional[str] = Query(default=None),    # YYYY-MM-DD
+    user=Depends(require_action("forensics.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    _format(fmt)
+    company_id = user.get("company_id") or "default"
+    rows = _open_scan(
+        store.iter_forensics,
+        company_id=company_id, drone_id=drone_id, incident_id=incident_id, event_type=event_type,
+        date_from=date_from, date_to=date_to,
+    )
+    return _stream("forensics", fmt, company_id, rows, FORENSICS_COLUMNS)
+
+
+@router.get("/evidence")
+def evidence_report(
+    fmt: str = Query(default="csv", alias="format"),
+    framework_id: Optional[str] = Query(default=None),
+    control_id: Optional[str] = Query(default=None),
+    drone_id: Optional[str] = Query(default=None),
+    incident_id: Optional[str] = Query(default=None),
+    review_status: Optional[str] = Query(default=None),
+    date_from: Optional[str] = Query(default=None),  # YYYY-MM-DD
+    date_to: Optional[str] = Query(default=None),    # YYYY-MM-DD
+    user=Depends(require_action("evidence.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    _format(fmt)
+    if review_status is not None and review_status not in REVIEW_STATUSES:
+        raise HTTPException(status_code=400, detail=f"review_status must be one of {', '.join(REVIEW_STATUSES)}")
+    company_id = user.get("company_id") or "default"
+    rows = _open_scan(
+        store.iter_evidence,
+        company_id=company_id, framework_id=framework_id, control_id=control_id, drone_id=drone_id,
+        incident_id=incident_id, review_status=review_status, date_from=date_from, date_to=date_to,
+    )
+    return _stream("evidence", fmt, company_id, rows, EVIDENCE_COLUMNS)
+
+
+def compliance_summary(
+    store: StorageBackend,
+    company_id: str,
+    framework_id: str,
+    drone_id: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Per-control evidence counts and a framework score from real review state."""
+    rows = store.evidence_summary_by_control(
+        company_id=company_id, framework_id=framework_id, drone_id=drone_id, date_from=date_from, date_to=date_to
+    )
+    by_control = {r["control_id"]: r for r in rows}
+    expected = {control for fw, control in CONTROL_EVENT_MAP.values() if fw == framework_id}
+    controls = []
+    for control_id in sorted(expected | set(by_control)):
+        r = by_control.get(control_id, {})
+        counts = {k: int(r.get(k) or 0) for k in ("accepted", "pending", "rejected", "total")}
+        if counts["accepted"]:
+            status = "met"
+        elif counts["pending"]:
+            status = "pending_review"
+        elif counts["rejected"]:
+            status = "rejected"
+        else:
+            status = "no_evidence"
+        controls.append({"framework_id": framework_id, "control_id": control_id, "status": status, **counts})
+    met = sum(1 for c in controls if c["status"] == "met")
+    total_evidence = sum(c["total"] for c in controls)
+    return {
+        "framework_id": framework_id,
+        "controls_total": len(controls),
+        "controls_met": met,
+        "score": round(100.0 * met / len(controls), 1) if controls else None,
+        "evidence_total": total_evidence,
+        "evidence_accepted": sum(c["accepted"] for c in controls),
+        "controls": controls,
+    }
+
+
+@router.get("/compliance")
+def compliance_report(
+    framework_id: List[str] = Query(...),
+    fmt: str = Query(default="json", alias="format"),
+    drone_id: Optional[str] = Query(default=None),
+    date_from: Optional[str] = Query(default=None),  # YYYY-MM-DD
+    date_to: Optional[str] = Query(default=None),    # YYYY-MM-DD
+    user=Depends(require_action("evidence.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    if fmt not in ("json", "csv"):
+        raise HTTPException(status_code=400, detail="format must be json or csv")
+    company_id = user.get("company_id") or "default"
+    try:
+        frameworks = [
+            compliance_summary(store, company_id, fw, drone_id, date_from, date_to)
+            for fw in dict.fromkeys(framework_id)
+        ]
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid filter: {exc}")
+    if fmt == "csv":
+        rows = (c for fw in frameworks for c in fw["controls"])
+        return _stream("compliance", "csv", company_id, rows, COMPLIANCE_COLUMNS)
+    return {
+        "ok": True,
+        "generated_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        "scope": "drone" if drone_id else "org",
+        "drone_id": drone_id,
+        "date_from": date_from,
+        "date_to": date_to,
+        "frameworks": frameworks,
+    }
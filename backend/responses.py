@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+import os
+import zlib
+from contextvars import ContextVar
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import orjson
+from fastapi.responses import Response
+
+from .metrics import REGISTRY
+
+# =========================================================
+# Response encoding: fast JSON, wire formats, compression
+# =========================================================
+# Routes that return a dict go through FastAPI's jsonable_encoder (a
+# recursive walk that copies every row) and then the default response
+# class. The large list endpoints instead return FastJSONResponse via
+# rows_response(), which hands the rows straight to orjson; the app's
+# default_response_class is FastJSONResponse too, so every route shares
+# the negotiation below.
+#
+# Columns that store JSON text (forensics_events.payload_json) are
+# spliced into JSON output verbatim with orjson.Fragment, so clients get
+# the payload as a JSON value rather than a re-escaped string. Only text
+# that looks like a JSON object or array is spliced; anything else (NULL,
+# legacy free text) is emitted as an ordinary string so the response stays
+# valid JSON. payload_json is always written with json.dumps by the app.
+#
+# Wire format (Accept): application/json by default; application/msgpack
+# (msgpack) or application/cbor (cbor2) when the client prefers them and
+# the library is installed. WireMiddleware records the choice in a
+# context variable that FastJSONResponse reads when it renders. Error
+# responses from exception handlers stay JSON.
+#
+# Compression (Accept-Encoding): br (brotli) preferred over gzip.
+#
+#   body < VIGIL_COMPRESS_MIN_BYTES (1 KiB)   sent as is
+#   buffered body up to 1 MiB                 gzip 6 / br 4
+#   larger buffered bodies, and streams       gzip 1 / br 1
+#
+# Streamed bodies (StreamingResponse: reports, exports) are compressed
+# chunk by chunk with a flush after each chunk, so they stay incremental
+# and memory stays flat. Responses that already carry a Content-Encoding
+# or a non-text media type (zip, parquet) pass through untouched.
+# bench/json_bench.py measures serialization per 10k rows;
+# bench/wire_bench.py measures formats and compression levels.
+# =========================================================
+
+RAW_JSON_COLUMNS = ("payload_json",)
+COMPRESS_ENABLED = os.environ.get("VIGIL_COMPRESS", "1") != "0"
+COMPRESS_MIN_BYTES = int(os.environ.get("VIGIL_COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_LEVELS: Tuple[Tuple[float, Dict[str, int]], ...] = (
+    (1 << 20, {"gzip": 6, "br": 4}),
+    (float("inf"), {"gzip": 1, "br": 1}),
+)
+STREAM_LEVELS = COMPRESS_LEVELS[-1][1]
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/x-ndjson", "application/msgpack", "application/cbor", "text/",
+)
+
+WIRE_MEDIA_TYPES = {
+    "json": "application/json",
+    "msgpack": "application/msgpack",
+    "cbor": "application/cbor",
+}
+_ACCEPT_ALIASES = {
+    "application/json": "json",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+    "application/cbor": "cbor",
+}
+WIRE_FORMAT: ContextVar[str] = ContextVar("wire_format", default="json")
+
+COMPRESSED_BYTES = REGISTRY.counter(
+    "http_compressed_bytes_total", "Response body bytes before and after compression", ("encoding", "stage")
+)
+
+
+def _import_msgpack() -> Any:
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+
+def _import_cbor2() -> Any:
+    try:
+        import cbor2
+    except ImportError:
+        return None
+    return cbor2
+
+
+def _import_brotli() -> Any:
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+_LIBS: Dict[str, Any] = {}
+
+
+def _lib(name: str) -> Any:
+    if name not in _LIBS:
+        _LIBS[name] = {"msgpack": _import_msgpack, "cbor": _import_cbor2, "br": _import_brotli}[name]()
+    return _LIBS[name]
+
+
+# ---------------------------------------------------------
+# Encoders
+# ---------------------------------------------------------
+
+
+class RawJSON:
+    """Stored JSON text, spliced as-is into JSON and decoded for binary formats."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def raw_json(value: Any) -> Any:
+    if isinstance(value, str) and value[:1] in ("{", "["):
+        return RawJSON(value)
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, RawJSON):
+        return orjson.Fragment(value.text)
+    # Postgres NUMERIC columns; everything else orjson handles natively
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _plain(value: Any) -> Any:
+    # What the binary encoders cannot take natively, as the JSON output would carry it
+    if isinstance(value, RawJSON):
+        return orjson.loads(value.text)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_json_default)
+
+
+def encode(content: Any, wire_format: str = "json") -> bytes:
+    if wire_format == "msgpack":
+        return _lib("msgpack").packb(content, default=_plain, strict_types=False)
+    if wire_format == "cbor":
+        return _lib("cbor").dumps(content, default=lambda encoder, value: encoder.encode(_plain(value)))
+    return dumps(content)
+
+
+def splice_rows(rows: Iterable[Dict[str, Any]], columns: Sequence[str] = RAW_JSON_COLUMNS) -> List[Dict[str, Any]]:
+    out = []
+    for row in rows:
+        if any(c in row for c in columns):
+            row = dict(row)
+            for c in columns:
+                if c in row:
+                    row[c] = raw_json(row[c])
+        out.append(row)
+    return out
+
+
+class FastJSONResponse(Response):
+    """orjson-rendered JSON, or MessagePack/CBOR when the request negotiated it."""
+
+    media_type = "application/json"
+
+    def __init__(self, content: Any = None, status_code: int = 200, headers: Any = None,
+                 media_type: Optional[str] = None, background: Any = None):
+        self.wire_format = WIRE_FORMAT.get() if media_type is None else "json"
+        if media_type is None:
+            media_type = WIRE_MEDIA_TYPES[self.wire_format]
+        super().__init__(content, status_code, headers, media_type, background)
+        if "vary" not in self.headers:
+            self.headers["vary"] = "Accept"
+
+    def render(self, content: Any) -> bytes:
+        return encode(content, self.wire_format)
+
+
+def rows_response(key: str, rows: Iterable[Dict[str, Any]], **extra: Any) -> FastJSONResponse:
+    """{"ok": true, **extra, key: rows} with raw JSON columns spliced in."""
+    return FastJSONResponse({"ok": True, **extra, key: splice_rows(rows)})
+
+
+# ---------------------------------------------------------
+# Negotiation
+# ---------------------------------------------------------
+
+
+def _accept_items(header: str) -> List[Tuple[str, float]]:
+    items = []
+    for part in header.split(","):
+        fields = part.strip().split(";")
+        name = fields[0].strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            key, _, val = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(val)
+                except ValueError:
+                    q = 0.0
+        items.append((name, q))
+    return items
+
+
+def negotiate_format(accept: str) -> str:
+    best, best_q = "json", 0.0
+    for name, q in _accept_items(accept):
+        fmt = _ACCEPT_ALIASES.get(name)
+        if fmt is None or q <= best_q:
+            continue
+        if fmt != "json" and _lib(fmt) is None:
+            continue
+        best, best_q = fmt, q
+    return best
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {name: q for name, q in _accept_items(accept_encoding) if q > 0}
+    if "br" in accepted and _lib("br") is not None:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress_level(encoding: str, size: Optional[int]) -> int:
+    if size is None:
+        return STREAM_LEVELS[encoding]
+    return next(levels[encoding] for limit, levels in COMPRESS_LEVELS if size <= limit)
+
+
+class _Compressor:
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = _lib("br").Compressor(quality=level)
+        else:
+            self._c = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._c.process(data) + self._c.flush()
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._c.finish() if self.encoding == "br" else self._c.flush()
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for k, v in headers:
+        if k.lower() == name:
+            return v
+    return None
+
+
+def _compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    if _header(headers, b"content-encoding") is not None:
+        return False
+    ctype = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+    return ctype.startswith(COMPRESSIBLE_TYPES)
+
+
+def _with_vary(headers: List[Tuple[bytes, bytes]], value: bytes) -> List[Tuple[bytes, bytes]]:
+    out = [(k, v) for k, v in headers if k.lower() != b"vary"]
+    current = _header(headers, b"vary")
+    out.append((b"vary", current + b", " + value if current else value))
+    return out
+
+
+class WireMiddleware:
+    """ASGI middleware: Accept -> wire format, Accept-Encoding -> compression."""
+
+    def __init__(self, app: Any, compress: bool = COMPRESS_ENABLED, min_bytes: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.compress = compress
+        self.min_bytes = min_bytes
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or ())
+        token = WIRE_FORMAT.set(negotiate_format(headers.get(b"accept", b"").decode("latin-1")))
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1")) if self.compress else None
+        try:
+            if encoding is None:
+                await self.app(scope, receive, send)
+            else:
+                await self.app(scope, receive, self._compressing_send(send, encoding))
+        finally:
+            WIRE_FORMAT.reset(token)
+
+    def _compressing_send(self, send: Callable[..., Any], encoding: str) -> Callable[..., Any]:
+        start: Dict[str, Any] = {}
+        state = {"mode": None}  # None until the first body message: "identity" | "buffered" | "stream"
+        compressor: List[_Compressor] = []
+        counted = COMPRESSED_BYTES.labels(encoding, "in"), COMPRESSED_BYTES.labels(encoding, "out")
+
+        async def _send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            headers = list(start.get("headers") or [])
+
+            if state["mode"] is None:
+                if not _compressible(headers) or start.get("status", 200) in (204, 304) or (
+                    not more and len(body) < self.min_bytes
+                ):
+                    state["mode"] = "identity"
+                    await send(start)
+                    await send(message)
+                    return
+                headers = [(k, v) for k, v in _with_vary(headers, b"Accept-Encoding") if k.lower() != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode()))
+                if not more:
+                    state["mode"] = "buffered"
+                    c = _Compressor(encoding, compress_level(encoding, len(body)))
+                    out = c.chunk(body) + c.finish()
+                    headers.append((b"content-length", str(len(out)).encode()))
+                    counted[0].inc(len(body))
+                    counted[1].inc(len(out))
+                    await send(dict(start, headers=headers))
+                    await send({"type": "http.response.body", "body": out})
+                    return
+                state["mode"] = "stream"
+                compressor.append(_Compressor(encoding, compress_level(encoding, None)))
+                await send(dict(start, headers=headers))
+
+            if state["mode"] == "identity":
+                await send(message)
+                return
+            c = compressor[0]
+            out = c.chunk(body) if body else b""
+            if not more:
+                out += c.finish()
+            counted[0].inc(len(body))
+            counted[1].inc(len(out))
+            await send({"type": "http.response.body", "body": out, "more_body": more})
+
+        return _send
@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from .correlation import CORRELATION
+from .storage import StorageBackend
+from .tracing import TRACER, bind_context
+
+# =========================================================
+# Threat simulation (templates + fleet-wide batch drills)
+# =========================================================
+# A batch drill expands (drones x threat templates) or an explicit
+# scenario schedule into a plan, then writes incidents and their
+# simulation_started / incident_created events in chunked bulk
+# transactions (StorageBackend.create_incidents_bulk). Progress and
+# throughput are tracked on a BatchRun held in BATCH_RUNS.
+#
+# Rows are stamped with the time they are actually written, never a
+# projected future time; the scheduled offset is kept in the
+# simulation_started payload. realtime=True waits for each offset before
+# writing it. At most MAX_CONCURRENT_BATCHES runs execute per process
+# (BatchCapacityError otherwise), and wait=True inline runs are limited to
+# MAX_INLINE_INCIDENTS so a request thread is never pinned by a 50k drill.
+# =========================================================
+
+THREAT_TEMPLATES: List[Dict[str, str]] = [
+    {"id": "gps_spoof", "name": "GPS Spoofing", "severity": "high"},
+    {"id": "rf_link_hijack", "name": "RF Link Hijack", "severity": "critical"},
+    {"id": "firmware_tamper", "name": "Firmware Tamper", "severity": "high"},
+]
+TEMPLATES_BY_ID = {t["id"]: t for t in THREAT_TEMPLATES}
+
+MAX_BATCH_DRONES = 5000
+MAX_BATCH_INCIDENTS = 50000
+DEFAULT_CHUNK_SIZE = 500
+MAX_TRACKED_RUNS = 100
+MAX_SCHEDULE_OFFSET_S = 3600.0
+MAX_INLINE_INCIDENTS = 5000
+MAX_INLINE_DELAY_S = 30.0
+MAX_CONCURRENT_BATCHES = int(os.environ.get("VIGIL_BATCH_CONCURRENCY", "2"))
+
+
+class BatchCapacityError(RuntimeError):
+    """Raised by start_batch when MAX_CONCURRENT_BATCHES runs are active."""
+
+
+def severity_for(threat_type: str) -> str:
+    return "critical" if threat_type == "rf_link_hijack" else "high"
+
+
+def title_for(threat_type: str) -> str:
+    return threat_type.replace("_", " ").title()
+
+
+@dataclass
+class ScenarioStep:
+    threat_type: str
+    offset_s: float = 0.0
+    drone_ids: Optional[List[str]] = None  # None = every drone in the batch
+
+
+# (offset_s, drone_id, threat_type)
+PlanItem = Tuple[float, str, str]
+
+
+def plan_batch(
+    drone_ids: Sequence[str],
+    threat_types: Sequence[str] = (),
+    schedule: Sequence[ScenarioStep] = (),
+) -> List[PlanItem]:
+    """
+    Expand a drill into one plan item per incident, ordered by offset.
+    Without a schedule every drone gets every threat type at offset 0.
+    """
+    drones = list(dict.fromkeys(d for d in drone_ids if d))
+    if not drones:
+        raise ValueError("drone_ids must not be empty")
+    if len(drones) > MAX_BATCH_DRONES:
+        raise ValueError(f"at most {MAX_BATCH_DRONES} drones per batch")
+
+    steps = list(schedule) or [ScenarioStep(threat_type=t) for t in threat_types]
+    if not steps:
+        raise ValueError("provide threat_types or a schedule")
+
+    plan: List[PlanItem] = []
+    for step in steps:
+        if step.threat_type not in TEMPLATES_BY_ID:
+            raise ValueError(f"unknown threat_type: {step.threat_type}")
+        if not 0 <= step.offset_s <= MAX_SCHEDULE_OFFSET_S:
+            raise ValueError(f"schedule offsets must be between 0 and {MAX_SCHEDULE_OFFSET_S:g}s")
+        for drone_id in step.drone_ids or drones:
+            plan.append((float(step.offset_s), drone_id, step.threat_type))
+
+    if len(plan) > MAX_BATCH_INCIDENTS:
+        raise ValueError(f"at most {MAX_BATCH_INCIDENTS} incidents per batch")
+    plan.sort(key=lambda item: item[0])
+    return plan
+
+
+@dataclass
+class BatchRun:
+    batch_id: str
+    company_id: str
+    actor: str
+    total: int
+    status: str = "queued"  # queued | running | done | failed
+    completed: int = 0
+    forensic_events: int = 0
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    elapsed_s: float = 0.0
+    error: Optional[str] = None
+    _t0: float = field(default=0.0, repr=False)
+
+    @property
+    def incidents_per_s(self) -> Optional[float]:
+        return round(self.completed / self.elapsed_s, 1) if self.elapsed_s > 0 else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "batch_id": self.batch_id,
+            "company_id": self.company_id,
+            "status": self.status,
+            "total": self.total,
+            "completed": self.completed,
+            "progress": round(self.completed / self.total, 4) if self.total else 1.0,
+            "forensic_events": self.forensic_events,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_s": round(self.elapsed_s, 4),
+            "incidents_per_s": self.incidents_per_s,
+            "error": self.error,
+        }
+
+
+class BatchRegistry:
+    """Most recent runs per process, for progress polling."""
+
+    def __init__(self, max_runs: int = MAX_TRACKED_RUNS):
+        self._runs: "OrderedDict[str, BatchRun]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_runs = max_runs
+
+    def add(self, run: BatchRun) -> None:
+        with self._lock:
+            self._runs[run.batch_id] = run
+            while len(self._runs) > self._max_runs:
+                self._runs.popitem(last=False)
+
+    def get(self, batch_id: str) -> Optional[BatchRun]:
+        with self._lock:
+            return self._runs.get(batch_id)
+
+
+BATCH_RUNS = BatchRegistry()
+_BATCH_SLOTS = threading.BoundedSemaphore(max(1, MAX_CONCURRENT_BATCHES))
+
+
+def _chunks(items: Sequence[PlanItem], size: int, *, split_offsets: bool = False) -> Iterable[Sequence[PlanItem]]:
+    """Fixed-size slices; with split_offsets a slice never spans two offsets."""
+    i = 0
+    while i < len(items):
+        end = min(i + size, len(items))
+        if split_offsets:
+            offset = items[i][0]
+            j = i + 1
+            while j < end and items[j][0] == offset:
+                j += 1
+            end = j
+        yield items[i:end]
+        i = end
+
+
+def execute_batch(
+    store: StorageBackend,
+    run: BatchRun,
+    plan: Sequence[PlanItem],
+    *,
+    actor_role: str,
+    training: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    realtime: bool = False,
+) -> BatchRun:
+    """
+    Write the plan. Rows carry the wall-clock time of the chunk that wrote
+    them; with realtime=True the runner first waits for each offset.
+    """
+    run.status = "running"
+    run.started_at = datetime.now(timezone.utc).isoformat()
+    run._t0 = time.perf_counter()
+    try:
+        operators = store.get_assigned_operators({drone_id for _, drone_id, _ in plan})
+        store.add_forensic_event(
+            company_id=run.company_id,
+            drone_id=None,
+            incident_id=None,
+            event_type="simulation_batch_started",
+            actor=run.actor,
+            action="run_batch",
+            result="ok",
+            payload_json=json.dumps(
+                {"batch_id": run.batch_id, "planned_incidents": run.total, "training": training, "actor_role": actor_role}
+            ),
+        )
+
+        for chunk in _chunks(plan, max(1, chunk_size), split_offsets=realtime):
+            if realtime:
+                delay = chunk[0][0] - (time.perf_counter() - run._t0)
+                if delay > 0:
+                    time.sleep(delay)
+
+            ts = datetime.now(timezone.utc).isoformat()
+            incidents: List[Dict[str, Any]] = []
+            events: List[Dict[str, Any]] = []
+            for offset_s, drone_id, threat_type in chunk:
+                incident_id = f"INC-{uuid4().hex[:12]}"
+                severity = severity_for(threat_type)
+                title = title_for(threat_type)
+                operator = operators.get(drone_id)
+                incidents.append(
+                    {
+                        "incident_id": incident_id,
+                        "company_id": run.company_id,
+                        "drone_id": drone_id,
+                        "threat_type": threat_type,
+                        "severity": severity,
+                        "title": title,
+                        "training": training,
+                        "created_at": ts,
+                        "details": json.dumps({"source": "threat_simulation", "batch_id": run.batch_id}),
+                        "operator": operator,
+                    }
+                )
+                events.append(
+                    {
+                        "ts": ts,
+                        "company_id": run.company_id,
+                        "drone_id": drone_id,
+                        "incident_id": None,
+                        "event_type": "simulation_started",
+                        "actor": run.actor,
+                        "action": threat_type,
+                        "result": "ok",
+                        "payload_json": json.dumps(
+                            {"training": training, "actor_role": actor_role, "batch_id": run.batch_id, "offset_s": offset_s}
+                        ),
+                    }
+                )
+                events.append(
+                    {
+                        "ts": ts,
+                        "company_id": run.company_id,
+                        "drone_id": drone_id,
+                        "incident_id": incident_id,
+                        "event_type": "incident_created",
+                        "actor": run.actor,
+                        "action": threat_type,
+                        "result": "ok",
+                        "payload_json": json.dumps(
+                            {
+                                "severity": severity,
+                                "title": title,
+                                "training": training,
+                                "actor_role": actor_role,
+                                "operator": operator,
+                                "batch_id": run.batch_id,
+                            }
+                        ),
+                    }
+                )
+
+            store.create_incidents_bulk(incidents, events)
+            # Drills always open their planned rows; later signals fold into them
+            for inc in incidents:
+                CORRELATION.track(
+                    company_id=run.company_id,
+                    drone_id=inc["drone_id"],
+                    threat_type=inc["threat_type"],
+                    training=training,
+                    incident_id=inc["incident_id"],
+                )
+            run.completed += len(incidents)
+            run.forensic_events += len(events)
+            run.elapsed_s = time.perf_counter() - run._t0
+
+        run.status = "done"
+    except Exception as exc:  # surfaced through the progress endpoint
+        run.status = "failed"
+        run.error = str(exc)
+    finally:
+        run.elapsed_s = time.perf_counter() - run._t0
+        run.finished_at = datetime.now(timezone.utc).isoformat()
+
+    if run.status == "done":
+        store.add_forensic_event(
+            company_id=run.company_id,
+            drone_id=None,
+            incident_id=None,
+            event_type="simulation_batch_completed",
+            actor=run.actor,
+            action="run_batch",
+            result="ok",
+            payload_json=json.dumps(
+                {
+                    "batch_id": run.batch_id,
+                    "incidents": run.completed,
+                    "elapsed_s": round(run.elapsed_s, 4),
+                    "incidents_per_s": run.incidents_per_s,
+                }
+            ),
+        )
+    return run
+
+
+def _execute_batch_traced(store: StorageBackend, run: BatchRun, plan: Sequence[PlanItem], **kwargs: Any) -> BatchRun:
+    attributes = {"vigil.batch_id": run.batch_id, "vigil.company_id": run.company_id, "vigil.planned_incidents": run.total}
+    try:
+        with TRACER.span("simulation.batch", attributes=attributes):
+            return execute_batch(store, run, plan, **kwargs)
+    finally:
+        _BATCH_SLOTS.release()
+
+
+def start_batch(
+    store: StorageBackend,
+    plan: Sequence[PlanItem],
+    *,
+    company_id: str,
+    actor: str,
+    actor_role: str,
+    training: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    realtime: bool = False,
+    background: bool = True,
+) -> BatchRun:
+    """
+    Register and run a drill, on a daemon thread unless background=False.
+    Raises ValueError when an inline run is too large or too long, and
+    BatchCapacityError when MAX_CONCURRENT_BATCHES runs are active.
+    """
+    if not background:
+        if len(plan) > MAX_INLINE_INCIDENTS:
+            raise ValueError(f"wait=true supports at most {MAX_INLINE_INCIDENTS} incidents; poll instead")
+        if realtime and plan and plan[-1][0] > MAX_INLINE_DELAY_S:
+            raise ValueError(f"wait=true with realtime supports offsets up to {MAX_INLINE_DELAY_S:g}s; poll instead")
+    if not _BATCH_SLOTS.acquire(blocking=False):
+        raise BatchCapacityError(f"{MAX_CONCURRENT_BATCHES} batch drills already running")
+
+    run = BatchRun(
+        batch_id=f"SIM-{uuid4().hex[:12]}",
+        company_id=company_id,
+        actor=actor,
+        total=len(plan),
+    )
+    BATCH_RUNS.add(run)
+    kwargs = {"actor_role": actor_role, "training": training, "chunk_size": chunk_size, "realtime": realtime}
+    if background:
+        try:
+            threading.Thread(
+                target=bind_context(_execute_batch_traced),
+                args=(store, run, plan),
+                kwargs=kwargs,
+                name=f"vigil-batch-{run.batch_id}",
+                daemon=True,
+            ).start()
+        except BaseException:
+            _BATCH_SLOTS.release()
+            raise
+    else:
+        _execute_batch_traced(store, run, plan, **kwargs)
+    return run
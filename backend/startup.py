@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import APIRouter, FastAPI
+from starlette.routing import BaseRoute, Match, NoMatchFound
+
+from .db import FAST_START
+from .metrics import REGISTRY
+
+# =========================================================
+# Cold start (VIGIL_FAST_START=1)
+# =========================================================
+# Fast-start mode trims the work a fresh worker does before it can serve:
+#   - db.init_db() skips the migration sweep when PRAGMA user_version
+#     already equals db.SCHEMA_VERSION (one PRAGMA instead of ~40 DDL /
+#     table_info round trips)
+#   - router modules registered through include_routers() are imported and
+#     their routes built on the first request under one of their path
+#     prefixes (LazyRoutes), so e.g. numpy (telemetry detectors) and the
+#     pydantic/FastAPI route analysis for every mirrored router stay off
+#     the startup path
+#   - SQL is never prepared up front; sqlite3 compiles each statement on
+#     first use into the per-connection statement cache
+#
+# Phase timings land in app_startup_seconds{phase=...} on /metrics:
+#   framework_import  fastapi/pydantic imports at the top of main.py
+#   import            main.py module import (framework imports included)
+#   init_schema       the startup hook's StorageBackend.init_schema()
+#   ready             import + startup, i.e. until the first request can be served
+#   app_ready         ready minus framework_import: the part this code base
+#                     controls, which fast-start keeps under 200 ms
+#   lazy_routes       cumulative time spent building lazily loaded routers
+# =========================================================
+
+STARTUP_SECONDS = REGISTRY.gauge("app_startup_seconds", "Cold-start phase durations", ("phase",))
+
+RouterLoader = Callable[[], Sequence[Tuple[APIRouter, str]]]
+
+_phases: Dict[str, float] = {}
+
+
+def record_phase(phase: str, seconds: float, accumulate: bool = False) -> None:
+    if accumulate:
+        seconds += _phases.get(phase, 0.0)
+    _phases[phase] = seconds
+    STARTUP_SECONDS.labels(phase).set(seconds)
+
+
+def phases() -> Dict[str, float]:
+    return dict(_phases)
+
+
+class LazyRoutes(BaseRoute):
+    """Placeholder that builds a group of routers on the first request under its prefixes."""
+
+    def __init__(self, app: FastAPI, loader: RouterLoader, prefixes: Sequence[str]):
+        self.app = app
+        self.loader = loader
+        self.prefixes = tuple(prefixes)
+        self.routes: Optional[List[BaseRoute]] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> List[BaseRoute]:
+        if self.routes is not None:
+            return self.routes
+        with self._lock:
+            if self.routes is None:
+                t0 = time.perf_counter()
+                scratch = APIRouter()
+                for router, prefix in self.loader():
+                    scratch.include_router(router, prefix=prefix)
+                table = self.app.router.routes
+                if self in table:
+                    i = table.index(self)
+                    table[i:i + 1] = scratch.routes
+                self.routes = scratch.routes
+                record_phase("lazy_routes", time.perf_counter() - t0, accumulate=True)
+        return self.routes
+
+    def matches(self, scope: Dict[str, Any]) -> Tuple[Match, Dict[str, Any]]:
+        if scope["type"] != "http" or not scope.get("path", "").startswith(self.prefixes):
+            return Match.NONE, {}
+        partial: Optional[Tuple[Match, Dict[str, Any]]] = None
+        for route in self.load():
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                return match, child_scope
+            if match == Match.PARTIAL and partial is None:
+                partial = (match, child_scope)
+        return partial or (Match.NONE, {})
+
+    async def handle(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        # APIRoute.matches() put the real route into the child scope
+        await scope["route"].handle(scope, receive, send)
+
+    def url_path_for(self, name: str, /, **path_params: Any) -> Any:
+        for route in self.load():
+            try:
+                return route.url_path_for(name, **path_params)
+            except NoMatchFound:
+                continue
+        raise NoMatchFound(name, path_params)
+
+
+def include_routers(app: FastAPI, loader: RouterLoader, prefixes: Sequence[str]) -> None:
+    """Include loader()'s (router, prefix) pairs now, or lazily in fast-start mode."""
+    if FAST_START:
+        app.router.routes.append(LazyRoutes(app, loader, prefixes))
+        return
+    for router, prefix in loader():
+        app.include_router(router, prefix=prefix)
+
+
+def load_all(app: FastAPI) -> None:
+    for route in list(app.router.routes):
+        if isinstance(route, LazyRoutes):
+            route.load()
+
+
+def install_openapi(app: FastAPI) -> None:
+    """Make /openapi.json (and /docs) see lazily loaded routes."""
+    build = app.openapi
+
+    def openapi() -> Dict[str, Any]:
+        load_all(app)
+        return build()
+
+    app.openapi = openapi  # type: ignore[method-assign]
@@ -0,0 +1,1247 @@
+from __future__ import annotations
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from . import db
+from .db import INCIDENT_TRANSITIONS, IncidentConflict
+from .querycache import QUERY_CACHE, evidence_filters, forensics_filters
+
+__all__ = [
+    "INCIDENT_TRANSITIONS",
+    "IncidentConflict",
+    "MemoryBackend",
+    "SQLiteBackend",
+    "StorageBackend",
+    "get_storage",
+    "open_storage",
+    "set_storage",
+]
+
+# =========================================================
+# Storage backends
+# =========================================================
+# Routes talk to a StorageBackend instead of importing sqlite3-bound
+# helpers directly. Selection is by URL (VIGIL_STORAGE_URL):
+#   sqlite:///path/to/vigil.db   -> SQLiteBackend (default, wraps db.py)
+#   sqlite+writer:///path        -> WriterClientBackend (writer.py): local
+#                                   reads, writes sent to the writer process
+#   postgresql://user@host/db    -> PostgresBackend (storage_pg.py)
+#   memory://                    -> MemoryBackend (in-process stand-in)
+# =========================================================
+
+STORAGE_URL_ENV = "VIGIL_STORAGE_URL"
+
+
+class StorageBackend(ABC):
+    """
+    Persistence contract for incidents, forensics, evidence, zero-trust
+    policy, drone assignments and the background job queue. Return shapes match db.py (plain dicts
+    keyed by column name) so the API responses are backend-independent.
+    """
+
+    name = "abstract"
+
+    @abstractmethod
+    def init_schema(self) -> None: ...
+
+    def close(self) -> None:
+        return None
+
+    # --- Zero Trust policy ---
+    @abstractmethod
+    def get_zerotrust_policy(self, company_id: str = "default") -> Dict[str, Any]: ...
+
+    @abstractmethod
+    def get_zerotrust_policy_version(self, company_id: str = "default") -> Optional[int]: ...
+
+    @abstractmethod
+    def set_zerotrust_policy(self, company_id: str, policy_json: str) -> Dict[str, Any]: ...
+
+    # --- Incidents ---
+    @abstractmethod
+    def create_incident(
+        self,
+        *,
+        incident_id: str,
+        company_id: str,
+        drone_id: Optional[str],
+        threat_type: str,
+        severity: str,
+        title: str,
+        training: bool = True,
+        created_at: Optional[str] = None,
+        details: Optional[str] = None,
+        operator: Optional[str] = None,
+    ) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    def create_incidents_bulk(
+        self,
+        incidents: Iterable[Dict[str, Any]],
+        events: Iterable[Dict[str, Any]] = (),
+    ) -> int:
+        """Incidents (create_incident kwargs) + their forensic events, one transaction."""
+
+    @abstractmethod
+    def get_incident(self, incident_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def list_active_incidents(self, company_id: str, drone_id: Optional[str] = None) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def update_incident_status(
+        self,
+        *,
+        company_id: str,
+        incident_id: str,
+        new_status: str,
+        mitigated_action: Optional[str] = None,
+        details: Optional[str] = None,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """CAS transition; see db.update_incident_status for the contract."""
+
+    # --- Forensics ---
+    @abstractmethod
+    def add_forensic_event(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str],
+        incident_id: Optional[str],
+        event_type: str,
+        actor: Optional[str] = None,
+        action: Optional[str] = None,
+        result: Optional[str] = None,
+        payload_json: Optional[str] = None,
+        ts: Optional[str] = None,
+    ) -> None: ...
+
+    @abstractmethod
+    def add_forensic_events(self, events: Iterable[Dict[str, Any]]) -> int: ...
+
+    @abstractmethod
+    def list_forensics(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        limit: int = 500,
+    ) -> List[Dict[str, Any]]: ...
+
+    # --- Evidence ---
+    @abstractmethod
+    def register_evidence(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str],
+        incident_id: Optional[str],
+        framework_id: str,
+        control_id: str,
+        evidence_type: str,
+        source_event_id: Optional[int] = None,
+        reference_id: Optional[str] = None,
+    ) -> None: ...
+
+    @abstractmethod
+    def create_evidence(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str],
+        incident_id: Optional[str],
+        framework_id: str,
+        control_id: str,
+        evidence_type: str,
+        source_event_id: Optional[int] = None,
+        reference_id: Optional[str] = None,
+        attestation: Optional[str] = None,
+    ) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    def review_evidence(
+        self,
+        *,
+        company_id: str,
+        evidence_id: int,
+        review_status: str,
+        reviewed_by: str,
+        review_note: Optional[str] = None,
+    ) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    def list_evidence(
+        self,
+        *,
+        company_id: str,
+        framework_id: Optional[str] = None,
+        control_id: Optional[str] = None,
+        drone_id: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: int = 200,
+    ) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def evidence_summary_by_control(
+        self,
+        *,
+        company_id: str,
+        framework_id: str,
+        drone_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> List[Dict[str, Any]]: ...
+
+    # --- Report scans (reports.py) ---
+    # Unbounded, oldest-first row iterators for streamed reports. Filters are
+    # validated (date format) when called; rows are fetched lazily in batches.
+    @abstractmethod
+    def iter_incidents(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str] = None,
+        status: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def iter_forensics(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        event_type: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def iter_evidence(
+        self,
+        *,
+        company_id: str,
+        framework_id: Optional[str] = None,
+        control_id: Optional[str] = None,
+        drone_id: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        review_status: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]: ...
+
+    # --- Export scans (columnar.py) ---
+    # Every row of an export table (db.EXPORT_KEYS) in key order, optionally
+    # for one company and strictly after a previously exported key.
+    @abstractmethod
+    def iter_export_rows(
+        self,
+        table: str,
+        *,
+        company_id: Optional[str] = None,
+        after: Optional[Sequence[Any]] = None,
+    ) -> Iterator[Dict[str, Any]]: ...
+
+    # --- Telemetry ---
+    @abstractmethod
+    def ingest_telemetry(self, samples: Iterable[Dict[str, Any]]) -> int: ...
+
+    @abstractmethod
+    def latest_telemetry(self, company_id: str) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def list_telemetry(self, company_id: str, drone_id: str, limit: int = 500) -> List[Dict[str, Any]]: ...
+
+    # --- Geofences ---
+    @abstractmethod
+    def create_geofence(
+        self,
+        *,
+        geofence_id: str,
+        company_id: str,
+        name: str,
+        kind: str,
+        geometry_json: str,
+        rule: str,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    def list_geofences(self, company_id: str) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def delete_geofence(self, company_id: str, geofence_id: str) -> bool: ...
+
+    # --- Drone assignments ---
+    @abstractmethod
+    def get_assigned_operator(self, drone_id: Optional[str]) -> Optional[str]: ...
+
+    @abstractmethod
+    def get_assigned_operators(self, drone_ids: Iterable[str]) -> Dict[str, str]: ...
+
+    @abstractmethod
+    def set_assigned_operator(self, drone_id: str, operator: str, assigned_by: Optional[str]) -> None: ...
+
+    # --- Background jobs (jobs.py) ---
+    @abstractmethod
+    def create_job(
+        self,
+        *,
+        job_id: str,
+        company_id: str,
+        kind: str,
+        params_json: str = "{}",
+        priority: int = 0,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    def claim_job(self, worker: str, kinds: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """Atomically move the next queued job (priority DESC, created_at) to running."""
+
+    @abstractmethod
+    def update_job_progress(self, job_id: str, progress: float, message: Optional[str] = None) -> None: ...
+
+    @abstractmethod
+    def heartbeat_job(self, job_id: str, worker: str) -> bool:
+        """Renew a running job's lease; False if the worker no longer holds it."""
+
+    @abstractmethod
+    def requeue_stale_jobs(self, stale_before: str, max_attempts: int) -> int:
+        """Requeue (or fail, past max_attempts) running jobs with a lease older than stale_before."""
+
+    @abstractmethod
+    def finish_job(
+        self,
+        job_id: str,
+        *,
+        status: str,
+        result_json: Optional[str] = None,
+        error: Optional[str] = None,
+        worker: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Only a running job (held by worker, when given) can finish; None otherwise."""
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job row without result_json."""
+
+    @abstractmethod
+    def get_job_result(self, job_id: str) -> Optional[str]: ...
+
+    @abstractmethod
+    def list_jobs(self, company_id: str, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]: ...
+
+
+# =========================================================
+# SQLite (current implementation, db.py)
+# =========================================================
+
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None):
+        if path:
+            db.DB_PATH = Path(path)
+
+    def init_schema(self) -> None:
+        db.init_db()
+
+    def get_zerotrust_policy(self, company_id: str = "default") -> Dict[str, Any]:
+        return db.get_zerotrust_policy(company_id)
+
+    def get_zerotrust_policy_version(self, company_id: str = "default") -> Optional[int]:
+        return db.get_zerotrust_policy_version(company_id)
+
+    def set_zerotrust_policy(self, company_id: str, policy_json: str) -> Dict[str, Any]:
+        return db.set_zerotrust_policy(company_id, policy_json)
+
+    def create_incident(self, **kwargs: Any) -> Dict[str, Any]:
+        return db.create_incident(**kwargs)
+
+    def create_incidents_bulk(
+        self,
+        incidents: Iterable[Dict[str, Any]],
+        events: Iterable[Dict[str, Any]] = (),
+    ) -> int:
+        events = list(events)
+        written = db.create_incidents_bulk(incidents, events)
+        QUERY_CACHE.forensics_written(events)
+        return written
+
+    def get_incident(self, incident_id: str) -> Optional[Dict[str, Any]]:
+        return db.get_incident(incident_id)
+
+    def list_active_incidents(self, company_id: str, drone_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return db.list_active_incidents(company_id=company_id, drone_id=drone_id)
+
+    def update_incident_status(self, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        return db.update_incident_status(**kwargs)
+
+    # list_forensics / list_evidence read through QUERY_CACHE (querycache.py);
+    # the writes below invalidate it for the company and drone they touch.
+    def add_forensic_event(self, **kwargs: Any) -> None:
+        db.add_forensic_event(**kwargs)
+        QUERY_CACHE.forensics_written([kwargs])
+
+    def add_forensic_events(self, events: Iterable[Dict[str, Any]]) -> int:
+        events = list(events)
+        written = db.add_forensic_events(events)
+        QUERY_CACHE.forensics_written(events)
+        return written
+
+    def list_forensics(self, company_id: str, **kwargs: Any) -> List[Dict[str, Any]]:
+        scope, filters = forensics_filters(**kwargs)
+        return QUERY_CACHE.read(
+            "forensics", company_id, scope, filters, lambda: db.list_forensics(company_id=company_id, **kwargs)
+        )
+
+    def register_evidence(self, **kwargs: Any) -> None:
+        db.register_evidence(**kwargs)
+        QUERY_CACHE.evidence_written(kwargs["company_id"], kwargs.get("drone_id"))
+
+    def create_evidence(self, **kwargs: Any) -> Dict[str, Any]:
+        row = db.create_evidence(**kwargs)
+        QUERY_CACHE.evidence_written(kwargs["company_id"], kwargs.get("drone_id"))
+        return row
+
+    def review_evidence(self, **kwargs: Any) -> Dict[str, Any]:
+        row = db.review_evidence(**kwargs)
+        if row:
+            QUERY_CACHE.evidence_written(row["company_id"], row.get("drone_id"))
+        return row
+
+    def list_evidence(self, company_id: str, **kwargs: Any) -> List[Dict[str, Any]]:
+        scope, filters = evidence_filters(**kwargs)
+        return QUERY_CACHE.read(
+            "evidence", company_id, scope, filters, lambda: db.list_evidence(company_id=company_id, **kwargs)
+        )
+
+    def evidence_summary_by_control(self, **kwargs: Any) -> List[Dict[str, Any]]:
+        return db.evidence_summary_by_control(**kwargs)
+
+    def iter_incidents(self, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        return db.iter_incidents(**kwargs)
+
+    def iter_forensics(self, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        return db.iter_forensics(**kwargs)
+
+    def iter_evidence(self, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        return db.iter_evidence(**kwargs)
+
+    def iter_export_rows(self, table: str, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        return db.iter_export_rows(table, **kwargs)
+
+    def ingest_telemetry(self, samples: Iterable[Dict[str, Any]]) -> int:
+        return db.insert_telemetry(samples)
+
+    def latest_telemetry(self, company_id: str) -> List[Dict[str, Any]]:
+        return db.latest_telemetry(company_id)
+
+    def list_telemetry(self, company_id: str, drone_id: str, limit: int = 500) -> List[Dict[str, Any]]:
+        return db.list_telemetry(company_id, drone_id, limit)
+
+    def create_geofence(self, **kwargs: Any) -> Dict[str, Any]:
+        return db.create_geofence(**kwargs)
+
+    def list_geofences(self, company_id: str) -> List[Dict[str, Any]]:
+        return db.list_geofences(company_id)
+
+    def delete_geofence(self, company_id: str, geofence_id: str) -> bool:
+        return db.delete_geofence(company_id, geofence_id)
+
+    def get_assigned_operator(self, drone_id: Optional[str]) -> Optional[str]:
+        return db.get_assigned_operator(drone_id)
+
+    def get_assigned_operators(self, drone_ids: Iterable[str]) -> Dict[str, str]:
+        return db.get_assigned_operators(drone_ids)
+
+    def set_assigned_operator(self, drone_id: str, operator: str, assigned_by: Optional[str]) -> None:
+        db.set_assigned_operator(drone_id, operator, assigned_by)
+
+    def create_job(self, **kwargs: Any) -> Dict[str, Any]:
+        return db.create_job(**kwargs)
+
+    def claim_job(self, worker: str, kinds: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        return db.claim_job(worker, kinds)
+
+    def update_job_progress(self, job_id: str, progress: float, message: Optional[str] = None) -> None:
+        db.update_job_progress(job_id, progress, message)
+
+    def heartbeat_job(self, job_id: str, worker: str) -> bool:
+        return db.heartbeat_job(job_id, worker)
+
+    def requeue_stale_jobs(self, stale_before: str, max_attempts: int) -> int:
+        return db.requeue_stale_jobs(stale_before, max_attempts)
+
+    def finish_job(self, job_id: str, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        return db.finish_job(job_id, **kwargs)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return db.get_job(job_id)
+
+    def get_job_result(self, job_id: str) -> Optional[str]:
+        return db.get_job_result(job_id)
+
+    def list_jobs(self, company_id: str, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        return db.list_jobs(company_id, status, limit)
+
+
+# =========================================================
+# In-process stand-in (tests, demos, conformance runs)
+# =========================================================
+
+class MemoryBackend(StorageBackend):
+    """
+    Dict-backed implementation of the full contract. Not durable; used to
+    exercise routes and the conformance suite without a database server.
+    """
+
+    name = "memory"
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._policies: Dict[str, Dict[str, Any]] = {}
+        self._incidents: Dict[str, Dict[str, Any]] = {}
+        self._forensics: List[Dict[str, Any]] = []
+        self._evidence: List[Dict[str, Any]] = []
+        self._assignments: Dict[str, Dict[str, Any]] = {}
+        self._telemetry: List[Dict[str, Any]] = []
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._geofences: Dict[str, Dict[str, Any]] = {}
+
+    def init_schema(self) -> None:
+        self.get_zerotrust_policy("default")
+
+    # --- Zero Trust policy ---
+    def get_zerotrust_policy(self, company_id: str = "default") -> Dict[str, Any]:
+        with self._lock:
+            row = self._policies.setdefault(
+                company_id,
+                {"company_id": company_id, "policy_json": "{}", "updated_at": db._now_iso(), "version": 1},
+            )
+            return dict(row)
+
+    def get_zerotrust_policy_version(self, company_id: str = "default") -> Optional[int]:
+        with self._lock:
+            row = self._policies.get(company_id)
+            return row["version"] if row else None
+
+    def set_zerotrust_policy(self, company_id: str, policy_json: str) -> Dict[str, Any]:
+        with self._lock:
+            previous = self._policies.get(company_id)
+            row = {
+                "company_id": company_id,
+                "policy_json": policy_json,
+                "updated_at": db._now_iso(),
+                "version": previous["version"] + 1 if previous else 1,
+            }
+            self._policies[company_id] = row
+            return dict(row)
+
+    # --- Incidents ---
+    def create_incident(
+        self,
+        *,
+        incident_id: str,
+        company_id: str,
+        drone_id: Optional[str],
+        threat_type: str,
+        severity: str,
+        title: str,
+        training: bool = True,
+        created_at: Optional[str] = None,
+        details: Optional[str] = None,
+        operator: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        ts = created_at or db._now_iso()
+        row = {
+            "incident_id": incident_id,
+            "company_id": company_id,
+            "drone_id": drone_id,
+            "threat_type": threat_type,
+            "severity": severity,
+            "title": title,
+            "status": "active",
+            "training": 1 if training else 0,
+            "created_at": ts,
+            "updated_at": ts,
+            "details": details,
+            "mitigated_action": None,
+            "mitigated_at": None,
+            "closed_at": None,
+            "operator": operator,
+            "version": 1,
+        }
+        with self._lock:
+            if incident_id in self._incidents:
+                raise ValueError(f"duplicate incident_id: {incident_id}")
+            self._incidents[incident_id] = row
+            return dict(row)
+
+    def create_incidents_bulk(
+        self,
+        incidents: Iterable[Dict[str, Any]],
+        events: Iterable[Dict[str, Any]] = (),
+    ) -> int:
+        written = 0
+        with self._lock:
+            for inc in incidents:
+                self.create_incident(**inc)
+                written += 1
+            for ev in events:
+                self._append_forensic(ev)
+        return written
+
+    def get_incident(self, incident_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._incidents.get(incident_id)
+            return dict(row) if row else None
+
+    def list_active_incidents(self, company_id: str, drone_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [
+                dict(r)
+                for r in self._incidents.values()
+                if r["company_id"] == company_id
+                and r["status"] == "active"
+                and (not drone_id or r["drone_id"] == drone_id)
+            ]
+        rows.sort(key=lambda r: r["created_at"], reverse=True)
+        return rows
+
+    def update_incident_status(
+        self,
+        *,
+        company_id: str,
+        incident_id: str,
+        new_status: str,
+        mitigated_action: Optional[str] = None,
+        details: Optional[str] = None,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        from_states = db._transition_sources(new_status)
+        ts = db._now_iso()
+        with self._lock:
+            row = self._incidents.get(incident_id)
+            if row is None or row["company_id"] != company_id:
+                return None
+            if row["status"] not in from_states or (
+                expected_version is not None and row["version"] != expected_version
+            ):
+                raise IncidentConflict(dict(row), new_status)
+            row["status"] = new_status
+            row["updated_at"] = ts
+            row["version"] += 1
+            if details is not None:
+                row["details"] = details
+            if mitigated_action is not None:
+                row["mitigated_action"] = mitigated_action
+            if new_status == "mitigated":
+                row["mitigated_at"] = ts
+            if new_status == "closed":
+                row["closed_at"] = ts
+            return dict(row)
+
+    def _derive_actor(self, company_id: str, drone_id: Optional[str], incident_id: Optional[str]) -> Optional[str]:
+        if incident_id:
+            inc = self._incidents.get(incident_id)
+            if inc and inc.get("operator"):
+                return inc["operator"]
+        if drone_id:
+            candidates = [
+                r for r in self._incidents.values()
+                if r["company_id"] == company_id and r["drone_id"] == drone_id and r.get("operator")
+            ]
+            if candidates:
+                return max(candidates, key=lambda r: r["created_at"])["operator"]
+        return None
+
+    # --- Forensics ---
+    def _append_forensic(self, ev: Dict[str, Any]) -> None:
+        company_id = ev["company_id"]
+        drone_id = ev.get("drone_id")
+        incident_id = ev.get("incident_id")
+        event_type = ev["event_type"]
+        actor = ev.get("actor") or self._derive_actor(company_id, drone_id, incident_id)
+        event_id = len(self._forensics) + 1
+        self._forensics.append(
+            {
+                "id": event_id,
+                "ts": ev.get("ts") or db._now_iso(),
+                "company_id": company_id,
+                "drone_id": drone_id,
+                "incident_id": incident_id,
+                "event_type": event_type,
+                "actor": actor,
+                "action": ev.get("action"),
+                "result": ev.get("result"),
+                "payload_json": ev.get("payload_json"),
+            }
+        )
+        mapping = db.CONTROL_EVENT_MAP.get(event_type)
+        if mapping:
+            framework_id, control_id = mapping
+            self._append_evidence(
+                company_id=company_id,
+                drone_id=drone_id,
+                incident_id=incident_id,
+                framework_id=framework_id,
+                control_id=control_id,
+                evidence_type=event_type,
+                source_event_id=event_id,
+                reference_id=incident_id or drone_id,
+            )
+
+    def add_forensic_event(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._append_forensic(kwargs)
+
+    def add_forensic_events(self, events: Iterable[Dict[str, Any]]) -> int:
+        written = 0
+        with self._lock:
+            for ev in events:
+                self._append_forensic(ev)
+                written += 1
+        return written
+
+    def list_forensics(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        limit: int = 500,
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [
+                dict(r)
+                for r in self._forensics
+                if r["company_id"] == company_id
+                and (not drone_id or r["drone_id"] == drone_id)
+                and (not incident_id or r["incident_id"] == incident_id)
+            ]
+        rows.sort(key=lambda r: r["ts"])
+        return rows[:limit]
+
+    # --- Evidence ---
+    def _append_evidence(self, **fields: Any) -> Dict[str, Any]:
+        row = {
+            "id": len(self._evidence) + 1,
+            "company_id": fields["company_id"],
+            "drone_id": fields.get("drone_id"),
+            "incident_id": fields.get("incident_id"),
+            "framework_id": fields["framework_id"],
+            "control_id": fields["control_id"],
+            "evidence_type": fields["evidence_type"],
+            "source_event_id": fields.get("source_event_id"),
+            "reference_id": fields.get("reference_id"),
+            "created_at": db._now_iso(),
+            "attestation": fields.get("attestation"),
+            "review_status": fields.get("review_status"),
+            "reviewed_by": None,
+            "reviewed_at": None,
+            "review_note": None,
+        }
+        self._evidence.append(row)
+        return row
+
+    def register_evidence(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._append_evidence(**kwargs)
+
+    def create_evidence(self, **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._append_evidence(review_status="pending", **kwargs))
+
+    def review_evidence(
+        self,
+        *,
+        company_id: str,
+        evidence_id: int,
+        review_status: str,
+        reviewed_by: str,
+        review_note: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        with self._lock:
+            if not 1 <= evidence_id <= len(self._evidence):
+                return {}
+            row = self._evidence[evidence_id - 1]
+            if row["company_id"] != company_id:
+                return {}
+            row.update(
+                review_status=review_status,
+                reviewed_by=reviewed_by,
+                reviewed_at=db._now_iso(),
+                review_note=review_note,
+            )
+            return dict(row)
+
+    def _evidence_matches(
+        self,
+        row: Dict[str, Any],
+        company_id: str,
+        framework_id: Optional[str],
+        control_id: Optional[str],
+        drone_id: Optional[str],
+        incident_id: Optional[str],
+        date_from: Optional[str],
+        date_to: Optional[str],
+    ) -> bool:
+        if row["company_id"] != company_id:
+            return False
+        if framework_id and row["framework_id"] != framework_id:
+            return False
+        if control_id and row["control_id"] != control_id:
+            return False
+        # Drone scope includes org-level (NULL) evidence, same as db.py
+        if drone_id and row["drone_id"] not in (drone_id, None):
+            return False
+        if incident_id and row["incident_id"] != incident_id:
+            return False
+        if date_from and row["created_at"] < db._day_bounds_utc(date_from, end=False):
+            return False
+        if date_to and row["created_at"] > db._day_bounds_utc(date_to, end=True):
+            return False
+        return True
+
+    def list_evidence(
+        self,
+        *,
+        company_id: str,
+        framework_id: Optional[str] = None,
+        control_id: Optional[str] = None,
+        drone_id: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: int = 200,
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [
+                dict(r)
+                for r in self._evidence
+                if self._evidence_matches(
+                    r, company_id, framework_id, control_id, drone_id, incident_id, date_from, date_to
+                )
+            ]
+        rows.sort(key=lambda r: r["created_at"], reverse=True)
+        return rows[:limit]
+
+    def evidence_summary_by_control(
+        self,
+        *,
+        company_id: str,
+        framework_id: str,
+        drone_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        summary: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for r in self._evidence:
+                if not self._evidence_matches(
+                    r, company_id, framework_id, None, drone_id, None, date_from, date_to
+                ):
+                    continue
+                status = r.get("review_status") or "pending"
+                acc = summary.setdefault(
+                    r["control_id"],
+                    {"control_id": r["control_id"], "accepted": 0, "pending": 0, "rejected": 0, "total": 0},
+                )
+                if status in ("accepted", "pending", "rejected"):
+                    acc[status] += 1
+                acc["total"] += 1
+        return list(summary.values())
+
+    # --- Report scans ---
+    # Snapshots under the lock; the stand-in holds everything in memory anyway
+    @staticmethod
+    def _date_bounds(date_from: Optional[str], date_to: Optional[str]) -> tuple:
+        return (
+            db._day_bounds_utc(date_from, end=False) if date_from else None,
+            db._day_bounds_utc(date_to, end=True) if date_to else None,
+        )
+
+    def iter_incidents(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str] = None,
+        status: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        lo, hi = self._date_bounds(date_from, date_to)
+        with self._lock:
+            rows = [
+                dict(r) for r in self._incidents.values()
+                if r["company_id"] == company_id
+                and (not drone_id or r["drone_id"] == drone_id)
+                and (not status or r["status"] == status)
+                and (lo is None or r["created_at"] >= lo)
+                and (hi is None or r["created_at"] <= hi)
+            ]
+        rows.sort(key=lambda r: (r["created_at"], r["incident_id"]))
+        return iter(rows)
+
+    def iter_forensics(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        event_type: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        lo, hi = self._date_bounds(date_from, date_to)
+        with self._lock:
+            rows = [
+                dict(r) for r in self._forensics
+                if r["company_id"] == company_id
+                and (not drone_id or r["drone_id"] == drone_id)
+                and (not incident_id or r["incident_id"] == incident_id)
+                and (not event_type or r["event_type"] == event_type)
+                and (lo is None or r["ts"] >= lo)
+                and (hi is None or r["ts"] <= hi)
+            ]
+        rows.sort(key=lambda r: (r["ts"], r["id"]))
+        return iter(rows)
+
+    def iter_evidence(
+        self,
+        *,
+        company_id: str,
+        framework_id: Optional[str] = None,
+        control_id: Optional[str] = None,
+        drone_id: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        review_status: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        self._date_bounds(date_from, date_to)  # validate up front, like the SQL backends
+        with self._lock:
+            rows = [
+                dict(r) for r in self._evidence
+                if self._evidence_matches(
+                    r, company_id, framework_id, control_id, drone_id, incident_id, date_from, date_to
+                )
+                and (not review_status or (r.get("review_status") or "pending") == review_status)
+            ]
+        rows.sort(key=lambda r: (r["created_at"], r["id"]))
+        return iter(rows)
+
+    def iter_export_rows(
+        self,
+        table: str,
+        *,
+        company_id: Optional[str] = None,
+        after: Optional[Sequence[Any]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        db.export_key_sql(table, after)  # validates table and key arity
+        key_columns = db.EXPORT_KEYS[table]
+        with self._lock:
+            source = {
+                "forensics_events": self._forensics,
+                "evidence_registry": self._evidence,
+                "telemetry": self._telemetry,
+                "incidents": list(self._incidents.values()),
+            }[table]
+            rows = [dict(r) for r in source if not company_id or r["company_id"] == company_id]
+
+        def key(r: Dict[str, Any]) -> tuple:
+            return tuple(r[c] for c in key_columns)
+
+        if after is not None:
+            rows = [r for r in rows if key(r) > tuple(after)]
+        rows.sort(key=key)
+        return iter(rows)
+
+    # --- Telemetry ---
+    def ingest_telemetry(self, samples: Iterable[Dict[str, Any]]) -> int:
+        written = 0
+        with self._lock:
+            for s in samples:
+                self._telemetry.append(
+                    {
+                        "id": len(self._telemetry) + 1,
+                        "company_id": s["company_id"],
+                        "drone_id": s["drone_id"],
+                        "status": s.get("status") or "online",
+                        "battery": s.get("battery"),
+                        "link_quality": s.get("link_quality"),
+                        "gps_health": s.get("gps_health"),
+                        "last_seen": s.get("last_seen") or db._now_iso(),
+                        "lat": s.get("lat"),
+                        "lon": s.get("lon"),
+                        "alt": s.get("alt"),
+                        "speed": s.get("speed"),
+                    }
+                )
+                written += 1
+        return written
+
+    def latest_telemetry(self, company_id: str) -> List[Dict[str, Any]]:
+        latest: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for row in self._telemetry:
+                if row["company_id"] == company_id:
+                    latest[row["drone_id"]] = row
+            return [dict(latest[d]) for d in sorted(latest)]
+
+    def list_telemetry(self, company_id: str, drone_id: str, limit: int = 500) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [
+                dict(r) for r in reversed(self._telemetry)
+                if r["company_id"] == company_id and r["drone_id"] == drone_id
+            ]
+        return rows[:limit]
+
+    # --- Geofences ---
+    def create_geofence(
+        self,
+        *,
+        geofence_id: str,
+        company_id: str,
+        name: str,
+        kind: str,
+        geometry_json: str,
+        rule: str,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        row = {
+            "geofence_id": geofence_id,
+            "company_id": company_id,
+            "name": name,
+            "kind": kind,
+            "geometry_json": geometry_json,
+            "rule": rule,
+            "created_by": created_by,
+            "created_at": db._now_iso(),
+        }
+        with self._lock:
+            if geofence_id in self._geofences:
+                raise ValueError(f"duplicate geofence_id: {geofence_id}")
+            self._geofences[geofence_id] = row
+            return dict(row)
+
+    def list_geofences(self, company_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [dict(r) for r in self._geofences.values() if r["company_id"] == company_id]
+        rows.sort(key=lambda r: (r["created_at"], r["geofence_id"]))
+        return rows
+
+    def delete_geofence(self, company_id: str, geofence_id: str) -> bool:
+        with self._lock:
+            row = self._geofences.get(geofence_id)
+            if row is None or row["company_id"] != company_id:
+                return False
+            del self._geofences[geofence_id]
+            return True
+
+    # --- Drone assignments ---
+    def get_assigned_operator(self, drone_id: Optional[str]) -> Optional[str]:
+        with self._lock:
+            row = self._assignments.get(drone_id) if drone_id else None
+            return row["operator"] if row else None
+
+    def get_assigned_operators(self, drone_ids: Iterable[str]) -> Dict[str, str]:
+        with self._lock:
+            return {
+                d: self._assignments[d]["operator"] for d in drone_ids if d in self._assignments
+            }
+
+    def set_assigned_operator(self, drone_id: str, operator: str, assigned_by: Optional[str]) -> None:
+        with self._lock:
+            self._assignments[drone_id] = {
+                "drone_id": drone_id,
+                "operator": operator,
+                "assigned_at": db._now_iso(),
+                "assigned_by": assigned_by,
+            }
+
+    # --- Background jobs ---
+    @staticmethod
+    def _public_job(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in row.items() if k != "result_json"}
+
+    def create_job(
+        self,
+        *,
+        job_id: str,
+        company_id: str,
+        kind: str,
+        params_json: str = "{}",
+        priority: int = 0,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        with self._lock:
+            if job_id in self._jobs:
+                raise ValueError(f"duplicate job_id: {job_id}")
+            row = {
+                "job_id": job_id,
+                "company_id": company_id,
+                "kind": kind,
+                "status": "queued",
+                "priority": int(priority),
+                "params_json": params_json,
+                "progress": 0.0,
+                "message": None,
+                "result_json": None,
+                "error": None,
+                "created_by": created_by,
+                "worker": None,
+                "attempts": 0,
+                "created_at": db._now_iso(),
+                "started_at": None,
+                "finished_at": None,
+                "heartbeat_at": None,
+            }
+            self._jobs[job_id] = row
+            return self._public_job(row)
+
+    def claim_job(self, worker: str, kinds: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        allowed = set(kinds) if kinds is not None else None
+        with self._lock:
+            queued = [
+                r for r in self._jobs.values()
+                if r["status"] == "queued" and (allowed is None or r["kind"] in allowed)
+            ]
+            if not queued:
+                return None
+            row = min(queued, key=lambda r: (-r["priority"], r["created_at"], r["job_id"]))
+            now = db._now_iso()
+            row.update(status="running", worker=worker, started_at=now, heartbeat_at=now, attempts=row["attempts"] + 1)
+            return self._public_job(row)
+
+    def update_job_progress(self, job_id: str, progress: float, message: Optional[str] = None) -> None:
+        with self._lock:
+            row = self._jobs.get(job_id)
+            if row is not None and row["status"] == "running":
+                row["progress"] = float(progress)
+                row["heartbeat_at"] = db._now_iso()
+                if message is not None:
+                    row["message"] = message
+
+    def heartbeat_job(self, job_id: str, worker: str) -> bool:
+        with self._lock:
+            row = self._jobs.get(job_id)
+            if row is None or row["status"] != "running" or row["worker"] != worker:
+                return False
+            row["heartbeat_at"] = db._now_iso()
+            return True
+
+    def requeue_stale_jobs(self, stale_before: str, max_attempts: int) -> int:
+        with self._lock:
+            stale = [
+                r for r in self._jobs.values()
+                if r["status"] == "running" and (r["heartbeat_at"] or r["started_at"]) < stale_before
+            ]
+            for row in stale:
+                if row["attempts"] >= max_attempts:
+                    row.update(
+                        status="failed",
+                        error=f"lease expired after {max_attempts} attempts",
+                        finished_at=db._now_iso(),
+                    )
+                else:
+                    row.update(status="queued", worker=None, heartbeat_at=None, message="lease expired; requeued")
+            return len(stale)
+
+    def finish_job(
+        self,
+        job_id: str,
+        *,
+        status: str,
+        result_json: Optional[str] = None,
+        error: Optional[str] = None,
+        worker: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        if status not in ("done", "failed"):
+            raise ValueError(f"not a final job status: {status}")
+        with self._lock:
+            row = self._jobs.get(job_id)
+            if row is None or row["status"] != "running" or (worker is not None and row["worker"] != worker):
+                return None
+            row.update(status=status, result_json=result_json, error=error, finished_at=db._now_iso())
+            if status == "done":
+                row["progress"] = 1.0
+            return self._public_job(row)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._jobs.get(job_id)
+            return self._public_job(row) if row else None
+
+    def get_job_result(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._jobs.get(job_id)
+            return row["result_json"] if row else None
+
+    def list_jobs(self, company_id: str, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [
+                self._public_job(r) for r in self._jobs.values()
+                if r["company_id"] == company_id and (status is None or r["status"] == status)
+            ]
+        rows.sort(key=lambda r: (r["created_at"], r["job_id"]), reverse=True)
+        return rows[:limit]
+
+
+# =========================================================
+# Selection
+# =========================================================
+
+def open_storage(url: Optional[str] = None) -> StorageBackend:
+    """Build a backend from a storage URL (see module header)."""
+    url = url or os.environ.get(STORAGE_URL_ENV) or ""
+    if url.startswith("sqlite+writer:"):
+        from .writer import WriterClientBackend  # multi-process mode
+
+        return WriterClientBackend(url[len("sqlite+writer:///"):] or None)
+    if not url or url.startswith("sqlite:"):
+        path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else None
+        return SQLiteBackend(path or None)
+    if url.startswith("memory:"):
+        return MemoryBackend()
+    if url.startswith(("postgresql:", "postgres:")):
+        from .storage_pg import PostgresBackend  # optional dependency (psycopg)
+
+        return PostgresBackend(url)
+    raise ValueError(f"Unsupported storage URL: {url!r}")
+
+
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    """Process-wide backend; also usable as a FastAPI dependency."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = open_storage()
+    return _storage
+
+
+def set_storage(backend: Optional[StorageBackend]) -> None:
+    """Swap the process-wide backend (tests, CLI tools)."""
+    global _storage
+    with _storage_lock:
+        if _storage is not None and _storage is not backend:
+            _storage.close()
+        _storage = backend
+
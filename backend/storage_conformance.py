@@ -0,0 +1,531 @@
+"""
+Shared conformance checks for StorageBackend implementations.
+
+Every backend must pass the same checks so routes behave identically on
+SQLite, PostgreSQL and the in-memory stand-in. Checks write under a fresh
+company_id so they are safe to run against a non-empty database.
+
+    python -m backend.storage_conformance memory://
+    python -m backend.storage_conformance sqlite:////tmp/vigil_conformance.db
+    python -m backend.storage_conformance postgresql://vigil@localhost/vigil
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from typing import Callable, List, Tuple
+from uuid import uuid4
+
+from .storage import IncidentConflict, StorageBackend, open_storage
+
+
+def _check_policy(store: StorageBackend, company_id: str) -> None:
+    row = store.get_zerotrust_policy(company_id)
+    assert row["company_id"] == company_id
+    assert row["policy_json"] == "{}", "missing policy must be seeded as {}"
+    version = row["version"]
+    assert store.get_zerotrust_policy_version(company_id) == version
+
+    written = store.set_zerotrust_policy(company_id, json.dumps({"enabled": True}))
+    assert written["version"] == version + 1, "every policy write bumps the version"
+    row = store.get_zerotrust_policy(company_id)
+    assert json.loads(row["policy_json"]) == {"enabled": True}
+    assert row["updated_at"]
+    assert row["version"] == written["version"]
+    assert store.get_zerotrust_policy_version(f"missing-{company_id}") is None
+
+
+def _check_incident_lifecycle(store: StorageBackend, company_id: str) -> None:
+    incident_id = f"INC-{uuid4().hex[:12]}"
+    created = store.create_incident(
+        incident_id=incident_id,
+        company_id=company_id,
+        drone_id="UA-C1",
+        threat_type="gps_spoof",
+        severity="high",
+        title="Gps Spoof",
+        details=json.dumps({"source": "conformance"}),
+        operator="operator1",
+    )
+    assert created["incident_id"] == incident_id
+    assert created["status"] == "active"
+    assert created["training"] == 1
+    assert created["operator"] == "operator1"
+    assert created["version"] == 1
+
+    active = store.list_active_incidents(company_id, drone_id="UA-C1")
+    assert [i["incident_id"] for i in active] == [incident_id]
+    assert store.list_active_incidents(company_id, drone_id="UA-NOPE") == []
+
+    assert store.update_incident_status(
+        company_id=f"other-{company_id}", incident_id=incident_id, new_status="mitigated"
+    ) is None, "another company's incident reads as missing"
+    assert store.get_incident(incident_id)["status"] == "active"
+
+    mitigated = store.update_incident_status(
+        company_id=company_id, incident_id=incident_id, new_status="mitigated", mitigated_action="rtl"
+    )
+    assert mitigated["status"] == "mitigated"
+    assert mitigated["mitigated_action"] == "rtl"
+    assert mitigated["mitigated_at"]
+    assert mitigated["details"] == json.dumps({"source": "conformance"}), "details must be preserved"
+
+    assert mitigated["version"] == 2
+
+    try:
+        store.update_incident_status(
+            company_id=company_id, incident_id=incident_id, new_status="closed", expected_version=1
+        )
+        raise AssertionError("stale expected_version must be rejected")
+    except IncidentConflict as exc:
+        assert exc.current["status"] == "mitigated"
+        assert exc.current["version"] == 2
+
+    closed = store.update_incident_status(
+        company_id=company_id, incident_id=incident_id, new_status="closed", expected_version=2
+    )
+    assert closed["status"] == "closed"
+    assert closed["version"] == 3
+    assert closed["closed_at"]
+    assert closed["mitigated_action"] == "rtl", "mitigated_action must be preserved"
+    assert store.list_active_incidents(company_id) == []
+    assert store.get_incident(f"INC-missing-{uuid4().hex}") is None
+    assert store.update_incident_status(
+        company_id=company_id, incident_id=f"INC-missing-{uuid4().hex}", new_status="closed"
+    ) is None
+
+    try:
+        store.update_incident_status(
+            company_id=company_id, incident_id=incident_id, new_status="mitigated"
+        )
+        raise AssertionError("closed incidents must not be re-mitigated")
+    except IncidentConflict:
+        pass
+
+
+def _check_bulk_incidents(store: StorageBackend, company_id: str) -> None:
+    incidents = [
+        {
+            "incident_id": f"INC-{uuid4().hex[:12]}",
+            "company_id": company_id,
+            "drone_id": f"UA-B{n}",
+            "threat_type": "firmware_tamper",
+            "severity": "high",
+            "title": "Firmware Tamper",
+            "created_at": f"2030-01-01T00:00:{n:02d}+00:00",
+        }
+        for n in range(3)
+    ]
+    events = [
+        {
+            "company_id": company_id,
+            "drone_id": inc["drone_id"],
+            "incident_id": inc["incident_id"],
+            "event_type": "incident_created",
+            "actor": "admin",
+            "action": "firmware_tamper",
+            "result": "ok",
+            "ts": inc["created_at"],
+        }
+        for inc in incidents
+    ]
+    assert store.create_incidents_bulk(incidents, events) == 3
+    active = store.list_active_incidents(company_id)
+    assert [i["incident_id"] for i in active] == [i["incident_id"] for i in reversed(incidents)]
+    assert all(i["status"] == "active" and i["version"] == 1 for i in active)
+    assert len(store.list_forensics(company_id=company_id)) == 3
+
+
+def _check_forensics_and_evidence(store: StorageBackend, company_id: str) -> None:
+    incident_id = f"INC-{uuid4().hex[:12]}"
+    store.create_incident(
+        incident_id=incident_id,
+        company_id=company_id,
+        drone_id="UA-C2",
+        threat_type="rf_link_hijack",
+        severity="critical",
+        title="Rf Link Hijack",
+        operator="operator1",
+    )
+    store.add_forensic_event(
+        company_id=company_id,
+        drone_id="UA-C2",
+        incident_id=incident_id,
+        event_type="incident_closed",
+        action="close",
+        result="ok",
+    )
+    events = store.list_forensics(company_id=company_id, incident_id=incident_id)
+    assert len(events) == 1
+    assert events[0]["actor"] == "operator1", "actor must fall back to the incident operator"
+
+    evidence = store.list_evidence(company_id=company_id, framework_id="faa_107", control_id="107.21")
+    assert len(evidence) == 1, "mapped event types must register evidence"
+    assert evidence[0]["source_event_id"] == events[0]["id"]
+    assert evidence[0]["reference_id"] == incident_id
+
+    written = store.add_forensic_events(
+        [
+            {
+                "company_id": company_id,
+                "drone_id": "UA-C2",
+                "incident_id": incident_id,
+                "event_type": "mitigation_action_executed",
+                "actor": "admin",
+                "action": f"step-{n}",
+                "result": "ok",
+                "payload_json": json.dumps({"n": n}),
+                "ts": f"2030-01-01T00:00:{n:02d}+00:00",
+            }
+            for n in range(5)
+        ]
+    )
+    assert written == 5
+    events = store.list_forensics(company_id=company_id, drone_id="UA-C2", limit=100)
+    assert len(events) == 6
+    assert [e["ts"] for e in events] == sorted(e["ts"] for e in events), "forensics are ordered by ts"
+    assert len(store.list_forensics(company_id=company_id, limit=2)) == 2
+    assert len(store.list_evidence(company_id=company_id, control_id="107.49")) == 5
+
+    store.add_forensic_event(
+        company_id=company_id,
+        drone_id="UA-C2B",
+        incident_id=None,
+        event_type="signal_correlated",
+        ts="2030-01-01T02:00:00+02:00",
+    )
+    events = store.list_forensics(company_id=company_id, drone_id="UA-C2B")
+    assert [e["ts"] for e in events] == ["2030-01-01T02:00:00+02:00"], "ts reads back as written"
+
+
+def _check_evidence_review_and_scope(store: StorageBackend, company_id: str) -> None:
+    org = store.create_evidence(
+        company_id=company_id,
+        drone_id=None,
+        incident_id=None,
+        framework_id="faa_107",
+        control_id="107.12",
+        evidence_type="manual",
+        attestation="org-level",
+    )
+    drone = store.create_evidence(
+        company_id=company_id,
+        drone_id="UA-C3",
+        incident_id=None,
+        framework_id="faa_107",
+        control_id="107.12",
+        evidence_type="manual",
+        attestation="drone-level",
+    )
+    store.create_evidence(
+        company_id=company_id,
+        drone_id="UA-OTHER",
+        incident_id=None,
+        framework_id="faa_107",
+        control_id="107.12",
+        evidence_type="manual",
+        attestation="other drone",
+    )
+    assert org["review_status"] == "pending"
+
+    scoped = store.list_evidence(company_id=company_id, drone_id="UA-C3")
+    assert {e["id"] for e in scoped} == {org["id"], drone["id"]}, "drone scope includes org-level evidence"
+
+    reviewed = store.review_evidence(
+        company_id=company_id,
+        evidence_id=drone["id"],
+        review_status="accepted",
+        reviewed_by="admin",
+        review_note="ok",
+    )
+    assert reviewed["review_status"] == "accepted"
+    assert reviewed["reviewed_by"] == "admin"
+    assert store.review_evidence(
+        company_id=f"other-{company_id}",
+        evidence_id=drone["id"],
+        review_status="rejected",
+        reviewed_by="admin",
+    ) == {}, "reviews are tenant-scoped"
+
+    summary = {
+        r["control_id"]: r
+        for r in store.evidence_summary_by_control(
+            company_id=company_id, framework_id="faa_107", drone_id="UA-C3"
+        )
+    }
+    row = summary["107.12"]
+    assert (row["accepted"], row["pending"], row["rejected"], row["total"]) == (1, 1, 0, 2)
+
+    assert store.list_evidence(company_id=company_id, date_from="2000-01-01", date_to="2000-01-02") == []
+
+
+def _check_assignments(store: StorageBackend, company_id: str) -> None:
+    drone_id = f"UA-{company_id}"
+    assert store.get_assigned_operator(drone_id) is None
+    store.set_assigned_operator(drone_id, "operator1", assigned_by="admin")
+    assert store.get_assigned_operator(drone_id) == "operator1"
+    store.set_assigned_operator(drone_id, "admin", assigned_by="admin")
+    assert store.get_assigned_operator(drone_id) == "admin"
+    assert store.get_assigned_operators([drone_id, f"{drone_id}-unassigned"]) == {drone_id: "admin"}
+    assert store.get_assigned_operators([]) == {}
+
+
+def _check_telemetry(store: StorageBackend, company_id: str) -> None:
+    samples = [
+        {
+            "company_id": company_id,
+            "drone_id": drone_id,
+            "status": "online",
+            "battery": 100 - n,
+            "link_quality": 90,
+            "gps_health": 95,
+            "last_seen": f"2030-01-01T00:00:{n:02d}+00:00",
+        }
+        for n in range(3)
+        for drone_id in ("UA-T1", "UA-T2")
+    ]
+    assert store.ingest_telemetry(samples) == 6
+    assert store.ingest_telemetry([]) == 0
+
+    latest = store.latest_telemetry(company_id)
+    assert [r["drone_id"] for r in latest] == ["UA-T1", "UA-T2"]
+    assert all(r["battery"] == 98 for r in latest), "latest sample per drone"
+
+    history = store.list_telemetry(company_id, "UA-T1", limit=2)
+    assert [r["battery"] for r in history] == [98, 99], "history is newest first"
+
+    store.ingest_telemetry(
+        [{"company_id": company_id, "drone_id": "UA-T3", "status": "online", "lat": 51.5, "lon": -0.12, "alt": 120.5,
+          "speed": 13.0, "last_seen": "2030-01-01T00:01:00+00:00"}]
+    )
+    positioned = [r for r in store.latest_telemetry(company_id) if r["drone_id"] == "UA-T3"]
+    assert [(r["lat"], r["lon"], r["alt"], r["speed"]) for r in positioned] == [(51.5, -0.12, 120.5, 13.0)]
+    assert all(r["lat"] is None for r in latest), "position columns are optional"
+
+
+def _check_geofences(store: StorageBackend, company_id: str) -> None:
+    ids = [f"GF-{uuid4().hex[:12]}" for _ in range(2)]
+    first = store.create_geofence(
+        geofence_id=ids[0], company_id=company_id, name="pad", kind="circle",
+        geometry_json=json.dumps({"lat": 51.5, "lon": -0.12, "radius_m": 250}), rule="keep_out", created_by="admin",
+    )
+    assert first["geofence_id"] == ids[0] and first["created_at"] and first["rule"] == "keep_out"
+    store.create_geofence(
+        geofence_id=ids[1], company_id=company_id, name="ops", kind="bbox",
+        geometry_json=json.dumps({"min_lat": 51, "min_lon": -1, "max_lat": 52, "max_lon": 0}), rule="keep_in",
+    )
+    listed = store.list_geofences(company_id)
+    assert [g["geofence_id"] for g in listed] == ids, "geofences list in creation order"
+    assert json.loads(listed[0]["geometry_json"])["radius_m"] == 250
+    assert store.list_geofences(f"other-{company_id}") == []
+    assert store.delete_geofence(f"other-{company_id}", ids[0]) is False, "deletes are tenant scoped"
+    assert store.delete_geofence(company_id, ids[0]) is True
+    assert store.delete_geofence(company_id, ids[0]) is False
+    assert [g["geofence_id"] for g in store.list_geofences(company_id)] == ids[1:]
+
+
+def _check_report_scans(store: StorageBackend, company_id: str) -> None:
+    incidents = [
+        {
+            "incident_id": f"INC-{uuid4().hex[:12]}",
+            "company_id": company_id,
+            "drone_id": f"UA-R{n % 2}",
+            "threat_type": "gps_spoof",
+            "severity": "high",
+            "title": "Gps Spoof",
+            "created_at": f"2030-01-0{n + 1}T12:00:00+00:00",
+        }
+        for n in range(4)
+    ]
+    events = [
+        {
+            "company_id": company_id,
+            "drone_id": inc["drone_id"],
+            "incident_id": inc["incident_id"],
+            "event_type": "incident_created",
+            "actor": "admin",
+            "action": "gps_spoof",
+            "result": "ok",
+            "ts": inc["created_at"],
+        }
+        for inc in reversed(incidents)
+    ]
+    store.create_incidents_bulk(incidents, events)
+    store.update_incident_status(
+        company_id=company_id, incident_id=incidents[0]["incident_id"], new_status="closed"
+    )
+
+    scanned = list(store.iter_incidents(company_id=company_id))
+    assert [i["incident_id"] for i in scanned] == [i["incident_id"] for i in incidents], "oldest first"
+    ranged = store.iter_incidents(company_id=company_id, date_from="2030-01-02", date_to="2030-01-03")
+    assert [i["created_at"][:10] for i in ranged] == ["2030-01-02", "2030-01-03"], "date bounds are inclusive days"
+    assert len(list(store.iter_incidents(company_id=company_id, drone_id="UA-R0"))) == 2
+    assert [i["status"] for i in store.iter_incidents(company_id=company_id, status="closed")] == ["closed"]
+
+    fx = list(store.iter_forensics(company_id=company_id, event_type="incident_created"))
+    assert [e["ts"] for e in fx] == sorted(e["ts"] for e in fx) and len(fx) == 4, "forensics scan is ts ordered"
+    assert len(list(store.iter_forensics(company_id=company_id, drone_id="UA-R1", date_to="2030-01-02"))) == 1
+
+    for n in range(3):
+        row = store.create_evidence(
+            company_id=company_id, drone_id="UA-R0" if n else None, incident_id=None, framework_id="faa_107",
+            control_id="107.29", evidence_type="manual", source_event_id=None, reference_id=None, attestation=f"a{n}",
+        )
+    store.review_evidence(company_id=company_id, evidence_id=row["id"], review_status="accepted", reviewed_by="admin")
+    ev = list(store.iter_evidence(company_id=company_id, control_id="107.29"))
+    assert [e["attestation"] for e in ev] == ["a0", "a1", "a2"]
+    assert len(list(store.iter_evidence(company_id=company_id, control_id="107.29", drone_id="UA-R0"))) == 3, (
+        "drone scope includes org-level evidence"
+    )
+    assert len(list(store.iter_evidence(company_id=company_id, drone_id="UA-X", control_id="107.29"))) == 1
+    assert [e["attestation"] for e in store.iter_evidence(company_id=company_id, review_status="accepted")] == ["a2"]
+    assert len(list(store.iter_evidence(company_id=company_id, review_status="pending"))) == 2
+    try:
+        store.iter_evidence(company_id=company_id, date_from="2030-13-01")
+        raise AssertionError("bad dates must raise ValueError when the scan is opened")
+    except ValueError:
+        pass
+
+
+def _check_export_scans(store: StorageBackend, company_id: str) -> None:
+    store.ingest_telemetry(
+        [
+            {"company_id": company_id, "drone_id": "UA-E1", "status": "online", "battery": 90 - n,
+             "link_quality": 80, "gps_health": 90, "last_seen": f"2030-02-01T00:00:0{n}+00:00"}
+            for n in range(3)
+        ]
+    )
+    rows = list(store.iter_export_rows("telemetry", company_id=company_id))
+    ids = [r["id"] for r in rows]
+    assert len(rows) == 3 and ids == sorted(ids), "export scan is id ordered"
+    assert [r["battery"] for r in store.iter_export_rows("telemetry", company_id=company_id, after=[ids[0]])] == [89, 88]
+    assert list(store.iter_export_rows("telemetry", company_id=company_id, after=[ids[-1]])) == []
+
+    incident_ids = [f"INC-{uuid4().hex[:12]}" for _ in range(2)]
+    for incident_id in incident_ids:
+        store.create_incident(
+            incident_id=incident_id, company_id=company_id, drone_id="UA-E1", threat_type="gps_spoof",
+            severity="high", title="Gps Spoof",
+        )
+    first = list(store.iter_export_rows("incidents", company_id=company_id))
+    assert sorted(r["incident_id"] for r in first) == sorted(incident_ids)
+    mark = [first[-1]["updated_at"], first[-1]["incident_id"]]
+    assert list(store.iter_export_rows("incidents", company_id=company_id, after=mark)) == []
+    time.sleep(0.002)
+    store.update_incident_status(
+        company_id=company_id, incident_id=first[0]["incident_id"], new_status="mitigated"
+    )
+    changed = list(store.iter_export_rows("incidents", company_id=company_id, after=mark))
+    assert [(r["incident_id"], r["status"]) for r in changed] == [(first[0]["incident_id"], "mitigated")], (
+        "updated incidents are exported again after the watermark"
+    )
+
+    for bad in (("nope", None), ("incidents", [1])):
+        try:
+            store.iter_export_rows(bad[0], after=bad[1])
+            raise AssertionError("unknown tables and malformed keys must raise ValueError")
+        except ValueError:
+            pass
+
+
+def _check_jobs(store: StorageBackend, company_id: str) -> None:
+    # A kind unique to this run, so claims never touch real queued work
+    kind = f"conformance-{uuid4().hex[:8]}"
+    ids = {name: f"JOB-{uuid4().hex[:12]}" for name in ("low", "high", "other")}
+    low = store.create_job(job_id=ids["low"], company_id=company_id, kind=kind, params_json='{"n": 1}')
+    assert low["status"] == "queued" and low["progress"] == 0 and low["attempts"] == 0
+    assert "result_json" not in low
+    store.create_job(job_id=ids["high"], company_id=company_id, kind=kind, priority=5, created_by="admin")
+    store.create_job(job_id=ids["other"], company_id=company_id, kind=f"{kind}-x", priority=9)
+
+    first = store.claim_job("w1", [kind])
+    assert first["job_id"] == ids["high"], "highest priority is claimed first"
+    assert first["status"] == "running" and first["worker"] == "w1" and first["attempts"] == 1
+    assert first["started_at"] and first["heartbeat_at"]
+    assert store.heartbeat_job(ids["high"], "w1")
+    assert not store.heartbeat_job(ids["high"], "w2"), "only the claiming worker renews the lease"
+    second = store.claim_job("w2", [kind])
+    assert second["job_id"] == ids["low"], "equal priority falls back to submit order"
+    assert store.claim_job("w3", [kind]) is None, "a job is claimed once"
+    assert store.claim_job("w3", []) is None
+
+    store.update_job_progress(ids["high"], 0.5, "halfway")
+    job = store.get_job(ids["high"])
+    assert job["progress"] == 0.5 and job["message"] == "halfway"
+
+    done = store.finish_job(ids["high"], status="done", result_json='{"ok": true}')
+    assert done["status"] == "done" and done["progress"] == 1.0 and done["finished_at"]
+    assert store.get_job_result(ids["high"]) == '{"ok": true}'
+    store.update_job_progress(ids["high"], 0.1)
+    assert store.get_job(ids["high"])["progress"] == 1.0, "finished jobs ignore progress"
+
+    assert store.finish_job(ids["high"], status="failed", error="late") is None, "only running jobs finish"
+    assert store.get_job(ids["high"])["status"] == "done"
+    assert not store.heartbeat_job(ids["high"], "w1")
+
+    assert store.finish_job(ids["low"], status="failed", error="stolen", worker="w1") is None
+    failed = store.finish_job(ids["low"], status="failed", error="boom", worker="w2")
+    assert failed["status"] == "failed" and failed["error"] == "boom"
+    assert store.get_job_result(ids["low"]) is None
+    try:
+        store.finish_job(ids["other"], status="running")
+        raise AssertionError("finish_job only accepts done/failed")
+    except ValueError:
+        pass
+
+    listed = store.list_jobs(company_id)
+    assert [j["job_id"] for j in listed] == [ids["other"], ids["high"], ids["low"]], "newest first"
+    assert all("result_json" not in j for j in listed)
+    assert [j["job_id"] for j in store.list_jobs(company_id, status="queued")] == [ids["other"]]
+    assert store.list_jobs(f"missing-{company_id}") == []
+    assert store.get_job("JOB-missing") is None
+    assert store.claim_job("w4", [f"{kind}-x"])["job_id"] == ids["other"]
+
+
+CHECKS: List[Tuple[str, Callable[[StorageBackend, str], None]]] = [
+    ("zerotrust_policy", _check_policy),
+    ("incident_lifecycle", _check_incident_lifecycle),
+    ("bulk_incidents", _check_bulk_incidents),
+    ("forensics_and_evidence", _check_forensics_and_evidence),
+    ("evidence_review_and_scope", _check_evidence_review_and_scope),
+    ("drone_assignments", _check_assignments),
+    ("telemetry", _check_telemetry),
+    ("geofences", _check_geofences),
+    ("report_scans", _check_report_scans),
+    ("export_scans", _check_export_scans),
+    ("jobs", _check_jobs),
+]
+
+
+def run_conformance(store: StorageBackend) -> List[Tuple[str, str]]:
+    """Run every check; returns (name, error) pairs for failures."""
+    store.init_schema()
+    failures: List[Tuple[str, str]] = []
+    for name, check in CHECKS:
+        company_id = f"conf-{uuid4().hex[:8]}"
+        try:
+            check(store, company_id)
+        except AssertionError as exc:
+            failures.append((name, str(exc) or "assertion failed"))
+    return failures
+
+
+def main(argv: List[str]) -> int:
+    url = argv[1] if len(argv) > 1 else "memory://"
+    store = open_storage(url)
+    try:
+        failures = run_conformance(store)
+    finally:
+        store.close()
+    for name, _ in CHECKS:
+        status = "FAIL" if any(f[0] == name for f in failures) else "ok"
+        print(f"{status:4}  {name}")
+    for name, err in failures:
+        print(f"  {name}: {err}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,1101 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from uuid import uuid4
+
+try:  # optional dependency: only needed when VIGIL_STORAGE_URL is postgresql://
+    from psycopg.rows import dict_row
+    from psycopg_pool import ConnectionPool
+except ImportError as exc:  # pragma: no cover - import guard
+    raise ImportError(
+        "PostgreSQL storage requires 'psycopg[binary]' and 'psycopg-pool'"
+    ) from exc
+
+from . import db
+from .storage import IncidentConflict, StorageBackend
+
+# =========================================================
+# PostgreSQL backend (pooled)
+# =========================================================
+# - One ConnectionPool per process; every call borrows a connection and the
+#   pool context commits (or rolls back) on exit.
+# - Timestamps stay ISO-8601 TEXT so rows are shape-identical to SQLite.
+# - add_forensic_events() streams rows through COPY; ids are reserved from
+#   the sequence first so mapped evidence can point at source_event_id.
+# - iter_*() report and export scans use a server-side (named) cursor,
+#   fetching REPORT_ITERSIZE rows per round trip for the life of the generator.
+# =========================================================
+
+POOL_MIN_SIZE = int(os.environ.get("VIGIL_PG_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.environ.get("VIGIL_PG_POOL_MAX", "10"))
+REPORT_ITERSIZE = int(os.environ.get("VIGIL_PG_REPORT_ITERSIZE", "1000"))
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS zerotrust_policy (
+        company_id TEXT PRIMARY KEY,
+        policy_json TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        version INTEGER NOT NULL DEFAULT 1
+    )
+    """,
+    "ALTER TABLE zerotrust_policy ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    """
+    CREATE TABLE IF NOT EXISTS incidents (
+        incident_id TEXT PRIMARY KEY,
+        company_id TEXT NOT NULL,
+        drone_id TEXT,
+        threat_type TEXT NOT NULL,
+        severity TEXT NOT NULL,
+        title TEXT NOT NULL,
+        status TEXT NOT NULL,
+        training INTEGER DEFAULT 1,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        details TEXT,
+        mitigated_action TEXT,
+        mitigated_at TEXT,
+        closed_at TEXT,
+        operator TEXT,
+        version INTEGER NOT NULL DEFAULT 1
+    )
+    """,
+    "ALTER TABLE incidents ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_company_status_created ON incidents(company_id, status, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_company_created ON incidents(company_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_updated ON incidents(updated_at, incident_id)",
+    """
+    CREATE TABLE IF NOT EXISTS forensics_events (
+        id BIGSERIAL PRIMARY KEY,
+        ts TEXT NOT NULL,
+        company_id TEXT NOT NULL,
+        drone_id TEXT,
+        incident_id TEXT,
+        event_type TEXT NOT NULL,
+        actor TEXT,
+        action TEXT,
+        result TEXT,
+        payload_json TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_forensics_company_ts ON forensics_events(company_id, ts)",
+    """
+    CREATE TABLE IF NOT EXISTS evidence_registry (
+        id BIGSERIAL PRIMARY KEY,
+        company_id TEXT NOT NULL,
+        drone_id TEXT,
+        incident_id TEXT,
+        framework_id TEXT NOT NULL,
+        control_id TEXT NOT NULL,
+        evidence_type TEXT NOT NULL,
+        source_event_id BIGINT,
+        reference_id TEXT,
+        created_at TEXT NOT NULL,
+        attestation TEXT,
+        review_status TEXT,
+        reviewed_by TEXT,
+        reviewed_at TEXT,
+        review_note TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_evidence_company_framework_control_created ON evidence_registry(company_id, framework_id, control_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_evidence_company_drone_created ON evidence_registry(company_id, drone_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_evidence_company_created ON evidence_registry(company_id, created_at)",
+    """
+    CREATE TABLE IF NOT EXISTS telemetry (
+        id BIGSERIAL PRIMARY KEY,
+        company_id TEXT NOT NULL,
+        drone_id TEXT NOT NULL,
+        status TEXT NOT NULL,
+        battery INTEGER,
+        link_quality INTEGER,
+        gps_health INTEGER,
+        last_seen TEXT,
+        lat DOUBLE PRECISION,
+        lon DOUBLE PRECISION,
+        alt DOUBLE PRECISION,
+        speed DOUBLE PRECISION
+    )
+    """,
+    "ALTER TABLE telemetry ADD COLUMN IF NOT EXISTS lat DOUBLE PRECISION",
+    "ALTER TABLE telemetry ADD COLUMN IF NOT EXISTS lon DOUBLE PRECISION",
+    "ALTER TABLE telemetry ADD COLUMN IF NOT EXISTS alt DOUBLE PRECISION",
+    "ALTER TABLE telemetry ADD COLUMN IF NOT EXISTS speed DOUBLE PRECISION",
+    "CREATE INDEX IF NOT EXISTS idx_telemetry_company_drone_id ON telemetry(company_id, drone_id, id)",
+    """
+    CREATE TABLE IF NOT EXISTS geofences (
+        geofence_id TEXT PRIMARY KEY,
+        company_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        geometry_json TEXT NOT NULL,
+        rule TEXT NOT NULL,
+        created_by TEXT,
+        created_at TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_geofences_company ON geofences(company_id, created_at)",
+    """
+    CREATE TABLE IF NOT EXISTS drone_assignments (
+        drone_id TEXT PRIMARY KEY,
+        operator TEXT NOT NULL,
+        assigned_at TEXT NOT NULL,
+        assigned_by TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id TEXT PRIMARY KEY,
+        company_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        status TEXT NOT NULL,
+        priority INTEGER NOT NULL DEFAULT 0,
+        params_json TEXT,
+        progress DOUBLE PRECISION NOT NULL DEFAULT 0,
+        message TEXT,
+        result_json TEXT,
+        error TEXT,
+        created_by TEXT,
+        worker TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL,
+        started_at TEXT,
+        finished_at TEXT,
+        heartbeat_at TEXT
+    )
+    """,
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS heartbeat_at TEXT",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status_priority_created ON jobs(status, priority DESC, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_company_created ON jobs(company_id, created_at)",
+]
+
+INCIDENT_COPY_COLUMNS = (
+    "incident_id", "company_id", "drone_id", "threat_type", "severity", "title",
+    "status", "training", "created_at", "updated_at", "details", "operator",
+)
+
+TELEMETRY_COPY_COLUMNS = (
+    "company_id", "drone_id", "status", "battery", "link_quality", "gps_health", "last_seen",
+    "lat", "lon", "alt", "speed",
+)
+
+FORENSICS_COPY_COLUMNS = (
+    "id", "ts", "company_id", "drone_id", "incident_id",
+    "event_type", "actor", "action", "result", "payload_json",
+)
+
+
+class PostgresBackend(StorageBackend):
+    name = "postgresql"
+
+    def __init__(self, conninfo: str, min_size: int = POOL_MIN_SIZE, max_size: int = POOL_MAX_SIZE):
+        self._pool = ConnectionPool(
+            conninfo,
+            min_size=min_size,
+            max_size=max_size,
+            kwargs={"row_factory": dict_row},
+            open=True,
+        )
+
+    def close(self) -> None:
+        self._pool.close()
+
+    def init_schema(self) -> None:
+        with self._pool.connection() as conn:
+            for stmt in SCHEMA:
+                conn.execute(stmt)
+            conn.execute(
+                """
+                INSERT INTO zerotrust_policy (company_id, policy_json, updated_at)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (company_id) DO NOTHING
+                """,
+                ("default", "{}", db._now_iso()),
+            )
+
+    # -------------------------
+    # Zero Trust policy
+    # -------------------------
+
+    def get_zerotrust_policy(self, company_id: str = "default") -> Dict[str, Any]:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT company_id, policy_json, updated_at, version FROM zerotrust_policy WHERE company_id=%s",
+                (company_id,),
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    """
+                    INSERT INTO zerotrust_policy (company_id, policy_json, updated_at)
+                    VALUES (%s, '{}', %s)
+                    ON CONFLICT (company_id) DO NOTHING
+                    """,
+                    (company_id, db._now_iso()),
+                )
+                row = conn.execute(
+                    "SELECT company_id, policy_json, updated_at, version FROM zerotrust_policy WHERE company_id=%s",
+                    (company_id,),
+                ).fetchone()
+        return dict(row)
+
+    def get_zerotrust_policy_version(self, company_id: str = "default") -> Optional[int]:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT version FROM zerotrust_policy WHERE company_id=%s", (company_id,)
+            ).fetchone()
+        return int(row["version"]) if row else None
+
+    def set_zerotrust_policy(self, company_id: str, policy_json: str) -> Dict[str, Any]:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                """
+                INSERT INTO zerotrust_policy (company_id, policy_json, updated_at, version)
+                VALUES (%s, %s, %s, 1)
+                ON CONFLICT (company_id) DO UPDATE SET
+                    policy_json=EXCLUDED.policy_json,
+                    updated_at=EXCLUDED.updated_at,
+                    version=zerotrust_policy.version + 1
+                RETURNING company_id, policy_json, updated_at, version
+                """,
+                (company_id, policy_json, db._now_iso()),
+            ).fetchone()
+        return dict(row)
+
+    # -------------------------
+    # Incidents
+    # -------------------------
+
+    def create_incident(
+        self,
+        *,
+        incident_id: str,
+        company_id: str,
+        drone_id: Optional[str],
+        threat_type: str,
+        severity: str,
+        title: str,
+        training: bool = True,
+        created_at: Optional[str] = None,
+        details: Optional[str] = None,
+        operator: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        ts = created_at or db._now_iso()
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                """
+                INSERT INTO incidents (
+                    incident_id, company_id, drone_id, threat_type, severity, title,
+                    status, training, created_at, updated_at, details, operator
+                ) VALUES (%s, %s, %s, %s, %s, %s, 'active', %s, %s, %s, %s, %s)
+                RETURNING *
+                """,
+                (
+                    incident_id,
+                    company_id,
+                    drone_id,
+                    threat_type,
+                    severity,
+                    title,
+                    1 if training else 0,
+                    ts,
+                    ts,
+                    details,
+                    operator,
+                ),
+            ).fetchone()
+        return dict(row) if row else {}
+
+    def create_incidents_bulk(
+        self,
+        incidents: Iterable[Dict[str, Any]],
+        events: Iterable[Dict[str, Any]] = (),
+    ) -> int:
+        incidents = list(incidents)
+        events = list(events)
+        with self._pool.connection() as conn:
+            with conn.cursor() as cur:
+                with cur.copy(
+                    "COPY incidents (" + ", ".join(INCIDENT_COPY_COLUMNS) + ") FROM STDIN"
+                ) as copy:
+                    for inc in incidents:
+                        ts = inc.get("created_at") or db._now_iso()
+                        copy.write_row(
+                            (
+                                inc["incident_id"],
+                                inc["company_id"],
+                                inc.get("drone_id"),
+                                inc["threat_type"],
+                                inc["severity"],
+                                inc["title"],
+                                "active",
+                                1 if inc.get("training", True) else 0,
+                                ts,
+                                ts,
+                                inc.get("details"),
+                                inc.get("operator"),
+                            )
+                        )
+            if events:
+                self._copy_forensic_events(conn, events)
+        return len(incidents)
+
+    def get_incident(self, incident_id: str) -> Optional[Dict[str, Any]]:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM incidents WHERE incident_id=%s AND company_id=%s", (incident_id, company_id)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list_active_incidents(self, company_id: str, drone_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT * FROM incidents
+                WHERE company_id=%s AND status='active'
+                  AND (%s::text IS NULL OR drone_id=%s)
+                ORDER BY created_at DESC
+                """,
+                (company_id, drone_id or None, drone_id or None),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def update_incident_status(
+        self,
+        *,
+        company_id: str,
+        incident_id: str,
+        new_status: str,
+        mitigated_action: Optional[str] = None,
+        details: Optional[str] = None,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        from_states = db._transition_sources(new_status)
+        ts = db._now_iso()
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                """
+                UPDATE incidents
+                SET status=%(status)s,
+                    updated_at=%(ts)s,
+                    details=COALESCE(%(details)s, details),
+                    mitigated_action=COALESCE(%(action)s, mitigated_action),
+                    mitigated_at=CASE WHEN %(status)s::text='mitigated' THEN %(ts)s ELSE mitigated_at END,
+                    closed_at=CASE WHEN %(status)s::text='closed' THEN %(ts)s ELSE closed_at END,
+                    version=version + 1
+                WHERE incident_id=%(incident_id)s AND company_id=%(company_id)s
+                  AND status = ANY(%(from_states)s)
+                  AND (%(expected)s::integer IS NULL OR version=%(expected)s)
+                RETURNING *
+                """,
+                {
+                    "status": new_status,
+                    "ts": ts,
+                    "details": details,
+                    "action": mitigated_action,
+                    "incident_id": incident_id,
+                    "company_id": company_id,
+                    "from_states": from_states,
+                    "expected": expected_version,
+                },
+            ).fetchone()
+            if row:
+                return dict(row)
+            current = conn.execute(
+                "SELECT * FROM incidents WHERE incident_id=%s", (incident_id,)
+            ).fetchone()
+        if current is None:
+            return None
+        raise IncidentConflict(dict(current), new_status)
+
+    # -------------------------
+    # Forensics
+    # -------------------------
+
+    @staticmethod
+    def _derive_actor(conn: Any, company_id: str, drone_id: Optional[str], incident_id: Optional[str]) -> Optional[str]:
+        if incident_id:
+            r = conn.execute(
+                "SELECT operator FROM incidents WHERE incident_id=%s", (incident_id,)
+            ).fetchone()
+            if r and r["operator"]:
+                return r["operator"]
+        if drone_id:
+            r = conn.execute(
+                """
+                SELECT operator FROM incidents
+                WHERE company_id=%s AND drone_id=%s AND operator IS NOT NULL AND operator != ''
+                ORDER BY created_at DESC
+                LIMIT 1
+                """,
+                (company_id, drone_id),
+            ).fetchone()
+            if r:
+                return r["operator"]
+        return None
+
+    def add_forensic_event(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str],
+        incident_id: Optional[str],
+        event_type: str,
+        actor: Optional[str] = None,
+        action: Optional[str] = None,
+        result: Optional[str] = None,
+        payload_json: Optional[str] = None,
+        ts: Optional[str] = None,
+    ) -> None:
+        with self._pool.connection() as conn:
+            derived_actor = actor or self._derive_actor(conn, company_id, drone_id, incident_id)
+            row = conn.execute(
+                """
+                INSERT INTO forensics_events (
+                    ts, company_id, drone_id, incident_id, event_type, actor, action, result, payload_json
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+                """,
+                (
+                    ts or db._now_iso(),
+                    company_id,
+                    drone_id,
+                    incident_id,
+                    event_type,
+                    derived_actor,
+                    action,
+                    result,
+                    payload_json,
+                ),
+            ).fetchone()
+            mapping = db.CONTROL_EVENT_MAP.get(event_type)
+            if mapping:
+                self._insert_evidence(
+                    conn,
+                    [(company_id, drone_id, incident_id, mapping[0], mapping[1], event_type,
+                      row["id"], incident_id or drone_id, db._now_iso())],
+                )
+
+    def _copy_forensic_events(self, conn: Any, events: List[Dict[str, Any]]) -> None:
+        # Actor lookups must finish before COPY starts: the connection
+        # cannot run other statements while a COPY is in progress.
+        actors = [
+            ev.get("actor") or self._derive_actor(conn, ev["company_id"], ev.get("drone_id"), ev.get("incident_id"))
+            for ev in events
+        ]
+        ids = [
+            r["id"]
+            for r in conn.execute(
+                "SELECT nextval(pg_get_serial_sequence('forensics_events', 'id')) AS id "
+                "FROM generate_series(1, %s)",
+                (len(events),),
+            ).fetchall()
+        ]
+        evidence_rows: List[tuple] = []
+        with conn.cursor() as cur:
+            with cur.copy(
+                "COPY forensics_events (" + ", ".join(FORENSICS_COPY_COLUMNS) + ") FROM STDIN"
+            ) as copy:
+                for event_id, actor, ev in zip(ids, actors, events):
+                    company_id = ev["company_id"]
+                    drone_id = ev.get("drone_id")
+                    incident_id = ev.get("incident_id")
+                    event_type = ev["event_type"]
+                    copy.write_row(
+                        (
+                            event_id,
+                            ev.get("ts") or db._now_iso(),
+                            company_id,
+                            drone_id,
+                            incident_id,
+                            event_type,
+                            actor,
+                            ev.get("action"),
+                            ev.get("result"),
+                            ev.get("payload_json"),
+                        )
+                    )
+                    mapping = db.CONTROL_EVENT_MAP.get(event_type)
+                    if mapping:
+                        evidence_rows.append(
+                            (company_id, drone_id, incident_id, mapping[0], mapping[1], event_type,
+                             event_id, incident_id or drone_id, db._now_iso())
+                        )
+        if evidence_rows:
+            self._insert_evidence(conn, evidence_rows)
+
+    def add_forensic_events(self, events: Iterable[Dict[str, Any]]) -> int:
+        events = list(events)
+        if not events:
+            return 0
+        with self._pool.connection() as conn:
+            self._copy_forensic_events(conn, events)
+        return len(events)
+
+    def list_forensics(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        limit: int = 500,
+    ) -> List[Dict[str, Any]]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT * FROM forensics_events
+                WHERE company_id=%s
+                  AND (%s::text IS NULL OR drone_id=%s)
+                  AND (%s::text IS NULL OR incident_id=%s)
+                ORDER BY ts ASC, id ASC
+                LIMIT %s
+                """,
+                (
+                    company_id,
+                    drone_id or None,
+                    drone_id or None,
+                    incident_id or None,
+                    incident_id or None,
+                    limit,
+                ),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    # -------------------------
+    # Report scans
+    # -------------------------
+
+    def _iter_rows(self, sql: str, params: List[Any]) -> Iterator[Dict[str, Any]]:
+        with self._pool.connection() as conn:
+            with conn.cursor(name=f"vigil_report_{uuid4().hex[:8]}") as cur:
+                cur.itersize = REPORT_ITERSIZE
+                cur.execute(sql, params)
+                for row in cur:
+                    yield dict(row)
+
+    @staticmethod
+    def _date_filters(column: str, date_from: Optional[str], date_to: Optional[str], where: List[str], params: List[Any]) -> None:
+        if date_from:
+            where.append(f"{column} >= %s")
+            params.append(db._day_bounds_utc(date_from, end=False))
+        if date_to:
+            where.append(f"{column} <= %s")
+            params.append(db._day_bounds_utc(date_to, end=True))
+
+    def iter_incidents(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str] = None,
+        status: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        where = ["company_id = %s"]
+        params: List[Any] = [company_id]
+        for column, value in (("drone_id", drone_id), ("status", status)):
+            if value:
+                where.append(f"{column} = %s")
+                params.append(value)
+        self._date_filters("created_at", date_from, date_to, where, params)
+        return self._iter_rows(
+            f"SELECT * FROM incidents WHERE {' AND '.join(where)} ORDER BY created_at, incident_id", params
+        )
+
+    def iter_forensics(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        event_type: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        where = ["company_id = %s"]
+        params: List[Any] = [company_id]
+        for column, value in (("drone_id", drone_id), ("incident_id", incident_id), ("event_type", event_type)):
+            if value:
+                where.append(f"{column} = %s")
+                params.append(value)
+        self._date_filters("ts", date_from, date_to, where, params)
+        return self._iter_rows(
+            f"SELECT * FROM forensics_events WHERE {' AND '.join(where)} ORDER BY ts, id", params
+        )
+
+    def iter_evidence(
+        self,
+        *,
+        company_id: str,
+        framework_id: Optional[str] = None,
+        control_id: Optional[str] = None,
+        drone_id: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        review_status: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        where, params = self._evidence_where(
+            company_id, framework_id, control_id, incident_id, date_from, date_to
+        )
+        if review_status:
+            where += " AND COALESCE(NULLIF(review_status, ''), 'pending') = %s"
+            params.append(review_status)
+        # Drone scope includes org-level (NULL) evidence, same as db.py
+        scoped, params = db.evidence_scope_sql("*", where, params, drone_id, placeholder="%s")
+        return self._iter_rows(f"{scoped} ORDER BY created_at, id", params)
+
+    def iter_export_rows(
+        self,
+        table: str,
+        *,
+        company_id: Optional[str] = None,
+        after: Optional[Sequence[Any]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        key_where, order = db.export_key_sql(table, after, placeholder="%s")
+        where: List[str] = []
+        params: List[Any] = []
+        if company_id:
+            where.append("company_id = %s")
+            params.append(company_id)
+        if key_where:
+            where.append(key_where)
+            params.extend(after or ())
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        return self._iter_rows(f"SELECT * FROM {table} {clause} ORDER BY {order}", params)
+
+    # -------------------------
+    # Evidence
+    # -------------------------
+
+    @staticmethod
+    def _insert_evidence(conn: Any, rows: List[tuple]) -> None:
+        with conn.cursor() as cur:
+            cur.executemany(
+                """
+                INSERT INTO evidence_registry
+                (company_id, drone_id, incident_id, framework_id, control_id, evidence_type, source_event_id, reference_id, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                rows,
+            )
+
+    def register_evidence(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str],
+        incident_id: Optional[str],
+        framework_id: str,
+        control_id: str,
+        evidence_type: str,
+        source_event_id: Optional[int] = None,
+        reference_id: Optional[str] = None,
+    ) -> None:
+        with self._pool.connection() as conn:
+            self._insert_evidence(
+                conn,
+                [(company_id, drone_id, incident_id, framework_id, control_id, evidence_type,
+                  source_event_id, reference_id, db._now_iso())],
+            )
+
+    def create_evidence(
+        self,
+        *,
+        company_id: str,
+        drone_id: Optional[str],
+        incident_id: Optional[str],
+        framework_id: str,
+        control_id: str,
+        evidence_type: str,
+        source_event_id: Optional[int] = None,
+        reference_id: Optional[str] = None,
+        attestation: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                """
+                INSERT INTO evidence_registry
+                (company_id, drone_id, incident_id, framework_id, control_id, evidence_type, source_event_id, reference_id, attestation, review_status, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'pending', %s)
+                RETURNING *
+                """,
+                (
+                    company_id,
+                    drone_id,
+                    incident_id,
+                    framework_id,
+                    control_id,
+                    evidence_type,
+                    source_event_id,
+                    reference_id,
+                    attestation,
+                    db._now_iso(),
+                ),
+            ).fetchone()
+        return dict(row)
+
+    def review_evidence(
+        self,
+        *,
+        company_id: str,
+        evidence_id: int,
+        review_status: str,
+        reviewed_by: str,
+        review_note: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                """
+                UPDATE evidence_registry
+                SET review_status=%s,
+                    reviewed_by=%s,
+                    reviewed_at=%s,
+                    review_note=%s
+                WHERE id=%s AND company_id=%s
+                RETURNING *
+                """,
+                (review_status, reviewed_by, db._now_iso(), review_note, evidence_id, company_id),
+            ).fetchone()
+        return dict(row) if row else {}
+
+    @staticmethod
+    def _evidence_where(
+        company_id: str,
+        framework_id: Optional[str],
+        control_id: Optional[str],
+        incident_id: Optional[str],
+        date_from: Optional[str],
+        date_to: Optional[str],
+    ) -> tuple:
+        where = ["company_id = %s"]
+        params: List[Any] = [company_id]
+        if framework_id:
+            where.append("framework_id = %s")
+            params.append(framework_id)
+        if control_id:
+            where.append("control_id = %s")
+            params.append(control_id)
+        if incident_id:
+            where.append("incident_id = %s")
+            params.append(incident_id)
+        if date_from:
+            where.append("created_at >= %s")
+            params.append(db._day_bounds_utc(date_from, end=False))
+        if date_to:
+            where.append("created_at <= %s")
+            params.append(db._day_bounds_utc(date_to, end=True))
+        return " AND ".join(where), params
+
+    def list_evidence(
+        self,
+        *,
+        company_id: str,
+        framework_id: Optional[str] = None,
+        control_id: Optional[str] = None,
+        drone_id: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: int = 200,
+    ) -> List[Dict[str, Any]]:
+        clause, params = self._evidence_where(
+            company_id, framework_id, control_id, incident_id, date_from, date_to
+        )
+        scoped, params = db.evidence_scope_sql("*", clause, params, drone_id, placeholder="%s")
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                scoped + " ORDER BY created_at DESC LIMIT %s",  # nosec B608 - built from constant fragments
+                [*params, limit],
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def evidence_summary_by_control(
+        self,
+        *,
+        company_id: str,
+        framework_id: str,
+        drone_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        clause, params = self._evidence_where(
+            company_id, framework_id, None, None, date_from, date_to
+        )
+        scoped, params = db.evidence_scope_sql("control_id, review_status", clause, params, drone_id, placeholder="%s")
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT
+                    control_id,
+                    COUNT(*) FILTER (WHERE COALESCE(NULLIF(review_status, ''), 'pending') = 'accepted') AS accepted,
+                    COUNT(*) FILTER (WHERE COALESCE(NULLIF(review_status, ''), 'pending') = 'pending') AS pending,
+                    COUNT(*) FILTER (WHERE COALESCE(NULLIF(review_status, ''), 'pending') = 'rejected') AS rejected,
+                    COUNT(*) AS total
+                FROM (""" + scoped + """) AS scoped
+                GROUP BY control_id
+                """,  # nosec B608 - built from constant fragments
+                params,
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    # -------------------------
+    # Telemetry
+    # -------------------------
+
+    def ingest_telemetry(self, samples: Iterable[Dict[str, Any]]) -> int:
+        written = 0
+        with self._pool.connection() as conn:
+            with conn.cursor() as cur:
+                with cur.copy(
+                    "COPY telemetry (" + ", ".join(TELEMETRY_COPY_COLUMNS) + ") FROM STDIN"
+                ) as copy:
+                    for s in samples:
+                        copy.write_row(
+                            (
+                                s["company_id"],
+                                s["drone_id"],
+                                s.get("status") or "online",
+                                s.get("battery"),
+                                s.get("link_quality"),
+                                s.get("gps_health"),
+                                s.get("last_seen") or db._now_iso(),
+                                s.get("lat"),
+                                s.get("lon"),
+                                s.get("alt"),
+                                s.get("speed"),
+                            )
+                        )
+                        written += 1
+        return written
+
+    def latest_telemetry(self, company_id: str) -> List[Dict[str, Any]]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT DISTINCT ON (drone_id) *
+                FROM telemetry
+                WHERE company_id=%s
+                ORDER BY drone_id, id DESC
+                """,
+                (company_id,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def list_telemetry(self, company_id: str, drone_id: str, limit: int = 500) -> List[Dict[str, Any]]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT * FROM telemetry
+                WHERE company_id=%s AND drone_id=%s
+                ORDER BY id DESC
+                LIMIT %s
+                """,
+                (company_id, drone_id, limit),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    # -------------------------
+    # Geofences
+    # -------------------------
+
+    def create_geofence(
+        self,
+        *,
+        geofence_id: str,
+        company_id: str,
+        name: str,
+        kind: str,
+        geometry_json: str,
+        rule: str,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                """
+                INSERT INTO geofences (geofence_id, company_id, name, kind, geometry_json, rule, created_by, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING *
+                """,
+                (geofence_id, company_id, name, kind, geometry_json, rule, created_by, db._now_iso()),
+            ).fetchone()
+        return dict(row)
+
+    def list_geofences(self, company_id: str) -> List[Dict[str, Any]]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM geofences WHERE company_id=%s ORDER BY created_at, geofence_id", (company_id,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def delete_geofence(self, company_id: str, geofence_id: str) -> bool:
+        with self._pool.connection() as conn:
+            cur = conn.execute(
+                "DELETE FROM geofences WHERE company_id=%s AND geofence_id=%s", (company_id, geofence_id)
+            )
+            return cur.rowcount > 0
+
+    # -------------------------
+    # Drone assignments
+    # -------------------------
+
+    def get_assigned_operator(self, drone_id: Optional[str]) -> Optional[str]:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT operator FROM drone_assignments WHERE drone_id=%s", (drone_id,)
+            ).fetchone()
+        return row["operator"] if row else None
+
+    def get_assigned_operators(self, drone_ids: Iterable[str]) -> Dict[str, str]:
+        ids = [d for d in drone_ids if d]
+        if not ids:
+            return {}
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT drone_id, operator FROM drone_assignments WHERE drone_id = ANY(%s)", (ids,)
+            ).fetchall()
+        return {r["drone_id"]: r["operator"] for r in rows}
+
+    def set_assigned_operator(self, drone_id: str, operator: str, assigned_by: Optional[str]) -> None:
+        with self._pool.connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO drone_assignments (drone_id, operator, assigned_at, assigned_by)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (drone_id) DO UPDATE SET
+                    operator=EXCLUDED.operator,
+                    assigned_at=EXCLUDED.assigned_at,
+                    assigned_by=EXCLUDED.assigned_by
+                """,
+                (drone_id, operator, db._now_iso(), assigned_by),
+            )
+
+    # -------------------------
+    # Background jobs
+    # -------------------------
+
+    def create_job(
+        self,
+        *,
+        job_id: str,
+        company_id: str,
+        kind: str,
+        params_json: str = "{}",
+        priority: int = 0,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                f"""
+                INSERT INTO jobs (job_id, company_id, kind, status, priority, params_json, created_by, created_at)
+                VALUES (%s, %s, %s, 'queued', %s, %s, %s, %s)
+                RETURNING {db.JOB_COLUMNS}
+                """,
+                (job_id, company_id, kind, int(priority), params_json, created_by, db._now_iso()),
+            ).fetchone()
+        return dict(row)
+
+    def claim_job(self, worker: str, kinds: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        kind_list = list(kinds) if kinds is not None else None
+        if kind_list == []:
+            return None
+        now = db._now_iso()
+        with self._pool.connection() as conn:
+            # SKIP LOCKED: concurrent claimers each take a different row
+            row = conn.execute(
+                f"""
+                UPDATE jobs
+                SET status='running', worker=%s, started_at=%s, heartbeat_at=%s, attempts=attempts + 1
+                WHERE job_id = (
+                    SELECT job_id FROM jobs
+                    WHERE status='queued' AND (%s::text[] IS NULL OR kind = ANY(%s::text[]))
+                    ORDER BY priority DESC, created_at, job_id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING {db.JOB_COLUMNS}
+                """,
+                (worker, now, now, kind_list, kind_list),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def update_job_progress(self, job_id: str, progress: float, message: Optional[str] = None) -> None:
+        with self._pool.connection() as conn:
+            conn.execute(
+                """
+                UPDATE jobs SET progress=%s, message=COALESCE(%s, message), heartbeat_at=%s
+                WHERE job_id=%s AND status='running'
+                """,
+                (float(progress), message, db._now_iso(), job_id),
+            )
+
+    def heartbeat_job(self, job_id: str, worker: str) -> bool:
+        with self._pool.connection() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET heartbeat_at=%s WHERE job_id=%s AND status='running' AND worker=%s",
+                (db._now_iso(), job_id, worker),
+            )
+            return cur.rowcount > 0
+
+    def requeue_stale_jobs(self, stale_before: str, max_attempts: int) -> int:
+        stale = "status='running' AND COALESCE(heartbeat_at, started_at) < %s"
+        with self._pool.connection() as conn:
+            failed = conn.execute(
+                f"UPDATE jobs SET status='failed', error=%s, finished_at=%s WHERE {stale} AND attempts >= %s",
+                (f"lease expired after {max_attempts} attempts", db._now_iso(), stale_before, int(max_attempts)),
+            ).rowcount
+            requeued = conn.execute(
+                f"""
+                UPDATE jobs SET status='queued', worker=NULL, heartbeat_at=NULL, message='lease expired; requeued'
+                WHERE {stale}
+                """,
+                (stale_before,),
+            ).rowcount
+        return failed + requeued
+
+    def finish_job(
+        self,
+        job_id: str,
+        *,
+        status: str,
+        result_json: Optional[str] = None,
+        error: Optional[str] = None,
+        worker: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        if status not in ("done", "failed"):
+            raise ValueError(f"not a final job status: {status}")
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                f"""
+                UPDATE jobs
+                SET status=%s, result_json=%s, error=%s, finished_at=%s,
+                    progress=CASE WHEN %s='done' THEN 1.0 ELSE progress END
+                WHERE job_id=%s AND status='running' AND (%s::text IS NULL OR worker=%s)
+                RETURNING {db.JOB_COLUMNS}
+                """,
+                (status, result_json, error, db._now_iso(), status, job_id, worker, worker),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._pool.connection() as conn:
+            row = conn.execute(f"SELECT {db.JOB_COLUMNS} FROM jobs WHERE job_id=%s", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_job_result(self, job_id: str) -> Optional[str]:
+        with self._pool.connection() as conn:
+            row = conn.execute("SELECT result_json FROM jobs WHERE job_id=%s", (job_id,)).fetchone()
+        return row["result_json"] if row else None
+
+    def list_jobs(self, company_id: str, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT {db.JOB_COLUMNS} FROM jobs
+                WHERE company_id=%s AND (%s::text IS NULL OR status=%s)
+                ORDER BY created_at DESC, job_id DESC
+                LIMIT %s
+                """,
+                (company_id, status, status, limit),
+            ).fetchall()
+        return [dict(r) for r in rows]
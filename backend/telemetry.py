@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel, Field
+
+from . import detection, geo, recent
+from .responses import FastJSONResponse, rows_response
+from .storage import StorageBackend, get_storage
+from .zerotrust import require_action
+
+# =========================================================
+# Telemetry ingest + reads
+# =========================================================
+# ingest() is the single write path for drone telemetry: the HTTP route,
+# the in-process simulator sink and any future gateway all go through it.
+# Accepted batches are handed to the streaming detectors (detection.py),
+# the per-drone recent-sample rings behind /{drone_id}/recent (recent.py)
+# and, when samples carry a position, to the geo index and geofences
+# (geo.py).
+#
+# last_seen is validated before anything is written: the route declares it
+# a datetime (bad values are a 422) and ingest() re-parses strings from
+# in-process callers, raising ValueError before the batch is persisted.
+# Samples without one are stamped with the batch's receive time here, once,
+# so the stored row, the recent ring and the detectors all agree on it.
+# Every consumer downstream therefore sees an ISO-8601 string with an
+# offset (naive times are taken as UTC).
+# =========================================================
+
+MAX_SAMPLES_PER_REQUEST = 10000
+
+router = APIRouter(prefix="/telemetry", tags=["telemetry"])
+
+
+class TelemetrySample(BaseModel):
+    drone_id: str
+    status: str = "online"  # online | warning | lost
+    battery: Optional[int] = Field(default=None, ge=0, le=100)
+    link_quality: Optional[int] = Field(default=None, ge=0, le=100)
+    gps_health: Optional[int] = Field(default=None, ge=0, le=100)
+    last_seen: Optional[datetime] = None  # ISO-8601; defaults to receive time
+    lat: Optional[float] = Field(default=None, ge=-90, le=90)     # WGS84 degrees
+    lon: Optional[float] = Field(default=None, ge=-180, le=180)
+    alt: Optional[float] = None                                   # metres
+    speed: Optional[float] = Field(default=None, ge=0)            # ground speed, m/s
+
+
+class TelemetryIngestRequest(BaseModel):
+    samples: List[TelemetrySample] = Field(max_length=MAX_SAMPLES_PER_REQUEST)
+
+
+def _last_seen_iso(value: Any) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError(f"last_seen is not an ISO-8601 timestamp: {value!r}") from None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+def ingest(store: StorageBackend, company_id: str, samples: Iterable[Dict[str, Any]]) -> int:
+    """Stamp samples with the tenant, persist them in one batch, run detectors."""
+    rows = [dict(s, company_id=company_id) for s in samples]
+    received = datetime.now(timezone.utc).isoformat()
+    for row in rows:
+        row["last_seen"] = _last_seen_iso(row.get("last_seen")) or received
+    written = store.ingest_telemetry(rows)
+    if recent.RECENT_ENABLED:
+        recent.RECENT.observe(company_id, rows)
+    if detection.DETECTION_ENABLED:
+        detection.ENGINE.observe(store, company_id, rows)
+    if geo.GEO_ENABLED:
+        geo.GEO.observe(store, company_id, rows)
+    return written
+
+
+def _with_heartbeat(row: Dict[str, Any]) -> Dict[str, Any]:
+    # TelemetryTable reads last_heartbeat
+    row["last_heartbeat"] = row.get("last_seen")
+    return row
+
+
+@router.post("")
+def ingest_telemetry(
+    body: TelemetryIngestRequest,
+    user=Depends(require_action("telemetry.ingest")),
+    store: StorageBackend = Depends(get_storage),
+):
+    company_id = user.get("company_id") or "default"
+    written = ingest(store, company_id, (s.model_dump() for s in body.samples))
+    return {"ok": True, "ingested": written}
+
+
+@router.get("")
+def latest_telemetry(
+    user=Depends(require_action("telemetry.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    company_id = user.get("company_id") or "default"
+    items = [_with_heartbeat(r) for r in store.latest_telemetry(company_id)]
+    return rows_response("items", items)
+
+
+@router.get("/detectors")
+def detector_stats(user=Depends(require_action("telemetry.read"))):
+    company_id = user.get("company_id") or "default"
+    return {
+        "ok": True,
+        "config": asdict(detection.ENGINE.config),
+        **detection.ENGINE.stats(company_id),
+        "recent": recent.RECENT.stats(company_id),
+    }
+
+
+@router.get("/{drone_id}/history")
+def telemetry_history(
+    drone_id: str,
+    limit: int = Query(default=200, ge=1, le=5000),
+    user=Depends(require_action("telemetry.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    company_id = user.get("company_id") or "default"
+    items = [_with_heartbeat(r) for r in store.list_telemetry(company_id, drone_id, limit)]
+    return rows_response("items", items, drone_id=drone_id)
+
+
+@router.get("/{drone_id}/recent")
+def recent_telemetry(
+    drone_id: str,
+    n: int = Query(default=60, ge=1, le=recent.RECENT_SAMPLES),
+    user=Depends(require_action("telemetry.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    """Last n samples, newest first, as parallel columns (t is epoch seconds)."""
+    company_id = user.get("company_id") or "default"
+    source, cols = recent.recent_columns(store, company_id, drone_id, n)
+    return FastJSONResponse(recent.body(drone_id, source, cols))
@@ -0,0 +1,312 @@
+"""
+Scenario-driven synthetic telemetry.
+
+Generates fleet telemetry for a threat template as NumPy arrays
+(drones x ticks) and streams it, tick by tick, into the telemetry ingest
+path: in-process through telemetry.ingest, or over HTTP to a running API.
+The HTTP mode doubles as a load generator.
+
+    python -m backend.telemetry_sim --scenario gps_spoof --drones 500 --rate 10 --duration 30 \\
+        --target http://127.0.0.1:8010 --token "$TOKEN"
+    python -m backend.telemetry_sim --scenario rf_link_hijack --drones 2000 --no-realtime \\
+        --storage sqlite:////tmp/vigil-load.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .simulation import TEMPLATES_BY_ID
+
+STATUS_CODES = ("online", "warning", "lost")
+BASELINE = "baseline"
+SCENARIOS = (BASELINE, *TEMPLATES_BY_ID)
+
+
+@dataclass
+class TelemetryFrame:
+    drone_ids: List[str]
+    start: datetime
+    t: np.ndarray             # (ticks,) seconds since start
+    battery: np.ndarray       # (drones, ticks) int16, percent
+    link_quality: np.ndarray  # (drones, ticks) int16, percent
+    gps_health: np.ndarray    # (drones, ticks) int16, percent
+    status: np.ndarray        # (drones, ticks) uint8 index into STATUS_CODES
+    affected: np.ndarray      # (drones,) bool, drones carrying the signature
+
+    @property
+    def samples(self) -> int:
+        return int(self.battery.size)
+
+
+def _baseline(rng: np.random.Generator, n: int, t: np.ndarray) -> Dict[str, np.ndarray]:
+    col = t[None, :]
+    battery0 = rng.uniform(70, 100, size=(n, 1))
+    drain = rng.uniform(0.01, 0.03, size=(n, 1))  # %/s in normal flight
+    battery = battery0 - drain * col + rng.normal(0, 0.15, size=(n, t.size))
+
+    link_base = rng.uniform(80, 95, size=(n, 1))
+    period = rng.uniform(20, 60, size=(n, 1))
+    phase = rng.uniform(0, 2 * np.pi, size=(n, 1))
+    link = link_base + 3 * np.sin(2 * np.pi * col / period + phase) + rng.normal(0, 1.5, size=(n, t.size))
+
+    gps = rng.uniform(90, 99, size=(n, 1)) + rng.normal(0, 1.0, size=(n, t.size))
+    return {"battery": battery, "link_quality": link, "gps_health": gps}
+
+
+def _gps_spoof(rng: np.random.Generator, m: int, since: np.ndarray, ch: Dict[str, np.ndarray]) -> None:
+    # Slow monotone drift of GPS health with growing jitter once spoofing starts
+    rate = rng.uniform(1.5, 3.0, size=(m, 1))
+    jitter = rng.normal(0, 1.0, size=since.shape) * (1 + 0.1 * since)
+    ch["gps_health"] -= rate * since + np.where(since > 0, jitter, 0)
+
+
+def _rf_link_hijack(rng: np.random.Generator, m: int, since: np.ndarray, ch: Dict[str, np.ndarray]) -> None:
+    # Link quality collapses exponentially to a low floor, with bursty recovery blips
+    tau = rng.uniform(1.0, 3.0, size=(m, 1))
+    floor = rng.uniform(2, 12, size=(m, 1))
+    link = ch["link_quality"]
+    collapsed = floor + (link - floor) * np.exp(-since / tau)
+    blips = (rng.random(size=since.shape) < 0.05) * rng.uniform(5, 20, size=since.shape)
+    ch["link_quality"] = np.where(since > 0, collapsed + blips, link)
+
+
+def _firmware_tamper(rng: np.random.Generator, m: int, since: np.ndarray, ch: Dict[str, np.ndarray]) -> None:
+    # Malicious payload burns power: drain rate jumps, sensors glitch intermittently
+    extra_drain = rng.uniform(0.3, 0.8, size=(m, 1))
+    ch["battery"] -= extra_drain * since
+    glitch = (since > 0) & (rng.random(size=since.shape) < 0.03)
+    ch["gps_health"] -= glitch * rng.uniform(10, 30, size=since.shape)
+    ch["link_quality"] -= glitch * rng.uniform(5, 15, size=since.shape)
+
+
+SIGNATURES: Dict[str, Callable[[np.random.Generator, int, np.ndarray, Dict[str, np.ndarray]], None]] = {
+    "gps_spoof": _gps_spoof,
+    "rf_link_hijack": _rf_link_hijack,
+    "firmware_tamper": _firmware_tamper,
+}
+
+
+def generate(
+    scenario: str,
+    drone_ids: Sequence[str],
+    *,
+    duration_s: float = 60.0,
+    rate_hz: float = 1.0,
+    affected_fraction: float = 1.0,
+    onset_s: Optional[float] = None,
+    seed: Optional[int] = None,
+    start: Optional[datetime] = None,
+) -> TelemetryFrame:
+    """
+    Build the whole (drones x ticks) frame in vectorized passes. The threat
+    signature is applied to `affected_fraction` of the fleet from onset_s
+    (default: a third of the way in), each drone with its own parameters.
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"unknown scenario: {scenario}")
+    if rate_hz <= 0 or duration_s <= 0:
+        raise ValueError("rate_hz and duration_s must be positive")
+
+    rng = np.random.default_rng(seed)
+    n = len(drone_ids)
+    ticks = max(1, int(round(duration_s * rate_hz)))
+    t = np.arange(ticks, dtype=np.float64) / rate_hz
+    ch = _baseline(rng, n, t)
+
+    affected = np.zeros(n, dtype=bool)
+    if scenario != BASELINE and n:
+        k = max(1, int(round(n * affected_fraction)))
+        affected[rng.choice(n, size=min(k, n), replace=False)] = True
+        onset = duration_s / 3 if onset_s is None else onset_s
+        # Stagger per-drone onset by up to 10% of the run
+        onsets = onset + rng.uniform(0, duration_s * 0.1, size=(int(affected.sum()), 1))
+        since = np.clip(t[None, :] - onsets, 0, None)
+        sub = {k_: v[affected] for k_, v in ch.items()}
+        SIGNATURES[scenario](rng, int(affected.sum()), since, sub)
+        for k_, v in sub.items():
+            ch[k_][affected] = v
+
+    battery = np.clip(np.rint(ch["battery"]), 0, 100).astype(np.int16)
+    link = np.clip(np.rint(ch["link_quality"]), 0, 100).astype(np.int16)
+    gps = np.clip(np.rint(ch["gps_health"]), 0, 100).astype(np.int16)
+
+    status = np.zeros(battery.shape, dtype=np.uint8)
+    status[(battery < 20) | (link < 40) | (gps < 50)] = 1
+    status[link < 10] = 2
+
+    return TelemetryFrame(
+        drone_ids=list(drone_ids),
+        start=start or datetime.now(timezone.utc),
+        t=t,
+        battery=battery,
+        link_quality=link,
+        gps_health=gps,
+        status=status,
+        affected=affected,
+    )
+
+
+def iter_ticks(frame: TelemetryFrame) -> Iterator[List[Dict[str, Any]]]:
+    """One list of sample dicts (ingest shape, no company_id) per tick."""
+    drones = frame.drone_ids
+    for j in range(frame.t.size):
+        ts = (frame.start + timedelta(seconds=float(frame.t[j]))).isoformat()
+        battery = frame.battery[:, j].tolist()
+        link = frame.link_quality[:, j].tolist()
+        gps = frame.gps_health[:, j].tolist()
+        status = frame.status[:, j].tolist()
+        yield [
+            {
+                "drone_id": drones[i],
+                "status": STATUS_CODES[status[i]],
+                "battery": battery[i],
+                "link_quality": link[i],
+                "gps_health": gps[i],
+                "last_seen": ts,
+            }
+            for i in range(len(drones))
+        ]
+
+
+# -------------------------
+# Sinks
+# -------------------------
+
+Sink = Callable[[List[Dict[str, Any]]], Any]
+
+
+def inprocess_sink(store: Any, company_id: str) -> Sink:
+    from .telemetry import ingest
+
+    return lambda batch: ingest(store, company_id, batch)
+
+
+def http_sink(base_url: str, token: str, timeout_s: float = 30.0) -> Sink:
+    url = base_url.rstrip("/") + "/api/telemetry"
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+
+    def _post(batch: List[Dict[str, Any]]) -> None:
+        body = json.dumps({"samples": batch}).encode("utf-8")
+        req = urllib.request.Request(url, data=body, headers=headers, method="POST")  # nosec B310 - operator-supplied URL
+        with urllib.request.urlopen(req, timeout=timeout_s) as resp:  # nosec B310
+            resp.read()
+
+    return _post
+
+
+@dataclass
+class StreamStats:
+    ticks: int = 0
+    samples: int = 0
+    elapsed_s: float = 0.0
+    behind_schedule_ticks: int = 0
+    latencies_ms: Optional[np.ndarray] = None
+
+    def summary(self) -> Dict[str, Any]:
+        lat = self.latencies_ms if self.latencies_ms is not None else np.zeros(0)
+        pct = np.percentile(lat, [50, 95, 99]).round(3).tolist() if lat.size else [None] * 3
+        return {
+            "ticks": self.ticks,
+            "samples": self.samples,
+            "elapsed_s": round(self.elapsed_s, 4),
+            "samples_per_s": round(self.samples / self.elapsed_s, 1) if self.elapsed_s else None,
+            "behind_schedule_ticks": self.behind_schedule_ticks,
+            "sink_latency_ms": {"p50": pct[0], "p95": pct[1], "p99": pct[2]},
+        }
+
+
+def stream(frame: TelemetryFrame, sink: Sink, *, realtime: bool = True, rate_hz: Optional[float] = None) -> StreamStats:
+    """
+    Push the frame into sink one tick at a time. realtime paces ticks at
+    rate_hz (default: the frame's own rate); otherwise ticks go out as fast
+    as the sink accepts them.
+    """
+    if rate_hz is None:
+        rate_hz = 1.0 / float(frame.t[1] - frame.t[0]) if frame.t.size > 1 else 1.0
+    interval = 1.0 / rate_hz
+    latencies = np.zeros(frame.t.size, dtype=np.float64)
+    stats = StreamStats()
+    t0 = time.perf_counter()
+    for j, batch in enumerate(iter_ticks(frame)):
+        if realtime:
+            delay = t0 + j * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -interval:
+                stats.behind_schedule_ticks += 1
+        s0 = time.perf_counter()
+        sink(batch)
+        latencies[j] = (time.perf_counter() - s0) * 1000
+        stats.ticks += 1
+        stats.samples += len(batch)
+    stats.elapsed_s = time.perf_counter() - t0
+    stats.latencies_ms = latencies[: stats.ticks]
+    return stats
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Synthetic telemetry generator / load driver")
+    parser.add_argument("--scenario", default=BASELINE, choices=SCENARIOS)
+    parser.add_argument("--drones", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30.0, help="simulated seconds")
+    parser.add_argument("--rate", type=float, default=1.0, help="samples per drone per second")
+    parser.add_argument("--affected", type=float, default=0.2, help="fraction of fleet with the signature")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-realtime", action="store_true", help="send as fast as possible")
+    parser.add_argument("--target", default=None, help="API base URL (HTTP mode)")
+    parser.add_argument("--token", default=None, help="bearer token for HTTP mode")
+    parser.add_argument("--storage", default=None, help="storage URL for in-process mode")
+    parser.add_argument("--company", default="default")
+    args = parser.parse_args(argv)
+
+    drone_ids = [f"UA-{i:05d}" for i in range(args.drones)]
+    g0 = time.perf_counter()
+    frame = generate(
+        args.scenario,
+        drone_ids,
+        duration_s=args.duration,
+        rate_hz=args.rate,
+        affected_fraction=args.affected,
+        seed=args.seed,
+    )
+    generate_s = time.perf_counter() - g0
+
+    if args.target:
+        if not args.token:
+            parser.error("--token is required with --target")
+        sink = http_sink(args.target, args.token)
+    else:
+        from .storage import open_storage
+
+        store = open_storage(args.storage)
+        store.init_schema()
+        sink = inprocess_sink(store, args.company)
+
+    stats = stream(frame, sink, realtime=not args.no_realtime, rate_hz=args.rate)
+    print(
+        json.dumps(
+            {
+                "scenario": args.scenario,
+                "drones": args.drones,
+                "affected_drones": int(frame.affected.sum()),
+                "generate_s": round(generate_s, 4),
+                **stats.summary(),
+            },
+            indent=2,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
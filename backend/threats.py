@@ -1,14 +1,27 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
 from uuid import uuid4
 import json
 from typing import Optional, Dict, Any, List
 
-from .auth import get_current_user
-from . import db
+from .correlation import CORRELATION, correlated_signal_event
+from .responses import rows_response
+from .simulation import (
+    BATCH_RUNS,
+    DEFAULT_CHUNK_SIZE,
+    MAX_SCHEDULE_OFFSET_S,
+    THREAT_TEMPLATES,
+    BatchCapacityError,
+    ScenarioStep,
+    plan_batch,
+    severity_for,
+    start_batch,
+    title_for,
+)
+from .storage import IncidentConflict, StorageBackend, get_storage
+from .zerotrust import require_action
 from .auth import USERS
 
 router = APIRouter(prefix="/api/threats", tags=["threats"])
@@ -31,81 +44,52 @@ class DroneAssignmentRequest(BaseModel):
 
 
 class ThreatRunRequest(BaseModel):
-    company_id: Optional[str] = None
     drone_id: Optional[str] = None
     threat_type: str
     training: bool = True
 
 
-class MitigationRequest(BaseModel):
-    action: str
+class ScenarioStepRequest(BaseModel):
+    threat_type: str
+    offset_s: float = Field(default=0.0, ge=0, le=MAX_SCHEDULE_OFFSET_S)
+    drone_ids: Optional[List[str]] = None
 
 
-def _ensure_drone_assignments_table() -> None:
-    conn = db.connect()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS drone_assignments (
-                drone_id TEXT PRIMARY KEY,
-                operator TEXT NOT NULL,
-                assigned_at TEXT NOT NULL,
-                assigned_by TEXT
-            )
-            """
-        )
-        conn.commit()
-    finally:
-        conn.close()
+class BatchThreatRunRequest(BaseModel):
+    drone_ids: List[str]
+    threat_types: List[str] = []
+    schedule: List[ScenarioStepRequest] = []
+    training: bool = True
+    chunk_size: int = Field(default=DEFAULT_CHUNK_SIZE, ge=1, le=5000)
+    realtime: bool = False  # pace writes to the schedule offsets
+    wait: bool = False      # run inline and return the finished batch
 
 
-def _get_assigned_operator(drone_id: str) -> Optional[str]:
-    _ensure_drone_assignments_table()
-    conn = db.connect()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT operator FROM drone_assignments WHERE drone_id=?",
-            (drone_id,),
-        )
-        row = cur.fetchone()
-        # row may be a tuple or sqlite3.Row depending on connection config
-        if not row:
-            return None
-        return row[0] if not isinstance(row, dict) else row.get("operator")
-    finally:
-        conn.close()
-
-
-def _set_assigned_operator(drone_id: str, operator: str, assigned_by: Optional[str]) -> None:
-    _ensure_drone_assignments_table()
-    conn = db.connect()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO drone_assignments (drone_id, operator, assigned_at, assigned_by)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(drone_id) DO UPDATE SET
-                operator=excluded.operator,
-                assigned_at=excluded.assigned_at,
-                assigned_by=excluded.assigned_by
-            """,
-            (
-                drone_id,
-                operator,
-                datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
-                assigned_by,
-            ),
-        )
-        conn.commit()
-    finally:
-        conn.close()
+class MitigationRequest(BaseModel):
+    action: str
+    expected_version: Optional[int] = None  # optimistic concurrency (incidents.version)
+
+
+def conflict_http_error(exc: IncidentConflict) -> HTTPException:
+    current = exc.current
+    return HTTPException(
+        status_code=409,
+        detail={
+            "message": "Incident changed or transition not allowed",
+            "incident_id": current.get("incident_id"),
+            "status": current.get("status"),
+            "version": current.get("version"),
+            "requested_status": exc.new_status,
+        },
+    )
 
 
 @router.post("/assign_operator")
-def assign_operator(req: DroneAssignmentRequest, user=Depends(get_current_user)):
+def assign_operator(
+    req: DroneAssignmentRequest,
+    user=Depends(require_action("drone.assign_operator")),
+    store: StorageBackend = Depends(get_storage),
+):
     # --- actor context from JWT (non-repudiation) ---
     user = user or {}
     actor = user.get("username") or "admin"
@@ -123,15 +107,15 @@ def assign_operator(req: DroneAssignmentRequest, user=Depends(get_current_user))
         raise HTTPException(status_code=400, detail="Unknown operator")
 
     # ✅ NEW: only emit evidence if operator actually changes
-    current = _get_assigned_operator(req.drone_id)
+    current = store.get_assigned_operator(req.drone_id)
     if current == req.operator:
         return {"ok": True, "drone_id": req.drone_id, "operator": req.operator, "unchanged": True}
 
     # --- state change ---
-    _set_assigned_operator(req.drone_id, req.operator, assigned_by=actor)
+    store.set_assigned_operator(req.drone_id, req.operator, assigned_by=actor)
 
     # --- append-only evidence event (Security Evidence Chain) ---
-    db.add_forensic_event(
+    store.add_forensic_event(
         company_id=company_id,
         drone_id=req.drone_id,
         incident_id=None,
@@ -146,60 +130,94 @@ def assign_operator(req: DroneAssignmentRequest, user=Depends(get_current_user))
 
 
 @router.get("/templates")
-def get_templates():
+def get_templates(user=Depends(require_action("threat.read"))):
     # Keep it simple; frontend expects templates list
     return {
         "ok": True,
-        "templates": [
-            {"id": "gps_spoof", "name": "GPS Spoofing", "severity": "high"},
-            {"id": "rf_link_hijack", "name": "RF Link Hijack", "severity": "critical"},
-            {"id": "firmware_tamper", "name": "Firmware Tamper", "severity": "high"},
-        ],
+        "templates": THREAT_TEMPLATES,
     }
 
 
 @router.post("/run")
-def run_threat(req: ThreatRunRequest, user=Depends(get_current_user)):
+def run_threat(
+    req: ThreatRunRequest,
+    user=Depends(require_action("threat.run")),
+    store: StorageBackend = Depends(get_storage),
+):
     # identity boundary
     user = user or {}
     actor = user.get("username") or "admin"
     role = (user.get("role") or "admin").lower()
-    company_id = req.company_id or user.get("company_id") or "default"
-
-    operator = _get_assigned_operator(req.drone_id)  # store operator on incident when available
+    # Signals always land in the caller's own tenant, whose policy was checked
+    company_id = user.get("company_id") or "default"
 
     incident_id = f"INC-{uuid4().hex[:12]}"
 
-    severity = "critical" if req.threat_type == "rf_link_hijack" else "high"
-    title = req.threat_type.replace("_", " ").title()
-
-    # 1) Forensics: simulation started
-    db.add_forensic_event(
-        company_id=company_id,
-        drone_id=req.drone_id,
-        incident_id=None,
-        event_type="simulation_started",
-        actor=actor,
-        action=req.threat_type,
-        result="ok",
-        payload_json=json.dumps({"training": req.training, "actor_role": role}),
-    )
-
-    # 2) Create incident (with operator if assigned)
-    incident = db.create_incident(
-        incident_id=incident_id,
+    # Repeat signal for an active (drone, threat) incident: fold, don't open a new row
+    incident_id, folded = CORRELATION.claim(
+        store,
         company_id=company_id,
         drone_id=req.drone_id,
         threat_type=req.threat_type,
-        severity=severity,
-        title=title,
         training=req.training,
-        details=json.dumps({"source": "threat_simulation"}),
-        operator=operator,
+        incident_id=incident_id,
     )
+    if folded:
+        store.add_forensic_event(
+            **correlated_signal_event(
+                company_id=company_id,
+                drone_id=req.drone_id,
+                incident_id=incident_id,
+                threat_type=req.threat_type,
+                actor=actor,
+                source="threat_simulation",
+                training=req.training,
+                actor_role=role,
+            )
+        )
+        return {
+            "ok": True,
+            "correlated": True,
+            "folded_signals": CORRELATION.folded_count(incident_id),
+            "incident": store.get_incident(incident_id),
+        }
+
+    operator = store.get_assigned_operator(req.drone_id)  # store operator on incident when available
+
+    severity = severity_for(req.threat_type)
+    title = title_for(req.threat_type)
+
+    try:
+        # 1) Forensics: simulation started
+        store.add_forensic_event(
+            company_id=company_id,
+            drone_id=req.drone_id,
+            incident_id=None,
+            event_type="simulation_started",
+            actor=actor,
+            action=req.threat_type,
+            result="ok",
+            payload_json=json.dumps({"training": req.training, "actor_role": role}),
+        )
+
+        # 2) Create incident (with operator if assigned)
+        incident = store.create_incident(
+            incident_id=incident_id,
+            company_id=company_id,
+            drone_id=req.drone_id,
+            threat_type=req.threat_type,
+            severity=severity,
+            title=title,
+            training=req.training,
+            details=json.dumps({"source": "threat_simulation"}),
+            operator=operator,
+        )
+    except Exception:
+        CORRELATION.release(incident_id)
+        raise
 
     # 3) Forensics: incident created
-    db.add_forensic_event(
+    store.add_forensic_event(
         company_id=company_id,
         drone_id=req.drone_id,
         incident_id=incident_id,
@@ -218,38 +236,115 @@ def run_threat(req: ThreatRunRequest, user=Depends(get_current_user)):
         ),
     )
 
-    return {"ok": True, "incident": incident}
+    return {"ok": True, "correlated": False, "incident": incident}
+
+
+@router.post("/run_batch")
+def run_threat_batch(
+    req: BatchThreatRunRequest,
+    user=Depends(require_action("threat.run_batch")),
+    store: StorageBackend = Depends(get_storage),
+):
+    """
+    Fleet-wide drill: one incident per (drone, threat) in the plan, written
+    in bulk transactions. Poll GET /run_batch/{batch_id} for progress.
+    """
+    user = user or {}
+    actor = user.get("username") or "admin"
+    role = (user.get("role") or "admin").lower()
+    # Drills always land in the caller's own tenant
+    company_id = user.get("company_id") or "default"
+
+    try:
+        plan = plan_batch(
+            req.drone_ids,
+            req.threat_types,
+            [ScenarioStep(threat_type=s.threat_type, offset_s=s.offset_s, drone_ids=s.drone_ids) for s in req.schedule],
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    try:
+        run = start_batch(
+            store,
+            plan,
+            company_id=company_id,
+            actor=actor,
+            actor_role=role,
+            training=req.training,
+            chunk_size=req.chunk_size,
+            realtime=req.realtime,
+            background=not req.wait,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except BatchCapacityError as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "5"})
+    return {"ok": True, "batch": run.snapshot()}
+
+
+@router.get("/run_batch/{batch_id}")
+def get_threat_batch(
+    batch_id: str,
+    user=Depends(require_action("threat.run_batch")),
+):
+    run = BATCH_RUNS.get(batch_id)
+    # Runs from other tenants are indistinguishable from unknown ones
+    if run is None or run.company_id != ((user or {}).get("company_id") or "default"):
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return {"ok": True, "batch": run.snapshot()}
 
 
 @inc_router.get("/active")
-def get_active_incidents(user=Depends(get_current_user)):
+def get_active_incidents(
+    user=Depends(require_action("incident.read")),
+    store: StorageBackend = Depends(get_storage),
+):
+    company_id = (user or {}).get("company_id") or "default"
+    incidents = store.list_active_incidents(company_id=company_id, drone_id=None)
+    for inc in incidents:
+        inc["folded_signals"] = CORRELATION.folded_count(inc["incident_id"])
+    return rows_response("incidents", incidents)
+
+
+@inc_router.get("/correlation")
+def get_correlation_stats(user=Depends(require_action("incident.read"))):
     company_id = (user or {}).get("company_id") or "default"
-    incidents = db.list_active_incidents(company_id=company_id, drone_id=None)
-    return {"ok": True, "incidents": incidents}
+    return {"ok": True, **CORRELATION.stats(company_id)}
 
 
 @inc_router.post("/{incident_id}/mitigate")
-def mitigate(incident_id: str, req: MitigationRequest, user=Depends(get_current_user)):
+def mitigate(
+    incident_id: str,
+    req: MitigationRequest,
+    user=Depends(require_action("incident.mitigate")),
+    store: StorageBackend = Depends(get_storage),
+):
     user = user or {}
     actor = user.get("username") or "admin"
     actor_role = (user.get("role") or "admin").lower()
 
-    inc = db.get_incident(incident_id)
-    if not inc:
+    # Single round-trip CAS; the returned row replaces the old pre-read
+    try:
+        updated = store.update_incident_status(
+            company_id=user.get("company_id") or "default",
+            incident_id=incident_id,
+            new_status="mitigated",
+            mitigated_action=req.action,
+            details=f"Mitigation executed (training): {req.action}",
+            expected_version=req.expected_version,
+        )
+    except IncidentConflict as exc:
+        raise conflict_http_error(exc)
+    if not updated:
         raise HTTPException(status_code=404, detail="Incident not found")
+    CORRELATION.resolve(updated)
 
-    operator = inc.get("operator")  # or _get_assigned_operator(inc.get("drone_id"))
+    operator = updated.get("operator")  # or store.get_assigned_operator(updated.get("drone_id"))
 
-    updated = db.update_incident_status(
-        incident_id=incident_id,
-        new_status="mitigated",
-        mitigated_action=req.action,
-        details=f"Mitigation executed (training): {req.action}",
-    )
-
-    db.add_forensic_event(
-        company_id=inc["company_id"],
-        drone_id=inc.get("drone_id"),
+    store.add_forensic_event(
+        company_id=updated["company_id"],
+        drone_id=updated.get("drone_id"),
         incident_id=incident_id,
         event_type="mitigation_action_executed",
         actor=actor,  # JWT actor ONLY
@@ -264,25 +359,34 @@ def mitigate(incident_id: str, req: MitigationRequest, user=Depends(get_current_
 
 
 @inc_router.post("/{incident_id}/close")
-def close(incident_id: str, user=Depends(get_current_user)):
+def close(
+    incident_id: str,
+    expected_version: Optional[int] = Query(default=None),
+    user=Depends(require_action("incident.close")),
+    store: StorageBackend = Depends(get_storage),
+):
     user = user or {}
     actor = user.get("username") or "admin"
     actor_role = (user.get("role") or "admin").lower()
 
-    inc = db.get_incident(incident_id)
-    if not inc:
+    try:
+        updated = store.update_incident_status(
+            company_id=user.get("company_id") or "default",
+            incident_id=incident_id,
+            new_status="closed",
+            expected_version=expected_version,
+        )
+    except IncidentConflict as exc:
+        raise conflict_http_error(exc)
+    if not updated:
         raise HTTPException(status_code=404, detail="Incident not found")
+    CORRELATION.resolve(updated)
 
-    operator = inc.get("operator")  # keep separate from actor
-
-    updated = db.update_incident_status(
-        incident_id=incident_id,
-        new_status="closed",
-    )
+    operator = updated.get("operator")  # keep separate from actor
 
-    db.add_forensic_event(
-        company_id=inc["company_id"],
-        drone_id=inc.get("drone_id"),
+    store.add_forensic_event(
+        company_id=updated["company_id"],
+        drone_id=updated.get("drone_id"),
         incident_id=incident_id,
         event_type="incident_closed",
         actor=actor,  # JWT actor ONLY
@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+import atexit
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, TypeVar
+
+# =========================================================
+# Distributed tracing (OpenTelemetry-compatible, opt-in)
+# =========================================================
+# Dependency-free spans with OTel semantics: 128-bit trace ids, 64-bit span
+# ids, W3C `traceparent` propagation and OTLP/JSON export. Enabled with
+# VIGIL_TRACING=1; spans are produced for
+#   - every HTTP request           TracingMiddleware (SERVER, parent taken
+#                                  from an incoming traceparent header)
+#   - every public db.* function   @traced (CLIENT, one per call/connection)
+#   - every SQLite COMMIT          db.InstrumentedConnection.commit
+#   - background batch drills      simulation.start_batch (bind_context)
+# The current span lives in a ContextVar, so FastAPI's threadpool handlers
+# inherit it; plain threads must be started through bind_context().
+#
+# Finished spans are queued and shipped by a background flusher thread
+# every VIGIL_TRACE_FLUSH_SECONDS (or once MAX_BATCH spans are queued) to
+# VIGIL_TRACE_EXPORT:
+#   file:/path/spans.jsonl      one OTLP ExportTraceServiceRequest per line
+#   http(s)://host:4318/v1/traces   OTLP/HTTP JSON (collector)
+#   memory                      kept in-process (TRACER.exporter.spans)
+# VIGIL_TRACE_SAMPLE_RATIO samples root spans; children follow their parent.
+# =========================================================
+
+SERVICE_NAME = os.environ.get("VIGIL_SERVICE_NAME", "vigilaero-backend")
+TRACE_EXPORT = os.environ.get("VIGIL_TRACE_EXPORT", "file:traces.jsonl")
+SAMPLE_RATIO = float(os.environ.get("VIGIL_TRACE_SAMPLE_RATIO", "1.0"))
+FLUSH_SECONDS = float(os.environ.get("VIGIL_TRACE_FLUSH_SECONDS", "1.0"))
+MAX_QUEUE = 20000
+MAX_BATCH = 512
+MEMORY_SPANS = 5000
+
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_rand = random.SystemRandom()
+
+
+def _attr_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attrs(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": k, "value": _attr_value(v)} for k, v in attributes.items() if v is not None]
+
+
+class Span:
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_span_id", "kind", "sampled",
+        "start_ns", "end_ns", "_t0", "attributes", "status_code", "status_message", "events",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        span_id: str,
+        parent_span_id: Optional[str],
+        kind: int,
+        sampled: bool,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self._t0 = time.perf_counter_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = dict(attributes) if attributes else {}
+        self.status_code = STATUS_UNSET
+        self.status_message = ""
+        self.events: List[Dict[str, Any]] = []
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status_code = STATUS_ERROR
+        self.status_message = message
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.set_error(f"{type(exc).__name__}: {exc}")
+        self.events.append(
+            {
+                "timeUnixNano": str(time.time_ns()),
+                "name": "exception",
+                "attributes": _attrs({"exception.type": type(exc).__name__, "exception.message": str(exc)}),
+            }
+        )
+
+    def end(self) -> None:
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._t0)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _attrs(self.attributes),
+            "status": {"code": self.status_code},
+        }
+        if self.parent_span_id:
+            out["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            out["status"]["message"] = self.status_message
+        if self.events:
+            out["events"] = self.events
+        return out
+
+
+class RemoteParent:
+    """Span context received from a caller (W3C traceparent)."""
+
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[RemoteParent]:
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    version, trace_id, span_id, flags = parts[0], parts[1].lower(), parts[2].lower(), parts[3]
+    try:
+        int(trace_id, 16), int(span_id, 16)
+        sampled = bool(int(flags[:2], 16) & 1)
+    except ValueError:
+        return None
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return RemoteParent(trace_id, span_id, sampled)
+
+
+_current: contextvars.ContextVar[Optional[Any]] = contextvars.ContextVar("vigil_trace_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    span = _current.get()
+    return span if isinstance(span, Span) else None
+
+
+# ---------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------
+
+
+def _request_body(spans: List[Span]) -> Dict[str, Any]:
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _attrs({"service.name": SERVICE_NAME})},
+                "scopeSpans": [{"scope": {"name": "vigilaero.tracing"}, "spans": [s.to_otlp() for s in spans]}],
+            }
+        ]
+    }
+
+
+class FileExporter:
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        line = json.dumps(_request_body(spans), separators=(",", ":"))
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+
+class OTLPHttpExporter:
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]) -> None:
+        data = json.dumps(_request_body(spans), separators=(",", ":")).encode("utf-8")
+        req = urllib.request.Request(
+            self.endpoint, data=data, method="POST", headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:  # nosec B310 - operator-configured URL
+            resp.read()
+
+
+class MemoryExporter:
+    def __init__(self, maxlen: int = MEMORY_SPANS):
+        self.spans: Deque[Span] = deque(maxlen=maxlen)
+
+    def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+    def trace(self, trace_id: str) -> List[Span]:
+        return [s for s in list(self.spans) if s.trace_id == trace_id]
+
+
+def exporter_from_url(url: str) -> Any:
+    if url == "memory":
+        return MemoryExporter()
+    if url.startswith(("http://", "https://")):
+        return OTLPHttpExporter(url)
+    if url.startswith("file:"):
+        return FileExporter(url[len("file:"):])
+    raise ValueError(f"Unsupported VIGIL_TRACE_EXPORT: {url!r}")
+
+
+# ---------------------------------------------------------
+# Tracer + batch processor
+# ---------------------------------------------------------
+
+
+class Tracer:
+    def __init__(self, enabled: bool, exporter: Any = None, sample_ratio: float = SAMPLE_RATIO):
+        self.enabled = enabled
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self.exported = 0
+        self.dropped = 0
+        self.export_errors = 0
+        self._queue: Deque[Span] = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    # ---- span lifecycle -----------------------------------------------
+
+    def _new_span(self, name: str, kind: int, attributes: Optional[Dict[str, Any]], parent: Any) -> Span:
+        if parent is None:
+            parent = _current.get()
+        if parent is not None:
+            return Span(name, parent.trace_id, "%016x" % _rand.getrandbits(64), parent.span_id,
+                        kind, parent.sampled, attributes)
+        sampled = self.sample_ratio >= 1.0 or _rand.random() < self.sample_ratio
+        return Span(name, "%032x" % _rand.getrandbits(128), "%016x" % _rand.getrandbits(64), None,
+                    kind, sampled, attributes)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: int = KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Any = None,
+    ) -> Iterator[Optional[Span]]:
+        if not self.enabled:
+            yield None
+            return
+        span = self._new_span(name, kind, attributes, parent)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            _current.reset(token)
+            span.end()
+            if span.sampled:
+                self._enqueue(span)
+
+    def _enqueue(self, span: Span) -> None:
+        with self._lock:
+            if len(self._queue) >= MAX_QUEUE:
+                self.dropped += 1
+                return
+            self._queue.append(span)
+            n = len(self._queue)
+        if self._flusher is None:
+            self._start_flusher()
+        if n >= MAX_BATCH:
+            self._wake.set()
+
+    # ---- background flusher -------------------------------------------
+
+    def _start_flusher(self) -> None:
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name="vigil-trace-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._wake.wait(FLUSH_SECONDS)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Export everything queued so far; returns the number of spans shipped."""
+        shipped = 0
+        while True:
+            with self._lock:
+                batch = [self._queue.popleft() for _ in range(min(MAX_BATCH, len(self._queue)))]
+            if not batch:
+                return shipped
+            try:
+                if self.exporter is not None:
+                    self.exporter.export(batch)
+                self.exported += len(batch)
+                shipped += len(batch)
+            except Exception:  # exporting must never break the app
+                self.export_errors += 1
+                self.dropped += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queued = len(self._queue)
+        return {
+            "enabled": self.enabled,
+            "exported": self.exported,
+            "queued": queued,
+            "dropped": self.dropped,
+            "export_errors": self.export_errors,
+        }
+
+
+def _tracer_from_env() -> Tracer:
+    if os.environ.get("VIGIL_TRACING", "0") != "1":
+        return Tracer(enabled=False)
+    return Tracer(enabled=True, exporter=exporter_from_url(TRACE_EXPORT))
+
+
+TRACER = _tracer_from_env()
+atexit.register(TRACER.flush)
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def traced(fn: F) -> F:
+    """Wrap a db.* function in a CLIENT span named db.<function>."""
+    name = "db." + fn.__name__
+    attributes = {"db.system": "sqlite", "db.operation": fn.__name__}
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not TRACER.enabled:
+            return fn(*args, **kwargs)
+        with TRACER.span(name, KIND_CLIENT, attributes):
+            return fn(*args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def bind_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Run fn (e.g. a Thread target) inside the caller's current context."""
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def runner(*args: Any, **kwargs: Any) -> Any:
+        return ctx.run(fn, *args, **kwargs)
+
+    return runner
+
+
+class TracingMiddleware:
+    """Opens a SERVER span per HTTP request and echoes its traceparent."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not TRACER.enabled:
+            await self.app(scope, receive, send)
+            return
+        incoming = None
+        for key, value in scope.get("headers") or ():
+            if key == b"traceparent":
+                incoming = parse_traceparent(value.decode("latin-1"))
+                break
+        method = scope.get("method", "")
+        attributes = {"http.request.method": method, "url.path": scope.get("path", "")}
+        with TRACER.span(f"{method} {scope.get('path', '')}", KIND_SERVER, attributes, parent=incoming) as span:
+            assert span is not None
+
+            async def _send(message: Dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    route = getattr(scope.get("route"), "path", None)
+                    if route:
+                        span.name = f"{method} {route}"
+                        span.set_attribute("http.route", route)
+                    status = message["status"]
+                    span.set_attribute("http.response.status_code", status)
+                    if status >= 500:
+                        span.set_error(f"HTTP {status}")
+                    headers = list(message.get("headers") or [])
+                    headers.append((b"traceparent", span.traceparent().encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, _send)
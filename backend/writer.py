@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import argparse
+import os
+import queue
+import secrets
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import db
+from .querycache import QUERY_CACHE
+from .storage import SQLiteBackend
+
+# =========================================================
+# Multi-process mode: one writer process, N API workers
+# =========================================================
+# Several uvicorn workers writing to one SQLite file contend for the
+# write lock ("database is locked"). In multi-process mode:
+#   - a single writer process (`python -m backend.writer`) owns every
+#     write and applies them one at a time on one thread
+#   - API workers use VIGIL_STORAGE_URL=sqlite+writer:///path/to/vigil.db,
+#     i.e. WriterClientBackend: reads run locally against the file (WAL, so
+#     they never wait on the writer) and the methods in WRITE_METHODS are
+#     forwarded over a local socket (VIGIL_WRITER_SOCKET, authenticated with
+#     VIGIL_WRITER_AUTHKEY)
+#
+#   python -m backend.writer --db backend/vigil.db --workers 4 --port 8000
+# starts the writer, then uvicorn with 4 workers wired to it.
+#
+# Per-process state stays per worker: the correlation index revalidates
+# against the database (VIGIL_CORRELATION_REVALIDATE_SECONDS), batch-run
+# progress is only visible on the worker that started it, detectors
+# baseline the drones whose telemetry reached that worker, the geo position
+# index and the recent-sample rings warm from the database and then follow
+# that worker's ingests (set VIGIL_RECENT=0 to read recent samples from the
+# database instead), the list query cache (backend/querycache.py) sees this
+# worker's writes at once and other workers' within VIGIL_QUERY_CACHE_TTL,
+# admission budgets (backend/admission.py) are enforced by each worker on
+# its own, and /metrics reports the worker that served the scrape.
+# =========================================================
+
+WRITER_SOCKET_ENV = "VIGIL_WRITER_SOCKET"
+WRITER_AUTHKEY_ENV = "VIGIL_WRITER_AUTHKEY"
+DEFAULT_SOCKET = "/tmp/vigil-writer.sock"
+CLIENT_POOL_SIZE = int(os.environ.get("VIGIL_WRITER_POOL", "8"))
+CONNECT_TIMEOUT_S = 10.0
+
+# StorageBackend methods that modify the database
+WRITE_METHODS = frozenset(
+    {
+        "init_schema",
+        "get_zerotrust_policy",  # seeds a default row on miss
+        "set_zerotrust_policy",
+        "create_incident",
+        "create_incidents_bulk",
+        "update_incident_status",
+        "add_forensic_event",
+        "add_forensic_events",
+        "register_evidence",
+        "create_evidence",
+        "review_evidence",
+        "ingest_telemetry",
+        "set_assigned_operator",
+        "create_geofence",
+        "delete_geofence",
+        "create_job",
+        "claim_job",
+        "update_job_progress",
+        "heartbeat_job",
+        "requeue_stale_jobs",
+        "finish_job",
+    }
+)
+
+
+def _authkey() -> bytes:
+    key = os.environ.get(WRITER_AUTHKEY_ENV)
+    if not key:
+        raise RuntimeError(f"{WRITER_AUTHKEY_ENV} must be set for the writer channel")
+    return key.encode("utf-8")
+
+
+def _socket_path() -> str:
+    return os.environ.get(WRITER_SOCKET_ENV) or DEFAULT_SOCKET
+
+
+# ---------------------------------------------------------
+# Writer process
+# ---------------------------------------------------------
+
+
+class WriterServer:
+    def __init__(self, db_path: str, address: str, authkey: bytes):
+        self.backend = SQLiteBackend(db_path)
+        self.address = address
+        self.authkey = authkey
+        # One thread applies every write, in arrival order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vigil-writer")
+        self.ops = 0
+        self.errors = 0
+        self.clients = 0
+
+    def prepare(self) -> None:
+        self.backend.init_schema()
+        conn = sqlite3.connect(db.DB_PATH)
+        try:
+            # Readers in the API workers must not block (or be blocked by) the writer
+            conn.execute("PRAGMA journal_mode=WAL")
+        finally:
+            conn.close()
+
+    def _apply(self, method: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        self.ops += 1
+        return getattr(self.backend, method)(*args, **kwargs)
+
+    def _serve_client(self, conn: Connection) -> None:
+        try:
+            while True:
+                try:
+                    method, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                if method not in WRITE_METHODS:
+                    conn.send(("err", ValueError(f"not a write method: {method}")))
+                    continue
+                try:
+                    result = self._executor.submit(self._apply, method, args, kwargs).result()
+                    reply: Tuple[str, Any] = ("ok", result)
+                except Exception as exc:  # re-raised in the worker
+                    self.errors += 1
+                    reply = ("err", exc)
+                try:
+                    conn.send(reply)
+                except (TypeError, AttributeError, ValueError):  # unpicklable exception
+                    conn.send(("err", RuntimeError(repr(reply[1]))))
+        finally:
+            conn.close()
+
+    def serve_forever(self, ready: Optional[threading.Event] = None) -> None:
+        path = Path(self.address)
+        if path.exists():
+            path.unlink()
+        with Listener(self.address, family="AF_UNIX", authkey=self.authkey) as listener:
+            os.chmod(self.address, 0o600)
+            if ready is not None:
+                ready.set()
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception:  # failed handshake (wrong authkey) or transient accept error
+                    continue
+                self.clients += 1
+                threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+
+# ---------------------------------------------------------
+# API-worker side
+# ---------------------------------------------------------
+
+
+class WriterClientBackend(SQLiteBackend):
+    """SQLiteBackend whose writes are executed by the writer process."""
+
+    name = "sqlite+writer"
+
+    def __init__(self, path: Optional[str] = None, address: Optional[str] = None, authkey: Optional[bytes] = None):
+        super().__init__(path)
+        self.address = address or _socket_path()
+        self.authkey = authkey or _authkey()
+        self._pool: "queue.LifoQueue[Connection]" = queue.LifoQueue()
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Connection:
+        deadline = time.monotonic() + CONNECT_TIMEOUT_S
+        while True:
+            try:
+                return Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)  # writer still starting
+
+    def _borrow(self) -> Connection:
+        while True:
+            try:
+                return self._pool.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                grow = self._open < CLIENT_POOL_SIZE
+                if grow:
+                    self._open += 1
+            if grow:
+                try:
+                    return self._connect()
+                except BaseException:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+            try:
+                # Re-check periodically: a dropped connection frees a slot
+                return self._pool.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        conn = self._borrow()
+        try:
+            conn.send((method, args, kwargs))
+            status, value = conn.recv()
+        except BaseException:
+            # The channel may be mid-message; drop it rather than reuse it
+            conn.close()
+            with self._lock:
+                self._open -= 1
+            raise
+        self._pool.put(conn)
+        if status == "err":
+            raise value
+        return value
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # --- forwarded writes ---
+    def init_schema(self) -> None:
+        self._call("init_schema")
+
+    def get_zerotrust_policy(self, company_id: str = "default") -> Dict[str, Any]:
+        return self._call("get_zerotrust_policy", company_id)
+
+    def set_zerotrust_policy(self, company_id: str, policy_json: str) -> Dict[str, Any]:
+        return self._call("set_zerotrust_policy", company_id, policy_json)
+
+    def create_incident(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._call("create_incident", **kwargs)
+
+    def create_incidents_bulk(
+        self,
+        incidents: Iterable[Dict[str, Any]],
+        events: Iterable[Dict[str, Any]] = (),
+    ) -> int:
+        events = list(events)
+        written = self._call("create_incidents_bulk", list(incidents), events)
+        QUERY_CACHE.forensics_written(events)
+        return written
+
+    def update_incident_status(self, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        return self._call("update_incident_status", **kwargs)
+
+    # The writer process's cache is not this worker's: invalidate locally
+    def add_forensic_event(self, **kwargs: Any) -> None:
+        self._call("add_forensic_event", **kwargs)
+        QUERY_CACHE.forensics_written([kwargs])
+
+    def add_forensic_events(self, events: Iterable[Dict[str, Any]]) -> int:
+        events = list(events)
+        written = self._call("add_forensic_events", events)
+        QUERY_CACHE.forensics_written(events)
+        return written
+
+    def register_evidence(self, **kwargs: Any) -> None:
+        self._call("register_evidence", **kwargs)
+        QUERY_CACHE.evidence_written(kwargs["company_id"], kwargs.get("drone_id"))
+
+    def create_evidence(self, **kwargs: Any) -> Dict[str, Any]:
+        row = self._call("create_evidence", **kwargs)
+        QUERY_CACHE.evidence_written(kwargs["company_id"], kwargs.get("drone_id"))
+        return row
+
+    def review_evidence(self, **kwargs: Any) -> Dict[str, Any]:
+        row = self._call("review_evidence", **kwargs)
+        if row:
+            QUERY_CACHE.evidence_written(row["company_id"], row.get("drone_id"))
+        return row
+
+    def ingest_telemetry(self, samples: Iterable[Dict[str, Any]]) -> int:
+        return self._call("ingest_telemetry", list(samples))
+
+    def set_assigned_operator(self, drone_id: str, operator: str, assigned_by: Optional[str]) -> None:
+        self._call("set_assigned_operator", drone_id, operator, assigned_by)
+
+    def create_geofence(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._call("create_geofence", **kwargs)
+
+    def delete_geofence(self, company_id: str, geofence_id: str) -> bool:
+        return self._call("delete_geofence", company_id, geofence_id)
+
+    def create_job(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._call("create_job", **kwargs)
+
+    def claim_job(self, worker: str, kinds: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        return self._call("claim_job", worker, list(kinds) if kinds is not None else None)
+
+    def update_job_progress(self, job_id: str, progress: float, message: Optional[str] = None) -> None:
+        self._call("update_job_progress", job_id, progress, message)
+
+    def heartbeat_job(self, job_id: str, worker: str) -> bool:
+        return self._call("heartbeat_job", job_id, worker)
+
+    def requeue_stale_jobs(self, stale_before: str, max_attempts: int) -> int:
+        return self._call("requeue_stale_jobs", stale_before, max_attempts)
+
+    def finish_job(self, job_id: str, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        return self._call("finish_job", job_id, **kwargs)
+
+
+# ---------------------------------------------------------
+# CLI: writer alone, or writer + uvicorn workers
+# ---------------------------------------------------------
+
+
+def start_writer_thread(db_path: str, address: str, authkey: bytes) -> WriterServer:
+    server = WriterServer(db_path, address, authkey)
+    server.prepare()
+    ready = threading.Event()
+    threading.Thread(target=server.serve_forever, args=(ready,), name="vigil-writer-listener", daemon=True).start()
+    ready.wait()
+    return server
+
+
+def run_workers(host: str, port: int, workers: int) -> None:
+    """uvicorn with `workers` API processes sharing one listening socket."""
+    import uvicorn  # only needed when this process also launches the API workers
+    from uvicorn.supervisors import Multiprocess
+
+    config = uvicorn.Config("backend.main:app", host=host, port=port, workers=workers, log_level="warning")
+    server = uvicorn.Server(config)
+    # uvicorn's own bind_socket() leaves proto=0, so asyncio never sets
+    # TCP_NODELAY on accepted connections and every response waits out
+    # delayed ACKs (~40 ms). Bind with an explicit IPPROTO_TCP instead.
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    Multiprocess(config, target=server.run, sockets=[sock]).run()
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Single-writer process for multi-worker deployments")
+    parser.add_argument("--db", default=os.environ.get("VIGIL_DB_PATH") or str(db.DB_PATH))
+    parser.add_argument("--socket", default=_socket_path())
+    parser.add_argument("--workers", type=int, default=0, help="also run uvicorn with this many API workers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    authkey = os.environ.get(WRITER_AUTHKEY_ENV) or secrets.token_hex(32)
+    os.environ[WRITER_AUTHKEY_ENV] = authkey
+    db_path = str(Path(args.db).resolve())
+    if args.workers <= 0:
+        server = WriterServer(db_path, args.socket, authkey.encode("utf-8"))
+        server.prepare()
+        server.serve_forever()
+        return 0
+
+    # The writer lives in this (supervisor) process; uvicorn spawns the
+    # workers, which inherit the storage URL, socket and authkey.
+    start_writer_thread(db_path, args.socket, authkey.encode("utf-8"))
+    os.environ["VIGIL_STORAGE_URL"] = f"sqlite+writer:///{db_path}"
+    os.environ[WRITER_SOCKET_ENV] = args.socket
+    run_workers(args.host, args.port, args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
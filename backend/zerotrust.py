@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from fastapi import Depends, HTTPException
+
+from .auth import get_current_user
+from .storage import StorageBackend, get_storage
+
+# =========================================================
+# Zero Trust enforcement
+# =========================================================
+# policy_json (per company) is compiled once into a CompiledPolicy and kept
+# in-process. Cache entries carry the row version; after REVALIDATE_SECONDS
+# the next request re-reads only the version column and recompiles when it
+# moved (another worker wrote a new policy). Writes through this process
+# replace the entry immediately.
+#
+# Accepted policy_json shape (all keys optional):
+#   {
+#     "enabled": true,
+#     "roles": ["Admin", "Operator"],          # or "Admin,Operator"
+#     "timeout": 15,                           # session timeout, minutes
+#     "allowed_actions": {"Operator": ["incident.*", "evidence.read"]}
+#   }
+# "{}" compiles to a disabled policy, so unconfigured tenants are unaffected.
+# POST /security/zerotrust is admin-only and refuses a policy that would
+# take security.policy.write away from the caller's own role (a lockout
+# the API could not undo).
+# =========================================================
+
+REVALIDATE_SECONDS = float(os.environ.get("VIGIL_ZT_REVALIDATE_SECONDS", "5"))
+
+
+class PolicyError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    company_id: str
+    version: int
+    enabled: bool = False
+    roles: FrozenSet[str] = frozenset()
+    session_timeout_s: Optional[int] = None
+    # role -> (exact actions, action prefixes); roles absent here may do anything
+    allowed_actions: Dict[str, Tuple[FrozenSet[str], Tuple[str, ...]]] = field(default_factory=dict)
+    # Source row, kept so GET /security/zerotrust can answer from the cache
+    policy_json: str = "{}"
+    updated_at: Optional[str] = None
+
+    def evaluate(self, role: Optional[str], action: str, issued_at: Optional[float], now: float) -> Optional[Tuple[int, str]]:
+        """Returns None when allowed, else (status_code, detail)."""
+        if not self.enabled:
+            return None
+        role_key = (role or "").lower()
+        if self.roles and role_key not in self.roles:
+            return 403, "Role not permitted by zero-trust policy"
+        if self.session_timeout_s is not None and issued_at is not None:
+            if now - issued_at > self.session_timeout_s:
+                return 401, "Session expired by zero-trust policy"
+        rule = self.allowed_actions.get(role_key)
+        if rule is not None:
+            exact, prefixes = rule
+            if action not in exact and not action.startswith(prefixes):
+                return 403, f"Action '{action}' not permitted by zero-trust policy"
+        return None
+
+    def to_public(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "roles": sorted(self.roles),
+            "timeout": self.session_timeout_s // 60 if self.session_timeout_s is not None else None,
+            "version": self.version,
+        }
+
+
+def _compile_actions(raw: Any) -> Tuple[FrozenSet[str], Tuple[str, ...]]:
+    if not isinstance(raw, (list, tuple)):
+        raise PolicyError("allowed_actions entries must be lists")
+    exact = set()
+    prefixes = []
+    for item in raw:
+        action = str(item).strip()
+        if action == "*":
+            prefixes.append("")
+        elif action.endswith("*"):
+            prefixes.append(action[:-1])
+        elif action:
+            exact.add(action)
+    return frozenset(exact), tuple(prefixes)
+
+
+def compile_policy(
+    company_id: str,
+    policy_json: Optional[str],
+    version: int = 1,
+    updated_at: Optional[str] = None,
+) -> CompiledPolicy:
+    try:
+        raw = json.loads(policy_json or "{}")
+    except json.JSONDecodeError as exc:
+        raise PolicyError(f"policy is not valid JSON: {exc.msg}") from exc
+    if not isinstance(raw, dict):
+        raise PolicyError("policy must be a JSON object")
+
+    roles_raw = raw.get("roles") or []
+    if isinstance(roles_raw, str):
+        roles_raw = roles_raw.split(",")
+    roles = frozenset(str(r).strip().lower() for r in roles_raw if str(r).strip())
+
+    timeout = raw.get("session_timeout_minutes", raw.get("timeout"))
+    try:
+        minutes = int(timeout) if timeout not in (None, "") else 0
+    except (TypeError, ValueError) as exc:
+        raise PolicyError("timeout must be a number of minutes") from exc
+    session_timeout_s = minutes * 60 if minutes > 0 else None
+
+    actions_raw = raw.get("allowed_actions") or {}
+    if not isinstance(actions_raw, dict):
+        raise PolicyError("allowed_actions must be an object keyed by role")
+    allowed_actions = {str(role).lower(): _compile_actions(acts) for role, acts in actions_raw.items()}
+
+    return CompiledPolicy(
+        company_id=company_id,
+        version=version,
+        enabled=bool(raw.get("enabled", False)),
+        roles=roles,
+        session_timeout_s=session_timeout_s,
+        allowed_actions=allowed_actions,
+        policy_json=policy_json or "{}",
+        updated_at=updated_at,
+    )
+
+
+class PolicyCache:
+    def __init__(self, revalidate_seconds: float = REVALIDATE_SECONDS):
+        self.revalidate_seconds = revalidate_seconds
+        self._entries: Dict[str, Tuple[CompiledPolicy, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, company_id: str, store: StorageBackend) -> CompiledPolicy:
+        now = time.monotonic()
+        entry = self._entries.get(company_id)
+        if entry is not None:
+            policy, checked_at = entry
+            if now - checked_at < self.revalidate_seconds:
+                return policy
+            if store.get_zerotrust_policy_version(company_id) == policy.version:
+                self._entries[company_id] = (policy, now)
+                return policy
+        return self._load(company_id, store, now)
+
+    def _load(self, company_id: str, store: StorageBackend, now: float) -> CompiledPolicy:
+        with self._lock:
+            row = store.get_zerotrust_policy(company_id)
+            version = int(row.get("version") or 1)
+            try:
+                policy = compile_policy(company_id, row["policy_json"], version, row.get("updated_at"))
+            except PolicyError:
+                # A stored policy that no longer compiles must not lock everyone out
+                policy = CompiledPolicy(
+                    company_id=company_id,
+                    version=version,
+                    policy_json=row["policy_json"],
+                    updated_at=row.get("updated_at"),
+                )
+            self._entries[company_id] = (policy, now)
+            return policy
+
+    def put(self, row: Dict[str, Any]) -> CompiledPolicy:
+        policy = compile_policy(
+            row["company_id"], row["policy_json"], int(row.get("version") or 1), row.get("updated_at")
+        )
+        self._entries[row["company_id"]] = (policy, time.monotonic())
+        return policy
+
+    def invalidate(self, company_id: Optional[str] = None) -> None:
+        if company_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(company_id, None)
+
+
+POLICY_CACHE = PolicyCache()
+
+
+def check_action(user: Dict[str, Any], action: str, store: StorageBackend) -> None:
+    """Raise HTTPException unless the caller's company policy allows `action`."""
+    company_id = user.get("company_id") or "default"
+    policy = POLICY_CACHE.get(company_id, store)
+    denied = policy.evaluate(user.get("role"), action, user.get("issued_at"), time.time())
+    if denied is not None:
+        raise HTTPException(status_code=denied[0], detail=denied[1])
+
+
+def require_action(action: str):
+    """
+    Route dependency: authenticates, then evaluates the caller's company
+    policy for `action`. Returns the user dict like require_token.
+    """
+
+    def _guard(
+        user: Dict[str, Any] = Depends(get_current_user),
+        store: StorageBackend = Depends(get_storage),
+    ) -> Dict[str, Any]:
+        check_action(user, action, store)
+        return user
+
+    return _guard
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Activity, TrendingUp, Battery, Wifi, MapPin } from 'lucide-react';
+import { API, getAuthHeader } from '../utils/auth';
 
 const LiveTelemetry = ({ droneId }) => {
   const [telemetry, setTelemetry] = useState({
@@ -14,7 +15,8 @@ const LiveTelemetry = ({ droneId }) => {
 
   const [isLive, setIsLive] = useState(true);
 
-  // Simulate live telemetry updates
+  // Newest sample from the backend's recent-sample ring; simulated drift
+  // until the drone has reported
   useEffect(() => {
     if (!droneId) {
       setIsLive(false);
@@ -22,7 +24,33 @@ const LiveTelemetry = ({ droneId }) => {
     }
 
     setIsLive(true);
-    const interval = setInterval(() => {
+    const latest = async () => {
+      try {
+        const res = await fetch(`${API}/telemetry/${encodeURIComponent(droneId)}/recent?n=1`, {
+          headers: { ...getAuthHeader() }
+        });
+        if (!res.ok) return null;
+        const json = await res.json();
+        return json.count > 0 ? json : null;
+      } catch (err) {
+        return null;
+      }
+    };
+
+    const interval = setInterval(async () => {
+      const live = await latest();
+      if (live) {
+        setTelemetry((prev) => ({
+          ...prev,
+          altitude: live.alt[0] ?? prev.altitude,
+          groundSpeed: live.speed[0] ?? prev.groundSpeed,
+          batteryLevel: live.battery[0] ?? prev.batteryLevel,
+          linkQuality: live.link_quality[0] ?? prev.linkQuality,
+          gpsLock: live.gps_health[0] == null ? prev.gpsLock : live.gps_health[0] >= 50,
+          timestamp: new Date(live.t[0] * 1000),
+        }));
+        return;
+      }
       setTelemetry((prev) => ({
         ...prev,
         altitude: Math.max(0, prev.altitude + (Math.random() - 0.5) * 2),
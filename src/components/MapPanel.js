@@ -1,5 +1,6 @@
-import React, { useState, useMemo } from 'react';
+import React, { useState, useMemo, useEffect } from 'react';
 import { Globe, Target } from 'lucide-react';
+import { API, getAuthHeader } from '../utils/auth';
 
 // ═══════════════════════════════════════════════════════════════════
 // UTILITY: Smart tooltip positioning to prevent off-screen rendering
@@ -28,7 +29,7 @@ const getTooltipPosition = (mouseX, mouseY, tooltipWidth = 280, tooltipHeight =
   return { x, y };
 };
 
-// Simulated fleet data
+// Simulated fleet data (shown until the backend reports positions)
 const FLEET_DATA = [
   {
     id: 'UA-101',
@@ -80,7 +81,34 @@ const FLEET_DATA = [
   }
 ];
 
+// Project lat/lon onto the canvas (percent), fitting the fleet's bounding box
+// with a margin so markers never sit on the edge.
+const toFleetData = (rows) => {
+  const lats = rows.map(r => r.lat);
+  const lons = rows.map(r => r.lon);
+  const minLat = Math.min(...lats), maxLat = Math.max(...lats);
+  const minLon = Math.min(...lons), maxLon = Math.max(...lons);
+  const spanLat = maxLat - minLat || 1;
+  const spanLon = maxLon - minLon || 1;
+  return rows.map(r => ({
+    id: r.drone_id,
+    name: r.drone_id,
+    position: {
+      x: 10 + ((r.lon - minLon) / spanLon) * 80,
+      y: 10 + ((maxLat - r.lat) / spanLat) * 80,
+    },
+    status: r.status === 'lost' ? 'offline' : 'online',
+    risk: r.status === 'lost' ? 'high' : r.status === 'warning' ? 'medium' : 'low',
+    altitude: r.alt ?? 0,
+    speed: r.speed ?? 0,
+    battery: '—',
+    mission: '—',
+    location: `${r.lat.toFixed(5)}, ${r.lon.toFixed(5)}`
+  }));
+};
+
 const MapPanel = ({ focusedDroneId, onDroneSelect, variant = 'strategic' }) => {
+  const [fleet, setFleet] = useState(FLEET_DATA);
   const [hoveredDrone, setHoveredDrone] = useState(null);
   const [filterMode, setFilterMode] = useState('all');
   const [mousePosition, setMousePosition] = useState({ x: 0, y: 0 });
@@ -104,16 +132,32 @@ const MapPanel = ({ focusedDroneId, onDroneSelect, variant = 'strategic' }) => {
     }
   };
 
+  useEffect(() => {
+    async function fetchPositions() {
+      try {
+        const res = await fetch(`${API}/api/geo/drones`, { headers: { ...getAuthHeader() } });
+        if (!res.ok) return;
+        const json = await res.json();
+        if (json.drones && json.drones.length > 0) setFleet(toFleetData(json.drones));
+      } catch (err) {
+        console.error("Fleet position error:", err);
+      }
+    }
+    fetchPositions();
+    const interval = setInterval(fetchPositions, 5000);
+    return () => clearInterval(interval);
+  }, []);
+
   const currentTheme = theme[variant] || theme.strategic;
   const ThemeIcon = currentTheme.icon;
 
   // Filter drones based on mode
   const filteredDrones = useMemo(() => {
-    if (filterMode === 'all') return FLEET_DATA;
-    if (filterMode === 'online') return FLEET_DATA.filter(d => d.status === 'online');
-    if (filterMode === 'alerts') return FLEET_DATA.filter(d => d.risk === 'medium' || d.risk === 'high');
-    return FLEET_DATA;
-  }, [filterMode]);
+    if (filterMode === 'all') return fleet;
+    if (filterMode === 'online') return fleet.filter(d => d.status === 'online');
+    if (filterMode === 'alerts') return fleet.filter(d => d.risk === 'medium' || d.risk === 'high');
+    return fleet;
+  }, [filterMode, fleet]);
 
   const getRiskColor = (risk) => {
     switch (risk) {
@@ -155,7 +199,7 @@ const MapPanel = ({ focusedDroneId, onDroneSelect, variant = 'strategic' }) => {
                     {currentTheme.badge}
                   </span>
                 </div>
-                <p className="text-xs text-slate-400 mt-0.5">{currentTheme.subtitle} · {filteredDrones.length} of {FLEET_DATA.length} visible</p>
+                <p className="text-xs text-slate-400 mt-0.5">{currentTheme.subtitle} · {filteredDrones.length} of {fleet.length} visible</p>
               </div>
             </div>
 
@@ -264,7 +308,7 @@ const MapPanel = ({ focusedDroneId, onDroneSelect, variant = 'strategic' }) => {
 
           {/* Hover Tooltip - ENTERPRISE: Clean styling */}
           {hoveredDrone && (() => {
-            const drone = FLEET_DATA.find(d => d.id === hoveredDrone);
+            const drone = fleet.find(d => d.id === hoveredDrone);
             if (!drone) return null;
 
             const riskColor = getRiskColor(drone.risk);
@@ -1,51 +1,22 @@
 import React, { useState } from 'react';
 import { FileText, Download, Calendar, BarChart3, Shield, AlertTriangle } from 'lucide-react';
 
-const ReportGenerator = ({ incidents = [], systemHealth, complianceData }) => {
-  const [isGenerating, setIsGenerating] = useState(false);
-  const [lastGenerated, setLastGenerated] = useState(null);
+const API_BASE = process.env.REACT_APP_API_BASE || "http://127.0.0.1:8010";
 
-  const generateIncidentCSV = () => {
-    const headers = ['Timestamp', 'Incident Type', 'Severity', 'Confidence', 'Pattern', 'Location', 'Status'];
-    const csvData = [
-      headers.join(','),
-      ...incidents.map(incident => [
-        incident.timestamp.toISOString(),
-        incident.name,
-        incident.severity,
-        (incident.confidence * 100).toFixed(1) + '%',
-        `"${incident.pattern}"`,
-        `"${incident.location?.lat.toFixed(4)}, ${incident.location?.lng.toFixed(4)}"`,
-        'Detected'
-      ].join(','))
-    ].join('\n');
+const getToken = () =>
+  localStorage.getItem("vigil_token") || localStorage.getItem("access_token") || "";
 
-    return csvData;
-  };
+const authHeaders = () => {
+  const t = getToken();
+  return t ? { Authorization: `Bearer ${t}` } : {};
+};
 
-  const generateComplianceSummary = () => {
-    const summary = {
-      generatedAt: new Date().toISOString(),
-      overallCompliance: '92%',
-      frameworks: complianceData || {
-        faa: { score: 94, status: 'compliant' },
-        easa: { score: 87, status: 'mostly_compliant' },
-        iso42001: { score: 91, status: 'compliant' },
-        iso27001: { score: 96, status: 'compliant' }
-      },
-      incidents: {
-        total: incidents.length,
-        bySeverity: {
-          critical: incidents.filter(i => i.severity === 'CRITICAL').length,
-          high: incidents.filter(i => i.severity === 'HIGH').length,
-          medium: incidents.filter(i => i.severity === 'MEDIUM').length
-        }
-      },
-      systemHealth: systemHealth || { uptime: 99.97, responseTime: 2.3 }
-    };
+// Compliance frameworks scored by the backend from reviewed evidence
+const REPORT_FRAMEWORKS = ['faa_107', 'faa_89', 'easa_2019_947', 'iso_27001'];
 
-    return summary;
-  };
+const ReportGenerator = ({ incidents = [], systemHealth }) => {
+  const [isGenerating, setIsGenerating] = useState(false);
+  const [lastGenerated, setLastGenerated] = useState(null);
 
   const downloadCSV = (data, filename) => {
     const blob = new Blob([data], { type: 'text/csv;charset=utf-8;' });
@@ -76,22 +47,28 @@ const ReportGenerator = ({ incidents = [], systemHealth, complianceData }) => {
     }
   };
 
+  // Reports are generated and streamed by the backend (/api/reports), so
+  // they cover the full history rather than what this page has loaded
+  const fetchReport = async (path) => {
+    const res = await fetch(`${API_BASE}/api/reports/${path}`, { headers: { ...authHeaders() } });
+    if (!res.ok) {
+      throw new Error(`Report request failed: ${res.status}`);
+    }
+    return res;
+  };
+
   const generateIncidentReport = async () => {
     setIsGenerating(true);
     
     try {
-      const csvData = generateIncidentCSV();
+      const res = await fetchReport('incidents?format=csv');
       const timestamp = new Date().toISOString().split('T')[0];
       const filename = `VigilAero-Incident-Report-${timestamp}.csv`;
       
-      await new Promise(resolve => setTimeout(resolve, 1500));
-      
-      downloadCSV(csvData, filename);
+      downloadCSV(await res.blob(), filename);
       
       setLastGenerated({ type: 'incident', timestamp: new Date(), filename });
       
-      console.log('Incident report generated:', { incidents: incidents.length, filename });
-      
     } catch (error) {
       console.error('Error generating incident report:', error);
     } finally {
@@ -103,18 +80,15 @@ const ReportGenerator = ({ incidents = [], systemHealth, complianceData }) => {
     setIsGenerating(true);
     
     try {
-      const summary = generateComplianceSummary();
+      const qs = REPORT_FRAMEWORKS.map(fw => `framework_id=${encodeURIComponent(fw)}`).join('&');
+      const summary = await (await fetchReport(`compliance?${qs}`)).json();
       const timestamp = new Date().toISOString().split('T')[0];
       const filename = `VigilAero-Compliance-Report-${timestamp}.json`;
       
-      await new Promise(resolve => setTimeout(resolve, 1500));
-      
       downloadJSON(summary, filename);
       
       setLastGenerated({ type: 'compliance', timestamp: new Date(), filename });
       
-      console.log('Compliance report generated:', summary);
-      
     } catch (error) {
       console.error('Error generating compliance report:', error);
     } finally {